@@ -0,0 +1,29 @@
+"""Add per-chat exclusions from the global forbidden words dictionary
+
+Revision ID: 004_add_excluded_words
+Revises: 003_add_admin_settings
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004_add_excluded_words'
+down_revision: Union[str, None] = '003_add_admin_settings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Добавить список исключений из общего словаря в конфигурацию чата"""
+    op.add_column(
+        'chat_configs',
+        sa.Column('excluded_words', sa.JSON, nullable=False, server_default='[]'),
+    )
+
+
+def downgrade() -> None:
+    """Удалить список исключений из общего словаря"""
+    op.drop_column('chat_configs', 'excluded_words')
@@ -0,0 +1,29 @@
+"""Add per-chat regex rules
+
+Revision ID: 005_add_regex_rules
+Revises: 004_add_excluded_words
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005_add_regex_rules'
+down_revision: Union[str, None] = '004_add_excluded_words'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Добавить правила-шаблоны в конфигурацию чата"""
+    op.add_column(
+        'chat_configs',
+        sa.Column('regex_rules', sa.JSON, nullable=False, server_default='[]'),
+    )
+
+
+def downgrade() -> None:
+    """Удалить правила-шаблоны чата"""
+    op.drop_column('chat_configs', 'regex_rules')
@@ -0,0 +1,43 @@
+"""Add rule hit counters and per-chat matching time
+
+Revision ID: 006_add_rule_stats
+Revises: 005_add_regex_rules
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006_add_rule_stats'
+down_revision: Union[str, None] = '005_add_regex_rules'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Создать таблицы счетчиков срабатываний правил и времени поиска по чатам"""
+    op.create_table(
+        'rule_stats',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('chat_id', sa.BigInteger, nullable=False),
+        sa.Column('rule', sa.String(200), nullable=False),
+        sa.Column('hit_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('last_hit_at', sa.DateTime, nullable=True),
+        sa.UniqueConstraint('chat_id', 'rule', name='uq_rule_stats_chat_rule'),
+    )
+
+    op.create_table(
+        'chat_match_stats',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('chat_id', sa.BigInteger, nullable=False, unique=True),
+        sa.Column('check_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('match_time', sa.Float, nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Удалить таблицы счетчиков"""
+    op.drop_table('chat_match_stats')
+    op.drop_table('rule_stats')
@@ -0,0 +1,29 @@
+"""Add per-chat link and mention rules
+
+Revision ID: 007_add_link_rules
+Revises: 006_add_rule_stats
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007_add_link_rules'
+down_revision: Union[str, None] = '006_add_rule_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Добавить правила для ссылок и упоминаний в конфигурацию чата"""
+    op.add_column(
+        'chat_configs',
+        sa.Column('link_rules', sa.JSON, nullable=False, server_default='[]'),
+    )
+
+
+def downgrade() -> None:
+    """Удалить правила для ссылок и упоминаний чата"""
+    op.drop_column('chat_configs', 'link_rules')
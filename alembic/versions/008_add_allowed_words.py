@@ -0,0 +1,29 @@
+"""Add per-chat allowed words
+
+Revision ID: 008_add_allowed_words
+Revises: 007_add_link_rules
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008_add_allowed_words'
+down_revision: Union[str, None] = '007_add_link_rules'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Добавить разрешенные фрагменты в конфигурацию чата"""
+    op.add_column(
+        'chat_configs',
+        sa.Column('allowed_words', sa.JSON, nullable=False, server_default='[]'),
+    )
+
+
+def downgrade() -> None:
+    """Удалить разрешенные фрагменты чата"""
+    op.drop_column('chat_configs', 'allowed_words')
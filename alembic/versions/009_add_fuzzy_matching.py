@@ -0,0 +1,29 @@
+"""Add per-chat fuzzy matching flag
+
+Revision ID: 009_add_fuzzy_matching
+Revises: 008_add_allowed_words
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009_add_fuzzy_matching'
+down_revision: Union[str, None] = '008_add_allowed_words'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Добавить флаг нечеткого поиска в конфигурацию чата"""
+    op.add_column(
+        'chat_configs',
+        sa.Column('fuzzy_matching', sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    """Удалить флаг нечеткого поиска чата"""
+    op.drop_column('chat_configs', 'fuzzy_matching')
@@ -0,0 +1,43 @@
+"""Move sampled clean messages to a separate training samples table
+
+Revision ID: 010_add_training_samples
+Revises: 009_add_fuzzy_matching
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '010_add_training_samples'
+down_revision: Union[str, None] = '009_add_fuzzy_matching'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = ('message_id', 'chat_id', 'user_id', 'text', 'timestamp')
+
+
+def upgrade() -> None:
+    """Создать таблицу выборки чистых сообщений и перенести в нее чистые сообщения из messages"""
+    op.create_table(
+        'training_samples',
+        sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('message_id', sa.BigInteger, nullable=False),
+        sa.Column('chat_id', sa.BigInteger, nullable=False),
+        sa.Column('user_id', sa.BigInteger, nullable=False),
+        sa.Column('text', sa.String, nullable=False),
+        sa.Column('timestamp', sa.DateTime, nullable=True),
+    )
+
+    # Чистые сообщения в messages сохранялись только как выборка для обучения
+    messages = sa.table('messages', *(sa.column(name) for name in _COLUMNS + ('contains_violations',)))
+    samples = sa.table('training_samples', *(sa.column(name) for name in _COLUMNS))
+    clean = messages.c.contains_violations == sa.false()
+    op.execute(samples.insert().from_select(_COLUMNS, sa.select(*(messages.c[name] for name in _COLUMNS)).where(clean)))
+    op.execute(messages.delete().where(clean))
+
+
+def downgrade() -> None:
+    """Удалить таблицу выборки чистых сообщений (выборка теряется)"""
+    op.drop_table('training_samples')
@@ -1,6 +1,10 @@
-import re
 from dataclasses import dataclass
-from typing import Dict, List, Set
+from typing import Dict, List, Optional
+
+from application.matching.base import Matcher
+from application.matching.selection import MatcherSelector, create_matcher
+
+_matcher_selector = MatcherSelector()
 
 
 @dataclass
@@ -8,7 +12,7 @@ class ModerationConfig:
     forbidden_words: List[str]
     warnings_limits: Dict[int, int]  # chat_id -> лимит предупреждений
     default_warnings_limit: int = 3
-    _compiled_patterns: Set[re.Pattern] = None  # Кэш скомпилированных регулярных выражений
+    _matcher: Optional[Matcher] = None  # Кэш скомпилированного бэкенда поиска
 
     @classmethod
     def create_default(cls) -> "ModerationConfig":
@@ -43,29 +47,17 @@ class ModerationConfig:
         if not text or not self.forbidden_words:
             return []
 
-        text_lower = text.lower()
-        found_words = []
-
-        # Используем кэшированные паттерны для лучшей производительности
-        patterns = self._get_compiled_patterns()
-
-        for word, pattern in zip(self.forbidden_words, patterns):
-            if pattern.search(text_lower):
-                found_words.append(word)
-
-        return found_words
+        # Используем кэшированный бэкенд поиска для лучшей производительности
+        return self._get_matcher().match(text.lower())
 
-    def _get_compiled_patterns(self) -> List[re.Pattern]:
-        """Получить скомпилированные регулярные выражения для запрещенных слов"""
-        if self._compiled_patterns is None:
-            self._compiled_patterns = []
-            for word in self.forbidden_words:
-                # Создаем паттерн для поиска слова как отдельного слова (не часть другого слова)
-                pattern = re.compile(r"\b" + re.escape(word) + r"\b", re.IGNORECASE)
-                self._compiled_patterns.append(pattern)
+    def _get_matcher(self) -> Matcher:
+        """Получить бэкенд поиска, выбранный по размеру словаря"""
+        if self._matcher is None:
+            backend = _matcher_selector.select_by_size(len(self.forbidden_words))
+            self._matcher = create_matcher(backend, self.forbidden_words)
 
-        return self._compiled_patterns
+        return self._matcher
 
     def _invalidate_pattern_cache(self) -> None:
-        """Сбросить кэш скомпилированных паттернов"""
-        self._compiled_patterns = None
+        """Сбросить кэш скомпилированного бэкенда поиска"""
+        self._matcher = None
@@ -1,15 +1,87 @@
+import itertools
+import json
 import logging
-import re
-from typing import List, Optional
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import partial
+from typing import AbstractSet, Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from infrastructure.database.models import ChatConfigModel
+from application.matching.aho_corasick import AhoCorasickMatcher
+from application.matching.base import Matcher
+from application.matching.cache import DEFAULT_CACHE_SIZE, MatcherCache
+from application.matching.fuzzy import FuzzyIndex
+from application.matching.hit_counters import RuleHitCounters
+from application.matching.links import LinkRuleSet, parse_link_rule
+from application.matching.morphology import InflectionIndex
+from application.matching.normalization import TextNormalizer
+from application.matching.offload import CheckOffload, DEFAULT_COST_THRESHOLD
+from application.matching.phrases import PhraseIndex
+from application.matching.prefilter import TokenPrefilter
+from application.matching.regex_rules import check_rule_pattern, DEFAULT_COMPILE_BUDGET, RegexRuleSet, UnsafeRegexError
+from application.matching.selection import AUTOMATON_BACKEND, create_matcher, MATCHER_BACKENDS, MatcherSelector
+from application.matching.snapshot import MatcherSnapshot
+from application.matching.tokens import collapse_whitespace, tokenize
+from infrastructure.database.models import BotSettingModel, ChatConfigModel, ChatMatchStatModel, RuleStatModel
 from infrastructure.database.session import get_session_manager
+from infrastructure.monitoring import metrics
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Общий словарь хранится в кэшах бэкендов поиска под этим идентификатором: у чатов Telegram он не встречается
+GLOBAL_DICTIONARY_ID = 0
+GLOBAL_WORDS_SETTING = "global_forbidden_words"
+# Общий словарь вместе с разрешенными фрагментами чата компилируется в отдельный автомат этого чата
+# и хранится в кэше бэкендов поиска под этим чатом с таким ключом вместо имени бэкенда
+ALLOWED_GLOBAL_KEY = f"{AUTOMATON_BACKEND}:global"
+# Остальные структуры чата хранятся в том же ограниченном кэше под такими ключами
+PREFILTER_KEY = "prefilter"
+INFLECTIONS_KEY = "inflections"
+PHRASES_KEY = "phrases"
+FUZZY_KEY = "fuzzy"
+ALLOWED_KEY = "allowed"
+REGEX_RULES_KEY = "regex_rules"
+LINK_RULES_KEY = "link_rules"
+
+
+@dataclass
+class _DictionaryLayer:
+    """Словарь (чата или общий) со структурами поиска, полученными из кэша один раз на проверку"""
+
+    layer_id: int
+    words: List[str]
+    prefilter: TokenPrefilter
+    indexes: List[Any]  # Индексы словоформ, фраз и нечеткого поиска
+    compile_matcher: Callable[[], Matcher]
+    matcher: Optional[Matcher] = None
+
+    def get_matcher(self) -> Matcher:
+        """Получить бэкенд поиска при первом тексте, прошедшем предварительный фильтр"""
+        if self.matcher is None:
+            self.matcher = self.compile_matcher()
+        return self.matcher
+
+
+@dataclass
+class _PrefilterResults:
+    """Результаты предварительного фильтра, накопленные за пачку текстов"""
+
+    checks: int = 0
+    skips: int = 0
+    false_positives: int = 0
+
+    def record(self, skipped: bool, matched: bool = False) -> None:
+        self.checks += 1
+        if skipped:
+            self.skips += 1
+        elif not matched:
+            self.false_positives += 1
+
 
 class EnhancedModerationConfig:
     """
@@ -17,9 +89,28 @@ class EnhancedModerationConfig:
     и кэшированием для лучшей производительности
     """
 
-    def __init__(self):
-        self._cached_configs = {}  # Кэш конфигураций чатов
-        self._compiled_patterns_cache = {}  # Кэш скомпилированных регулярных выражений
+    def __init__(
+        self,
+        patterns_cache_size: int = DEFAULT_CACHE_SIZE,
+        snapshot_path: Optional[str] = None,
+        offload_workers: int = 0,
+        offload_threshold: int = DEFAULT_COST_THRESHOLD,
+    ):
+        # Кэш конфигураций чатов; None - у чата нет записи в БД, чтобы не запрашивать ее на каждом сообщении
+        self._cached_configs: Dict[int, Optional[ChatConfigModel]] = {}
+        # LRU-кэш скомпилированных бэкендов поиска, фильтров и индексов чатов
+        self._compiled_patterns_cache = MatcherCache(patterns_cache_size)
+        # Снимок бэкендов с прошлого запуска: открывается сразу, записи восстанавливаются по требованию
+        self._snapshot = MatcherSnapshot(snapshot_path).open() if snapshot_path else None
+        self._matcher_selector = MatcherSelector()  # Выбор бэкенда поиска для каждого чата
+        self._normalizer = TextNormalizer()  # Нормализация текста перед поиском
+        self._hit_counters = RuleHitCounters()  # Срабатывания правил и время поиска, еще не записанные в БД
+        self._global_words: Optional[List[str]] = None  # Общий словарь владельца, загружается при первом обращении
+        # Пул процессов для дорогих проверок (0 процессов - все проверки в основном процессе)
+        self._offload = CheckOffload(offload_workers, offload_threshold, snapshot_path) if offload_workers > 0 else None
+        # Версии словарей для пула процессов: сбрасываются при любом изменении словаря или разрешенных фрагментов
+        self._dictionary_versions: Dict[int, int] = {}
+        self._version_counter = itertools.count(1)
         self.default_warnings_limit = 3
 
     async def get_warnings_limit(self, chat_id: int) -> int:
@@ -64,8 +155,8 @@ class EnhancedModerationConfig:
                     config.forbidden_words.append(word)
                     session.add(config)
 
-                    # Сбрасываем кэш паттернов для этого чата
-                    self._invalidate_patterns_cache(chat_id)
+                    # Обновляем скомпилированные структуры чата на месте, без полной перестройки
+                    self._add_to_compiled(chat_id, word)
                     self._cached_configs[chat_id] = config
 
                     logger.info(f"Добавлено запрещенное слово '{word}' для чата {chat_id}")
@@ -85,8 +176,8 @@ class EnhancedModerationConfig:
                     config.forbidden_words.remove(word)
                     session.add(config)
 
-                    # Сбрасываем кэш паттернов для этого чата
-                    self._invalidate_patterns_cache(chat_id)
+                    # Обновляем скомпилированные структуры чата на месте, без полной перестройки
+                    self._remove_from_compiled(chat_id, word)
                     self._cached_configs[chat_id] = config
 
                     logger.info(f"Удалено запрещенное слово '{word}' для чата {chat_id}")
@@ -105,21 +196,585 @@ class EnhancedModerationConfig:
             return []
 
         forbidden_words = await self.get_forbidden_words(chat_id)
-        if not forbidden_words:
+        global_words = await self.get_global_forbidden_words()
+        regex_rules = await self._get_enabled_regex_rules(chat_id)
+        if not forbidden_words and not global_words and not regex_rules:
             return []
 
-        text_lower = text.lower()
-        found_words = []
+        excluded_words = set(await self.get_excluded_words(chat_id)) if global_words else set()
+        allowed_words = await self.get_allowed_words(chat_id) if forbidden_words or global_words else []
+
+        # Время поиска учитывается без загрузки словарей: это стоимость самих правил чата
+        start_time = time.perf_counter()
+        found_words = (
+            await self._check_words(chat_id, forbidden_words, global_words, excluded_words, allowed_words, text)
+            if forbidden_words or global_words
+            else []
+        )
+        if regex_rules:
+            found_words += (await self._check_regex_rules(chat_id, regex_rules, [text]))[0]
+        self._hit_counters.record(chat_id, found_words, time.perf_counter() - start_time)
+        return found_words
+
+    async def _check_words(
+        self,
+        chat_id: int,
+        forbidden_words: List[str],
+        global_words: List[str],
+        excluded_words: AbstractSet[str],
+        allowed_words: List[str],
+        text: str,
+    ) -> List[str]:
+        """Проверить текст по словарю чата и общему словарю"""
+        fuzzy = await self.is_fuzzy_matching_enabled(chat_id)
+
+        # Дорогие проверки уходят в пул процессов, чтобы не блокировать цикл событий для остальных чатов
+        if self._offload is not None and self._offload.should_offload(
+            len(text), len(forbidden_words) + len(global_words), fuzzy
+        ):
+            try:
+                versions = (self._dictionary_version(chat_id), self._dictionary_version(GLOBAL_DICTIONARY_ID))
+                return await self._offload.check(
+                    chat_id, versions, forbidden_words, global_words, excluded_words, fuzzy, text, allowed_words
+                )
+            except BrokenProcessPool as e:
+                logger.error(f"Пул процессов проверки недоступен, проверки выполняются в основном процессе: {e}")
+                self._offload.shutdown()
+                self._offload = None
 
-        # Используем кэшированные паттерны для лучшей производительности
-        patterns = await self._get_compiled_patterns(chat_id, forbidden_words)
+        return self._scan_text(chat_id, forbidden_words, global_words, excluded_words, fuzzy, text, allowed_words)
 
-        for word, pattern in zip(forbidden_words, patterns):
-            if pattern.search(text_lower):
+    def _scan_text(
+        self,
+        chat_id: int,
+        forbidden_words: List[str],
+        global_words: List[str],
+        excluded_words: AbstractSet[str],
+        fuzzy: bool,
+        text: str,
+        allowed_words: Sequence[str] = (),
+    ) -> List[str]:
+        """Найти запрещенные слова чата и общего словаря в тексте"""
+        layers = self._get_layers(chat_id, forbidden_words, global_words, fuzzy, allowed_words)
+        found_words = self._match_layers(chat_id, layers, excluded_words, allowed_words, text, metrics.record_prefilter_result)
+        self._observe_layers(layers)
+        return found_words
+
+    async def check_texts(self, chat_id: int, texts: Sequence[str]) -> List[List[str]]:
+        """
+        Проверить пачку текстов одного чата и вернуть списки найденных слов в порядке текстов.
+        Словари, исключения и скомпилированные структуры чата получаются один раз на всю пачку
+        """
+        results: List[List[str]] = [[] for _ in texts]
+        if not any(texts):
+            return results
+
+        forbidden_words = await self.get_forbidden_words(chat_id)
+        global_words = await self.get_global_forbidden_words()
+        regex_rules = await self._get_enabled_regex_rules(chat_id)
+        if not forbidden_words and not global_words and not regex_rules:
+            return results
+        excluded_words = set(await self.get_excluded_words(chat_id)) if global_words else set()
+        allowed_words = await self.get_allowed_words(chat_id) if forbidden_words or global_words else []
+
+        fuzzy = await self.is_fuzzy_matching_enabled(chat_id)
+        layers = self._get_layers(chat_id, forbidden_words, global_words, fuzzy, allowed_words)
+        start_time = time.perf_counter()
+
+        # Результаты фильтра копятся за всю пачку и записываются в метрики одним вызовом
+        prefilter_results = _PrefilterResults()
+        for position, text in enumerate(texts):
+            if text and layers:
+                results[position] = self._match_layers(
+                    chat_id, layers, excluded_words, allowed_words, text, prefilter_results.record
+                )
+        self._observe_layers(layers)
+        if layers:
+            metrics.record_prefilter_results(
+                prefilter_results.checks, prefilter_results.skips, prefilter_results.false_positives
+            )
+
+        if regex_rules:
+            for found_words, matched_rules in zip(results, await self._check_regex_rules(chat_id, regex_rules, texts)):
+                found_words.extend(matched_rules)
+
+        self._hit_counters.record(
+            chat_id,
+            [word for found_words in results for word in found_words],
+            time.perf_counter() - start_time,
+            checks=sum(1 for text in texts if text),
+        )
+        return results
+
+    def _get_layers(
+        self,
+        chat_id: int,
+        forbidden_words: List[str],
+        global_words: List[str],
+        fuzzy: bool,
+        allowed_words: Sequence[str],
+    ) -> List["_DictionaryLayer"]:
+        """Получить из кэша структуры поиска словаря чата и общего словаря"""
+        layers = []
+        for layer_id, words in ((chat_id, forbidden_words), (GLOBAL_DICTIONARY_ID, global_words)):
+            if not words:
+                continue
+            indexes = [self._get_inflection_index(layer_id, words), self._get_phrase_index(layer_id, words)]
+            if fuzzy:
+                indexes.append(self._get_fuzzy_index(layer_id, words))
+            layers.append(
+                _DictionaryLayer(
+                    layer_id,
+                    words,
+                    self._get_prefilter(layer_id, words),
+                    indexes,
+                    partial(self._get_matcher, layer_id, words, allowed_words, chat_id),
+                )
+            )
+        return layers
+
+    def _match_layers(
+        self,
+        chat_id: int,
+        layers: List["_DictionaryLayer"],
+        excluded_words: AbstractSet[str],
+        allowed_words: Sequence[str],
+        text: str,
+        record_prefilter_result: Callable[..., None],
+    ) -> List[str]:
+        """Найти слова всех словарей в тексте: сначала слова чата, затем общего словаря без исключений чата"""
+        # Нормализуем текст один раз до любого бэкенда поиска
+        normalized = self._normalizer.normalize(text)
+        tokens = tokenize(normalized.text)
+        # Точный поиск отбрасывает перекрытые разрешенными фрагментами вхождения сам, в проходе автомата
+        # по тексту с теми же пробелами, что и у фрагментов, а для поиска по токенам фрагменты убираются из токенов
+        search_text = normalized.text
+        lookup_tokens = tokens
+        if allowed_words:
+            search_text = collapse_whitespace(search_text)
+            lookup_tokens = self._mask_allowed_tokens(chat_id, allowed_words, tokens)
+
+        found_words: List[str] = []
+        for layer in layers:
+            for word in self._match_layer(layer, search_text, tokens, lookup_tokens, record_prefilter_result):
+                # Общий словарь скомпилирован один раз для всех чатов, исключения чата применяются к результату
+                if layer.layer_id == GLOBAL_DICTIONARY_ID and (word in excluded_words or word in found_words):
+                    continue
                 found_words.append(word)
+        return found_words
+
+    @staticmethod
+    def _match_layer(
+        layer: "_DictionaryLayer",
+        text: str,
+        tokens: List[str],
+        lookup_tokens: List[str],
+        record_prefilter_result: Callable[..., None],
+    ) -> List[str]:
+        """
+        Найти слова одного словаря (чата или общего) в нормализованном тексте, в порядке словаря.
+        lookup_tokens - токены без разрешенных фрагментов чата для поиска словоформ, фраз и нечеткого поиска
+        """
+        # Точный поиск запускаем только для сообщений, прошедших предварительный фильтр
+        if layer.prefilter.may_match(tokens):
+            found_words = layer.get_matcher().match(text)
+            record_prefilter_result(skipped=False, matched=bool(found_words))
+        else:
+            found_words = []
+            record_prefilter_result(skipped=True)
+
+        # Словоформы, фразы и нечеткие совпадения ищем по тому же разбиению на токены
+        inflected_words = set().union(*(index.lookup(lookup_tokens) for index in layer.indexes))
+        if inflected_words:
+            found = inflected_words.union(found_words)
+            found_words = [word for word in layer.words if word in found]
 
         return found_words
 
+    def _observe_layers(self, layers: List["_DictionaryLayer"]) -> None:
+        """Учесть задержку бэкендов поиска, которые понадобились при проверке"""
+        for layer in layers:
+            if layer.matcher is not None:
+                self._matcher_selector.observe(layer.layer_id, layer.matcher)
+
+    async def get_global_forbidden_words(self) -> List[str]:
+        """Получить общий словарь запрещенных слов, действующий во всех чатах"""
+        if self._global_words is not None:
+            return self._global_words
+
+        try:
+            async with get_session_manager().session() as session:
+                setting = await self._get_setting_from_db(session, GLOBAL_WORDS_SETTING)
+                self._global_words = json.loads(setting.value) if setting and setting.value else []
+                return self._global_words
+        except Exception as e:
+            logger.error(f"Ошибка при получении общего словаря запрещенных слов: {e}")
+            return []
+
+    async def add_global_forbidden_word(self, word: str) -> None:
+        """Добавить слово в общий словарь запрещенных слов"""
+        word = word.lower().strip()
+        if not word:
+            return
+
+        words = await self.get_global_forbidden_words()
+        if word in words:
+            return
+
+        await self._save_global_words(words + [word])
+        self._add_to_compiled(GLOBAL_DICTIONARY_ID, word)
+        logger.info(f"Добавлено слово '{word}' в общий словарь запрещенных слов")
+
+    async def remove_global_forbidden_word(self, word: str) -> bool:
+        """Удалить слово из общего словаря. Возвращает True если слово было удалено"""
+        word = word.lower().strip()
+        words = await self.get_global_forbidden_words()
+        if word not in words:
+            return False
+
+        await self._save_global_words([existing for existing in words if existing != word])
+        self._remove_from_compiled(GLOBAL_DICTIONARY_ID, word)
+        logger.info(f"Удалено слово '{word}' из общего словаря запрещенных слов")
+        return True
+
+    async def clear_global_forbidden_words(self) -> None:
+        """Очистить общий словарь запрещенных слов"""
+        await self._save_global_words([])
+        self._reset_compiled(GLOBAL_DICTIONARY_ID)
+        logger.info("Очищен общий словарь запрещенных слов")
+
+    async def get_excluded_words(self, chat_id: int) -> List[str]:
+        """Получить слова общего словаря, отключенные в чате"""
+        config = await self._get_chat_config(chat_id)
+        return config.excluded_words if config and config.excluded_words else []
+
+    async def exclude_forbidden_word(self, chat_id: int, word: str) -> None:
+        """Отключить слово общего словаря в конкретном чате"""
+        word = word.lower().strip()
+        if not word:
+            return
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_or_create_chat_config(session, chat_id)
+                excluded_words: List[str] = config.excluded_words or []
+                if word not in excluded_words:
+                    # Присваиваем новый список, чтобы изменение JSON-колонки попало в сессию
+                    config.excluded_words = excluded_words + [word]
+                    session.add(config)
+                    self._cached_configs[chat_id] = config
+                    logger.info(f"Слово '{word}' общего словаря отключено для чата {chat_id}")
+        except Exception as e:
+            logger.error(f"Ошибка при отключении слова общего словаря для чата {chat_id}: {e}")
+            raise
+
+    async def include_forbidden_word(self, chat_id: int, word: str) -> bool:
+        """Снова включить слово общего словаря в чате. Возвращает True если слово было отключено"""
+        word = word.lower().strip()
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_chat_config_from_db(session, chat_id)
+                if not config or not config.excluded_words or word not in config.excluded_words:
+                    return False
+
+                config.excluded_words = [excluded for excluded in config.excluded_words if excluded != word]
+                session.add(config)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Слово '{word}' общего словаря снова включено для чата {chat_id}")
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при включении слова общего словаря для чата {chat_id}: {e}")
+            raise
+
+    async def get_allowed_words(self, chat_id: int) -> List[str]:
+        """Получить разрешенные фрагменты чата"""
+        config = await self._get_chat_config(chat_id)
+        return config.allowed_words if config and config.allowed_words else []
+
+    async def add_allowed_word(self, chat_id: int, word: str) -> None:
+        """
+        Добавить разрешенный фрагмент для чата: вхождения запрещенных слов чата и общего словаря,
+        перекрывающиеся с ним, не считаются нарушением
+        """
+        word = word.lower().strip()
+        if not word:
+            return
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_or_create_chat_config(session, chat_id)
+                allowed_words: List[str] = config.allowed_words or []
+                if word not in allowed_words:
+                    config.allowed_words = allowed_words + [word]
+                    session.add(config)
+                    self._reset_allowed(chat_id)
+                    self._cached_configs[chat_id] = config
+                    logger.info(f"Добавлен разрешенный фрагмент '{word}' для чата {chat_id}")
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении разрешенного фрагмента для чата {chat_id}: {e}")
+            raise
+
+    async def remove_allowed_word(self, chat_id: int, word: str) -> bool:
+        """Удалить разрешенный фрагмент чата. Возвращает True если фрагмент был удален"""
+        word = word.lower().strip()
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_chat_config_from_db(session, chat_id)
+                if not config or not config.allowed_words or word not in config.allowed_words:
+                    return False
+
+                config.allowed_words = [allowed for allowed in config.allowed_words if allowed != word]
+                session.add(config)
+                self._reset_allowed(chat_id)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Удален разрешенный фрагмент '{word}' для чата {chat_id}")
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при удалении разрешенного фрагмента для чата {chat_id}: {e}")
+            raise
+
+    async def get_regex_rules(self, chat_id: int) -> List[Dict[str, Any]]:
+        """Получить правила-шаблоны чата в виде {"pattern": шаблон, "enabled": включено ли правило}"""
+        config = await self._get_chat_config(chat_id)
+        return config.regex_rules if config and config.regex_rules else []
+
+    async def add_regex_rule(self, chat_id: int, pattern: str) -> None:
+        """Добавить правило-шаблон для чата. Небезопасные шаблоны и превышение бюджета чата отклоняются"""
+        pattern = pattern.strip()
+        cost = check_rule_pattern(pattern)
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_or_create_chat_config(session, chat_id)
+                rules = [rule for rule in config.regex_rules or [] if rule["pattern"] != pattern]
+                used = sum(check_rule_pattern(rule["pattern"]) for rule in rules if rule["enabled"])
+                if used + cost > DEFAULT_COMPILE_BUDGET:
+                    raise UnsafeRegexError(
+                        f"Превышен бюджет правил чата: {used + cost} из {DEFAULT_COMPILE_BUDGET}, удалите ненужные правила"
+                    )
+
+                # Повторное добавление включает правило, отключенное по лимиту времени
+                config.regex_rules = rules + [{"pattern": pattern, "enabled": True}]
+                session.add(config)
+                self._compiled_patterns_cache.discard(chat_id, REGEX_RULES_KEY)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Добавлено правило '{pattern}' для чата {chat_id}")
+        except UnsafeRegexError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении правила для чата {chat_id}: {e}")
+            raise
+
+    async def remove_regex_rule(self, chat_id: int, pattern: str) -> bool:
+        """Удалить правило-шаблон чата. Возвращает True если правило было удалено"""
+        pattern = pattern.strip()
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_chat_config_from_db(session, chat_id)
+                rules = config.regex_rules if config and config.regex_rules else []
+                if not any(rule["pattern"] == pattern for rule in rules):
+                    return False
+
+                config.regex_rules = [rule for rule in rules if rule["pattern"] != pattern]
+                session.add(config)
+                self._compiled_patterns_cache.discard(chat_id, REGEX_RULES_KEY)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Удалено правило '{pattern}' для чата {chat_id}")
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при удалении правила для чата {chat_id}: {e}")
+            raise
+
+    async def _get_enabled_regex_rules(self, chat_id: int) -> List[str]:
+        """Получить включенные правила-шаблоны чата"""
+        return [rule["pattern"] for rule in await self.get_regex_rules(chat_id) if rule["enabled"]]
+
+    async def _check_regex_rules(self, chat_id: int, patterns: List[str], texts: Sequence[str]) -> List[List[str]]:
+        """Проверить тексты правилами-шаблонами чата и отключить правила, превысившие лимит времени"""
+        rule_set = self._compiled_patterns_cache.get(chat_id, REGEX_RULES_KEY)
+        if rule_set is None or rule_set.source_patterns != patterns:
+            rule_set = RegexRuleSet(patterns)
+            self._compiled_patterns_cache.put(chat_id, REGEX_RULES_KEY, rule_set)
+
+        results = []
+        disabled_patterns: List[str] = []
+        for text in texts:
+            matched, disabled = rule_set.match(text) if text else ([], [])
+            results.append(matched)
+            disabled_patterns.extend(disabled)
+
+        if disabled_patterns:
+            await self._disable_regex_rules(chat_id, disabled_patterns)
+        return results
+
+    async def _disable_regex_rules(self, chat_id: int, patterns: List[str]) -> None:
+        """Отключить правила чата, превысившие лимит времени, и сохранить это в базе данных"""
+        for pattern in patterns:
+            metrics.increment_regex_rules_disabled(chat_id)
+            logger.warning(f"Правило '{pattern}' чата {chat_id} отключено: превышен лимит времени проверки")
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_chat_config_from_db(session, chat_id)
+                if config and config.regex_rules:
+                    config.regex_rules = [
+                        {"pattern": rule["pattern"], "enabled": rule["enabled"] and rule["pattern"] not in patterns}
+                        for rule in config.regex_rules
+                    ]
+                    session.add(config)
+                    self._cached_configs[chat_id] = config
+        except Exception as e:
+            # Правило уже исключено из скомпилированного набора, при ошибке оно отключится до перезапуска
+            logger.error(f"Ошибка при отключении правил для чата {chat_id}: {e}")
+
+    async def get_link_rules(self, chat_id: int) -> List[str]:
+        """Получить правила чата для ссылок и упоминаний"""
+        config = await self._get_chat_config(chat_id)
+        return config.link_rules if config and config.link_rules else []
+
+    async def add_link_rule(self, chat_id: int, rule: str) -> None:
+        """Добавить правило для ссылок или упоминаний. Некорректные правила вызывают InvalidLinkRuleError"""
+        rule = parse_link_rule(rule)
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_or_create_chat_config(session, chat_id)
+                rules: List[str] = config.link_rules or []
+                if rule not in rules:
+                    config.link_rules = rules + [rule]
+                    session.add(config)
+                    self._compiled_patterns_cache.discard(chat_id, LINK_RULES_KEY)
+                    self._cached_configs[chat_id] = config
+                    logger.info(f"Добавлено правило для ссылок '{rule}' для чата {chat_id}")
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении правила для ссылок для чата {chat_id}: {e}")
+            raise
+
+    async def remove_link_rule(self, chat_id: int, rule: str) -> bool:
+        """Удалить правило для ссылок или упоминаний. Возвращает True если правило было удалено"""
+        rule = rule.strip().lower()
+
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_chat_config_from_db(session, chat_id)
+                rules = config.link_rules if config and config.link_rules else []
+                if rule not in rules:
+                    return False
+
+                config.link_rules = [existing for existing in rules if existing != rule]
+                session.add(config)
+                self._compiled_patterns_cache.discard(chat_id, LINK_RULES_KEY)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Удалено правило для ссылок '{rule}' для чата {chat_id}")
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при удалении правила для ссылок для чата {chat_id}: {e}")
+            raise
+
+    async def check_links(self, chat_id: int, links: Sequence[str]) -> List[str]:
+        """
+        Проверить домены и упоминания сообщения (из разметки Telegram) правилами чата.
+        Возвращает сработавшие правила
+        """
+        if not links:
+            return []
+        rules = await self.get_link_rules(chat_id)
+        if not rules:
+            return []
+
+        start_time = time.perf_counter()
+        rule_set: Optional[LinkRuleSet] = self._compiled_patterns_cache.get(chat_id, LINK_RULES_KEY)
+        if rule_set is None or rule_set.source_rules != rules:
+            rule_set = LinkRuleSet(rules)
+            self._compiled_patterns_cache.put(chat_id, LINK_RULES_KEY, rule_set)
+
+        matched = rule_set.match(links)
+        # Сообщение уже учтено проверкой текста, здесь добавляются только срабатывания и время
+        self._hit_counters.record(chat_id, matched, time.perf_counter() - start_time, checks=0)
+        return matched
+
+    async def flush_rule_stats(self) -> int:
+        """Записать накопленные счетчики срабатываний правил и времени поиска в БД, вернуть число правил"""
+        delta = self._hit_counters.drain()
+        if not delta:
+            return 0
+
+        try:
+            async with get_session_manager().session() as session:
+                chat_ids = list(delta.checks)
+                result = await session.execute(
+                    select(RuleStatModel).where(
+                        RuleStatModel.chat_id.in_(chat_ids), RuleStatModel.rule.in_(list({rule for _, rule in delta.hits}))
+                    )
+                )
+                rule_stats = {(stat.chat_id, stat.rule): stat for stat in result.scalars()}
+                for (chat_id, rule), hits in delta.hits.items():
+                    stat = rule_stats.get((chat_id, rule))
+                    if stat is None:
+                        stat = RuleStatModel(chat_id=chat_id, rule=rule, hit_count=0)
+                    stat.hit_count += hits
+                    stat.last_hit_at = delta.last_hits[(chat_id, rule)]
+                    session.add(stat)
+
+                result = await session.execute(select(ChatMatchStatModel).where(ChatMatchStatModel.chat_id.in_(chat_ids)))
+                chat_stats = {stat.chat_id: stat for stat in result.scalars()}
+                for chat_id, checks in delta.checks.items():
+                    stat = chat_stats.get(chat_id)
+                    if stat is None:
+                        stat = ChatMatchStatModel(chat_id=chat_id, check_count=0, match_time=0.0)
+                    stat.check_count += checks
+                    stat.match_time += delta.match_times[chat_id]
+                    session.add(stat)
+
+            logger.debug(f"Записаны счетчики {len(delta.hits)} правил в {len(chat_ids)} чатах")
+            return len(delta.hits)
+        except Exception as e:
+            logger.error(f"Ошибка при записи счетчиков срабатываний правил: {e}")
+            self._hit_counters.restore(delta)
+            return 0
+
+    async def get_rule_stats(self, chat_id: int, limit: int = 5) -> Dict[str, Any]:
+        """
+        Получить статистику правил чата: самые частые срабатывания, правила без срабатываний
+        и среднее время поиска на сообщение. Учитываются и еще не записанные в БД счетчики
+        """
+        hits: Dict[str, int] = {}
+        check_count = 0
+        match_time = 0.0
+        try:
+            async with get_session_manager().session() as session:
+                result = await session.execute(select(RuleStatModel).where(RuleStatModel.chat_id == chat_id))
+                hits = {stat.rule: stat.hit_count for stat in result.scalars()}
+                result = await session.execute(select(ChatMatchStatModel).where(ChatMatchStatModel.chat_id == chat_id))
+                chat_stat = result.scalar_one_or_none()
+                if chat_stat is not None:
+                    check_count = chat_stat.check_count
+                    match_time = chat_stat.match_time
+        except Exception as e:
+            logger.error(f"Ошибка при получении статистики правил чата {chat_id}: {e}")
+
+        pending = self._hit_counters.pending
+        for (pending_chat_id, rule), count in pending.hits.items():
+            if pending_chat_id == chat_id:
+                hits[rule] = hits.get(rule, 0) + count
+        check_count += pending.checks.get(chat_id, 0)
+        match_time += pending.match_times.get(chat_id, 0.0)
+
+        rules = (
+            await self.get_forbidden_words(chat_id)
+            + [rule["pattern"] for rule in await self.get_regex_rules(chat_id)]
+            + await self.get_link_rules(chat_id)
+        )
+        return {
+            "top_rules": sorted(hits.items(), key=lambda item: (-item[1], item[0]))[:limit],
+            "dead_rules": [rule for rule in rules if not hits.get(rule)],
+            "check_count": check_count,
+            "average_match_time": match_time / check_count if check_count else 0.0,
+        }
+
     async def clear_forbidden_words(self, chat_id: int) -> None:
         """Очистить все запрещенные слова для чата"""
         try:
@@ -129,8 +784,8 @@ class EnhancedModerationConfig:
                 config.forbidden_words = []
                 session.add(config)
 
-                # Сбрасываем кэш паттернов для этого чата
-                self._invalidate_patterns_cache(chat_id)
+                # Сбрасываем кэш паттернов, словоформ и фраз для этого чата
+                self._reset_compiled(chat_id)
                 # Обновляем кэш конфигурации
                 self._cached_configs[chat_id] = config
                 logger.info(f"Очищены все запрещенные слова для чата {chat_id}")
@@ -146,8 +801,8 @@ class EnhancedModerationConfig:
         try:
             async with get_session_manager().session() as session:
                 config = await self._get_chat_config_from_db(session, chat_id)
-                if config:
-                    self._cached_configs[chat_id] = config
+                # Отсутствие записи тоже кэшируется: запись создается только через этот объект, и он обновит кэш
+                self._cached_configs[chat_id] = config
                 return config
         except Exception as e:
             logger.error(f"Ошибка при получении конфигурации чата {chat_id}: {e}")
@@ -167,32 +822,258 @@ class EnhancedModerationConfig:
 
         return config
 
-    async def _get_compiled_patterns(self, chat_id: int, words: List[str]) -> List[re.Pattern]:
-        """Получить скомпилированные регулярные выражения для запрещенных слов"""
-        cache_key = f"{chat_id}_{hash(tuple(words))}"
+    async def _get_setting_from_db(self, session: AsyncSession, key: str) -> Optional[BotSettingModel]:
+        """Получить глобальную настройку бота из базы данных"""
+        result = await session.execute(select(BotSettingModel).where(BotSettingModel.key == key))
+        return result.scalar_one_or_none()
+
+    async def _save_global_words(self, words: List[str]) -> None:
+        """Сохранить общий словарь в настройках бота"""
+        try:
+            async with get_session_manager().session() as session:
+                setting = await self._get_setting_from_db(session, GLOBAL_WORDS_SETTING)
+                if setting is None:
+                    setting = BotSettingModel(
+                        key=GLOBAL_WORDS_SETTING, value_type="json", description="Общий словарь запрещенных слов"
+                    )
+                setting.value = json.dumps(words, ensure_ascii=False)
+                session.add(setting)
+                self._global_words = words
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении общего словаря запрещенных слов: {e}")
+            raise
+
+    def get_matcher_backend(self, chat_id: int, words: List[str]) -> str:
+        """Определить бэкенд поиска для чата по размеру словаря и измеренной задержке"""
+        return self._matcher_selector.select(chat_id, len(words))
+
+    def set_matcher_backend(self, chat_id: int, backend: Optional[str]) -> None:
+        """Закрепить бэкенд поиска за чатом (None - выбирать автоматически)"""
+        self._matcher_selector.pin(chat_id, backend)
+
+    def _get_matcher(
+        self, chat_id: int, words: List[str], allowed_words: Sequence[str] = (), owner_id: Optional[int] = None
+    ) -> Matcher:
+        """
+        Получить скомпилированный бэкенд поиска запрещенных слов чата.
+        Для словаря с разрешенными фрагментами owner_id - чат, которому принадлежат фрагменты
+        (для словаря самого чата совпадает с chat_id)
+        """
+        if allowed_words:
+            return self._get_allowed_matcher(chat_id if owner_id is None else owner_id, chat_id, words, allowed_words)
+
+        backend = self.get_matcher_backend(chat_id, words)
+        matcher: Optional[Matcher] = self._compiled_patterns_cache.get(chat_id, backend)
+
+        if matcher is None and self._snapshot is not None:
+            matcher = self._snapshot.load(chat_id, backend, words)
+            if matcher is not None:
+                self._compiled_patterns_cache.put(chat_id, backend, matcher)
+
+        if matcher is None:
+            patterns = [self._normalizer.normalize_word(word) for word in words]
+            matcher = create_matcher(backend, words, patterns)
+            self._compiled_patterns_cache.put(chat_id, backend, matcher)
+
+        return matcher
+
+    def _get_allowed_matcher(self, chat_id: int, layer_id: int, words: List[str], allowed_words: Sequence[str]) -> Matcher:
+        """
+        Получить автомат словаря, в который вместе со словами скомпилированы разрешенные фрагменты чата.
+        Перекрытые фрагментами вхождения отбрасываются в том же проходе по тексту, поэтому при фрагментах
+        всегда используется автомат, а общий словарь для такого чата компилируется в собственный автомат чата
+        """
+        key = AUTOMATON_BACKEND if layer_id == chat_id else ALLOWED_GLOBAL_KEY
+        # Фрагменты, как и фразы словаря, не зависят от пробелов между словами: текст перед поиском приводится так же
+        allowed = [collapse_whitespace(self._normalizer.normalize_word(word)) for word in allowed_words]
+        matcher: Optional[Matcher] = self._compiled_patterns_cache.get(chat_id, key)
+
+        if matcher is None and self._snapshot is not None and key == AUTOMATON_BACKEND:
+            matcher = self._snapshot.load(chat_id, key, words, allowed)
+            if matcher is not None:
+                self._compiled_patterns_cache.put(chat_id, key, matcher)
+
+        if matcher is None:
+            patterns = [self._normalizer.normalize_word(word) for word in words]
+            matcher = AhoCorasickMatcher(allowed).build(words, patterns)
+            self._compiled_patterns_cache.put(chat_id, key, matcher)
+
+        return matcher
 
-        if cache_key not in self._compiled_patterns_cache:
-            patterns = []
-            for word in words:
-                # Создаем паттерн для поиска слова как отдельного слова (не часть другого слова)
-                pattern = re.compile(r"\b" + re.escape(word) + r"\b", re.IGNORECASE)
-                patterns.append(pattern)
+    def _allowed_global_matchers(self) -> Iterator[Matcher]:
+        """Автоматы общего словаря, построенные вместе с разрешенными фрагментами отдельных чатов"""
+        return (matcher for _, key, matcher in self._compiled_patterns_cache.items() if key == ALLOWED_GLOBAL_KEY)
 
-            self._compiled_patterns_cache[cache_key] = patterns
+    def _mask_allowed_tokens(self, chat_id: int, allowed_words: Sequence[str], tokens: List[str]) -> List[str]:
+        """
+        Убрать из токенов сообщения разрешенные фрагменты чата перед поиском словоформ, фраз и нечетким поиском.
+        Эти проверки работают по токенам, поэтому фрагменты сопоставляются с тем же разбиением на токены
+        """
+        index = self._get_compiled(
+            chat_id, ALLOWED_KEY, lambda: PhraseIndex(self._normalizer, min_tokens=1).build(allowed_words)
+        )
+        return index.mask(tokens)
 
-        return self._compiled_patterns_cache[cache_key]
+    def _dictionary_version(self, chat_id: int) -> int:
+        """Версия словаря чата для пула процессов: новая после каждого изменения словаря"""
+        version = self._dictionary_versions.get(chat_id)
+        if version is None:
+            version = self._dictionary_versions[chat_id] = next(self._version_counter)
+        return version
+
+    def _reset_allowed(self, chat_id: int) -> None:
+        """Сбросить структуры, в которые скомпилированы разрешенные фрагменты чата"""
+        self._dictionary_versions.pop(chat_id, None)
+        for key in (AUTOMATON_BACKEND, ALLOWED_GLOBAL_KEY, ALLOWED_KEY):
+            self._compiled_patterns_cache.discard(chat_id, key)
+
+    def _get_compiled(self, chat_id: int, key: str, build: Callable[[], T]) -> T:
+        """Получить структуру чата из кэша, построив ее при отсутствии"""
+        value: Optional[T] = self._compiled_patterns_cache.get(chat_id, key)
+        if value is None:
+            value = build()
+            self._compiled_patterns_cache.put(chat_id, key, value)
+        return value
+
+    def _get_prefilter(self, chat_id: int, words: List[str]) -> TokenPrefilter:
+        """Получить предварительный фильтр сообщений чата"""
+        return self._get_compiled(
+            chat_id, PREFILTER_KEY, lambda: TokenPrefilter([self._normalizer.normalize_word(word) for word in words])
+        )
+
+    def _get_inflection_index(self, chat_id: int, words: List[str]) -> InflectionIndex:
+        """Получить индекс словоформ запрещенных слов чата"""
+        return self._get_compiled(chat_id, INFLECTIONS_KEY, lambda: InflectionIndex(self._normalizer).build(words))
+
+    def _get_phrase_index(self, chat_id: int, words: List[str]) -> PhraseIndex:
+        """Получить индекс фраз запрещенных слов чата"""
+        return self._get_compiled(chat_id, PHRASES_KEY, lambda: PhraseIndex(self._normalizer).build(words))
+
+    async def is_fuzzy_matching_enabled(self, chat_id: int) -> bool:
+        """Проверить, включен ли нечеткий поиск для чата"""
+        config = await self._get_chat_config(chat_id)
+        return bool(config and config.fuzzy_matching)
+
+    async def set_fuzzy_matching(self, chat_id: int, enabled: bool) -> None:
+        """Включить или выключить нечеткий поиск запрещенных слов для чата"""
+        try:
+            async with get_session_manager().session() as session:
+                config = await self._get_or_create_chat_config(session, chat_id)
+                config.fuzzy_matching = enabled
+                session.add(config)
+                if not enabled:
+                    self._compiled_patterns_cache.discard(chat_id, FUZZY_KEY)
+                self._cached_configs[chat_id] = config
+                logger.info(f"Нечеткий поиск {'включен' if enabled else 'выключен'} для чата {chat_id}")
+        except Exception as e:
+            logger.error(f"Ошибка при изменении нечеткого поиска для чата {chat_id}: {e}")
+            raise
+
+    def _get_fuzzy_index(self, chat_id: int, words: List[str]) -> FuzzyIndex:
+        """Получить индекс нечеткого поиска запрещенных слов чата"""
+        return self._get_compiled(chat_id, FUZZY_KEY, lambda: FuzzyIndex(self._normalizer).build(words))
+
+    def compact_matchers(self) -> int:
+        """
+        Применить накопленные правки словарей сжатием бэкендов поиска, вернуть количество сжатых.
+        Вызывается периодически вне обработки сообщений, поэтому правка словаря не перестраивает бэкенд сразу
+        """
+        count = 0
+        for _, key, matcher in self._compiled_patterns_cache.items():
+            if (key in MATCHER_BACKENDS or key == ALLOWED_GLOBAL_KEY) and matcher.needs_compaction:
+                matcher.compact()
+                count += 1
+        return count
+
+    def save_snapshot(self) -> int:
+        """Записать скомпилированные бэкенды поиска в снимок на диске, вернуть количество записей"""
+        if self._snapshot is None:
+            return 0
+
+        try:
+            # Сохраняются только бэкенды поиска, и автоматы общего словаря отдельных чатов среди них не сохраняются:
+            # в снимке у чата одна запись на бэкенд
+            entries = [
+                (chat_id, matcher)
+                for chat_id, key, matcher in self._compiled_patterns_cache.items()
+                if key in MATCHER_BACKENDS
+            ]
+            count = MatcherSnapshot.write(self._snapshot.path, entries)
+            logger.info(f"Записан снимок бэкендов поиска {self._snapshot.path}: {count} записей")
+            return count
+        except Exception as e:
+            logger.error(f"Ошибка при записи снимка бэкендов поиска: {e}")
+            return 0
+
+    def close(self) -> None:
+        """Остановить пул процессов проверки"""
+        if self._offload is not None:
+            self._offload.shutdown()
+            self._offload = None
+
+    def _add_to_compiled(self, chat_id: int, word: str) -> None:
+        """Добавить слово во все построенные для чата бэкенды поиска и индексы"""
+        self._dictionary_versions.pop(chat_id, None)
+        pattern = self._normalizer.normalize_word(word)
+        for backend in MATCHER_BACKENDS:
+            matcher = self._compiled_patterns_cache.peek(chat_id, backend)
+            if matcher is not None:
+                matcher.add_word(word, pattern)
+        if chat_id == GLOBAL_DICTIONARY_ID:
+            for matcher in self._allowed_global_matchers():
+                matcher.add_word(word, pattern)
+
+        prefilter = self._compiled_patterns_cache.peek(chat_id, PREFILTER_KEY)
+        if prefilter is not None:
+            prefilter.add(pattern)
+        # Словоформы генерируются сразу, чтобы проверка сообщений не вызывала стеммер
+        for key in (INFLECTIONS_KEY, PHRASES_KEY, FUZZY_KEY):
+            index = self._compiled_patterns_cache.peek(chat_id, key)
+            if index is not None:
+                index.add(word)
+
+    def _remove_from_compiled(self, chat_id: int, word: str) -> None:
+        """Удалить слово из всех построенных для чата бэкендов поиска и индексов"""
+        self._dictionary_versions.pop(chat_id, None)
+        for backend in MATCHER_BACKENDS:
+            matcher = self._compiled_patterns_cache.peek(chat_id, backend)
+            if matcher is not None:
+                matcher.remove_word(word)
+        if chat_id == GLOBAL_DICTIONARY_ID:
+            for matcher in self._allowed_global_matchers():
+                matcher.remove_word(word)
+
+        prefilter = self._compiled_patterns_cache.peek(chat_id, PREFILTER_KEY)
+        if prefilter is not None:
+            prefilter.remove(self._normalizer.normalize_word(word))
+        for key in (INFLECTIONS_KEY, PHRASES_KEY, FUZZY_KEY):
+            index = self._compiled_patterns_cache.peek(chat_id, key)
+            if index is not None:
+                index.remove(word)
 
     def _invalidate_patterns_cache(self, chat_id: int) -> None:
-        """Сбросить кэш скомпилированных паттернов для чата"""
-        keys_to_remove = [key for key in self._compiled_patterns_cache.keys() if key.startswith(f"{chat_id}_")]
-        for key in keys_to_remove:
-            del self._compiled_patterns_cache[key]
+        """Сбросить кэш скомпилированных паттернов, фильтров и индексов чата"""
+        self._compiled_patterns_cache.invalidate(chat_id)
+
+    def _reset_compiled(self, chat_id: int) -> None:
+        """Сбросить все скомпилированные структуры словаря чата"""
+        if chat_id == GLOBAL_DICTIONARY_ID:
+            # Общий словарь скомпилирован и в автоматы чатов с разрешенными фрагментами
+            owners = {owner_id for owner_id, key, _ in self._compiled_patterns_cache.items() if key == ALLOWED_GLOBAL_KEY}
+            for owner_id in owners:
+                self._reset_allowed(owner_id)
+        self._invalidate_patterns_cache(chat_id)
+        self._dictionary_versions.pop(chat_id, None)
 
     def clear_cache(self, chat_id: Optional[int] = None) -> None:
         """Очистить кэш конфигураций"""
         if chat_id:
             self._cached_configs.pop(chat_id, None)
-            self._invalidate_patterns_cache(chat_id)
+            self._reset_compiled(chat_id)
+            self._matcher_selector.forget(chat_id)
         else:
             self._cached_configs.clear()
             self._compiled_patterns_cache.clear()
+            self._dictionary_versions.clear()
+            self._global_words = None
+            self._matcher_selector.forget()
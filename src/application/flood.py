@@ -0,0 +1,96 @@
+import time
+from array import array
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Tuple
+
+# Флуд - больше DEFAULT_FLOOD_LIMIT сообщений за DEFAULT_FLOOD_INTERVAL секунд
+DEFAULT_FLOOD_LIMIT = 5
+DEFAULT_FLOOD_INTERVAL = 3.0
+# Окна пользователей, не писавших столько секунд, удаляются вместе со счетчиком нарушений
+DEFAULT_IDLE_TTL = 600.0
+# Предел числа отслеживаемых пар (чат, пользователь): самые давно писавшие вытесняются
+DEFAULT_MAX_TRACKED = 1_000_000
+# Начиная с какого нарушения подряд пользователь заглушается, а не только предупреждается
+FLOOD_MUTE_AFTER = 2
+# Срок заглушения за флуд в Telegram: снимается автоматически
+FLOOD_MUTE_TIME = timedelta(hours=1)
+
+
+class FloodWindow:
+    """Кольцевой буфер времени последних сообщений пользователя в чате"""
+
+    __slots__ = ("times", "position", "count", "last_seen", "breaches")
+
+    def __init__(self, limit: int):
+        self.times = array("d", bytes(8 * limit))
+        self.position = 0  # Ячейка самого старого сообщения, в нее пишется следующее
+        self.count = 0  # Сколько ячеек заполнено
+        self.last_seen = 0.0
+        self.breaches = 0  # Нарушения с момента появления окна
+
+
+class FloodDetector:
+    """
+    Ограничение частоты сообщений по парам (чат, пользователь) без запросов к базе данных.
+    Для каждой пары хранится кольцевой буфер из limit отметок времени: сообщение - флуд, если самое старое
+    из последних limit сообщений было меньше interval секунд назад. Окна упорядочены по последнему
+    сообщению, поэтому неактивные пользователи вытесняются с начала очереди за O(1) на сообщение
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_FLOOD_LIMIT,
+        interval: float = DEFAULT_FLOOD_INTERVAL,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        max_tracked: int = DEFAULT_MAX_TRACKED,
+    ):
+        if limit < 1:
+            raise ValueError("Лимит сообщений должен быть положительным")
+        self.limit = limit
+        self.interval = interval
+        self.idle_ttl = max(idle_ttl, interval)
+        self.max_tracked = max_tracked
+        self._windows: "OrderedDict[Tuple[int, int], FloodWindow]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def record(self, chat_id: int, user_id: int, now: Optional[float] = None) -> int:
+        """
+        Учесть сообщение пользователя. Возвращает 0, если это не флуд, иначе номер нарушения
+        за время активности пользователя; после нарушения окно начинается заново
+        """
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+
+        key = (chat_id, user_id)
+        window = self._windows.get(key)
+        if window is None:
+            if len(self._windows) >= self.max_tracked:
+                self._windows.popitem(last=False)
+            window = self._windows[key] = FloodWindow(self.limit)
+        else:
+            self._windows.move_to_end(key)
+        window.last_seen = now
+
+        if window.count == self.limit and now - window.times[window.position] < self.interval:
+            window.count = 0
+            window.position = 0
+            window.breaches += 1
+            return window.breaches
+
+        window.times[window.position] = now
+        window.position = (window.position + 1) % self.limit
+        window.count = min(window.count + 1, self.limit)
+        return 0
+
+    def _evict(self, now: float) -> None:
+        """Удалить окна пользователей, которые давно не писали"""
+        windows = self._windows
+        deadline = now - self.idle_ttl
+        while windows:
+            key, window = next(iter(windows.items()))
+            if window.last_seen > deadline:
+                break
+            del windows[key]
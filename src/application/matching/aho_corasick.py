@@ -0,0 +1,290 @@
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .base import is_word_char, Matcher
+
+
+class AhoCorasickAutomaton:
+    """Автомат Ахо-Корасик для одновременного поиска множества подстрок за один проход"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        self._lengths: List[int] = [len(pattern) for pattern in patterns]
+        # Глубины состояний и обратные суффиксные ссылки нужны только для вставки, строятся при первой вставке
+        self._depth: Optional[List[int]] = None
+        self._fail_children: Optional[List[Set[int]]] = None
+
+        for index, pattern in enumerate(patterns):
+            if pattern:
+                self._insert(pattern, index)
+
+        self._build_failure_links()
+        # Символы, не встречающиеся ни в одном шаблоне, сразу возвращают автомат в корень
+        self._alphabet = frozenset(char for node in self._goto for char in node)
+
+    @property
+    def node_count(self) -> int:
+        """Количество состояний автомата"""
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Перебрать вхождения шаблонов как пары (индекс начала, индекс шаблона)"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        lengths = self._lengths
+        alphabet = self._alphabet
+        state = 0
+
+        for position, char in enumerate(text):
+            if char not in alphabet:
+                state = 0
+                continue
+
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for index in output[state]:
+                yield position + 1 - lengths[index], index
+
+    def add(self, pattern: str) -> int:
+        """
+        Добавить шаблон в построенный автомат без перестройки, вернуть его индекс.
+        Новым состояниям суффиксные ссылки строятся по порядку глубины, а существующие состояния,
+        для которых новое состояние стало самым длинным суффиксом, перевешиваются на него
+        """
+        index = len(self._lengths)
+        self._lengths.append(len(pattern))
+        if not pattern:
+            return index
+        if self._depth is None or self._fail_children is None:
+            self._index_failure_links()
+        goto, fail, depth, children = self._goto, self._fail, self._depth, self._fail_children
+        assert depth is not None and children is not None
+
+        created: List[Tuple[int, str, int]] = []  # (родитель, символ, новое состояние)
+        state = 0
+        for char in pattern:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                fail.append(0)
+                self._output.append(())
+                depth.append(depth[state] + 1)
+                children.append(set())
+                created.append((state, char, next_state))
+            state = next_state
+        self._output[state] = self._output[state] + (index,)
+        self._alphabet = self._alphabet | frozenset(pattern)
+
+        new_states = {new_state for _, _, new_state in created}
+        changed = [state] + [new_state for _, _, new_state in created]
+        for parent, char, new_state in created:
+            fallback = fail[parent]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            link = goto[fallback].get(char, 0) if parent else 0
+            fail[new_state] = link if link != new_state else 0
+            children[fail[new_state]].add(new_state)
+            changed.extend(self._relink(parent, char, new_state, new_states))
+
+        self._refresh_outputs(changed)
+        return index
+
+    def _relink(self, parent: int, char: str, new_state: int, new_states: Set[int]) -> List[int]:
+        """
+        Перевесить на новое состояние суффиксные ссылки существующих состояний: это переходы по char
+        из состояний, у которых строка родителя - суффикс. Вернуть перевешенные состояния
+        """
+        goto, fail, depth, children = self._goto, self._fail, self._depth, self._fail_children
+        assert depth is not None and children is not None
+        relinked = []
+        stack = list(children[parent])
+        while stack:
+            state = stack.pop()
+            target = goto[state].get(char)
+            if target is None:
+                stack.extend(children[state])
+                continue
+            # Глубже по дереву ссылок у переходов по char есть суффикс длиннее нового состояния
+            if target not in new_states and depth[fail[target]] < depth[new_state]:
+                children[fail[target]].discard(target)
+                fail[target] = new_state
+                children[new_state].add(target)
+                relinked.append(target)
+        return relinked
+
+    def _refresh_outputs(self, states: List[int]) -> None:
+        """Пересчитать унаследованные выходы состояний и их поддеревьев по суффиксным ссылкам"""
+        depth, children, lengths = self._depth, self._fail_children, self._lengths
+        assert depth is not None and children is not None
+        affected: Set[int] = set()
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            if state not in affected:
+                affected.add(state)
+                stack.extend(children[state])
+
+        # Ссылки ведут в менее глубокие состояния, поэтому их выходы к этому моменту уже пересчитаны
+        for state in sorted(affected, key=depth.__getitem__):
+            own = tuple(index for index in self._output[state] if lengths[index] == depth[state])
+            self._output[state] = own + self._output[self._fail[state]] if state else own
+
+    def _index_failure_links(self) -> None:
+        """Построить глубины состояний и обратные суффиксные ссылки"""
+        depth = [0] * len(self._goto)
+        children: List[Set[int]] = [set() for _ in self._goto]
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            for next_state in self._goto[state].values():
+                depth[next_state] = depth[state] + 1
+                children[self._fail[next_state]].add(next_state)
+                queue.append(next_state)
+        self._depth = depth
+        self._fail_children = children
+
+    def _insert(self, pattern: str, index: int) -> None:
+        """Добавить шаблон в бор"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (index,)
+
+    def _build_failure_links(self) -> None:
+        """Построить суффиксные ссылки обходом бора в ширину"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+
+                # Наследуем выходы по суффиксной ссылке, чтобы не ходить по цепочке при поиске
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+
+class AhoCorasickMatcher(Matcher):
+    """
+    Поиск запрещенных слов автоматом Ахо-Корасик с проверкой границ слова.
+    Возвращает тот же результат, что и цикл по паттернам \\bслово\\b, но за один проход по тексту.
+    Разрешенные фрагменты (исключения чата) компилируются в тот же автомат: вхождение запрещенного слова,
+    перекрывающееся с разрешенным фрагментом, отбрасывается в том же проходе
+    """
+
+    backend = "automaton"
+
+    def __init__(self, allowed: Optional[Sequence[str]] = None):
+        super().__init__()
+        self._allowed: List[str] = [pattern.lower() for pattern in allowed or () if pattern]
+        self._automaton = AhoCorasickAutomaton([])
+        self._positions: List[List[int]] = []
+        self._lengths: List[int] = []
+        self._starts_with_word: List[bool] = []
+        self._ends_with_word: List[bool] = []
+        self._is_allowed: List[bool] = []  # Шаблон автомата - разрешенный фрагмент, а не слово словаря
+        self._pattern_indexes: Dict[str, int] = {}  # Шаблон слова словаря -> индекс в автомате
+
+    @property
+    def allowed(self) -> List[str]:
+        return self._allowed
+
+    def _compile(self, patterns: List[str]) -> None:
+        # Одинаковые слова в словаре сводим к одному шаблону, сохраняя все позиции
+        unique_patterns: List[str] = []
+        pattern_positions: Dict[str, List[int]] = {}
+        for position, pattern in enumerate(patterns):
+            pattern = pattern.lower()
+            if pattern not in pattern_positions:
+                pattern_positions[pattern] = []
+                unique_patterns.append(pattern)
+            pattern_positions[pattern].append(position)
+
+        self._positions = [pattern_positions[pattern] for pattern in unique_patterns]
+        self._pattern_indexes = {pattern: index for index, pattern in enumerate(unique_patterns)}
+        # Разрешенные фрагменты идут после слов словаря и позиций в словаре не имеют
+        allowed = list(dict.fromkeys(self._allowed))
+        self._is_allowed = [False] * len(unique_patterns) + [True] * len(allowed)
+        self._positions.extend([] for _ in allowed)
+        unique_patterns.extend(allowed)
+        self._lengths = [len(pattern) for pattern in unique_patterns]
+        self._starts_with_word = [bool(pattern) and is_word_char(pattern[0]) for pattern in unique_patterns]
+        self._ends_with_word = [bool(pattern) and is_word_char(pattern[-1]) for pattern in unique_patterns]
+        self._automaton = AhoCorasickAutomaton(unique_patterns)
+
+    def _insert(self, position: int, pattern: str) -> bool:
+        pattern = pattern.lower()
+        index = self._pattern_indexes.get(pattern)
+        if index is None:
+            index = self._pattern_indexes[pattern] = self._automaton.add(pattern)
+            self._positions.append([])
+            self._is_allowed.append(False)
+            self._lengths.append(len(pattern))
+            self._starts_with_word.append(bool(pattern) and is_word_char(pattern[0]))
+            self._ends_with_word.append(bool(pattern) and is_word_char(pattern[-1]))
+        self._positions[index].append(position)
+        return True
+
+    def match_positions(self, text_lower: str) -> Set[int]:
+        if self._allowed:
+            return self._match_with_allowed(text_lower)
+
+        found: Set[int] = set()
+        for start, index in self._automaton.iter_matches(text_lower):
+            if index not in found and self._at_word_boundaries(text_lower, start, index):
+                found.add(index)
+
+        return {position for index in found for position in self._positions[index]}
+
+    def _match_with_allowed(self, text_lower: str) -> Set[int]:
+        """Найти слова словаря, не перекрытые разрешенными фрагментами, за один проход автомата"""
+        is_allowed = self._is_allowed
+        lengths = self._lengths
+        # Автомат выдает вхождения по возрастанию конца, поэтому найденные вхождения упорядочены по концу:
+        # разрешенный фрагмент снимает их с хвоста, а более поздние сверяются с самым дальним концом фрагментов
+        hits: List[Tuple[int, int]] = []  # (конец, индекс шаблона)
+        allowed_end = 0
+
+        for start, index in self._automaton.iter_matches(text_lower):
+            if not self._at_word_boundaries(text_lower, start, index):
+                continue
+
+            end = start + lengths[index]
+            if is_allowed[index]:
+                while hits and hits[-1][0] > start:
+                    hits.pop()
+                allowed_end = max(allowed_end, end)
+            elif start >= allowed_end:
+                hits.append((end, index))
+
+        return {position for _, index in hits for position in self._positions[index]}
+
+    def _at_word_boundaries(self, text_lower: str, start: int, index: int) -> bool:
+        """Проверить границы \\b вокруг вхождения шаблона"""
+        # \b слева: словесность предыдущего символа должна отличаться от первого символа шаблона
+        before = start > 0 and is_word_char(text_lower[start - 1])
+        if before == self._starts_with_word[index]:
+            return False
+
+        end = start + self._lengths[index]
+        after = end < len(text_lower) and is_word_char(text_lower[end])
+        return after != self._ends_with_word[index]
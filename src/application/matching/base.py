@@ -0,0 +1,181 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Сжатие нужно, когда удаленных слов больше этой доли словаря (но не меньше минимума)
+COMPACTION_RATIO = 0.1
+COMPACTION_MIN_CHANGES = 8
+# Больше стольких отдельно проверяемых добавленных слов бэкенд сжимается сразу: каждое проверяется на каждом сообщении
+MAX_PENDING_WORDS = 4
+
+
+def is_word_char(char: str) -> bool:
+    """Проверить, является ли символ словесным (совпадает с \\w модуля re для строк)"""
+    return char.isalnum() or char == "_"
+
+
+def compile_word_pattern(pattern: str) -> re.Pattern:
+    """Скомпилировать паттерн поиска слова как отдельного слова (не части другого слова)"""
+    return re.compile(r"\b" + re.escape(pattern) + r"\b", re.IGNORECASE)
+
+
+@dataclass
+class MatcherStats:
+    """Статистика работы бэкенда поиска"""
+
+    backend: str
+    word_count: int
+    build_time: float
+    match_count: int
+    average_match_time: float
+
+
+class Matcher(ABC):
+    """
+    Базовый класс бэкенда поиска запрещенных слов.
+    Слово считается найденным, если в тексте есть вхождение, удовлетворяющее паттерну \\bслово\\b.
+    Добавленные слова вставляются в построенные структуры, а если бэкенд этого не умеет, до сжатия ищутся
+    отдельными регулярными выражениями; удаленные помечаются и отбрасываются из результата.
+    Правка словаря не перестраивает бэкенд: сжатие выполняется позже, вне обработки сообщений
+    """
+
+    backend: str = ""
+
+    def __init__(self):
+        self._words: List[str] = []
+        self._patterns: List[str] = []
+        self._word_positions: Dict[str, List[int]] = {}
+        self._pending: List[Tuple[int, re.Pattern]] = []  # Добавленные после построения слова
+        self._removed: Set[int] = set()  # Позиции удаленных слов
+        self._build_time = 0.0
+        self._match_count = 0
+        self._match_time = 0.0
+        self._compaction_count = 0
+
+    @property
+    def words(self) -> List[str]:
+        """Слова, по которым построен бэкенд"""
+        if not self._removed:
+            return self._words
+        return [word for position, word in enumerate(self._words) if position not in self._removed]
+
+    @property
+    def allowed(self) -> List[str]:
+        """Разрешенные фрагменты, снимающие перекрывающиеся с ними вхождения (поддерживает только автомат)"""
+        return []
+
+    @property
+    def compaction_count(self) -> int:
+        """Количество выполненных сжатий"""
+        return self._compaction_count
+
+    @property
+    def pending_changes(self) -> int:
+        """Количество изменений словаря, ожидающих сжатия"""
+        return len(self._pending) + len(self._removed)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Есть ли отложенные изменения, которые стоит применить сжатием"""
+        live_count = len(self._words) - len(self._removed)
+        return bool(self._pending) or len(self._removed) > max(COMPACTION_MIN_CHANGES, int(live_count * COMPACTION_RATIO))
+
+    @property
+    def match_count(self) -> int:
+        """Количество выполненных проверок"""
+        return self._match_count
+
+    @property
+    def average_match_time(self) -> float:
+        """Среднее время одной проверки в секундах"""
+        if not self._match_count:
+            return 0.0
+        return self._match_time / self._match_count
+
+    def build(self, words: Sequence[str], patterns: Optional[Sequence[str]] = None) -> "Matcher":
+        """
+        Скомпилировать бэкенд для списка слов.
+        patterns - формы слов для поиска (например, нормализованные); по умолчанию ищутся сами слова
+        """
+        start_time = time.perf_counter()
+        self._words = list(words)
+        self._patterns = list(patterns) if patterns is not None else list(self._words)
+        self._word_positions = {}
+        for position, word in enumerate(self._words):
+            self._word_positions.setdefault(word, []).append(position)
+        self._pending = []
+        self._removed = set()
+        self._compile(self._patterns)
+        self._build_time = time.perf_counter() - start_time
+        return self
+
+    def add_word(self, word: str, pattern: Optional[str] = None) -> None:
+        """Добавить слово в конец словаря без перестройки бэкенда"""
+        position = len(self._words)
+        pattern = pattern if pattern is not None else word
+        self._words.append(word)
+        self._patterns.append(pattern)
+        self._word_positions.setdefault(word, []).append(position)
+        if not self._insert(position, pattern):
+            self._pending.append((position, compile_word_pattern(pattern)))
+            if len(self._pending) > MAX_PENDING_WORDS:
+                self.compact()
+
+    def remove_word(self, word: str) -> None:
+        """Удалить первое вхождение слова из словаря без перестройки бэкенда"""
+        positions = self._word_positions.get(word)
+        if not positions:
+            return
+
+        position = positions.pop(0)
+        if not positions:
+            del self._word_positions[word]
+        self._removed.add(position)
+
+    def compact(self) -> None:
+        """Перестроить бэкенд по актуальному словарю, применив отложенные изменения"""
+        live = [position for position in range(len(self._words)) if position not in self._removed]
+        self.build([self._words[position] for position in live], [self._patterns[position] for position in live])
+        self._compaction_count += 1
+
+    def match(self, text_lower: str) -> List[str]:
+        """Найти запрещенные слова в тексте, приведенном к нижнему регистру, в порядке словаря"""
+        start_time = time.perf_counter()
+        positions = self.match_positions(text_lower)
+        for position, pattern in self._pending:
+            if pattern.search(text_lower):
+                positions.add(position)
+        if self._removed:
+            positions -= self._removed
+        self._match_time += time.perf_counter() - start_time
+        self._match_count += 1
+        return [self._words[position] for position in sorted(positions)]
+
+    def stats(self) -> MatcherStats:
+        """Получить статистику бэкенда"""
+        return MatcherStats(
+            backend=self.backend,
+            word_count=len(self._words) - len(self._removed),
+            build_time=self._build_time,
+            match_count=self._match_count,
+            average_match_time=self.average_match_time,
+        )
+
+    def _insert(self, position: int, pattern: str) -> bool:
+        """
+        Вставить шаблон в построенные структуры.
+        Возвращает False, если бэкенд не умеет дешевую вставку и слово нужно искать отдельно до сжатия
+        """
+        return False
+
+    @abstractmethod
+    def _compile(self, patterns: List[str]) -> None:
+        """Построить внутренние структуры для списка шаблонов (по одному на слово)"""
+        pass
+
+    @abstractmethod
+    def match_positions(self, text_lower: str) -> Set[int]:
+        """Найти позиции (индексы в словаре) запрещенных слов в тексте"""
+        pass
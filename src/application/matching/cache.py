@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from infrastructure.monitoring import metrics
+
+# Размер кэша по умолчанию, совпадает с PATTERNS_CACHE_SIZE по умолчанию
+DEFAULT_CACHE_SIZE = 1000
+
+
+class MatcherCache:
+    """
+    Ограниченный LRU-кэш скомпилированных структур поиска чатов: бэкендов поиска, предварительных фильтров
+    и индексов словоформ, фраз, нечеткого поиска и правил. Ключ - чат и вид структуры (имя бэкенда или индекса),
+    поэтому память ограничена общим числом записей, сколько бы чатов ни встретил бот.
+    Сброс чата сразу удаляет все его записи, и устаревшие структуры не занимают места в кэше
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, str], Any]" = OrderedDict()
+        self._chat_kinds: Dict[int, Set[str]] = {}  # Виды структур, сохраненные для каждого чата
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, chat_id: int, kind: str) -> Optional[Any]:
+        """Получить структуру чата, отметив ее как недавно использованную"""
+        key = (chat_id, kind)
+        value = self._entries.get(key)
+        if value is None:
+            metrics.increment_pattern_cache_misses()
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.increment_pattern_cache_hits()
+        return value
+
+    def peek(self, chat_id: int, kind: str) -> Optional[Any]:
+        """Получить структуру без учета в счетчиках и порядке вытеснения"""
+        return self._entries.get((chat_id, kind))
+
+    def put(self, chat_id: int, kind: str, value: Any) -> None:
+        """Сохранить структуру, вытеснив давно не использованные записи"""
+        self._entries[(chat_id, kind)] = value
+        self._entries.move_to_end((chat_id, kind))
+        self._chat_kinds.setdefault(chat_id, set()).add(kind)
+        while len(self._entries) > self.max_size:
+            (evicted_chat_id, evicted_kind), _ = self._entries.popitem(last=False)
+            self._forget_kind(evicted_chat_id, evicted_kind)
+            metrics.increment_pattern_cache_evictions()
+
+    def items(self) -> Iterator[Tuple[int, str, Any]]:
+        """Перебрать записи как (чат, вид структуры, структура)"""
+        for (chat_id, kind), value in list(self._entries.items()):
+            yield chat_id, kind, value
+
+    def discard(self, chat_id: int, kind: str) -> None:
+        """Удалить одну структуру чата"""
+        if self._entries.pop((chat_id, kind), None) is not None:
+            self._forget_kind(chat_id, kind)
+
+    def invalidate(self, chat_id: int) -> None:
+        """Удалить все структуры чата"""
+        for kind in self._chat_kinds.pop(chat_id, ()):
+            del self._entries[(chat_id, kind)]
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._entries.clear()
+        self._chat_kinds.clear()
+
+    def _forget_kind(self, chat_id: int, kind: str) -> None:
+        kinds = self._chat_kinds[chat_id]
+        kinds.discard(kind)
+        if not kinds:
+            del self._chat_kinds[chat_id]
@@ -0,0 +1,148 @@
+import mmap
+import os
+import struct
+import tempfile
+from typing import List, Optional, Sequence, Tuple
+
+from .normalization import TextNormalizer
+from .tokens import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # Классификатор необязателен: без numpy бот работает только со словарями
+    np = None
+
+# Версия формата файла модели: файлы других версий не загружаются
+MODEL_FORMAT_VERSION = 1
+_MAGIC = b"TABMODL"
+_HEADER = struct.Struct("<7sHIdd")  # сигнатура, версия формата, число корзин, смещение, порог
+# Веса начинаются с выровненного смещения, чтобы читать их из отображенного в память файла без копирования
+_WEIGHTS_OFFSET = 64
+
+# Число корзин хэширования признаков по умолчанию (степень двойки)
+DEFAULT_NUM_FEATURES = 1 << 18
+# Порог вероятности спама по умолчанию
+DEFAULT_THRESHOLD = 0.9
+# Признаки длиннее стольких байт хэшируются по началу
+MAX_FEATURE_BYTES = 32
+CHAR_NGRAM = 3
+
+# 32-битный FNV-1a: считается по столбцам матрицы байтов сразу для всех признаков
+_FNV_OFFSET = 2166136261
+_FNV_PRIME = 16777619
+
+
+def text_features(normalized: str) -> List[str]:
+    """Признаки нормализованного текста: слова, пары соседних слов и буквенные триграммы слов"""
+    tokens = tokenize(normalized)
+    features = list(tokens)
+    features.extend(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    for token in tokens:
+        # Триграммы устойчивы к падежным окончаниям и новым формам слов
+        padded = f"<{token}>"
+        features.extend(padded[start : start + CHAR_NGRAM] for start in range(len(padded) - CHAR_NGRAM + 1))
+    return features
+
+
+def hash_features(features: Sequence[str], num_features: int) -> "np.ndarray":
+    """Номера корзин признаков: FNV-1a, вычисленный векторно по матрице байтов всех признаков"""
+    if not features:
+        return np.zeros(0, dtype=np.int64)
+    encoded = np.array([feature.encode("utf-8")[:MAX_FEATURE_BYTES] for feature in features], dtype=f"S{MAX_FEATURE_BYTES}")
+    matrix = encoded.view(np.uint8).reshape(len(features), MAX_FEATURE_BYTES)
+    lengths = np.char.str_len(encoded)
+
+    hashes = np.full(len(features), _FNV_OFFSET, dtype=np.uint32)
+    for column in range(int(lengths.max())):
+        updated = (hashes ^ matrix[:, column]) * np.uint32(_FNV_PRIME)
+        hashes = np.where(lengths > column, updated, hashes)
+    return (hashes & np.uint32(num_features - 1)).astype(np.int64)
+
+
+def vectorize(
+    texts: Sequence[str], num_features: int, normalizer: TextNormalizer
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Разреженное представление пачки текстов: номер текста и корзина каждого признака,
+    а также множитель нормировки каждого текста
+    """
+    features_by_text = [text_features(normalizer.normalize(text).text) for text in texts]
+    counts = np.array([len(features) for features in features_by_text], dtype=np.int64)
+    rows = np.repeat(np.arange(len(texts)), counts)
+    columns = hash_features([feature for features in features_by_text for feature in features], num_features)
+    scale = 1 / np.sqrt(np.maximum(counts, 1))
+    return rows, columns, scale
+
+
+class SpamClassifier:
+    """
+    Линейный классификатор спама по хэшированным n-граммам текста.
+    Признаки текста хэшируются в num_features корзин, значение каждой корзины - число признаков,
+    деленное на корень из числа признаков текста; вероятность спама - сигмоида скалярного произведения
+    с весами. Пачка текстов оценивается одним векторным вычислением
+    """
+
+    def __init__(
+        self,
+        weights: "np.ndarray",
+        bias: float,
+        threshold: float = DEFAULT_THRESHOLD,
+        normalizer: Optional[TextNormalizer] = None,
+    ):
+        if np is None:
+            raise RuntimeError("Для классификатора спама нужен пакет numpy")
+        num_features = len(weights)
+        if num_features < 2 or num_features & (num_features - 1):
+            raise ValueError("Число корзин признаков должно быть степенью двойки")
+        self.weights = weights
+        self.bias = bias
+        self.threshold = threshold
+        self.num_features = num_features
+        self._normalizer = normalizer or TextNormalizer()
+
+    def scores(self, texts: Sequence[str]) -> "np.ndarray":
+        """Вероятности спама для пачки текстов"""
+        if not texts:
+            return np.zeros(0)
+        rows, columns, scale = vectorize(texts, self.num_features, self._normalizer)
+        logits = np.bincount(rows, weights=self.weights[columns], minlength=len(texts)) * scale + self.bias
+        probabilities: "np.ndarray" = 1 / (1 + np.exp(-logits))
+        return probabilities
+
+    def predict(self, texts: Sequence[str]) -> List[bool]:
+        """Признать тексты пачки спамом, если вероятность не ниже порога"""
+        return [bool(score >= self.threshold) for score in self.scores(texts)]
+
+    @classmethod
+    def load(cls, path: str) -> "SpamClassifier":
+        """Загрузить модель из файла; веса не копируются, а читаются из отображенного в память файла"""
+        if np is None:
+            raise RuntimeError("Для классификатора спама нужен пакет numpy")
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _WEIGHTS_OFFSET:
+                raise ValueError("файл слишком короткий")
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Отображение закрывается сборщиком мусора вместе с последним массивом весов, который его использует
+        magic, version, num_features, bias, threshold = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != MODEL_FORMAT_VERSION:
+            raise ValueError(f"неподдерживаемый формат (версия {version})")
+        if len(data) != _WEIGHTS_OFFSET + 4 * num_features:
+            raise ValueError("размер файла не совпадает с числом весов")
+        return cls(np.frombuffer(data, dtype="<f4", count=num_features, offset=_WEIGHTS_OFFSET), bias, threshold)
+
+    @staticmethod
+    def write(path: str, weights: "np.ndarray", bias: float, threshold: float = DEFAULT_THRESHOLD) -> None:
+        """Атомарно записать модель: работающий бот не увидит наполовину записанный файл"""
+        header = _HEADER.pack(_MAGIC, MODEL_FORMAT_VERSION, len(weights), bias, threshold)
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".model-")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(header.ljust(_WEIGHTS_OFFSET, b"\0"))
+                file.write(np.asarray(weights, dtype="<f4").tobytes())
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
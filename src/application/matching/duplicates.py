@@ -0,0 +1,153 @@
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from .normalization import TextNormalizer
+from .tokens import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # Без numpy подписи считаются на чистом Python, медленнее
+    np = None
+
+# Копий в разных чатах за окно, после которых сообщение считается рассылкой
+DEFAULT_DUPLICATE_THRESHOLD = 5
+# Окно учета копий, секунды
+DEFAULT_DUPLICATE_WINDOW = 600
+# Предел числа отпечатков в памяти: самые старые вытесняются раньше окончания окна
+DEFAULT_MAX_ENTRIES = 100_000
+# Короткие сообщения ("привет всем") повторяются в чатах естественно и не учитываются
+MIN_TOKENS = 6
+
+# Подпись MinHash из NUM_PERMUTATIONS минимумов делится на полосы по ROWS_PER_BAND значений (LSH):
+# сообщения с похожестью по Жаккару от 0.5 становятся кандидатами почти наверняка, а несвязанные
+# почти никогда. Кандидат подтверждается долей совпавших значений подписи
+NUM_PERMUTATIONS = 32
+ROWS_PER_BAND = 2
+MIN_SIMILARITY = 0.5
+
+# Хэш-перестановки (a * x + b) mod p над 31-битными хэшами признаков: произведение помещается в uint64,
+# поэтому все перестановки для всех признаков сообщения считаются одной операцией над матрицей numpy
+_PRIME = (1 << 31) - 1
+_random = random.Random(20241017)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+if np is not None:
+    _MULTIPLIERS = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _INCREMENTS = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+Signature = Tuple[int, ...]
+
+
+def minhash(features: Set[str]) -> Signature:
+    """Подпись MinHash множества признаков: минимум каждой из хэш-перестановок"""
+    hashes = [int.from_bytes(blake2b(feature.encode(), digest_size=4).digest(), "little") % _PRIME for feature in features]
+    if np is None:
+        return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS)
+
+    values = np.array(hashes, dtype=np.uint64)
+    return tuple(((_MULTIPLIERS * values + _INCREMENTS) % _PRIME).min(axis=1).tolist())
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """Оценка похожести по Жаккару: доля совпавших значений подписей"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def _bands(signature: Signature) -> List[Tuple[int, Signature]]:
+    return [(start, signature[start : start + ROWS_PER_BAND]) for start in range(0, len(signature), ROWS_PER_BAND)]
+
+
+@dataclass(eq=False)
+class DuplicateEntry:
+    """Группа почти одинаковых сообщений, впервые замеченная в момент first_seen"""
+
+    signature: Signature
+    first_seen: float
+    chats: Set[int] = field(default_factory=set)  # Чаты, где встречались копии (не больше порога)
+    flagged: bool = False  # Копия уже была признана нарушением
+
+
+class DuplicateDetector:
+    """
+    Поиск одной и той же рассылки в разных чатах.
+    Сообщения сравниваются по MinHash-подписи слов и пар слов нормализованного текста; индекс по полосам
+    подписи (LSH) находит почти одинаковые сообщения за несколько обращений к словарю. Подписи живут
+    не дольше окна и вытесняются по порядку появления, поэтому память ограничена
+    """
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_DUPLICATE_THRESHOLD,
+        window: float = DEFAULT_DUPLICATE_WINDOW,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        normalizer: Optional[TextNormalizer] = None,
+    ):
+        self.threshold = threshold
+        self.window = window
+        self.max_entries = max_entries
+        self._normalizer = normalizer or TextNormalizer()
+        self._bands: Dict[Tuple[int, Signature], List[DuplicateEntry]] = {}  # (полоса, значения) -> группы
+        self._entries: Deque[DuplicateEntry] = deque()  # Группы в порядке появления
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """Вычислить подпись текста по словам и парам соседних слов; None для слишком коротких сообщений"""
+        tokens = tokenize(self._normalizer.normalize(text).text)
+        if len(tokens) < MIN_TOKENS:
+            return None
+        return minhash(set(tokens) | {f"{first} {second}" for first, second in zip(tokens, tokens[1:])})
+
+    def observe(self, signature: Signature, chat_id: int, now: Optional[float] = None) -> bool:
+        """
+        Учесть копию сообщения в чате. Возвращает True, если это известная рассылка: копия уже признана
+        нарушением или встречалась в порог чатов за окно
+        """
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+
+        entry = self._find(signature)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                self._remove_oldest()
+            entry = DuplicateEntry(signature=signature, first_seen=now)
+            for key in _bands(signature):
+                self._bands.setdefault(key, []).append(entry)
+            self._entries.append(entry)
+
+        if entry.flagged or len(entry.chats) >= self.threshold:
+            return True
+        entry.chats.add(chat_id)
+        return False
+
+    def flag(self, signature: Signature) -> None:
+        """Отметить группу сообщения как нарушение: следующие копии ловятся без проверки по словарям"""
+        entry = self._find(signature)
+        if entry is not None:
+            entry.flagged = True
+
+    def _find(self, signature: Signature) -> Optional[DuplicateEntry]:
+        """Найти группу почти такого же сообщения среди кандидатов из совпавших полос"""
+        for key in _bands(signature):
+            for entry in self._bands.get(key, ()):
+                if similarity(entry.signature, signature) >= MIN_SIMILARITY:
+                    return entry
+        return None
+
+    def _evict(self, now: float) -> None:
+        """Вытеснить группы старше окна"""
+        while self._entries and self._entries[0].first_seen <= now - self.window:
+            self._remove_oldest()
+
+    def _remove_oldest(self) -> None:
+        """Удалить самую старую группу вместе с ее записями в полосах"""
+        entry = self._entries.popleft()
+        for key in _bands(entry.signature):
+            band = self._bands[key]
+            band.remove(entry)
+            if not band:
+                del self._bands[key]
@@ -0,0 +1,195 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Повтор символа подряд, начиная с которого он считается растягиванием ("!!!!", "ааааа")
+MIN_REPEATED_RUN = 4
+
+# Начала слов, по которым слово считается ссылкой
+URL_PREFIXES = ("http://", "https://", "www.", "t.me/")
+
+# Пороги эвристик по умолчанию
+MIN_CAPS_LETTERS = 20  # Капс проверяется только в сообщениях с таким числом букв
+MAX_CAPS_RATIO = 0.8
+MIN_EMOJI_LENGTH = 10  # Плотность эмодзи проверяется только в сообщениях такой длины
+MAX_EMOJI_DENSITY = 0.5
+MAX_URLS = 3
+MAX_MIXED_SCRIPT_WORDS = 1  # Одно слово со смешением алфавитов бывает и случайно
+
+# Блоки эмодзи: пиктограммы, смайлики, транспорт, флаги и символы Dingbats
+_EMOJI_RANGES = ((0x1F000, 0x1FAFF), (0x2600, 0x27BF))
+
+# Класс символа - набор флагов: вид символа и, для букв, регистр и алфавит
+_LETTER, _DIGIT, _SPACE, _EMOJI, _UPPER, _CYRILLIC, _LATIN = (1 << bit for bit in range(7))
+_MIXED_SCRIPT = _CYRILLIC | _LATIN
+
+
+@dataclass(frozen=True, slots=True)
+class TextFeatures:
+    """Дешевые признаки текста для эвристик, вычисленные за один проход"""
+
+    length: int
+    letters: int
+    uppercase: int
+    emoji: int
+    digits: int
+    urls: int
+    words: int
+    mixed_script_words: int  # Слова, в которых кириллица смешана с латиницей ("пpивeт")
+    repeated_runs: int  # Повторы одного символа длиной от MIN_REPEATED_RUN
+    longest_run: int
+
+    @property
+    def caps_ratio(self) -> float:
+        """Доля заглавных среди букв"""
+        return self.uppercase / self.letters if self.letters else 0.0
+
+    @property
+    def emoji_density(self) -> float:
+        """Доля эмодзи среди символов"""
+        return self.emoji / self.length if self.length else 0.0
+
+
+# Эвристика: по признакам сообщения возвращает название нарушения или None
+FeatureRule = Callable[[TextFeatures], Optional[str]]
+
+# Нарушения, которые находят эвристики
+CAPS_VIOLATION = "капс"
+EMOJI_VIOLATION = "эмодзи"
+LINKS_VIOLATION = "много ссылок"
+MIXED_SCRIPT_VIOLATION = "смешение алфавитов"
+FEATURE_VIOLATIONS = frozenset({CAPS_VIOLATION, EMOJI_VIOLATION, LINKS_VIOLATION, MIXED_SCRIPT_VIOLATION})
+
+
+def caps_rule(features: TextFeatures) -> Optional[str]:
+    """Сообщение написано капсом"""
+    return CAPS_VIOLATION if features.letters >= MIN_CAPS_LETTERS and features.caps_ratio >= MAX_CAPS_RATIO else None
+
+
+def emoji_rule(features: TextFeatures) -> Optional[str]:
+    """Сообщение состоит в основном из эмодзи"""
+    return EMOJI_VIOLATION if features.length >= MIN_EMOJI_LENGTH and features.emoji_density >= MAX_EMOJI_DENSITY else None
+
+
+def links_rule(features: TextFeatures) -> Optional[str]:
+    """В сообщении слишком много ссылок"""
+    return LINKS_VIOLATION if features.urls > MAX_URLS else None
+
+
+def mixed_script_rule(features: TextFeatures) -> Optional[str]:
+    """Слова с латинскими буквами вместо кириллических ("пpивeт") - обход фильтров по словам"""
+    return MIXED_SCRIPT_VIOLATION if features.mixed_script_words > MAX_MIXED_SCRIPT_WORDS else None
+
+
+# Эвристики, которые можно включить настройкой FEATURE_RULES
+FEATURE_RULES: Dict[str, FeatureRule] = {
+    "caps": caps_rule,
+    "emoji": emoji_rule,
+    "links": links_rule,
+    "mixed_script": mixed_script_rule,
+}
+# По умолчанию эвристики отключены и включаются настройкой FEATURE_RULES
+DEFAULT_FEATURE_RULES: Tuple[str, ...] = ()
+
+
+def build_feature_rules(names: Sequence[str]) -> List[FeatureRule]:
+    """Собрать эвристики по названиям из FEATURE_RULES"""
+    unknown = [name for name in names if name not in FEATURE_RULES]
+    if unknown:
+        raise ValueError(f"Неизвестные эвристики: {', '.join(unknown)}. Доступны: {', '.join(FEATURE_RULES)}")
+    return [FEATURE_RULES[name] for name in names]
+
+
+def _is_emoji(char: str) -> bool:
+    codepoint = ord(char)
+    return any(first <= codepoint <= last for first, last in _EMOJI_RANGES)
+
+
+# Вид символа определяется первой подходящей проверкой
+_KINDS: Tuple[Tuple[int, Callable[[str], bool]], ...] = (
+    (_LETTER, str.isalpha),
+    (_DIGIT, str.isdigit),
+    (_SPACE, str.isspace),
+    (_EMOJI, _is_emoji),
+)
+# Признаки букв: регистр и алфавит (латиница - буквы до блока IPA)
+_LETTER_FLAGS: Tuple[Tuple[int, Callable[[str], bool]], ...] = (
+    (_UPPER, str.isupper),
+    (_CYRILLIC, lambda char: "\u0400" <= char <= "\u04ff"),
+    (_LATIN, lambda char: char < "\u0250"),
+)
+
+
+@lru_cache(maxsize=4096)
+def _char_class(char: str) -> int:
+    """Класс символа по таблицам _KINDS и _LETTER_FLAGS; в сообщениях повторяется немного разных символов"""
+    kind = next((flag for flag, predicate in _KINDS if predicate(char)), 0)
+    if kind == _LETTER:
+        kind |= sum(flag for flag, predicate in _LETTER_FLAGS if predicate(char))
+    return kind
+
+
+def extract_features(text: str) -> TextFeatures:
+    """
+    Вычислить признаки текста за один проход по символам; класс символа берется из таблиц _char_class.
+    Слово - последовательность букв и цифр (для смешения алфавитов), ссылка - часть текста между
+    пробелами, которая начинается с одного из URL_PREFIXES
+    """
+    letters = uppercase = emoji = digits = urls = 0
+    words = mixed_script_words = 0
+    repeated_runs = longest_run = 0
+
+    previous = ""
+    run = 0
+    scripts: Optional[int] = None  # Флаги букв текущего слова, None - вне слова
+    chunk_start = 0
+
+    for index, char in enumerate(text):
+        if char == previous:
+            run += 1
+        else:
+            repeated_runs += run >= MIN_REPEATED_RUN
+            longest_run = max(longest_run, run)
+            previous, run = char, 1
+
+        char_class = _char_class(char)
+        if char_class & _LETTER:
+            letters += 1
+            uppercase += bool(char_class & _UPPER)
+            if scripts is None:
+                words += 1
+                scripts = 0
+            scripts |= char_class
+            continue
+        if char_class & _DIGIT:
+            digits += 1
+            continue
+
+        # Любой другой символ завершает слово
+        if scripts is not None:
+            mixed_script_words += scripts & _MIXED_SCRIPT == _MIXED_SCRIPT
+            scripts = None
+        if char_class & _SPACE:
+            urls += index > chunk_start and text.startswith(URL_PREFIXES, chunk_start, index)
+            chunk_start = index + 1
+        elif char_class & _EMOJI:
+            emoji += 1
+
+    repeated_runs += run >= MIN_REPEATED_RUN
+    longest_run = max(longest_run, run)
+    if scripts is not None:
+        mixed_script_words += scripts & _MIXED_SCRIPT == _MIXED_SCRIPT
+    urls += len(text) > chunk_start and text.startswith(URL_PREFIXES, chunk_start)
+
+    return TextFeatures(
+        length=len(text),
+        letters=letters,
+        uppercase=uppercase,
+        emoji=emoji,
+        digits=digits,
+        urls=urls,
+        words=words,
+        mixed_script_words=mixed_script_words,
+        repeated_runs=repeated_runs,
+        longest_run=longest_run,
+    )
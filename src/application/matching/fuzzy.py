@@ -0,0 +1,163 @@
+import logging
+from typing import Dict, Iterable, Set
+
+from .normalization import TextNormalizer
+
+logger = logging.getLogger(__name__)
+
+# Ограничение на число записей индекса удалений одного чата
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def allowed_distance(term: str) -> int:
+    """Допустимое расстояние редактирования для слова: короткие слова не ищем нечетко"""
+    if len(term) < 4:
+        return 0
+    if len(term) < 7:
+        return 1
+    return 2
+
+
+def deletion_neighbourhood(term: str, distance: int) -> Set[str]:
+    """Все строки, получаемые из слова удалением не более distance символов"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {variant[:position] + variant[position + 1 :] for variant in frontier for position in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """
+    Расстояние Дамерау-Левенштейна (с перестановкой соседних символов) с ранним выходом.
+    Возвращает limit + 1, если расстояние больше limit
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous_previous is not None and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    Индекс нечеткого поиска запрещенных слов в стиле SymSpell.
+    Для каждого слова заранее строится окрестность удалений; проверка токена сообщения - это
+    поиск его удалений в хэш-таблице и подтверждение редких кандидатов расстоянием редактирования
+    """
+
+    def __init__(self, normalizer: TextNormalizer, max_distance: int = 2, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._normalizer = normalizer
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._deletes: Dict[str, Set[str]] = {}  # вариант с удалениями -> нормализованные слова
+        self._terms: Dict[str, Set[str]] = {}  # нормализованное слово -> исходные слова
+        self._distances: Dict[str, int] = {}  # нормализованное слово -> допустимое расстояние
+        self._entry_count = 0
+        self._max_term_length = 0  # При удалении не уменьшается: оценка сверху достаточна
+        self.skipped_words = 0
+
+    @property
+    def entry_count(self) -> int:
+        """Количество записей в индексе удалений"""
+        return self._entry_count
+
+    def build(self, words: Iterable[str]) -> "FuzzyIndex":
+        """Построить индекс для списка слов"""
+        self._deletes = {}
+        self._terms = {}
+        self._distances = {}
+        self._entry_count = 0
+        self._max_term_length = 0
+        self.skipped_words = 0
+        for word in words:
+            self.add(word)
+        return self
+
+    def add(self, word: str) -> None:
+        """Добавить слово в индекс с учетом ограничения памяти"""
+        term = self._normalizer.normalize_word(word)
+        if not term.isalnum():
+            # Фразы и записи с пунктуацией ищет основной бэкенд поиска
+            return
+
+        if term in self._terms:
+            self._terms[term].add(word)
+            return
+
+        distance = min(allowed_distance(term), self.max_distance)
+        if distance == 0:
+            return
+
+        # При нехватке места уменьшаем расстояние, а не отказываемся от слова сразу
+        while distance > 0:
+            variants = deletion_neighbourhood(term, distance)
+            if self._entry_count + len(variants) <= self.max_entries:
+                break
+            distance -= 1
+        else:
+            self.skipped_words += 1
+            logger.warning(f"Слово '{word}' не добавлено в нечеткий индекс: превышен лимит {self.max_entries} записей")
+            return
+
+        self._terms[term] = {word}
+        self._distances[term] = distance
+        for variant in variants:
+            self._deletes.setdefault(variant, set()).add(term)
+        self._entry_count += len(variants)
+        self._max_term_length = max(self._max_term_length, len(term))
+
+    def remove(self, word: str) -> None:
+        """Удалить слово из индекса"""
+        term = self._normalizer.normalize_word(word)
+        words = self._terms.get(term)
+        if not words or word not in words:
+            return
+
+        words.discard(word)
+        if words:
+            return
+
+        del self._terms[term]
+        variants = deletion_neighbourhood(term, self._distances.pop(term))
+        for variant in variants:
+            terms = self._deletes.get(variant)
+            if terms is None:
+                continue
+            terms.discard(term)
+            if not terms:
+                del self._deletes[variant]
+        self._entry_count -= len(variants)
+
+    def lookup(self, tokens: Iterable[str]) -> Set[str]:
+        """Найти запрещенные слова, от которых токены сообщения отличаются не более чем на допустимое расстояние"""
+        if not self._terms:
+            return set()
+
+        deletes = self._deletes
+        # Токены длиннее самого длинного слова больше чем на max_distance совпасть не могут
+        max_length = self._max_term_length + self.max_distance
+        found: Set[str] = set()
+        checked: Set[str] = set()
+        for token in tokens:
+            if not 3 <= len(token) <= max_length or token in checked:
+                continue
+            checked.add(token)
+
+            for variant in deletion_neighbourhood(token, self.max_distance):
+                for term in deletes.get(variant, ()):
+                    if edit_distance(token, term, self._distances[term]) <= self._distances[term]:
+                        found.update(self._terms[term])
+        return found
@@ -0,0 +1,66 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Counter as CounterType
+from typing import DefaultDict, Dict, Iterable, Tuple
+
+# Интервал записи счетчиков в базу данных по умолчанию, секунды
+DEFAULT_FLUSH_INTERVAL = 60
+
+
+@dataclass
+class HitCountersDelta:
+    """Накопленные с прошлой записи счетчики"""
+
+    hits: CounterType[Tuple[int, str]] = field(default_factory=Counter)  # (чат, правило) -> срабатывания
+    last_hits: Dict[Tuple[int, str], datetime] = field(default_factory=dict)  # (чат, правило) -> последнее срабатывание
+    checks: CounterType[int] = field(default_factory=Counter)  # чат -> проверенные сообщения
+    # чат -> время поиска, секунды (Counter хранит только целые счетчики)
+    match_times: DefaultDict[int, float] = field(default_factory=lambda: defaultdict(float))
+
+    def __bool__(self) -> bool:
+        return bool(self.checks)
+
+
+class RuleHitCounters:
+    """
+    Счетчики срабатываний правил и времени поиска по чатам.
+    Обновляются только из цикла событий, поэтому обходятся без блокировок; накопленные значения
+    забираются целиком заменой объекта и записываются в базу данных пачкой
+    """
+
+    def __init__(self):
+        self._pending = HitCountersDelta()
+
+    @property
+    def pending(self) -> HitCountersDelta:
+        """Счетчики, еще не записанные в базу данных"""
+        return self._pending
+
+    def record(self, chat_id: int, rules: Iterable[str], match_time: float, checks: int = 1) -> None:
+        """Учесть проверку сообщений чата: сработавшие правила и время поиска"""
+        pending = self._pending
+        pending.checks[chat_id] += checks
+        pending.match_times[chat_id] += match_time
+        now = None
+        for rule in rules:
+            key = (chat_id, rule)
+            pending.hits[key] += 1
+            if now is None:
+                now = datetime.utcnow()
+            pending.last_hits[key] = now
+
+    def drain(self) -> HitCountersDelta:
+        """Забрать накопленные счетчики для записи, начав новый период"""
+        pending, self._pending = self._pending, HitCountersDelta()
+        return pending
+
+    def restore(self, delta: HitCountersDelta) -> None:
+        """Вернуть счетчики, которые не удалось записать, чтобы учесть их при следующей записи"""
+        pending = self._pending
+        pending.hits.update(delta.hits)
+        pending.checks.update(delta.checks)
+        for chat_id, match_time in delta.match_times.items():
+            pending.match_times[chat_id] += match_time
+        for key, last_hit in delta.last_hits.items():
+            pending.last_hits.setdefault(key, last_hit)
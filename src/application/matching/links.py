@@ -0,0 +1,131 @@
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+# Ключи узла дерева доменов: правило для самого домена и правило для домена вместе с поддоменами.
+# Метки получаются разбиением по точке, поэтому ключи с точкой не пересекаются ни с одной меткой
+_EXACT = "."
+_WILDCARD = "*."
+
+# Домены ссылок на пользователей и каналы Telegram: t.me/name проверяется как упоминание @name
+TELEGRAM_LINK_DOMAINS = {"t.me", "telegram.me", "telegram.dog"}
+
+MAX_DOMAIN_LABELS = 127
+
+
+class InvalidLinkRuleError(ValueError):
+    """Некорректное правило для ссылок и упоминаний"""
+
+
+def parse_link_rule(rule: str) -> str:
+    """
+    Проверить правило и привести его к каноническому виду.
+    Поддерживаются домены (casino.xyz - только сам домен), домены с поддоменами (*.casino.xyz)
+    и упоминания (@username)
+    """
+    rule = rule.strip().lower()
+    if rule.startswith("@"):
+        username = rule[1:]
+        if not username or not all(char.isalnum() or char == "_" for char in username):
+            raise InvalidLinkRuleError("Упоминание должно иметь вид @username")
+        return rule
+
+    domain = rule[2:] if rule.startswith("*.") else rule
+    labels = domain.split(".")
+    if len(labels) < 2 or len(labels) > MAX_DOMAIN_LABELS or not all(_is_domain_label(label) for label in labels):
+        raise InvalidLinkRuleError("Домен должен иметь вид casino.xyz или *.casino.xyz")
+    return rule
+
+
+def _is_domain_label(label: str) -> bool:
+    """Проверить метку домена: буквы, цифры и дефис не по краям"""
+    return (
+        bool(label)
+        and not label.startswith("-")
+        and not label.endswith("-")
+        and all(char.isalnum() or char == "-" for char in label)
+    )
+
+
+def normalize_domain(url: str) -> Optional[str]:
+    """Выделить домен из ссылки: нижний регистр, без порта, учетных данных и завершающей точки"""
+    url = url.strip()
+    if "://" not in url:
+        # Telegram размечает ссылки и без схемы: example.com/path
+        url = "http://" + url
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host.rstrip(".") or None
+
+
+def link_items(url: str) -> List[str]:
+    """Элементы ссылки для проверки правилами: домен, а для ссылок Telegram еще и упоминание"""
+    domain = normalize_domain(url)
+    if domain is None:
+        return []
+
+    items = [domain]
+    if domain in TELEGRAM_LINK_DOMAINS:
+        path = urlsplit(url if "://" in url else "http://" + url).path.strip("/")
+        username = path.split("/", 1)[0].lower()
+        if username:
+            items.append("@" + username)
+    return items
+
+
+class LinkRuleSet:
+    """
+    Правила чата для ссылок и упоминаний.
+    Домены хранятся в префиксном дереве по меткам в обратном порядке (xyz -> casino -> ...), поэтому
+    проверка домена стоит O(число меток) независимо от количества правил; упоминания ищутся в множестве
+    """
+
+    def __init__(self, rules: Iterable[str]):
+        self.source_rules = list(rules)  # Правила, из которых собран набор, для проверки актуальности
+        self._root: Dict[str, Any] = {}  # метка -> узел; у узла под ключами _EXACT и _WILDCARD - исходные правила
+        self._mentions: Dict[str, str] = {}  # упоминание -> исходное правило
+        for rule in self.source_rules:
+            self._add(rule)
+
+    def _add(self, rule: str) -> None:
+        canonical = rule.strip().lower()
+        if canonical.startswith("@"):
+            self._mentions[canonical] = rule
+            return
+
+        wildcard = canonical.startswith("*.")
+        node = self._root
+        for label in reversed((canonical[2:] if wildcard else canonical).split(".")):
+            node = node.setdefault(label, {})
+        node[_WILDCARD if wildcard else _EXACT] = rule
+
+    def match_domain(self, domain: str) -> List[str]:
+        """Найти правила, под которые подпадает домен"""
+        matched: List[str] = []
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                return matched
+            # Правило *.casino.xyz срабатывает на сам домен и на любой его поддомен
+            if _WILDCARD in node:
+                matched.append(node[_WILDCARD])
+        if _EXACT in node:
+            matched.append(node[_EXACT])
+        return matched
+
+    def match(self, items: Iterable[str]) -> List[str]:
+        """Найти сработавшие правила для доменов и упоминаний сообщения"""
+        found: List[str] = []
+        for item in items:
+            if item.startswith("@"):
+                matched = [self._mentions[item]] if item in self._mentions else []
+            else:
+                matched = self.match_domain(item)
+            for rule in matched:
+                if rule not in found:
+                    found.append(rule)
+        return found
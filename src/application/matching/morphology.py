@@ -0,0 +1,223 @@
+import re
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .normalization import TextNormalizer
+
+_VOWELS = "аеиоуыэюя"
+_CYRILLIC_WORD = re.compile(r"^[а-яё]+$")
+
+# Окончания стеммера Snowball для русского языка. Группы с префиксом "а/я" срезаются только после этих букв
+# fmt: off
+_PERFECTIVE_GERUND_AFTER_A = ("в", "вши", "вшись")
+_PERFECTIVE_GERUND = ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись")
+_REFLEXIVE = ("ся", "сь")
+_ADJECTIVE = (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом",
+    "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+)
+_PARTICIPLE_AFTER_A = ("ем", "нн", "вш", "ющ", "щ")
+_PARTICIPLE = ("ивш", "ывш", "ующ")
+_VERB_AFTER_A = ("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно")
+_VERB = (
+    "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им", "ым", "ен",
+    "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+)
+_NOUN = (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией", "ей", "ой", "ий", "й",
+    "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я",
+)
+_SUPERLATIVE = ("ейше", "ейш")
+_DERIVATIONAL = ("ость", "ост")
+# fmt: on
+
+# Окончания, которые добавляются к основе при генерации словоформ
+# fmt: off
+_NOUN_ENDINGS = (
+    "", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "ом", "ем", "ой", "ей", "ою", "ею", "ам", "ям",
+    "ами", "ями", "ах", "ях", "ов", "ев", "ью", "ия", "ии", "ию", "ие", "ий", "ием", "иям", "иями", "иях",
+)
+_DIMINUTIVE_SUFFIXES = ("ик", "чик", "ок", "ек", "очк", "ечк", "ошк", "ушк", "ишк", "оньк", "еньк")
+_DIMINUTIVE_ENDINGS = ("", "а", "и", "у", "е", "о", "ой", "ом", "ам", "ами", "ах", "ов")
+_ADJECTIVE_ENDINGS = (
+    "ый", "ий", "ой", "ая", "яя", "ое", "ее", "ые", "ие", "ого", "его", "ому", "ему", "ым", "им",
+    "ом", "ем", "ую", "юю", "ою", "ею", "ых", "их", "ыми", "ими", "ей",
+)
+_VERB_ENDINGS = (
+    "ть", "ю", "у", "ешь", "ет", "ем", "ете", "ют", "ут", "л", "ла", "ло", "ли", "й", "йте",
+    "ить", "ишь", "ит", "им", "ите", "ят", "ат", "ил", "ила", "ило", "или", "и",
+    "ать", "ал", "ала", "ало", "али", "ять", "ял", "яла", "яло", "яли", "ешься", "ется", "ются", "утся",
+)
+_VERB_SUFFIXES = ("ть", "ти", "чь", "ться", "тись", "чься")
+_ADJECTIVE_SUFFIXES = ("ый", "ий", "ой", "ая", "яя", "ое", "ее", "ые", "ие")
+# fmt: on
+
+# Короткие основы порождают слишком много случайных совпадений
+MIN_STEM_LENGTH = 3
+
+
+def _rv_start(word: str) -> int:
+    """Начало области RV: позиция после первой гласной"""
+    for position, char in enumerate(word):
+        if char in _VOWELS:
+            return position + 1
+    return len(word)
+
+
+def _r2_start(word: str) -> int:
+    """Начало области R2 алгоритма Snowball"""
+    region = len(word)
+    start = 0
+    for _ in range(2):
+        for position in range(start + 1, len(word)):
+            if word[position] not in _VOWELS and word[position - 1] in _VOWELS:
+                region = position + 1
+                break
+        else:
+            return len(word)
+        start = region
+    return region
+
+
+def _remove_ending(word: str, rv: int, endings: Tuple[str, ...], after_a: bool = False) -> Optional[str]:
+    """Срезать самое длинное подходящее окончание внутри области RV"""
+    for ending in sorted(endings, key=len, reverse=True):
+        if not word.endswith(ending) or len(word) - len(ending) < rv:
+            continue
+        stem = word[: len(word) - len(ending)]
+        if after_a and (len(stem) - 1 < rv or stem[-1] not in "ая"):
+            continue
+        return stem
+    return None
+
+
+def _remove_group(word: str, rv: int, after_a: Tuple[str, ...], plain: Tuple[str, ...]) -> Optional[str]:
+    """Срезать окончание из пары групп: требующих "а/я" перед собой и обычных"""
+    candidates = [stem for stem in (_remove_ending(word, rv, after_a, True), _remove_ending(word, rv, plain)) if stem]
+    return min(candidates, key=len) if candidates else None
+
+
+def russian_stem(word: str) -> str:
+    """Найти основу русского слова упрощенным стеммером Snowball"""
+    word = word.lower().replace("ё", "е")
+    rv = _rv_start(word)
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное/глагол/существительное
+    stem = _remove_group(word, rv, _PERFECTIVE_GERUND_AFTER_A, _PERFECTIVE_GERUND)
+    if stem is not None:
+        word = stem
+    else:
+        word = _remove_ending(word, rv, _REFLEXIVE) or word
+        adjective = _remove_ending(word, rv, _ADJECTIVE)
+        if adjective is not None:
+            word = _remove_group(adjective, rv, _PARTICIPLE_AFTER_A, _PARTICIPLE) or adjective
+        else:
+            verb = _remove_group(word, rv, _VERB_AFTER_A, _VERB)
+            word = verb if verb is not None else (_remove_ending(word, rv, _NOUN) or word)
+
+    # Шаг 2: конечная "и"
+    word = _remove_ending(word, rv, ("и",)) or word
+
+    # Шаг 3: словообразовательный суффикс в области R2
+    r2 = _r2_start(word)
+    word = _remove_ending(word, max(rv, r2), _DERIVATIONAL) or word
+
+    # Шаг 4: превосходная степень, удвоенная "н" и мягкий знак
+    word = _remove_ending(word, rv, _SUPERLATIVE) or word
+    if word.endswith("нн") and len(word) - 1 >= rv:
+        return word[:-1]
+    return _remove_ending(word, rv, ("ь",)) or word
+
+
+def generate_forms(word: str) -> Set[str]:
+    """
+    Сгенерировать словоформы русского слова: падежные формы, формы глагола и уменьшительные варианты.
+    Генерация намеренно избыточна - несуществующие формы никогда не встретятся в тексте
+    """
+    word = word.lower().replace("ё", "е")
+    forms = {word}
+    if not _CYRILLIC_WORD.match(word):
+        return forms
+
+    stem = russian_stem(word)
+    if len(stem) < MIN_STEM_LENGTH:
+        return forms
+
+    if word.endswith(_VERB_SUFFIXES):
+        for ending in _VERB_ENDINGS:
+            forms.add(stem + ending)
+            forms.add(stem + ending + ("сь" if ending and ending[-1] in _VOWELS else "ся"))
+        return forms
+
+    if word.endswith(_ADJECTIVE_SUFFIXES):
+        forms.update(stem + ending for ending in _ADJECTIVE_ENDINGS)
+
+    forms.update(stem + ending for ending in _NOUN_ENDINGS)
+    # Беглая гласная в родительном падеже множественного числа: "ставк" -> "ставок", "деньг" -> "денег"
+    if stem[-2] == "ь":
+        forms.add(stem[:-2] + "е" + stem[-1])
+    elif stem[-1] not in _VOWELS and stem[-2] not in _VOWELS:
+        forms.update(stem[:-1] + vowel + stem[-1] for vowel in "ое")
+    for suffix in _DIMINUTIVE_SUFFIXES:
+        forms.update(stem + suffix + ending for ending in _DIMINUTIVE_ENDINGS)
+    return forms
+
+
+class InflectionIndex:
+    """
+    Индекс словоформ запрещенных слов чата.
+    Формы генерируются один раз при добавлении слова, а проверка сообщения - это поиск
+    каждого токена в хэш-таблице, без вызовов стеммера на сообщение
+    """
+
+    def __init__(self, normalizer: TextNormalizer):
+        self._normalizer = normalizer
+        self._forms: Dict[str, Set[str]] = {}  # нормализованная форма -> исходные слова
+        self._word_forms: Dict[str, Set[str]] = {}  # исходное слово -> его нормализованные формы
+
+    @property
+    def form_count(self) -> int:
+        """Количество различных словоформ в индексе"""
+        return len(self._forms)
+
+    def build(self, words: Iterable[str]) -> "InflectionIndex":
+        """Построить индекс для списка слов"""
+        self._forms = {}
+        self._word_forms = {}
+        for word in words:
+            self.add(word)
+        return self
+
+    def add(self, word: str) -> None:
+        """Добавить слово и его словоформы в индекс"""
+        if word in self._word_forms:
+            return
+
+        generated = generate_forms(word)
+        if len(generated) == 1:
+            # Нелексические записи и короткие слова ищет основной бэкенд поиска
+            return
+
+        forms = {self._normalizer.normalize_word(form) for form in generated}
+        self._word_forms[word] = forms
+        for form in forms:
+            self._forms.setdefault(form, set()).add(word)
+
+    def remove(self, word: str) -> None:
+        """Удалить слово и его словоформы из индекса"""
+        for form in self._word_forms.pop(word, ()):
+            words = self._forms.get(form)
+            if words is None:
+                continue
+            words.discard(word)
+            if not words:
+                del self._forms[form]
+
+    def lookup(self, tokens: Iterable[str]) -> Set[str]:
+        """Найти запрещенные слова, словоформы которых встречаются среди токенов сообщения"""
+        forms = self._forms
+        found: Set[str] = set()
+        for token in tokens:
+            words = forms.get(token)
+            if words:
+                found.update(words)
+        return found
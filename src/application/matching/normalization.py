@@ -0,0 +1,177 @@
+import logging
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .base import is_word_char
+
+logger = logging.getLogger(__name__)
+
+# Невидимые символы, которыми разбивают слова: мягкий перенос, пробелы нулевой ширины, направляющие метки
+_INVISIBLE_CHARS = [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E, 0x3164, 0xFEFF, 0xFFA0]
+_INVISIBLE_RANGES = [(0x200B, 0x200F), (0x202A, 0x202E), (0x2060, 0x2064), (0x2066, 0x206F)]
+
+# Комбинируемые диакритические знаки (ударения, "залго"), оставшиеся после композиции NFC
+_COMBINING_RANGES = [(0x0300, 0x036F), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF), (0xFE20, 0xFE2F)]
+
+# Блоки с символами совместимости: полноширинные формы, математические буквы, лигатуры, надстрочные знаки
+_COMPATIBILITY_RANGES = [(0x00A0, 0x33FF), (0xA700, 0xA7FF), (0xFB00, 0xFFEF), (0x1D400, 0x1D7FF), (0x1F100, 0x1F1FF)]
+
+# Буквы с диакритикой ("á", "ӧ"), которые приводятся к базовой букве. "й" - самостоятельная буква, ее не трогаем
+_ACCENTED_RANGES = [(0x00C0, 0x024F), (0x0370, 0x04FF), (0x1E00, 0x1EFF)]
+_KEPT_ACCENTED_LETTERS = {"й", "Й"}
+
+# Латинские и греческие буквы, неотличимые на вид от кириллических: символ первой строки заменяется
+# символом второй на той же позиции
+_HOMOGLYPHS = str.maketrans("acekopxyαεκορχё", "асекорхуаекорхе")
+
+# Частые символы, не меняющиеся при нормализации. Явная запись в таблице избавляет str.translate
+# от исключения KeyError на каждый такой символ и заметно ускоряет проход по тексту
+_PASSTHROUGH_RANGES = [(0x0000, 0x052F), (0x2000, 0x206F)]
+
+# Повторы букв ("спааааам") схлопываются до одной; цифры не трогаем
+_REPEATED_LETTERS = re.compile(r"([^\W\d])\1+")
+
+# Стоимость нормализации одного сообщения, после которой она считается превышенной
+DEFAULT_BUDGET_SECONDS = 0.001
+
+
+# Таблица для str.translate: код символа -> замена (строка или код), None - удалить символ
+TranslationTable = Dict[int, Union[str, int, None]]
+
+
+def _codepoints(ranges: List[Tuple[int, int]]) -> Iterator[int]:
+    for first, last in ranges:
+        yield from range(first, last + 1)
+
+
+# Удаляемые символы и гомоглифы: применяются и к результату разложения остальных символов
+_DELETED = set(_INVISIBLE_CHARS).union(_codepoints(_INVISIBLE_RANGES + _COMBINING_RANGES))
+_FOLD_TABLE: TranslationTable = {**_HOMOGLYPHS, **dict.fromkeys(_DELETED, "")}
+
+
+def _compatibility_form(char: str) -> Optional[str]:
+    """Форма совместимости NFKC ("ａ" -> "a", "ﬁ" -> "fi") или None, если символ не меняется"""
+    compatible = unicodedata.normalize("NFKC", char)
+    return compatible if compatible != char else None
+
+
+def _base_letter(char: str) -> Optional[str]:
+    """Буква без диакритики ("á" -> "a") или None, если символ не меняется"""
+    if char in _KEPT_ACCENTED_LETTERS:
+        return None
+    base = "".join(part for part in unicodedata.normalize("NFD", char) if not unicodedata.combining(part))
+    return base if base and base != char else None
+
+
+# Разложения символов по блокам; более поздние записи перекрывают ранние
+_DECOMPOSITIONS = ((_COMPATIBILITY_RANGES, _compatibility_form), (_ACCENTED_RANGES, _base_letter))
+
+
+def _build_translation_table() -> TranslationTable:
+    """Построить единую таблицу для str.translate: удаление невидимых знаков, NFKC и гомоглифы"""
+    table: TranslationTable = {}
+    for ranges, decompose in _DECOMPOSITIONS:
+        for codepoint in _codepoints(ranges):
+            replacement = decompose(chr(codepoint))
+            if replacement is not None:
+                table[codepoint] = replacement.lower().translate(_FOLD_TABLE)
+
+    table.update(_FOLD_TABLE)
+    for codepoint in _codepoints(_PASSTHROUGH_RANGES):
+        table.setdefault(codepoint, chr(codepoint))
+    return table
+
+
+_TRANSLATION_TABLE = _build_translation_table()
+
+
+def _is_repeatable(char: str) -> bool:
+    """Проверить, схлопываются ли повторы символа (буквы и подчеркивание, но не цифры)"""
+    return is_word_char(char) and not char.isdecimal()
+
+
+@dataclass
+class NormalizedText:
+    """Нормализованный текст сообщения с ленивым отображением на позиции исходного текста"""
+
+    original: str
+    text: str
+    collapse_repeats: bool = True
+    _offsets: Optional[List[int]] = field(default=None, repr=False)
+
+    def to_original(self, start: int, end: int) -> Tuple[int, int]:
+        """Перевести полуинтервал [start, end) нормализованного текста в позиции исходного"""
+        offsets = self._get_offsets()
+        original_start = offsets[start] if start < len(offsets) else len(self.original)
+        original_end = offsets[end] if end < len(offsets) else len(self.original)
+        return original_start, original_end
+
+    def original_span(self, start: int, end: int) -> str:
+        """Получить фрагмент исходного текста, соответствующий фрагменту нормализованного"""
+        original_start, original_end = self.to_original(start, end)
+        return self.original[original_start:original_end]
+
+    def _get_offsets(self) -> List[int]:
+        """
+        Повторить нормализацию по графемам (базовый символ с комбинируемыми знаками),
+        запоминая исходную позицию каждого символа. Медленный путь: выполняется только когда
+        нужны позиции, например для найденного нарушения
+        """
+        if self._offsets is not None:
+            return self._offsets
+
+        chars: List[str] = []
+        offsets: List[int] = []
+        cluster_start = 0
+        for position in range(1, len(self.original) + 1):
+            if position < len(self.original) and unicodedata.combining(self.original[position]):
+                continue
+
+            cluster = unicodedata.normalize("NFC", self.original[cluster_start:position])
+            for char in cluster.lower().translate(_TRANSLATION_TABLE):
+                if self.collapse_repeats and chars and char == chars[-1] and _is_repeatable(char):
+                    continue
+                chars.append(char)
+                offsets.append(cluster_start)
+            cluster_start = position
+
+        self._offsets = offsets
+        return offsets
+
+
+class TextNormalizer:
+    """
+    Нормализация текста перед поиском запрещенных слов.
+    Один проход str.translate по заранее построенной таблице (NFKC, невидимые знаки, диакритика, гомоглифы),
+    затем схлопывание повторов букв. Словарь нормализуется тем же способом, поэтому обходы вида
+    "сaзино" с латинской "a" или "спааааам" находят исходные слова
+    """
+
+    def __init__(self, budget_seconds: float = DEFAULT_BUDGET_SECONDS, collapse_repeats: bool = True):
+        self.budget_seconds = budget_seconds
+        self.collapse_repeats = collapse_repeats
+        self.budget_exceeded = 0
+
+    def normalize(self, text: str) -> NormalizedText:
+        """Нормализовать текст сообщения"""
+        start_time = time.perf_counter()
+        normalized = NormalizedText(original=text, text=self.normalize_word(text), collapse_repeats=self.collapse_repeats)
+
+        elapsed = time.perf_counter() - start_time
+        if elapsed > self.budget_seconds:
+            self.budget_exceeded += 1
+            logger.debug(f"Нормализация текста длиной {len(text)} заняла {elapsed * 1000:.3f} мс")
+
+        return normalized
+
+    def normalize_word(self, word: str) -> str:
+        """Нормализовать отдельное слово или фразу словаря"""
+        if not unicodedata.is_normalized("NFC", word):
+            word = unicodedata.normalize("NFC", word)
+        word = word.lower().translate(_TRANSLATION_TABLE)
+        if self.collapse_repeats:
+            word = _REPEATED_LETTERS.sub(r"\1", word)
+        return word
@@ -0,0 +1,180 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import asyncio
+
+from infrastructure.monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+# Порог стоимости проверки, начиная с которого она уходит в пул процессов
+DEFAULT_COST_THRESHOLD = 4096
+# Каждая тысяча слов словаря и нечеткий поиск увеличивают оценку стоимости
+WORDS_PER_COST_UNIT = 1000
+FUZZY_COST_FACTOR = 4
+
+# Состояние процесса-обработчика: своя конфигурация модерации со своими кэшами бэкендов поиска
+_worker_config = None
+# словарь -> версия, слова и разрешенные фрагменты, по которым построены структуры
+_worker_dictionaries: Dict[int, Tuple[int, Tuple[str, ...], Tuple[str, ...]]] = {}
+
+# Словарь в задаче пула: идентификатор, версия и содержимое (слова и разрешенные фрагменты).
+# Содержимое передается только при смене версии, иначе None - процесс-обработчик использует свою копию
+DictionaryPayload = Tuple[int, int, Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]]
+
+
+def estimate_cost(text_length: int, word_count: int, fuzzy: bool) -> int:
+    """Оценить стоимость проверки текста: длина текста с весом словаря и нечеткого поиска"""
+    cost = text_length * (1 + word_count // WORDS_PER_COST_UNIT)
+    return cost * FUZZY_COST_FACTOR if fuzzy else cost
+
+
+def _init_worker(snapshot_path: Optional[str]) -> None:
+    """
+    Подготовить процесс-обработчик: бэкенды поиска восстанавливаются из снимка, а не компилируются заново.
+    Снимок читается целиком сразу при запуске процесса, чтобы первые проверки не ждали восстановления
+    """
+    global _worker_config
+    from application.enhanced_config import EnhancedModerationConfig
+
+    _worker_config = EnhancedModerationConfig(snapshot_path=snapshot_path)
+    _worker_dictionaries.clear()
+    if _worker_config._snapshot is not None:
+        _worker_config._snapshot.preload()
+
+
+def _sync_dictionary(layer_id: int, version: int, content: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None) -> bool:
+    """
+    Перестроить структуры словаря в процессе-обработчике при смене версии словаря.
+    Возвращает False, если версия новая, а содержимое словаря в задаче не передано
+    """
+    current = _worker_dictionaries.get(layer_id)
+    if current is not None and current[0] == version:
+        return True
+    if content is None:
+        return False
+
+    _worker_config._reset_compiled(layer_id)
+    _worker_dictionaries[layer_id] = (version, *content)
+    return True
+
+
+def _check_in_worker(
+    chat_id: int,
+    dictionaries: Tuple[DictionaryPayload, DictionaryPayload],
+    excluded_words: FrozenSet[str],
+    fuzzy: bool,
+    text: str,
+) -> Optional[List[str]]:
+    """
+    Проверить текст в процессе-обработчике по словарю чата и общему словарю.
+    Возвращает None, если у процесса нет нужной версии словаря: проверку нужно повторить с содержимым словарей
+    """
+    from application.enhanced_config import GLOBAL_DICTIONARY_ID
+
+    if _worker_config is None:
+        _init_worker(None)
+
+    if not all(_sync_dictionary(*dictionary) for dictionary in dictionaries):
+        return None
+
+    _, forbidden_words, allowed_words = _worker_dictionaries[chat_id]
+    _, global_words, _ = _worker_dictionaries[GLOBAL_DICTIONARY_ID]
+    return _worker_config._scan_text(
+        chat_id, list(forbidden_words), list(global_words), excluded_words, fuzzy, text, allowed_words
+    )
+
+
+class CheckOffload:
+    """
+    Пул процессов для дорогих проверок текста.
+    Длинные сообщения в чатах с большими словарями или нечетким поиском проверяются вне цикла событий,
+    короткие остаются в основном процессе: передача в пул для них дороже самой проверки
+    """
+
+    def __init__(self, workers: int, threshold: int = DEFAULT_COST_THRESHOLD, snapshot_path: Optional[str] = None):
+        if workers < 1:
+            raise ValueError("Количество процессов проверки должно быть положительным")
+        self.threshold = threshold
+        # Процессы запускаются при первой отправленной проверке
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshot_path,))
+        self._queue_depth = 0
+        self._sent_versions: Dict[int, int] = {}  # словарь -> последняя версия, переданная в пул
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество проверок, ожидающих результата из пула"""
+        return self._queue_depth
+
+    def should_offload(self, text_length: int, word_count: int, fuzzy: bool) -> bool:
+        """Проверить, нужно ли отправить проверку в пул процессов"""
+        return estimate_cost(text_length, word_count, fuzzy) >= self.threshold
+
+    async def check(
+        self,
+        chat_id: int,
+        versions: Tuple[int, int],
+        forbidden_words: Sequence[str],
+        global_words: Sequence[str],
+        excluded_words: Iterable[str],
+        fuzzy: bool,
+        text: str,
+        allowed_words: Sequence[str] = (),
+    ) -> List[str]:
+        """
+        Проверить текст в пуле процессов. versions - версии словаря чата и общего словаря:
+        слова передаются в пул только после смены версии, а не с каждой проверкой
+        """
+        self._queue_depth += 1
+        metrics.set_offload_queue_depth(self._queue_depth)
+        start_time = time.perf_counter()
+        task = (chat_id, versions, forbidden_words, global_words, frozenset(excluded_words), fuzzy, text, allowed_words)
+        try:
+            result = await self._submit(*task, resend=False)
+            if result is None:
+                # Процесс еще не получал эту версию словаря: повторяем проверку с содержимым словарей
+                result = await self._submit(*task, resend=True)
+            return result
+        finally:
+            self._queue_depth -= 1
+            metrics.record_offloaded_check(time.perf_counter() - start_time)
+            metrics.set_offload_queue_depth(self._queue_depth)
+
+    def _payload(
+        self, layer_id: int, version: int, words: Sequence[str], allowed_words: Sequence[str], resend: bool
+    ) -> DictionaryPayload:
+        """Словарь для задачи пула: содержимое передается с первой проверкой новой версии или по запросу процесса"""
+        if not resend and self._sent_versions.get(layer_id) == version:
+            return layer_id, version, None
+        self._sent_versions[layer_id] = version
+        return layer_id, version, (tuple(words), tuple(allowed_words))
+
+    async def _submit(
+        self,
+        chat_id: int,
+        versions: Tuple[int, int],
+        forbidden_words: Sequence[str],
+        global_words: Sequence[str],
+        excluded_words: FrozenSet[str],
+        fuzzy: bool,
+        text: str,
+        allowed_words: Sequence[str],
+        resend: bool,
+    ) -> Optional[List[str]]:
+        """Отправить проверку в пул; resend - передать содержимое словарей независимо от версии"""
+        from application.enhanced_config import GLOBAL_DICTIONARY_ID
+
+        chat_version, global_version = versions
+        dictionaries = (
+            self._payload(chat_id, chat_version, forbidden_words, allowed_words, resend),
+            self._payload(GLOBAL_DICTIONARY_ID, global_version, global_words, (), resend),
+        )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _check_in_worker, chat_id, dictionaries, excluded_words, fuzzy, text)
+
+    def shutdown(self) -> None:
+        """Остановить процессы пула, отменив ожидающие проверки"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Пул процессов проверки остановлен")
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Iterable, List, Set
+
+from .normalization import TextNormalizer
+from .tokens import tokenize
+
+# Ключ узла префиксного дерева, под которым хранятся фразы, заканчивающиеся в этом узле
+_PHRASES = ""
+
+
+class PhraseIndex:
+    """
+    Индекс фраз запрещенных слов в виде префиксного дерева по токенам.
+    Фраза совпадает, если ее токены идут в сообщении подряд, независимо от пробелов, переводов строк
+    и пунктуации между ними. Проверка использует то же разбиение на токены, что и поиск отдельных слов.
+    min_tokens - минимальное число токенов фразы: индекс разрешенных фрагментов чата хранит и отдельные слова
+    """
+
+    def __init__(self, normalizer: TextNormalizer, min_tokens: int = 2):
+        self._normalizer = normalizer
+        self.min_tokens = min_tokens
+        self._root: Dict[str, Any] = {}  # токен -> узел; у узла под ключом _PHRASES - исходные фразы
+        self._phrase_tokens: Dict[str, List[str]] = {}  # исходная фраза -> ее токены
+
+    @property
+    def phrase_count(self) -> int:
+        """Количество фраз в индексе"""
+        return len(self._phrase_tokens)
+
+    def build(self, words: Iterable[str]) -> "PhraseIndex":
+        """Построить индекс для списка слов, отобрав фразы"""
+        self._root = {}
+        self._phrase_tokens = {}
+        for word in words:
+            self.add(word)
+        return self
+
+    def add(self, word: str) -> None:
+        """Добавить фразу в индекс"""
+        if word in self._phrase_tokens:
+            return
+
+        tokens = tokenize(self._normalizer.normalize_word(word))
+        if len(tokens) < self.min_tokens:
+            # Отдельные слова ищут основной бэкенд поиска и индекс словоформ
+            return
+
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_PHRASES, set()).add(word)
+        self._phrase_tokens[word] = tokens
+
+    def remove(self, word: str) -> None:
+        """Удалить фразу из индекса вместе с опустевшими узлами"""
+        tokens = self._phrase_tokens.pop(word, None)
+        if tokens is None:
+            return
+
+        path = [self._root]
+        for token in tokens:
+            path.append(path[-1][token])
+
+        phrases = path[-1][_PHRASES]
+        phrases.discard(word)
+        if not phrases:
+            del path[-1][_PHRASES]
+        for depth in range(len(tokens) - 1, -1, -1):
+            if path[depth + 1]:
+                break
+            del path[depth][tokens[depth]]
+
+    def lookup(self, tokens: List[str]) -> Set[str]:
+        """Найти фразы, токены которых идут подряд среди токенов сообщения"""
+        root = self._root
+        found: Set[str] = set()
+        if not root:
+            return found
+
+        for start, token in enumerate(tokens):
+            node = root.get(token)
+            position = start + 1
+            # Большинство токенов не начинает ни одну фразу: для них это один поиск в хэш-таблице
+            while node is not None:
+                phrases = node.get(_PHRASES)
+                if phrases:
+                    found.update(phrases)
+                if position >= len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+        return found
+
+    def mask(self, tokens: List[str]) -> List[str]:
+        """
+        Заменить пустыми строками токены, входящие в найденные фразы.
+        Пустой токен не совпадает ни с одним словом и не склеивает соседние токены во фразу
+        """
+        root = self._root
+        masked = tokens
+        masked_until = 0  # Токены до этой позиции уже заменены
+        for start, token in enumerate(tokens):
+            node = root.get(token)
+            position = start + 1
+            while node is not None:
+                if node.get(_PHRASES) and position > masked_until:
+                    first = max(start, masked_until)
+                    if masked is tokens:
+                        masked = list(tokens)
+                    masked[first:position] = [""] * (position - first)
+                    masked_until = position
+                if position >= len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+        return masked
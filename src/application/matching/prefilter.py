@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional, Sequence
+
+from .tokens import tokenize
+
+
+class TokenPrefilter:
+    """
+    Предварительный фильтр сообщений по хэш-множеству токенов словаря.
+    Вхождение \\bслово\\b возможно, только если каждая последовательность словесных символов слова
+    встречается в тексте как целый токен, поэтому для слова достаточно хранить один ключевой токен.
+    Сообщение без ключевых токенов гарантированно чистое и точный поиск для него не запускается
+    """
+
+    def __init__(self, patterns: Optional[Sequence[str]] = None):
+        self._keys: Dict[str, int] = {}  # ключевой токен -> количество слов с этим ключом
+        self._keyless_count = 0  # Слова без словесных символов: с ними отсев невозможен
+        if patterns is not None:
+            self.build(patterns)
+
+    @property
+    def key_count(self) -> int:
+        """Количество ключевых токенов"""
+        return len(self._keys)
+
+    def build(self, patterns: Sequence[str]) -> "TokenPrefilter":
+        """Построить фильтр по нормализованным словам словаря"""
+        self._keys = {}
+        self._keyless_count = 0
+        for pattern in patterns:
+            self.add(pattern)
+        return self
+
+    def add(self, pattern: str) -> None:
+        """Добавить нормализованное слово в фильтр"""
+        key = self._key(pattern)
+        if key is None:
+            self._keyless_count += 1
+        else:
+            self._keys[key] = self._keys.get(key, 0) + 1
+
+    def remove(self, pattern: str) -> None:
+        """Удалить нормализованное слово из фильтра"""
+        key = self._key(pattern)
+        if key is None:
+            self._keyless_count = max(self._keyless_count - 1, 0)
+        elif key in self._keys:
+            self._keys[key] -= 1
+            if not self._keys[key]:
+                del self._keys[key]
+
+    def may_match(self, tokens: Iterable[str]) -> bool:
+        """Проверить, может ли текст с такими токенами содержать запрещенное слово"""
+        return bool(self._keyless_count) or not self._keys.keys().isdisjoint(tokens)
+
+    @staticmethod
+    def _key(pattern: str) -> Optional[str]:
+        """Ключевой токен слова: самый длинный, так как он реже всего встречается в обычном тексте"""
+        runs = tokenize(pattern)
+        return max(runs, key=len) if runs else None
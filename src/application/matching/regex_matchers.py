@@ -0,0 +1,80 @@
+import re
+from typing import Dict, List, Set
+
+from .base import Matcher, compile_word_pattern, is_word_char
+
+
+class RegexMatcher(Matcher):
+    """Отдельное регулярное выражение \\bслово\\b на каждое слово. Дешевая компиляция для маленьких словарей"""
+
+    backend = "regex"
+
+    def __init__(self):
+        super().__init__()
+        self._compiled: List[re.Pattern] = []
+
+    def _compile(self, patterns: List[str]) -> None:
+        self._compiled = [compile_word_pattern(pattern) for pattern in patterns]
+
+    def _insert(self, position: int, pattern: str) -> bool:
+        self._compiled.append(compile_word_pattern(pattern))
+        return True
+
+    def match_positions(self, text_lower: str) -> Set[int]:
+        return {position for position, pattern in enumerate(self._compiled) if pattern.search(text_lower)}
+
+
+class AlternationMatcher(Matcher):
+    """
+    Одно регулярное выражение с альтернативой всех слов.
+    Просмотр вперед проверяет каждую позицию текста, поэтому перекрывающиеся вхождения не теряются
+    """
+
+    backend = "alternation"
+
+    def __init__(self):
+        super().__init__()
+        self._pattern = None
+        self._positions: Dict[str, List[int]] = {}
+        self._prefixes: Dict[str, List[str]] = {}
+
+    def _compile(self, patterns: List[str]) -> None:
+        self._positions = {}
+        for position, pattern in enumerate(patterns):
+            if pattern:
+                self._positions.setdefault(pattern.lower(), []).append(position)
+
+        self._prefixes = {pattern: self._boundary_prefixes(pattern) for pattern in self._positions}
+
+        if not self._positions:
+            self._pattern = None
+            return
+
+        # Длинные альтернативы первыми: в каждой позиции находим самое длинное слово,
+        # а более короткие слова с той же позиции восстанавливаем по списку префиксов
+        alternatives = "|".join(re.escape(pattern) for pattern in sorted(self._positions, key=len, reverse=True))
+        self._pattern = re.compile(r"(?=\b(" + alternatives + r")\b)", re.IGNORECASE)
+
+    def match_positions(self, text_lower: str) -> Set[int]:
+        if self._pattern is None:
+            return set()
+
+        found: Set[int] = set()
+        seen: Set[str] = set()
+        for match in self._pattern.finditer(text_lower):
+            pattern = match.group(1).lower()
+            if pattern in seen or pattern not in self._positions:
+                continue
+            seen.add(pattern)
+            found.update(self._positions[pattern])
+            for prefix in self._prefixes[pattern]:
+                found.update(self._positions[prefix])
+        return found
+
+    def _boundary_prefixes(self, pattern: str) -> List[str]:
+        """Слова словаря, которые являются префиксом шаблона и заканчиваются на границе слова внутри него"""
+        return [
+            pattern[:length]
+            for length in range(1, len(pattern))
+            if pattern[:length] in self._positions and is_word_char(pattern[length - 1]) != is_word_char(pattern[length])
+        ]
@@ -0,0 +1,190 @@
+import logging
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+# Разбор шаблонов модулем re: с Python 3.11 он внутренний (re._parser), а модуль sre_parse устарел
+if sys.version_info >= (3, 11):
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+else:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Ограничения правил: длина шаблона и число неограниченных квантификаторов. Два неограниченных квантификатора,
+# которые могут совпасть с одними и теми же символами (\w*\w*, .*.*), дают перебор степени n^2 на каждой позиции.
+# Один неограниченный квантификатор все равно дает квадратичное время на тексте (поиск с каждой позиции до конца
+# текста, например a.*b на "aaaa..."): от этого защищает только ограничение времени проверки
+MAX_PATTERN_LENGTH = 200
+MAX_UNBOUNDED_REPEATS = 1
+# Число вариантов длины совпадения, которые может перебирать поиск на одной позиции текста: произведение ширин
+# квантификаторов ({1,3} - 3 варианта, ? - 2), неограниченный квантификатор считается за UNBOUNDED_REPEAT_WIDTH
+MAX_REPEAT_COMBINATIONS = 1000
+UNBOUNDED_REPEAT_WIDTH = 100
+# Бюджет стоимости компиляции правил одного чата (в узлах разобранного шаблона)
+DEFAULT_COMPILE_BUDGET = 500
+# Время проверки одного сообщения всеми правилами чата; правило, превысившее его в одиночку, отключается
+DEFAULT_TIME_LIMIT = 0.01
+
+_REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)}
+_GROUPS = {
+    sre_parse.SUBPATTERN: lambda av: av[-1],
+    getattr(sre_parse, "ATOMIC_GROUP", None): lambda av: av,
+}
+_SINGLE_CHARACTER = {sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN, sre_parse.CATEGORY}
+_FORBIDDEN = {
+    sre_parse.GROUPREF: "обратные ссылки",
+    sre_parse.GROUPREF_EXISTS: "условные группы",
+    sre_parse.ASSERT: "просмотр вперед и назад",
+    sre_parse.ASSERT_NOT: "просмотр вперед и назад",
+}
+
+
+class UnsafeRegexError(ValueError):
+    """Шаблон правила некорректен или выходит за безопасное подмножество регулярных выражений"""
+
+
+def check_rule_pattern(pattern: str) -> int:
+    """
+    Проверить, что шаблон входит в безопасное подмножество, и вернуть стоимость его компиляции.
+    Запрещены обратные ссылки, просмотр и квантификаторы над группами: без них поиск не уходит
+    в экспоненциальный перебор, а ограничения на квантификаторы не дают ему стать полиномиальным высокой степени.
+    Поиск по правилу не прерывается, поэтому его время ограничивается заранее, при разборе шаблона
+    """
+    if not pattern:
+        raise UnsafeRegexError("Шаблон не может быть пустым")
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise UnsafeRegexError(f"Шаблон длиннее {MAX_PATTERN_LENGTH} символов")
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as e:
+        raise UnsafeRegexError(f"Некорректный шаблон: {e}") from e
+
+    cost, unbounded, combinations = _walk(parsed)
+    if unbounded > MAX_UNBOUNDED_REPEATS:
+        raise UnsafeRegexError("Допускается только один из квантификаторов без верхней границы (*, +, {n,})")
+    if combinations > MAX_REPEAT_COMBINATIONS:
+        raise UnsafeRegexError("Слишком широкие квантификаторы: сократите диапазоны повторений")
+    return cost
+
+
+def _walk(items) -> Tuple[int, int, int]:
+    """
+    Обойти разобранный шаблон: вернуть число узлов, число неограниченных квантификаторов
+    и число вариантов длины совпадения, которые перебирает поиск
+    """
+    cost = 0
+    unbounded = 0
+    combinations = 1
+    for op, av in items:
+        if op in _FORBIDDEN:
+            raise UnsafeRegexError(f"В правилах не поддерживаются {_FORBIDDEN[op]}")
+
+        node_cost, node_unbounded, node_combinations = _walk_node(op, av)
+        cost += node_cost
+        unbounded += node_unbounded
+        combinations *= node_combinations
+    return cost, unbounded, combinations
+
+
+def _walk_node(op, av) -> Tuple[int, int, int]:
+    """Обойти один узел шаблона (см. _walk)"""
+    if op in _REPEATS:
+        return _walk_repeat(*av)
+
+    if op == sre_parse.BRANCH:
+        # Поиск пробует ветви по очереди, поэтому варианты ветвей складываются
+        branches = [_walk(branch) for branch in av[1]]
+        return (
+            1 + sum(cost for cost, _, _ in branches),
+            sum(unbounded for _, unbounded, _ in branches),
+            sum(combinations for _, _, combinations in branches),
+        )
+
+    if op in _GROUPS:
+        cost, unbounded, combinations = _walk(_GROUPS[op](av))
+        return cost + 1, unbounded, combinations
+
+    return 1 + (len(av) if op == sre_parse.IN else 0), 0, 1
+
+
+def _walk_repeat(low: int, high: int, body) -> Tuple[int, int, int]:
+    """Обойти квантификатор (см. _walk)"""
+    # Повторять можно только один символ или класс символов; группу - не более одного раза
+    if high > 1 and not (len(body) == 1 and body[0][0] in _SINGLE_CHARACTER):
+        raise UnsafeRegexError("Квантификатор можно применять только к символу или классу символов")
+
+    cost, unbounded, combinations = _walk(body)
+    if high == sre_parse.MAXREPEAT:
+        return cost + 1, unbounded + 1, combinations * UNBOUNDED_REPEAT_WIDTH
+    return cost + 1, unbounded, combinations * (high - low + 1)
+
+
+@dataclass
+class RegexRule:
+    """Скомпилированное правило чата"""
+
+    pattern: str
+    compiled: re.Pattern
+    cost: int
+
+
+class RegexRuleSet:
+    """
+    Скомпилированные правила-шаблоны чата.
+    Правила компилируются по порядку, пока хватает бюджета чата; проверка сообщения ограничена по времени,
+    а правило, которое в одиночку превысило лимит, отключается
+    """
+
+    def __init__(self, patterns: Sequence[str], budget: int = DEFAULT_COMPILE_BUDGET, time_limit: float = DEFAULT_TIME_LIMIT):
+        self.source_patterns = list(patterns)  # Правила, из которых собран набор, для проверки актуальности
+        self.budget = budget
+        self.time_limit = time_limit
+        self.skipped_patterns: List[str] = []  # Некорректные или не поместившиеся в бюджет правила
+        self._rules: List[RegexRule] = []
+
+        used = 0
+        for pattern in patterns:
+            try:
+                cost = check_rule_pattern(pattern)
+            except UnsafeRegexError as e:
+                logger.warning(f"Правило '{pattern}' пропущено: {e}")
+                self.skipped_patterns.append(pattern)
+                continue
+            if used + cost > budget:
+                logger.warning(f"Правило '{pattern}' пропущено: превышен бюджет компиляции {budget}")
+                self.skipped_patterns.append(pattern)
+                continue
+            used += cost
+            self._rules.append(RegexRule(pattern, re.compile(pattern, re.IGNORECASE), cost))
+        self.used_budget = used
+
+    @property
+    def patterns(self) -> List[str]:
+        """Активные правила"""
+        return [rule.pattern for rule in self._rules]
+
+    def match(self, text: str) -> Tuple[List[str], List[str]]:
+        """Найти сработавшие правила; вернуть их и правила, отключенные за превышение лимита времени"""
+        matched: List[str] = []
+        disabled: List[RegexRule] = []
+        deadline = time.perf_counter() + self.time_limit
+        for position, rule in enumerate(self._rules):
+            start_time = time.perf_counter()
+            if rule.compiled.search(text):
+                matched.append(rule.pattern)
+
+            finish_time = time.perf_counter()
+            if finish_time - start_time > self.time_limit:
+                disabled.append(rule)
+            if finish_time > deadline and position + 1 < len(self._rules):
+                logger.warning(f"Проверка правил прервана по лимиту времени: пропущено {len(self._rules) - position - 1}")
+                break
+
+        for rule in disabled:
+            self._rules.remove(rule)
+            logger.warning(f"Правило '{rule.pattern}' отключено: проверка заняла больше {self.time_limit * 1000:.1f} мс")
+        return matched, [rule.pattern for rule in disabled]
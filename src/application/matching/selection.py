@@ -0,0 +1,108 @@
+import logging
+from typing import Dict, Optional, Sequence, Type
+
+from .aho_corasick import AhoCorasickMatcher
+from .base import Matcher
+from .regex_matchers import AlternationMatcher, RegexMatcher
+
+logger = logging.getLogger(__name__)
+
+REGEX_BACKEND = RegexMatcher.backend
+ALTERNATION_BACKEND = AlternationMatcher.backend
+AUTOMATON_BACKEND = AhoCorasickMatcher.backend
+
+# Бэкенды в порядке роста стоимости компиляции и падения стоимости поиска
+MATCHER_BACKENDS: Dict[str, Type[Matcher]] = {
+    REGEX_BACKEND: RegexMatcher,
+    ALTERNATION_BACKEND: AlternationMatcher,
+    AUTOMATON_BACKEND: AhoCorasickMatcher,
+}
+_BACKEND_ORDER = list(MATCHER_BACKENDS)
+
+
+def create_matcher(backend: str, words: Sequence[str], patterns: Optional[Sequence[str]] = None) -> Matcher:
+    """Создать и скомпилировать бэкенд поиска"""
+    matcher_class = MATCHER_BACKENDS.get(backend)
+    if matcher_class is None:
+        raise ValueError(f"Неизвестный бэкенд поиска: {backend}")
+    return matcher_class().build(words, patterns)
+
+
+class MatcherSelector:
+    """
+    Выбор бэкенда поиска для чата.
+    Начальный выбор делается по размеру словаря, а если измеренное среднее время проверки
+    превышает бюджет, чат переводится на следующий, более быстрый на поиске бэкенд
+    """
+
+    def __init__(
+        self,
+        alternation_min_words: int = 20,
+        automaton_min_words: int = 200,
+        latency_budget: float = 0.0005,
+        min_samples: int = 100,
+    ):
+        self.alternation_min_words = alternation_min_words
+        self.automaton_min_words = automaton_min_words
+        self.latency_budget = latency_budget
+        self.min_samples = min_samples
+        self._pinned: Dict[int, str] = {}  # Бэкенд, явно закрепленный за чатом
+        self._promoted: Dict[int, str] = {}  # Бэкенд, выбранный по измеренной задержке
+
+    def select(self, chat_id: int, word_count: int) -> str:
+        """Выбрать бэкенд для чата"""
+        pinned = self._pinned.get(chat_id)
+        if pinned:
+            return pinned
+
+        backend = self.select_by_size(word_count)
+        promoted = self._promoted.get(chat_id)
+        if promoted and _BACKEND_ORDER.index(promoted) > _BACKEND_ORDER.index(backend):
+            return promoted
+        return backend
+
+    def pin(self, chat_id: int, backend: Optional[str]) -> None:
+        """Закрепить бэкенд за чатом (None - выбирать автоматически)"""
+        if backend is None:
+            self._pinned.pop(chat_id, None)
+            return
+        if backend not in MATCHER_BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд поиска: {backend}")
+        self._pinned[chat_id] = backend
+
+    def observe(self, chat_id: int, matcher: Matcher) -> Optional[str]:
+        """
+        Учесть измеренную задержку бэкенда чата.
+        Возвращает новый бэкенд, если чат нужно перевести на более быстрый поиск
+        """
+        if chat_id in self._pinned or matcher.match_count < self.min_samples:
+            return None
+        if matcher.average_match_time <= self.latency_budget:
+            return None
+
+        position = _BACKEND_ORDER.index(matcher.backend)
+        if position + 1 >= len(_BACKEND_ORDER):
+            return None
+
+        backend = _BACKEND_ORDER[position + 1]
+        self._promoted[chat_id] = backend
+        logger.info(
+            f"Чат {chat_id} переведен на бэкенд поиска '{backend}': "
+            f"среднее время проверки {matcher.average_match_time * 1000:.3f} мс"
+        )
+        return backend
+
+    def forget(self, chat_id: Optional[int] = None) -> None:
+        """Сбросить выбор, сделанный по измеренной задержке"""
+        if chat_id is None:
+            self._promoted.clear()
+        else:
+            self._promoted.pop(chat_id, None)
+
+    def select_by_size(self, word_count: int) -> str:
+        """Выбрать бэкенд только по размеру словаря"""
+        if word_count >= self.automaton_min_words:
+            return AUTOMATON_BACKEND
+        if word_count >= self.alternation_min_words:
+            return ALTERNATION_BACKEND
+        return REGEX_BACKEND
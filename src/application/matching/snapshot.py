@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Optional, Sequence, Tuple
+
+from .base import Matcher
+
+logger = logging.getLogger(__name__)
+
+# Версия формата: увеличивается при любом изменении структур бэкендов поиска или нормализации,
+# после чего снимки предыдущих версий просто игнорируются
+SNAPSHOT_FORMAT_VERSION = 3
+_MAGIC = b"TABSNAP"
+_HEADER = struct.Struct("<7sHI")  # сигнатура, версия формата, длина оглавления
+
+
+def dictionary_hash(words: Sequence[str], allowed: Sequence[str] = ()) -> str:
+    """Хэш словаря чата и разрешенных фрагментов, по которому проверяется актуальность записи снимка"""
+    source = "\n".join(words)
+    if allowed:
+        source += "\0" + "\n".join(allowed)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class MatcherSnapshot:
+    """
+    Снимок скомпилированных бэкендов поиска на диске.
+    Файл отображается в память, при открытии читается только оглавление, а бэкенд чата
+    восстанавливается при первом обращении. Снимок пишет и читает только сам бот,
+    поэтому файл должен лежать в каталоге, недоступном для записи посторонним
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._index: Dict[Tuple[int, str], Tuple[str, int, int]] = {}  # (чат, бэкенд) -> (хэш, смещение, длина)
+        self._preloaded: Dict[Tuple[int, str], Matcher] = {}  # Записи, восстановленные заранее
+        self.loaded_count = 0
+        self.rejected_count = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def open(self) -> "MatcherSnapshot":
+        """Отобразить файл снимка в память и прочитать оглавление"""
+        self.close()
+        try:
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+                raise ValueError("файл слишком короткий")
+
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_length = _HEADER.unpack_from(self._mmap, 0)
+            if magic != _MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"неподдерживаемый формат (версия {version})")
+
+            data_start = _HEADER.size + index_length
+            index = json.loads(self._mmap[_HEADER.size : data_start].decode("utf-8"))
+            self._index = {
+                (int(chat_id), backend): (words_hash, data_start + offset, length)
+                for chat_id, backend, words_hash, offset, length in index
+            }
+            logger.info(f"Открыт снимок бэкендов поиска {self.path}: {len(self._index)} записей")
+        except FileNotFoundError:
+            self.close()
+        except Exception as e:
+            logger.warning(f"Снимок бэкендов поиска {self.path} не загружен: {e}")
+            self.close()
+        return self
+
+    def close(self) -> None:
+        """Закрыть отображение файла"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index = {}
+        self._preloaded = {}
+
+    def preload(self) -> int:
+        """
+        Восстановить все записи снимка заранее, не дожидаясь обращений (например, при запуске процесса-обработчика).
+        Актуальность записи по-прежнему проверяется при обращении. Возвращает количество восстановленных записей
+        """
+        for (chat_id, backend), (_, offset, length) in self._index.items():
+            if (chat_id, backend) not in self._preloaded:
+                matcher = self._restore(chat_id, offset, length)
+                if matcher is not None:
+                    self._preloaded[(chat_id, backend)] = matcher
+        return len(self._preloaded)
+
+    def load(self, chat_id: int, backend: str, words: Sequence[str], allowed: Sequence[str] = ()) -> Optional[Matcher]:
+        """Восстановить бэкенд чата, если он построен по тому же словарю и тем же разрешенным фрагментам"""
+        # Запись нужна только один раз: дальше бэкенд живет в кэше
+        entry = self._index.pop((chat_id, backend), None)
+        matcher = self._preloaded.pop((chat_id, backend), None)
+        if entry is None or self._mmap is None:
+            return None
+
+        words_hash, offset, length = entry
+        if words_hash != dictionary_hash(words, allowed):
+            self.rejected_count += 1
+            return None
+
+        if matcher is None:
+            matcher = self._restore(chat_id, offset, length)
+            if matcher is None:
+                return None
+
+        self.loaded_count += 1
+        return matcher
+
+    def _restore(self, chat_id: int, offset: int, length: int) -> Optional[Matcher]:
+        try:
+            matcher: Matcher = pickle.loads(self._mmap[offset : offset + length])
+            return matcher
+        except Exception as e:
+            logger.warning(f"Не удалось восстановить бэкенд поиска чата {chat_id} из снимка: {e}")
+            return None
+
+    @staticmethod
+    def write(path: str, entries: Iterable[Tuple[int, Matcher]]) -> int:
+        """Атомарно записать снимок бэкендов поиска, вернуть количество записей"""
+        index = []
+        blobs = []
+        offset = 0
+        for chat_id, matcher in entries:
+            if matcher.pending_changes:
+                matcher.compact()
+            blob = pickle.dumps(matcher, protocol=pickle.HIGHEST_PROTOCOL)
+            index.append((chat_id, matcher.backend, dictionary_hash(matcher.words, matcher.allowed), offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+
+        index_data = json.dumps(index).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(_HEADER.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, len(index_data)))
+                file.write(index_data)
+                for blob in blobs:
+                    file.write(blob)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return len(index)
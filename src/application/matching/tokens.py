@@ -0,0 +1,16 @@
+import re
+from typing import List
+
+# Токен - максимальная последовательность словесных символов, как между границами \b
+TOKEN_PATTERN = re.compile(r"\w+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбить нормализованный текст на токены за один проход"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Свести пробелы, табуляции и переводы строк между словами к одному пробелу, как при разбиении на токены"""
+    return _WHITESPACE.sub(" ", text).strip()
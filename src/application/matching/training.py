@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from .classifier import DEFAULT_NUM_FEATURES, DEFAULT_THRESHOLD, SpamClassifier, vectorize
+from .normalization import TextNormalizer
+
+try:
+    import numpy as np
+except ImportError:  # Обучение доступно только вместе с классификатором
+    np = None
+
+DEFAULT_LEARNING_RATE = 0.5
+# Коэффициент L2-регуляризации: не дает редким признакам получить огромные веса
+DEFAULT_L2 = 1e-6
+
+
+@dataclass
+class TrainingStats:
+    """Качество модели на пройденных пачках: оценка каждой пачки делается до обновления весов"""
+
+    messages: int = 0
+    spam: int = 0
+    true_positives: int = 0
+    false_positives: int = 0
+    false_negatives: int = 0
+
+    @property
+    def precision(self) -> float:
+        found = self.true_positives + self.false_positives
+        return self.true_positives / found if found else 0.0
+
+    @property
+    def recall(self) -> float:
+        return self.true_positives / self.spam if self.spam else 0.0
+
+
+class SpamTrainer:
+    """
+    Обучение логистической регрессии на хэшированных признаках по пачкам текстов.
+    Каждая пачка - один шаг градиентного спуска, поэтому обучающая выборка может читаться потоком
+    и целиком в памяти не держится; в памяти только вектор весов
+    """
+
+    def __init__(
+        self,
+        num_features: int = DEFAULT_NUM_FEATURES,
+        learning_rate: float = DEFAULT_LEARNING_RATE,
+        l2: float = DEFAULT_L2,
+        normalizer: Optional[TextNormalizer] = None,
+    ):
+        if np is None:
+            raise RuntimeError("Для обучения классификатора спама нужен пакет numpy")
+        if num_features < 2 or num_features & (num_features - 1):
+            raise ValueError("Число корзин признаков должно быть степенью двойки")
+        self.num_features = num_features
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.weights = np.zeros(num_features, dtype=np.float64)
+        self.bias = 0.0
+        self.stats = TrainingStats()
+        self._normalizer = normalizer or TextNormalizer()
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence[bool], threshold: float = DEFAULT_THRESHOLD) -> None:
+        """Сделать шаг обучения по пачке текстов с метками (True - спам)"""
+        if not texts:
+            return
+        targets = np.asarray(labels, dtype=np.float64)
+        rows, columns, scale = vectorize(texts, self.num_features, self._normalizer)
+        values = scale[rows]
+
+        logits = np.bincount(rows, weights=self.weights[columns] * values, minlength=len(texts)) + self.bias
+        probabilities = 1 / (1 + np.exp(-logits))
+        self._update_stats(probabilities >= threshold, targets > 0)
+
+        errors = probabilities - targets
+        gradient = np.bincount(columns, weights=errors[rows] * values, minlength=self.num_features) / len(texts)
+        self.weights -= self.learning_rate * (gradient + self.l2 * self.weights)
+        self.bias -= self.learning_rate * float(errors.mean())
+
+    def _update_stats(self, predicted: "np.ndarray", actual: "np.ndarray") -> None:
+        self.stats.messages += len(actual)
+        self.stats.spam += int(actual.sum())
+        self.stats.true_positives += int((predicted & actual).sum())
+        self.stats.false_positives += int((predicted & ~actual).sum())
+        self.stats.false_negatives += int((~predicted & actual).sum())
+
+    def classifier(self, threshold: float = DEFAULT_THRESHOLD) -> SpamClassifier:
+        """Классификатор с текущими весами"""
+        return SpamClassifier(self.weights.astype(np.float32), self.bias, threshold, self._normalizer)
+
+    def save(self, path: str, threshold: float = DEFAULT_THRESHOLD) -> None:
+        """Записать модель в файл, который бот загружает командой /reload_model или при запуске"""
+        SpamClassifier.write(path, self.weights, self.bias, threshold)
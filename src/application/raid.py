@@ -0,0 +1,79 @@
+import time
+from array import array
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Рейд - не меньше DEFAULT_RAID_JOIN_LIMIT вступлений за DEFAULT_RAID_WINDOW секунд
+DEFAULT_RAID_JOIN_LIMIT = 10
+DEFAULT_RAID_WINDOW = 60
+# Сколько длится режим рейда после последнего всплеска вступлений, секунды
+DEFAULT_RAID_DURATION = 600
+# Окно делится на столько интервалов-корзин: счетчик вступлений обновляется за O(1)
+BUCKETS = 10
+# Последние вступившие в чате: одно вступление приходит и как chat_member, и как new_chat_members
+RECENT_JOINS = 64
+
+
+class ChatJoins:
+    """Счетчики вступлений в чат по временным корзинам"""
+
+    __slots__ = ("counts", "bucket_ids", "raid_until", "recent")
+
+    def __init__(self):
+        self.counts = array("l", [0] * BUCKETS)
+        self.bucket_ids = array("q", [-1] * BUCKETS)  # Номер интервала, который сейчас считает корзина
+        self.raid_until = 0.0
+        self.recent: Deque[int] = deque(maxlen=RECENT_JOINS)
+
+
+class RaidDetector:
+    """
+    Обнаружение рейдов - массовых вступлений в чат.
+    Окно делится на BUCKETS корзин; вступление увеличивает счетчик своей корзины, а устаревшая корзина
+    обнуляется при повторном использовании. Пока рейда нет, о вступивших пользователях ничего не хранится,
+    кроме короткой очереди последних идентификаторов для отсева повторных уведомлений
+    """
+
+    def __init__(
+        self,
+        join_limit: int = DEFAULT_RAID_JOIN_LIMIT,
+        window: float = DEFAULT_RAID_WINDOW,
+        duration: float = DEFAULT_RAID_DURATION,
+    ):
+        if join_limit < 1:
+            raise ValueError("Порог вступлений должен быть положительным")
+        self.join_limit = join_limit
+        self.window = window
+        self.duration = duration
+        self._bucket_seconds = window / BUCKETS
+        self._chats: Dict[int, ChatJoins] = {}
+
+    def record_join(self, chat_id: int, user_id: int, now: Optional[float] = None) -> bool:
+        """Учесть вступление пользователя. Возвращает True, если в чате режим рейда и вступившего нужно ограничить"""
+        now = time.monotonic() if now is None else now
+        joins = self._chats.get(chat_id)
+        if joins is None:
+            joins = self._chats[chat_id] = ChatJoins()
+
+        if user_id in joins.recent:
+            return False
+        joins.recent.append(user_id)
+
+        bucket_id = int(now // self._bucket_seconds)
+        index = bucket_id % BUCKETS
+        if joins.bucket_ids[index] != bucket_id:
+            joins.bucket_ids[index] = bucket_id
+            joins.counts[index] = 0
+        joins.counts[index] += 1
+
+        total = sum(count for count, bucket in zip(joins.counts, joins.bucket_ids) if bucket > bucket_id - BUCKETS)
+        if total >= self.join_limit:
+            # Каждый всплеск продлевает режим рейда
+            joins.raid_until = now + self.duration
+        return now < joins.raid_until
+
+    def is_raid(self, chat_id: int, now: Optional[float] = None) -> bool:
+        """Проверить, действует ли в чате режим рейда"""
+        now = time.monotonic() if now is None else now
+        joins = self._chats.get(chat_id)
+        return joins is not None and now < joins.raid_until
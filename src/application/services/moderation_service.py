@@ -1,8 +1,16 @@
 import logging
+import random
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence
+
+import asyncio
 
 from application.enhanced_config import EnhancedModerationConfig
+from application.flood import FLOOD_MUTE_AFTER, FloodDetector
+from application.matching.classifier import SpamClassifier
+from application.matching.duplicates import DuplicateDetector, Signature
+from application.matching.features import extract_features, FEATURE_VIOLATIONS, FeatureRule
+from application.raid import RaidDetector
 from domain.entities.message import Message
 from domain.entities.user import User
 from domain.exceptions import UserAlreadyBannedError, UserAlreadyMutedError, UserNotBannedError, UserNotMutedError
@@ -12,35 +20,230 @@ from infrastructure.monitoring import database_time_it, metrics, time_it
 
 logger = logging.getLogger(__name__)
 
+# Нарушение, которым помечаются копии известной рассылки, найденные без проверки по словарям
+DUPLICATE_SPAM = "повтор рассылки"
+# Нарушение, за которое пользователь предупреждается при превышении частоты сообщений
+FLOOD = "флуд"
+# Нарушение, найденное классификатором спама, а не словарями
+CLASSIFIED_SPAM = "спам по оценке модели"
+# Нарушения, найденные не по словарям, шаблонам и ссылкам: такие сообщения не подходят как примеры спама
+# для обучения модели (модель училась бы на собственных оценках и на грубых эвристиках)
+HEURISTIC_VIOLATIONS = frozenset({DUPLICATE_SPAM, FLOOD, CLASSIFIED_SPAM}) | FEATURE_VIOLATIONS
+
 
 class TelegramModerationService(ModerationService):
     def __init__(
-        self, user_repository: UserRepository, message_repository: MessageRepository, config: EnhancedModerationConfig
+        self,
+        user_repository: UserRepository,
+        message_repository: MessageRepository,
+        config: EnhancedModerationConfig,
+        duplicate_detector: Optional[DuplicateDetector] = None,
+        flood_detector: Optional[FloodDetector] = None,
+        raid_detector: Optional[RaidDetector] = None,
+        feature_rules: Optional[Sequence[FeatureRule]] = None,
+        classifier: Optional[SpamClassifier] = None,
+        classifier_path: Optional[str] = None,
+        clean_sample_rate: float = 0.0,
     ):
         self.user_repository = user_repository
         self.message_repository = message_repository
         self.config = config
+        self.duplicate_detector = duplicate_detector  # Поиск рассылок по всем чатам (None - отключен)
+        self.flood_detector = flood_detector  # Ограничение частоты сообщений (None - отключено)
+        self.raid_detector = raid_detector  # Обнаружение массовых вступлений (None - отключено)
+        self.feature_rules = list(feature_rules or [])  # Эвристики по признакам текста
+        self.classifier = classifier  # Классификатор спама (None - только словари)
+        self.classifier_path = classifier_path  # Файл модели для перезагрузки
+        self.clean_sample_rate = clean_sample_rate  # Доля чистых сообщений, сохраняемых для обучения модели
 
     @time_it
     async def check_message(self, message: Message) -> List[str]:
         """Проверить сообщение на нарушения и вернуть список найденных запрещенных слов"""
         metrics.increment_messages_processed(message.chat_id)
 
-        violation_words = await self.config.check_text(message.chat_id, message.text)
+        signature = self._duplicate_signature(message)
+        if signature is not None and self.duplicate_detector.observe(signature, message.chat_id):
+            # Копия известной рассылки: словари не проверяем
+            metrics.increment_duplicates_detected(message.chat_id)
+            violation_words = [DUPLICATE_SPAM]
+        else:
+            violation_words = await self.config.check_text(message.chat_id, message.text)
+            if message.links:
+                violation_words = violation_words + await self.config.check_links(message.chat_id, message.links)
+            violation_words = violation_words + self._check_features(message.text)
+            if not violation_words and self._classify(message.chat_id, [message.text])[0]:
+                violation_words = [CLASSIFIED_SPAM]
+            if violation_words and signature is not None:
+                self.duplicate_detector.flag(signature)
         if violation_words:
-            metrics.increment_violations_detected(message.chat_id)
-            logger.info(f"Обнаружены нарушения в сообщении {message.message_id}: {violation_words}")
-            message.contains_violations = True
-            message.violation_words = violation_words
-            await self.message_repository.save(message)
+            await self._handle_violation(message, violation_words)
+        else:
+            await self._sample_clean(message)
 
-            user = await self.user_repository.get_by_id(message.user_id, message.chat_id)
-            if user is None:
-                user = User(message.user_id, message.chat_id)
+        return violation_words
 
-            await self.warn_user(user, violation_words)
+    @time_it
+    async def check_messages(self, messages: List[Message]) -> List[List[str]]:
+        """
+        Проверить пачку сообщений (медиагруппа, накопившиеся обновления, история) и вернуть
+        списки найденных запрещенных слов в порядке сообщений. Сообщения одного чата проверяются одним вызовом
+        """
+        positions_by_chat: Dict[int, List[int]] = {}
+        for position, message in enumerate(messages):
+            positions_by_chat.setdefault(message.chat_id, []).append(position)
 
-        return violation_words
+        results: List[List[str]] = [[] for _ in messages]
+        signatures = [self._duplicate_signature(message) for message in messages]
+        for chat_id, positions in positions_by_chat.items():
+            metrics.increment_messages_processed(chat_id, count=len(positions))
+            await self._check_chat_batch(chat_id, messages, signatures, positions, results)
+
+        # Нарушения обрабатываем в исходном порядке, чтобы предупреждения шли как сообщения
+        for message, violation_words in zip(messages, results):
+            if violation_words:
+                await self._handle_violation(message, violation_words)
+            else:
+                await self._sample_clean(message)
+
+        return results
+
+    async def _check_chat_batch(
+        self,
+        chat_id: int,
+        messages: List[Message],
+        signatures: List[Optional[Signature]],
+        positions: List[int],
+        results: List[List[str]],
+    ) -> None:
+        """Проверить сообщения одного чата из пачки и записать нарушения в results по их позициям"""
+        # Копии известной рассылки помечаются сразу, остальные сообщения чата проверяются одним вызовом
+        checked_positions = []
+        for position in positions:
+            signature = signatures[position]
+            if signature is not None and self.duplicate_detector.observe(signature, chat_id):
+                metrics.increment_duplicates_detected(chat_id)
+                results[position] = [DUPLICATE_SPAM]
+            else:
+                checked_positions.append(position)
+        if not checked_positions:
+            return
+
+        chat_results = await self.config.check_texts(chat_id, [messages[position].text for position in checked_positions])
+        for position, violation_words in zip(checked_positions, chat_results):
+            links = messages[position].links
+            if links:
+                violation_words = violation_words + await self.config.check_links(chat_id, links)
+            results[position] = violation_words + self._check_features(messages[position].text)
+
+        # Сообщения без нарушений по словарям оцениваются классификатором одной пачкой
+        unresolved = [position for position in checked_positions if not results[position]]
+        spam_flags = self._classify(chat_id, [messages[position].text for position in unresolved])
+        for position, is_spam in zip(unresolved, spam_flags):
+            if is_spam:
+                results[position] = [CLASSIFIED_SPAM]
+        for position in checked_positions:
+            if results[position] and signatures[position] is not None:
+                self.duplicate_detector.flag(signatures[position])
+
+    async def check_flood(self, chat_id: int, user_id: int) -> int:
+        """
+        Учесть сообщение пользователя для защиты от флуда. При превышении частоты выдается предупреждение,
+        а при повторном превышении пользователь заглушается. Возвращает номер нарушения (0 - флуда нет)
+        """
+        if self.flood_detector is None:
+            return 0
+        breaches = self.flood_detector.record(chat_id, user_id)
+        if not breaches:
+            return 0
+
+        metrics.increment_floods_detected(chat_id)
+        logger.info(f"Флуд от пользователя {user_id} в чате {chat_id}, нарушение {breaches}")
+        user = await self.user_repository.get_by_id(user_id, chat_id)
+        if user is None:
+            user = User(user_id, chat_id)
+
+        await self.warn_user(user, [FLOOD])
+        if breaches >= FLOOD_MUTE_AFTER and not user.is_banned:
+            try:
+                await self.mute_user(user)
+            except UserAlreadyMutedError:
+                pass
+        return breaches
+
+    def register_join(self, chat_id: int, user_id: int) -> bool:
+        """
+        Учесть вступление пользователя в чат для защиты от рейдов.
+        Возвращает True, если в чате режим рейда и вступившего нужно ограничить
+        """
+        if self.raid_detector is None:
+            return False
+        metrics.increment_joins_recorded(chat_id)
+        was_raid = self.raid_detector.is_raid(chat_id)
+        restrict = self.raid_detector.record_join(chat_id, user_id)
+        if restrict and not was_raid:
+            metrics.increment_raids_detected(chat_id)
+            logger.warning(f"Массовые вступления в чат {chat_id}: включен режим рейда")
+        return restrict
+
+    async def load_classifier(self, path: Optional[str] = None) -> bool:
+        """
+        Загрузить модель классификатора из файла (по умолчанию - из classifier_path) и заменить ею текущую.
+        Проверки, начатые до замены, доходят со старой моделью; при ошибке загрузки текущая модель остается в работе
+        """
+        path = path or self.classifier_path
+        if not path:
+            return False
+        self.classifier_path = path
+        try:
+            classifier = await asyncio.to_thread(SpamClassifier.load, path)
+        except Exception as e:
+            logger.warning(f"Модель классификатора спама {path} не загружена: {e}")
+            return False
+        self.classifier = classifier
+        logger.info(f"Загружена модель классификатора спама {path}: {classifier.num_features} признаков")
+        return True
+
+    async def _sample_clean(self, message: Message) -> None:
+        """Сохранить случайную долю чистых сообщений в обучающую выборку модели, отдельно от таблицы сообщений"""
+        if message.text and self.clean_sample_rate > 0 and random.random() < self.clean_sample_rate:
+            await self.message_repository.save_training_sample(message)
+
+    def _classify(self, chat_id: int, texts: List[str]) -> List[bool]:
+        """Оценить пачку текстов чата классификатором; пустые тексты спамом не считаются"""
+        # Модель берется один раз: замена во время оценки пачки на нее не влияет
+        classifier = self.classifier
+        if classifier is None or not texts:
+            return [False] * len(texts)
+        flags = [is_spam and bool(text) for text, is_spam in zip(texts, classifier.predict(texts))]
+        metrics.increment_spam_classified(chat_id, count=sum(flags))
+        return flags
+
+    def _check_features(self, text: str) -> List[str]:
+        """Вычислить признаки текста один раз и проверить их всеми эвристиками"""
+        if not self.feature_rules or not text:
+            return []
+        features = extract_features(text)
+        return [violation for violation in (rule(features) for rule in self.feature_rules) if violation]
+
+    def _duplicate_signature(self, message: Message) -> Optional[Signature]:
+        """Подпись сообщения для поиска рассылок; None, если поиск отключен или сообщение слишком короткое"""
+        if self.duplicate_detector is None or not message.text:
+            return None
+        return self.duplicate_detector.signature(message.text)
+
+    async def _handle_violation(self, message: Message, violation_words: List[str]) -> None:
+        """Сохранить сообщение с нарушением и выдать предупреждение автору"""
+        metrics.increment_violations_detected(message.chat_id)
+        logger.info(f"Обнаружены нарушения в сообщении {message.message_id}: {violation_words}")
+        message.contains_violations = True
+        message.violation_words = violation_words
+        await self.message_repository.save(message)
+
+        user = await self.user_repository.get_by_id(message.user_id, message.chat_id)
+        if user is None:
+            user = User(message.user_id, message.chat_id)
+
+        await self.warn_user(user, violation_words)
 
     @database_time_it
     async def warn_user(self, user: User, violation_words: List[str]) -> None:
@@ -132,20 +335,85 @@ class TelegramModerationService(ModerationService):
         await self.config.set_warnings_limit(chat_id, limit)
 
     async def add_forbidden_word(self, word: str) -> None:
-        """Добавить запрещенное слово"""
+        """Добавить запрещенное слово в общий словарь всех чатов"""
         logger.info(f"Добавление запрещенного слова: {word}")
-        await self.config.add_forbidden_word(word)
+        await self.config.add_global_forbidden_word(word)
 
     async def remove_forbidden_word(self, word: str) -> bool:
-        """Удалить запрещенное слово. Возвращает True если слово было удалено"""
+        """Удалить запрещенное слово из общего словаря. Возвращает True если слово было удалено"""
         logger.info(f"Удаление запрещенного слова: {word}")
-        return await self.config.remove_forbidden_word(word)
+        return await self.config.remove_global_forbidden_word(word)
 
     async def get_forbidden_words(self) -> List[str]:
-        """Получить список всех запрещенных слов"""
-        return await self.config.get_forbidden_words()
+        """Получить список всех запрещенных слов общего словаря"""
+        return await self.config.get_global_forbidden_words()
 
     async def clear_forbidden_words(self) -> None:
-        """Очистить весь список запрещенных слов"""
+        """Очистить весь общий словарь запрещенных слов"""
         logger.warning("Очистка всех запрещенных слов")
-        await self.config.clear_forbidden_words()
+        await self.config.clear_global_forbidden_words()
+
+    async def exclude_forbidden_word(self, chat_id: int, word: str) -> None:
+        """Отключить слово общего словаря в конкретном чате"""
+        logger.info(f"Отключение слова общего словаря '{word}' для чата {chat_id}")
+        await self.config.exclude_forbidden_word(chat_id, word)
+
+    async def include_forbidden_word(self, chat_id: int, word: str) -> bool:
+        """Снова включить слово общего словаря в чате. Возвращает True если слово было отключено"""
+        logger.info(f"Включение слова общего словаря '{word}' для чата {chat_id}")
+        return await self.config.include_forbidden_word(chat_id, word)
+
+    async def add_allowed_word(self, chat_id: int, word: str) -> None:
+        """Добавить разрешенный фрагмент в чат"""
+        logger.info(f"Добавление разрешенного фрагмента '{word}' для чата {chat_id}")
+        await self.config.add_allowed_word(chat_id, word)
+
+    async def remove_allowed_word(self, chat_id: int, word: str) -> bool:
+        """Удалить разрешенный фрагмент чата. Возвращает True если фрагмент был удален"""
+        logger.info(f"Удаление разрешенного фрагмента '{word}' для чата {chat_id}")
+        return await self.config.remove_allowed_word(chat_id, word)
+
+    async def get_allowed_words(self, chat_id: int) -> List[str]:
+        """Получить разрешенные фрагменты чата"""
+        return await self.config.get_allowed_words(chat_id)
+
+    async def set_fuzzy_matching(self, chat_id: int, enabled: bool) -> None:
+        """Включить или выключить нечеткий поиск запрещенных слов в чате"""
+        logger.info(f"{'Включение' if enabled else 'Выключение'} нечеткого поиска для чата {chat_id}")
+        await self.config.set_fuzzy_matching(chat_id, enabled)
+
+    async def is_fuzzy_matching_enabled(self, chat_id: int) -> bool:
+        """Проверить, включен ли нечеткий поиск в чате"""
+        return await self.config.is_fuzzy_matching_enabled(chat_id)
+
+    async def add_regex_rule(self, chat_id: int, pattern: str) -> None:
+        """Добавить правило-шаблон в чат. Небезопасный шаблон вызывает UnsafeRegexError"""
+        logger.info(f"Добавление правила '{pattern}' для чата {chat_id}")
+        await self.config.add_regex_rule(chat_id, pattern)
+
+    async def remove_regex_rule(self, chat_id: int, pattern: str) -> bool:
+        """Удалить правило-шаблон чата. Возвращает True если правило было удалено"""
+        logger.info(f"Удаление правила '{pattern}' для чата {chat_id}")
+        return await self.config.remove_regex_rule(chat_id, pattern)
+
+    async def get_regex_rules(self, chat_id: int) -> List[Dict[str, Any]]:
+        """Получить правила-шаблоны чата"""
+        return await self.config.get_regex_rules(chat_id)
+
+    async def add_link_rule(self, chat_id: int, rule: str) -> None:
+        """Добавить правило для ссылок или упоминаний. Некорректное правило вызывает InvalidLinkRuleError"""
+        logger.info(f"Добавление правила для ссылок '{rule}' для чата {chat_id}")
+        await self.config.add_link_rule(chat_id, rule)
+
+    async def remove_link_rule(self, chat_id: int, rule: str) -> bool:
+        """Удалить правило для ссылок или упоминаний. Возвращает True если правило было удалено"""
+        logger.info(f"Удаление правила для ссылок '{rule}' для чата {chat_id}")
+        return await self.config.remove_link_rule(chat_id, rule)
+
+    async def get_link_rules(self, chat_id: int) -> List[str]:
+        """Получить правила чата для ссылок и упоминаний"""
+        return await self.config.get_link_rules(chat_id)
+
+    async def get_rule_stats(self, chat_id: int) -> Dict[str, Any]:
+        """Получить статистику срабатываний правил и времени поиска в чате"""
+        return await self.config.get_rule_stats(chat_id)
@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 
 @dataclass
@@ -35,6 +35,16 @@ class ModerationConfig:
 
     default_warnings_limit: int
     enable_auto_ban: bool
+    duplicate_threshold: int = 0  # Копий в разных чатах, после которых сообщение считается рассылкой (0 - отключено)
+    duplicate_window: int = 600  # Окно учета копий, секунды
+    flood_limit: int = 5  # Больше стольких сообщений за flood_interval - флуд (0 - отключено)
+    flood_interval: float = 3.0  # Секунды
+    raid_join_limit: int = 10  # Вступлений за raid_window, после которых включается режим рейда (0 - отключено)
+    raid_window: int = 60  # Секунды
+    raid_duration: int = 600  # Сколько длится режим рейда после последнего всплеска, секунды
+    spam_model_path: Optional[str] = None  # Файл модели классификатора спама (None - только словари)
+    clean_sample_rate: float = 0.0  # Доля чистых сообщений, сохраняемых для обучения модели (0 - не сохранять)
+    feature_rules: Tuple[str, ...] = ()  # Эвристики по признакам текста (пусто - отключены)
 
     @classmethod
     def create_default(cls) -> "ModerationConfig":
@@ -48,6 +58,13 @@ class PerformanceConfig:
 
     cache_ttl: int
     patterns_cache_size: int
+    matcher_snapshot_path: Optional[str] = None
+    check_offload_workers: int = 0
+    check_offload_threshold: int = 4096
+    rule_stats_flush_interval: int = 60
+    message_batch_size: int = 100
+    message_flush_interval: float = 1.0
+    message_buffer_limit: int = 10_000
 
 
 @dataclass
@@ -105,10 +122,28 @@ class AppConfig:
         moderation = ModerationConfig(
             default_warnings_limit=int(os.getenv("DEFAULT_WARNINGS_LIMIT", "3")),
             enable_auto_ban=os.getenv("ENABLE_AUTO_BAN", "true").lower() == "true",
+            duplicate_threshold=int(os.getenv("DUPLICATE_THRESHOLD", "0")),
+            duplicate_window=int(os.getenv("DUPLICATE_WINDOW", "600")),
+            flood_limit=int(os.getenv("FLOOD_LIMIT", "5")),
+            flood_interval=float(os.getenv("FLOOD_INTERVAL", "3")),
+            raid_join_limit=int(os.getenv("RAID_JOIN_LIMIT", "10")),
+            raid_window=int(os.getenv("RAID_WINDOW", "60")),
+            raid_duration=int(os.getenv("RAID_DURATION", "600")),
+            spam_model_path=os.getenv("SPAM_MODEL_PATH") or None,
+            clean_sample_rate=float(os.getenv("CLEAN_SAMPLE_RATE", "0")),
+            feature_rules=tuple(name.strip() for name in os.getenv("FEATURE_RULES", "").split(",") if name.strip()),
         )
 
         performance = PerformanceConfig(
-            cache_ttl=int(os.getenv("CACHE_TTL", "3600")), patterns_cache_size=int(os.getenv("PATTERNS_CACHE_SIZE", "1000"))
+            cache_ttl=int(os.getenv("CACHE_TTL", "3600")),
+            patterns_cache_size=int(os.getenv("PATTERNS_CACHE_SIZE", "1000")),
+            matcher_snapshot_path=os.getenv("MATCHER_SNAPSHOT_PATH") or None,
+            check_offload_workers=int(os.getenv("CHECK_OFFLOAD_WORKERS", "0")),
+            check_offload_threshold=int(os.getenv("CHECK_OFFLOAD_THRESHOLD", "4096")),
+            rule_stats_flush_interval=int(os.getenv("RULE_STATS_FLUSH_INTERVAL", "60")),
+            message_batch_size=int(os.getenv("MESSAGE_BATCH_SIZE", "100")),
+            message_flush_interval=float(os.getenv("MESSAGE_FLUSH_INTERVAL", "1")),
+            message_buffer_limit=int(os.getenv("MESSAGE_BUFFER_LIMIT", "10000")),
         )
 
         return cls(
@@ -11,7 +11,10 @@ class Message:
     timestamp: datetime
     contains_violations: bool = False
     violation_words: list[str] = None
+    links: list[str] = None  # Домены ссылок и упоминания (@username) из разметки сообщения
 
     def __post_init__(self):
         if self.violation_words is None:
             self.violation_words = []
+        if self.links is None:
+            self.links = []
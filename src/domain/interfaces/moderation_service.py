@@ -11,6 +11,11 @@ class ModerationService(ABC):
         """Check message for violations and return list of found forbidden words"""
         pass
 
+    @abstractmethod
+    async def check_messages(self, messages: List[Message]) -> List[List[str]]:
+        """Check a batch of messages and return found forbidden words for each message in order"""
+        pass
+
     @abstractmethod
     async def warn_user(self, user: User, violation_words: List[str]) -> None:
         """Issue a warning to a user for using forbidden words"""
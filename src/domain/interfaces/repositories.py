@@ -24,6 +24,11 @@ class MessageRepository(ABC):
     async def save(self, message: Message) -> None:
         pass
 
+    @abstractmethod
+    async def save_training_sample(self, message: Message) -> None:
+        """Сохранить чистое сообщение в обучающую выборку классификатора"""
+        pass
+
     @abstractmethod
     async def get_user_violations(self, user_id: int, chat_id: int) -> List[Message]:
         pass
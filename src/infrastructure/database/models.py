@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, JSON, String, Table, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, JSON, String, Table, Text, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -84,3 +84,68 @@ class ChatConfigModel(Base):
     chat_id = Column(Integer, unique=True, nullable=False)
     warnings_limit = Column(Integer, default=3)
     forbidden_words = Column(JSON, nullable=False, default=list)
+    # Слова общего словаря, которые в этом чате не считаются запрещенными
+    excluded_words = Column(JSON, nullable=False, default=list)
+    # Правила-шаблоны чата: [{"pattern": шаблон, "enabled": включено ли правило}]
+    regex_rules = Column(JSON, nullable=False, default=list)
+    # Правила для ссылок и упоминаний: casino.xyz, *.casino.xyz, @username
+    link_rules = Column(JSON, nullable=False, default=list)
+    # Разрешенные фрагменты: вхождения запрещенных слов внутри них не считаются нарушением
+    allowed_words = Column(JSON, nullable=False, default=list)
+    # Нечеткий поиск запрещенных слов: опечатки и замены букв цифрами
+    fuzzy_matching = Column(Boolean, nullable=False, default=False)
+
+
+class BotSettingModel(Base):
+    __tablename__ = "bot_settings"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(100), unique=True, nullable=False)
+    value = Column(Text, nullable=True)
+    value_type = Column(String(20), nullable=False, default="string")  # string, int, bool, json
+    description = Column(Text, nullable=True)
+    is_sensitive = Column(Boolean, nullable=False, default=False)
+    updated_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BotSettingModel(key={self.key}, value_type={self.value_type})>"
+
+
+class RuleStatModel(Base):
+    """Накопленные срабатывания правила (запрещенного слова или шаблона) в чате"""
+
+    __tablename__ = "rule_stats"
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(Integer, nullable=False)
+    rule = Column(String(200), nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_hit_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (UniqueConstraint("chat_id", "rule", name="uq_rule_stats_chat_rule"),)
+
+
+class ChatMatchStatModel(Base):
+    """Накопленное время поиска запрещенных слов в чате"""
+
+    __tablename__ = "chat_match_stats"
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(Integer, unique=True, nullable=False)
+    check_count = Column(Integer, nullable=False, default=0)
+    match_time = Column(Float, nullable=False, default=0.0)  # секунды
+
+
+class TrainingSampleModel(Base):
+    """Чистое сообщение из случайной выборки для обучения классификатора спама (хранится отдельно от messages)"""
+
+    __tablename__ = "training_samples"
+
+    id = Column(Integer, primary_key=True)
+    message_id = Column(Integer, nullable=False)
+    chat_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    text = Column(String, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow)
@@ -3,7 +3,7 @@ import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Deque, Dict
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +22,42 @@ class Metrics:
     warnings_issued: int = 0
     commands_executed: int = 0
     database_errors: int = 0
+    regex_rules_disabled: int = 0
+    unchanged_edits_skipped: int = 0
+    duplicates_detected: int = 0
+    floods_detected: int = 0
+    # Вступления в чаты, начала режима рейда и вступившие, ограниченные во время рейда
+    joins_recorded: int = 0
+    raids_detected: int = 0
+    raid_restrictions: int = 0
+    # Сообщения, признанные спамом классификатором
+    spam_classified: int = 0
+
+    # Предварительный фильтр сообщений перед точным поиском запрещенных слов
+    prefilter_checks: int = 0
+    prefilter_skips: int = 0
+    prefilter_false_positives: int = 0
+
+    # Кэш скомпилированных бэкендов поиска
+    pattern_cache_hits: int = 0
+    pattern_cache_misses: int = 0
+    pattern_cache_evictions: int = 0
+
+    # Проверки, отправленные в пул процессов
+    offloaded_checks: int = 0
+    offload_queue_depth: int = 0
+
+    # Отложенная запись сообщений в БД
+    message_flushes: int = 0
+    messages_flushed: int = 0
+    message_buffer_size: int = 0
 
     # Временные метрики
-    response_times: deque = field(default_factory=lambda: deque(maxlen=1000))
-    database_query_times: deque = field(default_factory=lambda: deque(maxlen=1000))
+    response_times: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    database_query_times: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    offload_times: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    message_flush_times: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    message_batch_sizes: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
 
     # Счетчики по чатам
     chat_metrics: Dict[int, Dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
@@ -33,11 +65,11 @@ class Metrics:
     # Время запуска
     start_time: datetime = field(default_factory=datetime.utcnow)
 
-    def increment_messages_processed(self, chat_id: int = None):
+    def increment_messages_processed(self, chat_id: int = None, count: int = 1):
         """Увеличить счетчик обработанных сообщений"""
-        self.messages_processed += 1
+        self.messages_processed += count
         if chat_id:
-            self.chat_metrics[chat_id]["messages_processed"] += 1
+            self.chat_metrics[chat_id]["messages_processed"] += count
 
     def increment_violations_detected(self, chat_id: int = None):
         """Увеличить счетчик обнаруженных нарушений"""
@@ -81,10 +113,117 @@ class Metrics:
         if command:
             self.chat_metrics[0][f"command_{command}"] += 1
 
+    def increment_regex_rules_disabled(self, chat_id: int = None):
+        """Увеличить счетчик правил-шаблонов, отключенных по лимиту времени"""
+        self.regex_rules_disabled += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["regex_rules_disabled"] += 1
+
+    def increment_unchanged_edits_skipped(self, chat_id: int = None):
+        """Увеличить счетчик правок без изменения текста, пропущенных без повторной проверки"""
+        self.unchanged_edits_skipped += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["unchanged_edits_skipped"] += 1
+
+    def increment_duplicates_detected(self, chat_id: int = None):
+        """Увеличить счетчик копий рассылки, пойманных без проверки по словарям"""
+        self.duplicates_detected += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["duplicates_detected"] += 1
+
+    def increment_floods_detected(self, chat_id: int = None):
+        """Увеличить счетчик превышений частоты сообщений"""
+        self.floods_detected += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["floods_detected"] += 1
+
+    def increment_joins_recorded(self, chat_id: int = None):
+        """Увеличить счетчик вступлений в чаты"""
+        self.joins_recorded += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["joins_recorded"] += 1
+
+    def increment_raids_detected(self, chat_id: int = None):
+        """Увеличить счетчик включений режима рейда"""
+        self.raids_detected += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["raids_detected"] += 1
+
+    def increment_raid_restrictions(self, chat_id: int = None):
+        """Увеличить счетчик пользователей, ограниченных во время рейда"""
+        self.raid_restrictions += 1
+        if chat_id:
+            self.chat_metrics[chat_id]["raid_restrictions"] += 1
+
+    def increment_spam_classified(self, chat_id: int = None, count: int = 1):
+        """Увеличить счетчик сообщений, признанных спамом классификатором"""
+        self.spam_classified += count
+        if chat_id:
+            self.chat_metrics[chat_id]["spam_classified"] += count
+
     def increment_database_errors(self):
         """Увеличить счетчик ошибок базы данных"""
         self.database_errors += 1
 
+    def increment_pattern_cache_hits(self):
+        """Увеличить счетчик попаданий в кэш бэкендов поиска"""
+        self.pattern_cache_hits += 1
+
+    def increment_pattern_cache_misses(self):
+        """Увеличить счетчик промахов кэша бэкендов поиска"""
+        self.pattern_cache_misses += 1
+
+    def increment_pattern_cache_evictions(self):
+        """Увеличить счетчик вытеснений из кэша бэкендов поиска"""
+        self.pattern_cache_evictions += 1
+
+    def record_prefilter_result(self, skipped: bool, matched: bool = False):
+        """Учесть результат предварительного фильтра: пропуск сообщения или кандидат без совпадений"""
+        self.prefilter_checks += 1
+        if skipped:
+            self.prefilter_skips += 1
+        elif not matched:
+            self.prefilter_false_positives += 1
+
+    def record_prefilter_results(self, checks: int, skips: int, false_positives: int):
+        """Учесть результаты предварительного фильтра для пачки сообщений одним вызовом"""
+        self.prefilter_checks += checks
+        self.prefilter_skips += skips
+        self.prefilter_false_positives += false_positives
+
+    def get_prefilter_skip_ratio(self) -> float:
+        """Получить долю сообщений, отсеянных предварительным фильтром"""
+        if not self.prefilter_checks:
+            return 0.0
+        return self.prefilter_skips / self.prefilter_checks
+
+    def get_prefilter_false_positive_rate(self) -> float:
+        """Получить долю ложных срабатываний среди сообщений, пропущенных фильтром к точному поиску"""
+        candidates = self.prefilter_checks - self.prefilter_skips
+        if not candidates:
+            return 0.0
+        return self.prefilter_false_positives / candidates
+
+    def set_offload_queue_depth(self, depth: int):
+        """Обновить количество проверок, ожидающих результата из пула процессов"""
+        self.offload_queue_depth = depth
+
+    def record_offloaded_check(self, offload_time: float):
+        """Учесть проверку в пуле процессов и ее полное время с передачей данных"""
+        self.offloaded_checks += 1
+        self.offload_times.append(offload_time)
+
+    def set_message_buffer_size(self, size: int):
+        """Обновить количество сообщений, ожидающих записи в БД"""
+        self.message_buffer_size = size
+
+    def record_message_flush(self, batch_size: int, flush_time: float):
+        """Учесть запись пачки сообщений в БД, ее размер и время"""
+        self.message_flushes += 1
+        self.messages_flushed += batch_size
+        self.message_batch_sizes.append(batch_size)
+        self.message_flush_times.append(flush_time)
+
     def add_response_time(self, response_time: float):
         """Добавить время ответа"""
         self.response_times.append(response_time)
@@ -105,6 +244,24 @@ class Metrics:
             return 0.0
         return sum(self.database_query_times) / len(self.database_query_times)
 
+    def get_average_offload_time(self) -> float:
+        """Получить среднее время проверки в пуле процессов"""
+        if not self.offload_times:
+            return 0.0
+        return sum(self.offload_times) / len(self.offload_times)
+
+    def get_average_message_flush_time(self) -> float:
+        """Получить среднее время записи пачки сообщений в БД"""
+        if not self.message_flush_times:
+            return 0.0
+        return sum(self.message_flush_times) / len(self.message_flush_times)
+
+    def get_average_message_batch_size(self) -> float:
+        """Получить средний размер пачки сообщений, записанной в БД"""
+        if not self.message_batch_sizes:
+            return 0.0
+        return sum(self.message_batch_sizes) / len(self.message_batch_sizes)
+
     def get_uptime(self) -> timedelta:
         """Получить время работы приложения"""
         return datetime.utcnow() - self.start_time
@@ -123,8 +280,29 @@ class Metrics:
             "warnings_issued": self.warnings_issued,
             "commands_executed": self.commands_executed,
             "database_errors": self.database_errors,
+            "regex_rules_disabled": self.regex_rules_disabled,
+            "unchanged_edits_skipped": self.unchanged_edits_skipped,
+            "duplicates_detected": self.duplicates_detected,
+            "floods_detected": self.floods_detected,
+            "joins_recorded": self.joins_recorded,
+            "raids_detected": self.raids_detected,
+            "raid_restrictions": self.raid_restrictions,
+            "spam_classified": self.spam_classified,
             "average_response_time": self.get_average_response_time(),
             "average_database_query_time": self.get_average_database_query_time(),
+            "pattern_cache_hits": self.pattern_cache_hits,
+            "pattern_cache_misses": self.pattern_cache_misses,
+            "pattern_cache_evictions": self.pattern_cache_evictions,
+            "prefilter_skip_ratio": self.get_prefilter_skip_ratio(),
+            "prefilter_false_positive_rate": self.get_prefilter_false_positive_rate(),
+            "offloaded_checks": self.offloaded_checks,
+            "offload_queue_depth": self.offload_queue_depth,
+            "average_offload_time": self.get_average_offload_time(),
+            "message_flushes": self.message_flushes,
+            "messages_flushed": self.messages_flushed,
+            "message_buffer_size": self.message_buffer_size,
+            "average_message_flush_time": self.get_average_message_flush_time(),
+            "average_message_batch_size": self.get_average_message_batch_size(),
             "chat_count": len(self.chat_metrics),
         }
 
@@ -1,19 +1,27 @@
 import logging
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
 
-from sqlalchemy import select
+import asyncio
+from sqlalchemy import insert, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.entities.message import Message
 from domain.entities.user import User
 from domain.interfaces.repositories import MessageRepository, UserRepository
-from infrastructure.database.models import MessageModel, UserModel
+from infrastructure.database.models import MessageModel, TrainingSampleModel, UserModel
 from infrastructure.database.session import get_session_manager
+from infrastructure.monitoring import metrics
 
 logger = logging.getLogger(__name__)
 
+# Наибольшая задержка записи сообщения из буфера в БД, секунды
+DEFAULT_MESSAGE_FLUSH_INTERVAL = 1.0
+# Предел буфера сообщений: при заполнении сохранение ждет записи в БД
+DEFAULT_MESSAGE_BUFFER_LIMIT = 10_000
+
 
 class SQLAlchemyUserRepository(UserRepository):
     async def get_by_id(self, user_id: int, chat_id: int) -> Optional[User]:
@@ -83,25 +91,129 @@ class SQLAlchemyUserRepository(UserRepository):
 
 
 class SQLAlchemyMessageRepository(MessageRepository):
+    """
+    Репозиторий сообщений с отложенной записью.
+    save (и save_training_sample для выборки чистых сообщений) добавляет строку в буфер в памяти; буфер записывается многострочными INSERT по batch_size строк
+    в одной транзакции, когда в нем набирается batch_size сообщений (фоновая задача run) или раз в
+    flush_interval секунд. Если буфер заполнен до max_buffered, save записывает его сам и ждет записи.
+    С batch_size=1 каждое сообщение записывается сразу
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 1,
+        flush_interval: float = DEFAULT_MESSAGE_FLUSH_INTERVAL,
+        max_buffered: int = DEFAULT_MESSAGE_BUFFER_LIMIT,
+    ):
+        if batch_size < 1:
+            raise ValueError("Размер пачки сообщений должен быть положительным")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max(max_buffered, batch_size)
+        self._buffer: List[Tuple[Type[Any], Dict[str, Any]]] = []  # (модель таблицы, строка)
+        self._flush_lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
     async def save(self, message: Message) -> None:
+        await self._append(MessageModel, self._to_row(message))
+
+    async def save_training_sample(self, message: Message) -> None:
+        row = self._to_row(message)
+        del row["contains_violations"], row["violation_words"]
+        await self._append(TrainingSampleModel, row)
+
+    async def _append(self, model: Type[Any], row: Dict[str, Any]) -> None:
+        """Добавить строку в буфер и записать его, если пачка набрана или буфер заполнен"""
+        self._buffer.append((model, row))
+        metrics.set_message_buffer_size(len(self._buffer))
+        if len(self._buffer) >= self.max_buffered or self.batch_size == 1:
+            # Запись не успевает за сохранением (или отложенная запись отключена): вызывающий ждет записи
+            await self.flush()
+        elif len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> int:
+        """Записать накопленные сообщения в БД. Возвращает количество записанных сообщений"""
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            self._batch_ready.clear()
+            if not batch:
+                return 0
+
+            start_time = time.perf_counter()
+            try:
+                async with get_session_manager().session() as session:
+                    # Пачки ограничены batch_size строк: число параметров одного запроса ограничено в СУБД
+                    for start in range(0, len(batch), self.batch_size):
+                        chunk = batch[start : start + self.batch_size]
+                        for model in (MessageModel, TrainingSampleModel):
+                            rows = [row for row_model, row in chunk if row_model is model]
+                            if rows:
+                                await session.execute(insert(model).values(rows))
+            except Exception as e:
+                logger.error(f"Ошибка при записи {len(batch)} сообщений: {e}")
+                metrics.increment_database_errors()
+                self._restore(batch)
+                raise
+            except BaseException:
+                # Отмена задачи при остановке бота: пачка остается в буфере для записи в close
+                self._restore(batch)
+                raise
+
+            metrics.record_message_flush(len(batch), time.perf_counter() - start_time)
+            metrics.set_message_buffer_size(len(self._buffer))
+            return len(batch)
+
+    def _restore(self, batch: List[Tuple[Type[Any], Dict[str, Any]]]) -> None:
+        """Вернуть незаписанную пачку в начало буфера; сверх предела буфера самые новые сообщения теряются"""
+        self._buffer[:0] = batch
+        lost = len(self._buffer) - self.max_buffered
+        if lost > 0:
+            del self._buffer[self.max_buffered :]
+            logger.warning(f"Буфер сообщений переполнен, потеряно сообщений: {lost}")
+        metrics.set_message_buffer_size(len(self._buffer))
+
+    @staticmethod
+    def _to_row(message: Message) -> dict:
+        return {
+            "message_id": message.message_id,
+            "chat_id": message.chat_id,
+            "user_id": message.user_id,
+            "text": message.text,
+            "timestamp": message.timestamp,
+            "contains_violations": message.contains_violations,
+            "violation_words": message.violation_words,
+        }
+
+    async def run(self) -> None:
+        """Записывать буфер, как только в нем набирается пачка, и не реже раза в flush_interval"""
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                # Пачка возвращена в буфер и будет записана следующей попыткой: фоновая запись не должна
+                # останавливаться из-за одной ошибки, а пауза не дает повторять запись в цикле без ожидания
+                logger.error(f"Фоновая запись сообщений не удалась, повтор через {self.flush_interval} с: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def close(self) -> None:
+        """Записать остаток буфера при остановке бота"""
         try:
-            async with get_session_manager().session() as session:
-                message_model = MessageModel(
-                    message_id=message.message_id,
-                    chat_id=message.chat_id,
-                    user_id=message.user_id,
-                    text=message.text,
-                    timestamp=message.timestamp,
-                    contains_violations=message.contains_violations,
-                    violation_words=message.violation_words,
-                )
-                session.add(message_model)
-        except SQLAlchemyError as e:
-            logger.error(f"Ошибка при сохранении сообщения {message.message_id}: {e}")
-            raise
+            await self.flush()
+        except Exception:
+            logger.error(f"При остановке не записано сообщений: {len(self._buffer)}")
 
     async def get_user_violations(self, user_id: int, chat_id: int) -> List[Message]:
         try:
+            # Чтение видит сообщения, которые еще ждут записи в буфере
+            await self.flush()
             async with get_session_manager().session() as session:
                 result = await session.execute(
                     select(MessageModel)
@@ -132,6 +244,7 @@ class SQLAlchemyMessageRepository(MessageRepository):
 
     async def get_recent_messages(self, chat_id: int, limit: int = 100) -> List[Message]:
         try:
+            await self.flush()
             async with get_session_manager().session() as session:
                 result = await session.execute(
                     select(MessageModel)
@@ -156,3 +269,42 @@ class SQLAlchemyMessageRepository(MessageRepository):
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при получении последних сообщений для чата {chat_id}: {e}")
             return []
+
+    async def iter_messages(self, chunk_size: int = 1000) -> AsyncIterator[List[Message]]:
+        """
+        Читать все сообщения пачками по chunk_size в порядке записи. Строки читаются серверным курсором,
+        поэтому таблица целиком в память не загружается
+        """
+        async for message_models in self._stream(MessageModel, chunk_size):
+            yield [
+                Message(
+                    message_id=m.message_id,
+                    user_id=m.user_id,
+                    chat_id=m.chat_id,
+                    text=m.text,
+                    timestamp=m.timestamp,
+                    contains_violations=m.contains_violations,
+                    violation_words=m.violation_words,
+                )
+                for m in message_models
+            ]
+
+    async def iter_training_samples(self, chunk_size: int = 1000) -> AsyncIterator[List[Message]]:
+        """Читать выборку чистых сообщений пачками по chunk_size в порядке записи"""
+        async for sample_models in self._stream(TrainingSampleModel, chunk_size):
+            yield [
+                Message(message_id=m.message_id, user_id=m.user_id, chat_id=m.chat_id, text=m.text, timestamp=m.timestamp)
+                for m in sample_models
+            ]
+
+    async def _stream(self, model: Type[Any], chunk_size: int) -> AsyncIterator[List[Any]]:
+        """Читать строки таблицы пачками серверным курсором, дописав буфер перед чтением"""
+        try:
+            await self.flush()
+            async with get_session_manager().session() as session:
+                result = await session.stream_scalars(select(model).order_by(model.id).execution_options(yield_per=chunk_size))
+                async for models in result.partitions(chunk_size):
+                    yield list(models)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при чтении таблицы {model.__tablename__}: {e}")
+            raise
@@ -0,0 +1,40 @@
+import logging
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд список администраторов чата считается актуальным
+DEFAULT_ADMINS_TTL = 600.0
+
+
+class ChatAdmins:
+    """
+    Кэш администраторов чатов: список запрашивается у Telegram не чаще раза в ttl секунд на чат,
+    поэтому проверка отправителя каждого сообщения не расходует лимиты Bot API
+    """
+
+    def __init__(self, ttl: float = DEFAULT_ADMINS_TTL):
+        self.ttl = ttl
+        self._chats: Dict[int, Tuple[float, FrozenSet[int]]] = {}  # чат -> (время запроса, ID администраторов)
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int, now: Optional[float] = None) -> bool:
+        """Является ли пользователь администратором или создателем чата"""
+        now = time.monotonic() if now is None else now
+        cached = self._chats.get(chat_id)
+        if cached is None or now - cached[0] >= self.ttl:
+            cached = self._chats[chat_id] = (now, await self._fetch(bot, chat_id))
+        return user_id in cached[1]
+
+    @staticmethod
+    async def _fetch(bot: Bot, chat_id: int) -> FrozenSet[int]:
+        """Запросить администраторов чата; при ошибке до следующего запроса администраторов нет"""
+        try:
+            members = await bot.get_chat_administrators(chat_id=chat_id)
+        except TelegramAPIError as e:
+            logger.warning(f"Не удалось получить администраторов чата {chat_id}: {e}")
+            return frozenset()
+        return frozenset(member.user.id for member in members)
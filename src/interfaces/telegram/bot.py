@@ -1,43 +1,109 @@
 import logging
 from typing import Optional
 
+import asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.filters import Command
+from aiogram.filters import ChatMemberUpdatedFilter, Command, JOIN_TRANSITION
 from aiogram.types import Message
 
 from application.enhanced_config import EnhancedModerationConfig
+from application.flood import FloodDetector
+from application.matching.duplicates import DuplicateDetector
+from application.matching.features import build_feature_rules
+from application.matching.hit_counters import DEFAULT_FLUSH_INTERVAL
+from application.raid import RaidDetector
 from application.services.moderation_service import TelegramModerationService
+from application.settings import ModerationConfig, PerformanceConfig
 from infrastructure.database.session import get_session_manager
 from infrastructure.monitoring import metrics, time_it
 from infrastructure.repositories import SQLAlchemyMessageRepository, SQLAlchemyUserRepository
 
 from .handlers import ModeratorCommandHandlers
+from .restrictions import RestrictionQueue
 
 logger = logging.getLogger(__name__)
 
 
 class ModerationBot:
-    def __init__(self, token: str):
+    def __init__(
+        self, token: str, performance: Optional[PerformanceConfig] = None, moderation: Optional[ModerationConfig] = None
+    ):
         # Инициализация бота и диспетчера
         self.bot = Bot(token=token, parse_mode=ParseMode.HTML)
         self.dp = Dispatcher()
 
         # Инициализация репозиториев
         self.user_repository = SQLAlchemyUserRepository()
-        self.message_repository = SQLAlchemyMessageRepository()
+        # Сообщения записываются в БД пачками из буфера, а не по одному на каждое нарушение
+        if performance is not None:
+            self.message_repository = SQLAlchemyMessageRepository(
+                batch_size=performance.message_batch_size,
+                flush_interval=performance.message_flush_interval,
+                max_buffered=performance.message_buffer_limit,
+            )
+        else:
+            self.message_repository = SQLAlchemyMessageRepository()
 
         # Инициализация улучшенной конфигурации
-        self.config = EnhancedModerationConfig()
+        if performance is not None:
+            self.config = EnhancedModerationConfig(
+                patterns_cache_size=performance.patterns_cache_size,
+                snapshot_path=performance.matcher_snapshot_path,
+                offload_workers=performance.check_offload_workers,
+                offload_threshold=performance.check_offload_threshold,
+            )
+        else:
+            self.config = EnhancedModerationConfig()
+        # Интервал записи счетчиков срабатываний правил в БД
+        self.rule_stats_flush_interval = (
+            performance.rule_stats_flush_interval if performance is not None else DEFAULT_FLUSH_INTERVAL
+        )
+
+        # Поиск одной и той же рассылки во всех чатах бота
+        if moderation is None:
+            moderation = ModerationConfig.create_default()
+        duplicate_detector = (
+            DuplicateDetector(threshold=moderation.duplicate_threshold, window=moderation.duplicate_window)
+            if moderation.duplicate_threshold > 0
+            else None
+        )
+        # Ограничение частоты сообщений пользователей
+        flood_detector = (
+            FloodDetector(limit=moderation.flood_limit, interval=moderation.flood_interval)
+            if moderation.flood_limit > 0
+            else None
+        )
+        # Обнаружение массовых вступлений: во время рейда вступившие ограничиваются через очередь
+        raid_detector = (
+            RaidDetector(
+                join_limit=moderation.raid_join_limit, window=moderation.raid_window, duration=moderation.raid_duration
+            )
+            if moderation.raid_join_limit > 0
+            else None
+        )
+        self.restriction_queue = RestrictionQueue(self.bot)
+        # Модель классификатора спама загружается при запуске
+        self.spam_model_path = moderation.spam_model_path
 
         # Инициализация сервисов
         self.moderation_service = TelegramModerationService(
-            user_repository=self.user_repository, message_repository=self.message_repository, config=self.config
+            user_repository=self.user_repository,
+            message_repository=self.message_repository,
+            config=self.config,
+            duplicate_detector=duplicate_detector,
+            flood_detector=flood_detector,
+            raid_detector=raid_detector,
+            feature_rules=build_feature_rules(moderation.feature_rules),
+            classifier_path=moderation.spam_model_path,
+            clean_sample_rate=moderation.clean_sample_rate,
         )
 
         # Инициализация обработчиков
         self.command_handlers = ModeratorCommandHandlers(
-            moderation_service=self.moderation_service, user_repository=self.user_repository
+            moderation_service=self.moderation_service,
+            user_repository=self.user_repository,
+            restriction_queue=self.restriction_queue,
         )
 
         self._register_handlers()
@@ -47,6 +113,10 @@ class ModerationBot:
         """Регистрация всех обработчиков"""
         # Регистрация обработчиков сообщений
         self.dp.message.register(self.command_handlers.handle_message)
+        # Правки проверяются тем же обработчиком: иначе спам добавляют в сообщение после публикации
+        self.dp.edited_message.register(self.command_handlers.handle_message)
+        # Вступления в чат для защиты от рейдов (служебные сообщения new_chat_members разбирает handle_message)
+        self.dp.chat_member.register(self.command_handlers.handle_chat_member, ChatMemberUpdatedFilter(JOIN_TRANSITION))
 
         # Регистрация обработчиков команд модерации
         self.dp.message.register(self.command_handlers.ban_command, Command("ban"))
@@ -61,9 +131,22 @@ class ModerationBot:
         self.dp.message.register(self.command_handlers.remove_forbidden_word_command, Command("remove_forbidden"))
         self.dp.message.register(self.command_handlers.list_forbidden_words_command, Command("list_forbidden"))
         self.dp.message.register(self.command_handlers.clear_forbidden_words_command, Command("clear_forbidden"))
+        self.dp.message.register(self.command_handlers.exclude_forbidden_word_command, Command("exclude_forbidden"))
+        self.dp.message.register(self.command_handlers.include_forbidden_word_command, Command("include_forbidden"))
+        self.dp.message.register(self.command_handlers.add_regex_rule_command, Command("add_regex"))
+        self.dp.message.register(self.command_handlers.remove_regex_rule_command, Command("remove_regex"))
+        self.dp.message.register(self.command_handlers.list_regex_rules_command, Command("list_regex"))
+        self.dp.message.register(self.command_handlers.add_allowed_word_command, Command("add_allowed"))
+        self.dp.message.register(self.command_handlers.remove_allowed_word_command, Command("remove_allowed"))
+        self.dp.message.register(self.command_handlers.list_allowed_words_command, Command("list_allowed"))
+        self.dp.message.register(self.command_handlers.fuzzy_matching_command, Command("fuzzy"))
+        self.dp.message.register(self.command_handlers.add_link_rule_command, Command("add_link"))
+        self.dp.message.register(self.command_handlers.remove_link_rule_command, Command("remove_link"))
+        self.dp.message.register(self.command_handlers.list_link_rules_command, Command("list_link"))
 
         # Дополнительные команды
         self.dp.message.register(self.command_handlers.bot_status_command, Command("bot_status"))
+        self.dp.message.register(self.command_handlers.reload_model_command, Command("reload_model"))
         self.dp.message.register(self.command_handlers.help_command, Command("help", "start"))
         self.dp.message.register(self.stats_command, Command("stats"))
 
@@ -73,15 +156,39 @@ class ModerationBot:
         # Инициализация базы данных
         session_manager = get_session_manager()
         await session_manager.init_db()
+        if self.spam_model_path:
+            await self.moderation_service.load_classifier(self.spam_model_path)
 
+        stats_task = asyncio.create_task(self._flush_rule_stats_periodically())
+        restriction_task = asyncio.create_task(self.restriction_queue.run())
+        message_flush_task = asyncio.create_task(self.message_repository.run())
         logger.info("Запуск polling бота...")
-        await self.dp.start_polling(self.bot)
+        try:
+            await self.dp.start_polling(self.bot)
+        finally:
+            stats_task.cancel()
+            restriction_task.cancel()
+            message_flush_task.cancel()
+
+    async def _flush_rule_stats_periodically(self):
+        """Периодически записывать счетчики срабатываний правил в БД и сжимать бэкенды поиска после правок словарей"""
+        while True:
+            await asyncio.sleep(self.rule_stats_flush_interval)
+            await self.config.flush_rule_stats()
+            self.config.compact_matchers()
 
     async def stop(self):
         """Остановить бота"""
         logger.info("Остановка бота...")
         await self.dp.stop_polling()
         await self.bot.session.close()
+        # Записываем сообщения из буфера до закрытия соединений с БД
+        await self.message_repository.close()
+        # Записываем счетчики, накопленные с последней периодической записи
+        await self.config.flush_rule_stats()
+        # Сохраняем скомпилированные бэкенды поиска для быстрого холодного старта
+        self.config.save_snapshot()
+        self.config.close()
 
     @time_it
     async def stats_command(self, message: Message) -> None:
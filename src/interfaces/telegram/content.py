@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiogram.types import Message as TelegramMessage
+from aiogram.types import MessageEntity
+
+from application.matching.links import link_items
+
+# Сколько последних сообщений чата помнить для пропуска повторной проверки неизмененных правок
+MAX_TRACKED_MESSAGES = 1000
+
+
+@dataclass(frozen=True)
+class MessageContent:
+    """Проверяемое содержимое сообщения: текст или подпись к медиа и ссылки из разметки"""
+
+    text: str
+    links: Tuple[str, ...]  # Домены ссылок и упоминания (@username)
+
+
+def extract_content(message: TelegramMessage) -> Optional[MessageContent]:
+    """
+    Извлечь проверяемое содержимое из нового, отредактированного или пересланного сообщения.
+    Подпись к фото, видео и документам проверяется так же, как текст; у пересланного сообщения
+    дополнительно проверяется источник пересылки. Возвращает None, если проверять нечего
+    """
+    if message.text:
+        text, entities = message.text, message.entities
+    else:
+        text, entities = message.caption or "", message.caption_entities
+
+    links = _extract_links(text, entities or [])
+    source = _forward_source(message)
+    if source:
+        links.append(source)
+
+    if not text and not links:
+        return None
+    return MessageContent(text=text, links=tuple(links))
+
+
+def _extract_links(text: str, entities: Sequence[MessageEntity]) -> List[str]:
+    """Домены ссылок и упоминания из разметки: Telegram уже нашел их, повторно текст не разбираем"""
+    links: List[str] = []
+    for entity in entities:
+        if entity.type == "url":
+            links.extend(link_items(entity.extract_from(text)))
+        elif entity.type == "text_link" and entity.url:
+            links.extend(link_items(entity.url))
+        elif entity.type == "mention":
+            links.append(entity.extract_from(text).lower())
+    return links
+
+
+def _forward_source(message: TelegramMessage) -> Optional[str]:
+    """Упоминание канала, чата или пользователя, из которого переслано сообщение"""
+    origin = getattr(message, "forward_origin", None)
+    if origin is None:
+        return None
+
+    source = getattr(origin, "chat", None) or getattr(origin, "sender_chat", None) or getattr(origin, "sender_user", None)
+    username = getattr(source, "username", None)
+    return f"@{username.lower()}" if username else None
+
+
+class ScannedMessages:
+    """
+    Отпечатки содержимого последних проверенных сообщений по чатам.
+    Правка, не изменившая текст и ссылки (например, замена медиа или кнопок), повторно не проверяется
+    """
+
+    def __init__(self, max_messages: int = MAX_TRACKED_MESSAGES):
+        self.max_messages = max_messages
+        self._chats: Dict[int, OrderedDict] = {}  # чат -> (сообщение -> отпечаток содержимого)
+
+    def is_unchanged(self, chat_id: int, message_id: int, content: MessageContent) -> bool:
+        """Запомнить содержимое сообщения и вернуть True, если оно уже проверялось в таком виде"""
+        fingerprint = hash(content)
+        messages = self._chats.setdefault(chat_id, OrderedDict())
+        if messages.get(message_id) == fingerprint:
+            messages.move_to_end(message_id)
+            return True
+
+        messages[message_id] = fingerprint
+        messages.move_to_end(message_id)
+        if len(messages) > self.max_messages:
+            messages.popitem(last=False)
+        return False
@@ -1,39 +1,160 @@
+import logging
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
+import asyncio
 from aiogram import types
 from aiogram.types import Message as TelegramMessage
 
+from application.flood import FLOOD_MUTE_AFTER, FLOOD_MUTE_TIME
+from application.matching.links import InvalidLinkRuleError
+from application.matching.regex_rules import UnsafeRegexError
 from application.services.moderation_service import TelegramModerationService
 from domain.entities.message import Message
 from domain.entities.user import User
 from domain.exceptions import UserAlreadyBannedError, UserAlreadyMutedError, UserNotBannedError, UserNotMutedError
 from domain.interfaces.repositories import UserRepository
+from infrastructure.monitoring import metrics
 
+from .admins import ChatAdmins
+from .content import extract_content, ScannedMessages
 from .decorators import admin_only, chat_admin_only, owner_only
+from .restrictions import RestrictionQueue
+
+logger = logging.getLogger(__name__)
+
+# Сколько правил без срабатываний показывать в статусе бота
+MAX_LISTED_DEAD_RULES = 10
+# Сколько последних альбомов помнить, чтобы учитывать альбом во флуде как одно сообщение
+MAX_TRACKED_MEDIA_GROUPS = 1000
+# Сколько секунд ждать остальные сообщения альбома, чтобы проверить их одной пачкой
+MEDIA_GROUP_DELAY = 0.5
+
+
+def _escape_markdown(text: str) -> str:
+    """Экранировать служебные символы Markdown в тексте правила"""
+    for char in ("_", "*", "`", "["):
+        text = text.replace(char, "\\" + char)
+    return text
 
 
 class ModeratorCommandHandlers:
-    def __init__(self, moderation_service: TelegramModerationService, user_repository: UserRepository):
+    def __init__(
+        self,
+        moderation_service: TelegramModerationService,
+        user_repository: UserRepository,
+        restriction_queue: Optional[RestrictionQueue] = None,
+    ):
         self.moderation_service = moderation_service
         self.user_repository = user_repository
+        self.restriction_queue = restriction_queue  # Ограничение вступивших во время рейда (None - отключено)
+        self.scanned_messages = ScannedMessages()  # Уже проверенное содержимое для пропуска неизмененных правок
+        self.chat_admins = ChatAdmins()  # Администраторы чатов не ограничиваются за флуд
+        self._flood_media_groups: "OrderedDict[str, None]" = OrderedDict()  # Уже учтенные во флуде альбомы
+        self.media_group_delay = MEDIA_GROUP_DELAY
+        # Сообщения альбомов, ожидающие проверки пачкой: (чат, альбом) -> (сообщение Telegram, сообщение)
+        self._media_groups: Dict[Tuple[int, str], List[Tuple[TelegramMessage, Message]]] = {}
+        self._media_group_tasks: Set[asyncio.Task] = set()
 
     async def handle_message(self, message: TelegramMessage) -> None:
-        """Обработать обычное сообщение чата"""
-        if message.text:
-            domain_message = Message(
-                message_id=message.message_id,
-                user_id=message.from_user.id,
-                chat_id=message.chat.id,
-                text=message.text,
-                timestamp=datetime.utcnow(),
-            )
+        """Обработать сообщение чата: новое или отредактированное, текст или подпись к медиа"""
+        if message.new_chat_members:
+            for member in message.new_chat_members:
+                self._register_join(message.chat.id, member)
+            return
 
-            violations = await self.moderation_service.check_message(domain_message)
-            if violations:
-                await message.reply(
-                    f"⚠️ Сообщение содержит запрещенные слова: {', '.join(violations)}\n" f"Сообщение записано как нарушение."
+        # Частоту считаем по всем новым сообщениям, включая стикеры и медиа без подписи; правки не считаются
+        if message.edit_date is None and message.from_user is not None and await self._counts_as_flood(message):
+            breaches = await self.moderation_service.check_flood(message.chat.id, message.from_user.id)
+            if breaches >= FLOOD_MUTE_AFTER:
+                await message.bot.restrict_chat_member(
+                    chat_id=message.chat.id,
+                    user_id=message.from_user.id,
+                    permissions=types.ChatPermissions(can_send_messages=False),
+                    until_date=FLOOD_MUTE_TIME,
                 )
+                await message.reply("🔇 Пользователь заглушен за флуд")
+                return
+            if breaches:
+                await message.reply("⚠️ Слишком много сообщений подряд. Предупреждение за флуд записано.")
+
+        content = extract_content(message)
+        if content is None:
+            return
+        if self.scanned_messages.is_unchanged(message.chat.id, message.message_id, content):
+            metrics.increment_unchanged_edits_skipped(message.chat.id)
+            return
+
+        domain_message = Message(
+            message_id=message.message_id,
+            user_id=message.from_user.id,
+            chat_id=message.chat.id,
+            text=content.text,
+            timestamp=datetime.utcnow(),
+            links=list(content.links),
+        )
+
+        # Новые сообщения альбома проверяются вместе, одной пачкой, когда альбом придет целиком
+        if message.media_group_id is not None and message.edit_date is None:
+            self._buffer_media_group(message, domain_message)
+            return
+
+        violations = await self.moderation_service.check_message(domain_message)
+        await self._reply_violations(message, violations)
+
+    @staticmethod
+    async def _reply_violations(message: TelegramMessage, violations: List[str]) -> None:
+        """Сообщить о найденных в сообщении нарушениях"""
+        if violations:
+            await message.reply(
+                f"⚠️ Сообщение содержит запрещенные слова: {', '.join(violations)}\n" f"Сообщение записано как нарушение."
+            )
+
+    def _buffer_media_group(self, message: TelegramMessage, domain_message: Message) -> None:
+        """Отложить сообщение альбома: первое сообщение запускает проверку альбома через media_group_delay"""
+        key = (message.chat.id, message.media_group_id)
+        group = self._media_groups.get(key)
+        if group is None:
+            group = self._media_groups[key] = []
+            task = asyncio.create_task(self._check_media_group(key))
+            self._media_group_tasks.add(task)
+            task.add_done_callback(self._media_group_tasks.discard)
+        group.append((message, domain_message))
+
+    async def _check_media_group(self, key: Tuple[int, str]) -> None:
+        """Проверить накопленные сообщения альбома одной пачкой и ответить на сообщения с нарушениями"""
+        await asyncio.sleep(self.media_group_delay)
+        group = self._media_groups.pop(key)
+        try:
+            results = await self.moderation_service.check_messages([domain_message for _, domain_message in group])
+            for (message, _), violations in zip(group, results):
+                await self._reply_violations(message, violations)
+        except Exception as e:
+            logger.error(f"Ошибка при проверке альбома {key[1]} в чате {key[0]}: {e}")
+
+    async def _counts_as_flood(self, message: TelegramMessage) -> bool:
+        """Учитывать ли сообщение во флуде: альбом считается одним сообщением, администраторы чата не учитываются"""
+        if message.media_group_id is not None:
+            if message.media_group_id in self._flood_media_groups:
+                return False
+            self._flood_media_groups[message.media_group_id] = None
+            if len(self._flood_media_groups) > MAX_TRACKED_MEDIA_GROUPS:
+                self._flood_media_groups.popitem(last=False)
+        return not await self.chat_admins.is_admin(message.bot, message.chat.id, message.from_user.id)
+
+    async def handle_chat_member(self, update: types.ChatMemberUpdated) -> None:
+        """Обработать вступление пользователя в чат (обновление chat_member)"""
+        self._register_join(update.chat.id, update.new_chat_member.user)
+
+    def _register_join(self, chat_id: int, user: types.User) -> None:
+        """Учесть вступление и во время рейда поставить вступившего в очередь на ограничение"""
+        # Ботов добавляют только администраторы
+        if user.is_bot:
+            return
+        if self.moderation_service.register_join(chat_id, user.id) and self.restriction_queue is not None:
+            if self.restriction_queue.enqueue(chat_id, user.id):
+                metrics.increment_raid_restrictions(chat_id)
 
     @chat_admin_only
     async def ban_command(self, message: TelegramMessage) -> None:
@@ -195,12 +316,202 @@ class ModeratorCommandHandlers:
         words_text = "\n".join([f"• {word}" for word in words])
         await message.reply(f"📝 Запрещенные слова:\n{words_text}")
 
+    @chat_admin_only
+    async def exclude_forbidden_word_command(self, message: TelegramMessage) -> None:
+        """Отключить слово общего словаря в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply(
+                "Пожалуйста, укажите слово общего словаря для отключения в этом чате\n"
+                "Использование: /exclude_forbidden слово"
+            )
+            return
+
+        word = args[1].strip()
+        await self.moderation_service.exclude_forbidden_word(message.chat.id, word)
+        await message.reply(f"Слово '{word}' больше не считается запрещенным в этом чате")
+
+    @chat_admin_only
+    async def include_forbidden_word_command(self, message: TelegramMessage) -> None:
+        """Снова включить слово общего словаря в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply(
+                "Пожалуйста, укажите слово общего словаря для включения в этом чате\n"
+                "Использование: /include_forbidden слово"
+            )
+            return
+
+        word = args[1].strip()
+        success = await self.moderation_service.include_forbidden_word(message.chat.id, word)
+        if success:
+            await message.reply(f"Слово '{word}' снова считается запрещенным в этом чате")
+        else:
+            await message.reply(f"Слово '{word}' не было отключено в этом чате")
+
+    @chat_admin_only
+    async def add_allowed_word_command(self, message: TelegramMessage) -> None:
+        """Добавить разрешенный фрагмент в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply(
+                "Пожалуйста, укажите слово или фразу, внутри которых запрещенные слова не считаются нарушением\n"
+                "Использование: /add_allowed сука собака"
+            )
+            return
+
+        word = args[1].strip()
+        await self.moderation_service.add_allowed_word(message.chat.id, word)
+        await message.reply(f"Фрагмент '{word}' разрешен в этом чате")
+
+    @chat_admin_only
+    async def remove_allowed_word_command(self, message: TelegramMessage) -> None:
+        """Удалить разрешенный фрагмент в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply("Пожалуйста, укажите фрагмент для удаления\n" "Использование: /remove_allowed фрагмент")
+            return
+
+        word = args[1].strip()
+        success = await self.moderation_service.remove_allowed_word(message.chat.id, word)
+        if success:
+            await message.reply(f"Фрагмент '{word}' больше не разрешен")
+        else:
+            await message.reply(f"Фрагмент '{word}' не найден среди разрешенных")
+
+    @chat_admin_only
+    async def list_allowed_words_command(self, message: TelegramMessage) -> None:
+        """Показать разрешенные фрагменты этого чата"""
+        words = await self.moderation_service.get_allowed_words(message.chat.id)
+        if not words:
+            await message.reply("Разрешенных фрагментов в этом чате нет")
+            return
+
+        words_text = "\n".join(f"• {word}" for word in words)
+        await message.reply(f"✅ Разрешенные фрагменты:\n{words_text}")
+
+    @chat_admin_only
+    async def fuzzy_matching_command(self, message: TelegramMessage) -> None:
+        """Включить, выключить или показать нечеткий поиск запрещенных слов в этом чате"""
+        args = message.text.split()
+        if len(args) == 1:
+            enabled = await self.moderation_service.is_fuzzy_matching_enabled(message.chat.id)
+            await message.reply(f"Нечеткий поиск в этом чате {'включен' if enabled else 'выключен'}")
+            return
+        if len(args) != 2 or args[1].lower() not in ("on", "off"):
+            await message.reply("Пожалуйста, укажите on или off\n" "Использование: /fuzzy on")
+            return
+
+        enabled = args[1].lower() == "on"
+        await self.moderation_service.set_fuzzy_matching(message.chat.id, enabled)
+        await message.reply(f"Нечеткий поиск в этом чате {'включен' if enabled else 'выключен'}")
+
+    @chat_admin_only
+    async def add_regex_rule_command(self, message: TelegramMessage) -> None:
+        """Добавить правило-шаблон в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply(
+                "Пожалуйста, укажите регулярное выражение для правила\n" "Использование: /add_regex t\\.me/\\w+bot"
+            )
+            return
+
+        pattern = args[1].strip()
+        try:
+            await self.moderation_service.add_regex_rule(message.chat.id, pattern)
+        except UnsafeRegexError as e:
+            await message.reply(f"Правило не добавлено: {e}")
+            return
+        await message.reply(f"Правило '{pattern}' добавлено")
+
+    @chat_admin_only
+    async def remove_regex_rule_command(self, message: TelegramMessage) -> None:
+        """Удалить правило-шаблон в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply("Пожалуйста, укажите правило для удаления\n" "Использование: /remove_regex шаблон")
+            return
+
+        pattern = args[1].strip()
+        success = await self.moderation_service.remove_regex_rule(message.chat.id, pattern)
+        if success:
+            await message.reply(f"Правило '{pattern}' удалено")
+        else:
+            await message.reply(f"Правило '{pattern}' не найдено")
+
+    @chat_admin_only
+    async def list_regex_rules_command(self, message: TelegramMessage) -> None:
+        """Показать правила-шаблоны этого чата"""
+        rules = await self.moderation_service.get_regex_rules(message.chat.id)
+        if not rules:
+            await message.reply("Правил-шаблонов в этом чате нет")
+            return
+
+        rules_text = "\n".join(
+            f"• {rule['pattern']}" + ("" if rule["enabled"] else " (отключено: превышен лимит времени)") for rule in rules
+        )
+        await message.reply(f"📝 Правила-шаблоны:\n{rules_text}")
+
+    @chat_admin_only
+    async def add_link_rule_command(self, message: TelegramMessage) -> None:
+        """Добавить правило для ссылок или упоминаний в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply(
+                "Пожалуйста, укажите домен или упоминание\n" "Использование: /add_link casino.xyz, *.casino.xyz или @username"
+            )
+            return
+
+        try:
+            await self.moderation_service.add_link_rule(message.chat.id, args[1])
+        except InvalidLinkRuleError as e:
+            await message.reply(f"Правило не добавлено: {e}")
+            return
+        await message.reply(f"Правило '{args[1].strip().lower()}' добавлено")
+
+    @chat_admin_only
+    async def remove_link_rule_command(self, message: TelegramMessage) -> None:
+        """Удалить правило для ссылок или упоминаний в этом чате"""
+        args = message.text.split(maxsplit=1)
+        if len(args) != 2 or not args[1].strip():
+            await message.reply("Пожалуйста, укажите правило для удаления\n" "Использование: /remove_link casino.xyz")
+            return
+
+        rule = args[1].strip().lower()
+        success = await self.moderation_service.remove_link_rule(message.chat.id, rule)
+        if success:
+            await message.reply(f"Правило '{rule}' удалено")
+        else:
+            await message.reply(f"Правило '{rule}' не найдено")
+
+    @chat_admin_only
+    async def list_link_rules_command(self, message: TelegramMessage) -> None:
+        """Показать правила для ссылок и упоминаний этого чата"""
+        rules = await self.moderation_service.get_link_rules(message.chat.id)
+        if not rules:
+            await message.reply("Правил для ссылок в этом чате нет")
+            return
+
+        rules_text = "\n".join(f"• {rule}" for rule in rules)
+        await message.reply(f"🔗 Правила для ссылок и упоминаний:\n{rules_text}")
+
     @owner_only
     async def clear_forbidden_words_command(self, message: TelegramMessage) -> None:
         """Очистить весь список запрещенных слов (только для владельца)"""
         await self.moderation_service.clear_forbidden_words()
         await message.reply("🗑️ Список запрещенных слов очищен")
 
+    @owner_only
+    async def reload_model_command(self, message: TelegramMessage) -> None:
+        """Перезагрузить модель классификатора спама из файла (только для владельца)"""
+        if not self.moderation_service.classifier_path:
+            await message.reply("Файл модели классификатора не задан (SPAM_MODEL_PATH)")
+            return
+        if await self.moderation_service.load_classifier():
+            await message.reply("🧠 Модель классификатора спама загружена")
+        else:
+            await message.reply("❌ Не удалось загрузить модель, работает прежняя. Подробности в журнале")
+
     @admin_only
     async def bot_status_command(self, message: TelegramMessage) -> None:
         """Показать статус бота и конфигурацию"""
@@ -212,14 +523,28 @@ class ModeratorCommandHandlers:
         user_role = get_user_role(message.from_user.id)
         warnings_limit = await self.moderation_service.get_warnings_limit(message.chat.id)
         forbidden_count = len(await self.moderation_service.get_forbidden_words())
+        rule_stats = await self.moderation_service.get_rule_stats(message.chat.id)
 
         status_text = (
             f"🤖 **Статус бота**\n\n"
             f"👤 Ваша роль: {user_role}\n"
             f"⚠️ Лимит предупреждений: {warnings_limit}\n"
             f"🚫 Запрещенных слов: {forbidden_count}\n"
+            f"⏱️ Среднее время поиска: {rule_stats['average_match_time'] * 1000:.2f} мс "
+            f"({rule_stats['check_count']} сообщений)\n"
             f"🏷️ Версия: {config.environment}"
         )
+        if rule_stats["top_rules"]:
+            status_text += "\n\n📈 Частые срабатывания:\n" + "\n".join(
+                f"• {_escape_markdown(rule)}: {hits}" for rule, hits in rule_stats["top_rules"]
+            )
+        dead_rules = rule_stats["dead_rules"]
+        if dead_rules:
+            status_text += "\n\n💤 Правила без срабатываний:\n" + "\n".join(
+                f"• {_escape_markdown(rule)}" for rule in dead_rules[:MAX_LISTED_DEAD_RULES]
+            )
+            if len(dead_rules) > MAX_LISTED_DEAD_RULES:
+                status_text += f"\n… и еще {len(dead_rules) - MAX_LISTED_DEAD_RULES}"
 
         await message.reply(status_text, parse_mode="Markdown")
 
@@ -242,7 +567,11 @@ class ModeratorCommandHandlers:
             )
 
         if user_role == "owner":
-            help_text += "**Команды владельца:**\n" "/clear_forbidden - очистить все запрещенные слова\n\n"
+            help_text += (
+                "**Команды владельца:**\n"
+                "/clear_forbidden - очистить все запрещенные слова\n"
+                "/reload_model - перезагрузить модель классификатора спама\n\n"
+            )
 
         help_text += (
             "**Команды модерации (для админов чата):**\n"
@@ -250,7 +579,19 @@ class ModeratorCommandHandlers:
             "/unban - разбанить пользователя\n"
             "/mute - заглушить пользователя\n"
             "/unmute - снять заглушение\n"
-            "/kick - исключить из чата\n\n"
+            "/kick - исключить из чата\n"
+            "/exclude_forbidden <слово> - отключить слово общего словаря в чате\n"
+            "/include_forbidden <слово> - снова включить слово общего словаря в чате\n"
+            "/add_allowed <фрагмент> - не считать нарушением запрещенные слова внутри фрагмента\n"
+            "/remove_allowed <фрагмент> - удалить разрешенный фрагмент\n"
+            "/list_allowed - показать разрешенные фрагменты чата\n"
+            "/fuzzy <on|off> - включить или выключить нечеткий поиск запрещенных слов в чате\n"
+            "/add_regex <шаблон> - добавить правило-шаблон в чате\n"
+            "/remove_regex <шаблон> - удалить правило-шаблон\n"
+            "/list_regex - показать правила-шаблоны чата\n"
+            "/add_link <домен или @username> - запретить ссылки на домен или упоминание\n"
+            "/remove_link <правило> - удалить правило для ссылок\n"
+            "/list_link - показать правила для ссылок\n\n"
             "**Общие команды:**\n"
             "/help - эта справка"
         )
@@ -0,0 +1,88 @@
+import logging
+from datetime import timedelta
+from typing import Set, Tuple
+
+import asyncio
+from aiogram import Bot, types
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Не больше стольких ограничений в секунду: общий лимит Bot API - около 30 запросов в секунду
+DEFAULT_RESTRICTIONS_PER_SECOND = 20
+# Предел очереди: при переполнении новые вступившие не ограничиваются, а только учитываются
+DEFAULT_MAX_QUEUED = 10_000
+# Срок ограничения вступивших во время рейда: снимается автоматически, без записи в БД
+RAID_RESTRICTION_TIME = timedelta(hours=1)
+# Сколько раз повторять запрос, на который Telegram ответил просьбой подождать
+MAX_RETRY_AFTER_ATTEMPTS = 3
+
+
+class RestrictionQueue:
+    """
+    Очередь ограничения пользователей, вступивших в чат во время рейда.
+    Ограничения выполняются одним фоновым обработчиком с ограничением частоты запросов к Telegram,
+    поэтому сотни вступлений подряд не упираются в лимиты Bot API
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        restrictions_per_second: float = DEFAULT_RESTRICTIONS_PER_SECOND,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ):
+        self.bot = bot
+        self.interval = 1 / restrictions_per_second
+        self._queue: "asyncio.Queue[Tuple[int, int]]" = asyncio.Queue(maxsize=max_queued)
+        self._queued: Set[Tuple[int, int]] = set()  # Пары (чат, пользователь) в очереди, без повторов
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(self, chat_id: int, user_id: int) -> bool:
+        """Поставить пользователя в очередь на ограничение. Возвращает False, если очередь переполнена"""
+        key = (chat_id, user_id)
+        if key in self._queued:
+            return True
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            logger.warning(f"Очередь ограничений переполнена, пользователь {user_id} в чате {chat_id} пропущен")
+            return False
+        self._queued.add(key)
+        return True
+
+    async def run(self) -> None:
+        """Выполнять ограничения из очереди не чаще заданной частоты"""
+        while True:
+            chat_id, user_id = await self._queue.get()
+            try:
+                await self.restrict(chat_id, user_id)
+            except Exception as e:
+                # Ошибка одного ограничения не должна останавливать фоновый обработчик очереди
+                logger.error(f"Ошибка при ограничении пользователя {user_id} в чате {chat_id}: {e}")
+            finally:
+                self._queued.discard((chat_id, user_id))
+                self._queue.task_done()
+            await asyncio.sleep(self.interval)
+
+    async def restrict(self, chat_id: int, user_id: int) -> None:
+        """Запретить пользователю писать в чат на время RAID_RESTRICTION_TIME"""
+        for attempt in range(1, MAX_RETRY_AFTER_ATTEMPTS + 1):
+            try:
+                await self.bot.restrict_chat_member(
+                    chat_id=chat_id,
+                    user_id=user_id,
+                    permissions=types.ChatPermissions(can_send_messages=False),
+                    until_date=RAID_RESTRICTION_TIME,
+                )
+                return
+            except TelegramRetryAfter as e:
+                if attempt == MAX_RETRY_AFTER_ATTEMPTS:
+                    logger.warning(f"Пользователь {user_id} в чате {chat_id} не ограничен за {attempt} попытки: {e}")
+                    return
+                # Telegram просит подождать: ждем и повторяем запрос
+                await asyncio.sleep(e.retry_after)
+            except TelegramAPIError as e:
+                logger.warning(f"Не удалось ограничить пользователя {user_id} в чате {chat_id}: {e}")
+                return
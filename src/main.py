@@ -35,7 +35,7 @@ class BotApplication:
         logger.info(f"Режим отладки: {self.config.debug}")
 
         # Создание экземпляра бота
-        self.bot = ModerationBot(self.config.bot_token)
+        self.bot = ModerationBot(self.config.bot_token, performance=self.config.performance, moderation=self.config.moderation)
 
         # Инициализация базы данных
         logger.info("Инициализация базы данных...")
@@ -0,0 +1,112 @@
+import argparse
+import logging
+import random
+import sys
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import asyncio
+from dotenv import load_dotenv
+
+from application.matching.classifier import DEFAULT_NUM_FEATURES, DEFAULT_THRESHOLD
+from application.matching.training import DEFAULT_LEARNING_RATE, SpamTrainer, TrainingStats
+from application.services.moderation_service import HEURISTIC_VIOLATIONS
+from infrastructure.database.session import get_session_manager
+from infrastructure.repositories import SQLAlchemyMessageRepository
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Разобрать аргументы командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Обучение классификатора спама: нарушения из таблицы messages и выборка чистых сообщений"
+    )
+    parser.add_argument("output", help="Файл модели, который бот загружает из SPAM_MODEL_PATH")
+    parser.add_argument("--epochs", type=int, default=5, help="Число проходов по таблицам")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Строк в одной пачке чтения из БД")
+    parser.add_argument("--batch-size", type=int, default=64, help="Сообщений в одном шаге обучения")
+    parser.add_argument("--clean-sample", type=float, default=1.0, help="Доля чистых сообщений в обучении")
+    parser.add_argument("--num-features", type=int, default=DEFAULT_NUM_FEATURES, help="Корзин хэширования")
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Порог вероятности спама")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def is_training_spam(violation_words: Sequence[str]) -> bool:
+    """Подходит ли нарушение как пример спама: найдено по словарю, шаблону или ссылке, а не эвристикой или моделью"""
+    return any(word not in HEURISTIC_VIOLATIONS for word in violation_words)
+
+
+async def iter_labeled(
+    repository: SQLAlchemyMessageRepository, chunk_size: int, clean_sample: float, sampler: random.Random
+) -> AsyncIterator[List[Tuple[str, bool]]]:
+    """
+    Пачки (текст, спам ли): нарушения из таблицы сообщений вперемешку с выборкой чистых сообщений.
+    Обе таблицы читаются потоком, по пачке из каждой на шаг, чтобы классы не шли длинными сериями
+    """
+    streams = [
+        (repository.iter_messages(chunk_size).__aiter__(), True),
+        (repository.iter_training_samples(chunk_size).__aiter__(), False),
+    ]
+    while streams:
+        labeled: List[Tuple[str, bool]] = []
+        for stream in list(streams):
+            rows, is_spam = stream
+            try:
+                chunk = await rows.__anext__()
+            except StopAsyncIteration:
+                streams.remove(stream)
+                continue
+            if is_spam:
+                labeled.extend((m.text, True) for m in chunk if m.text and is_training_spam(m.violation_words))
+            else:
+                labeled.extend((m.text, False) for m in chunk if m.text and sampler.random() < clean_sample)
+        if labeled:
+            yield labeled
+
+
+async def train(args: argparse.Namespace, repository: Optional[SQLAlchemyMessageRepository] = None) -> SpamTrainer:
+    """Обучить модель, читая нарушения и выборку чистых сообщений потоком на каждой эпохе"""
+    repository = repository or SQLAlchemyMessageRepository()
+    trainer = SpamTrainer(num_features=args.num_features, learning_rate=args.learning_rate)
+    sampler = random.Random(args.seed)
+
+    for epoch in range(1, args.epochs + 1):
+        trainer.stats = TrainingStats()
+        async for batch in iter_labeled(repository, args.chunk_size, args.clean_sample, sampler):
+            sampler.shuffle(batch)
+            for start in range(0, len(batch), args.batch_size):
+                step = batch[start : start + args.batch_size]
+                trainer.partial_fit([text for text, _ in step], [is_spam for _, is_spam in step], args.threshold)
+
+        stats = trainer.stats
+        logger.info(
+            f"Эпоха {epoch}: сообщений {stats.messages}, нарушений {stats.spam}, "
+            f"точность {stats.precision:.3f}, полнота {stats.recall:.3f}"
+        )
+        if not stats.spam or stats.spam == stats.messages:
+            raise ValueError("Для обучения нужны и нарушения по словарям, и чистые сообщения (CLEAN_SAMPLE_RATE бота)")
+
+    return trainer
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    # Загрузка переменных окружения: база данных берется из DATABASE_URL бота
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+
+    try:
+        trainer = await train(args)
+        trainer.save(args.output, args.threshold)
+        logger.info(f"Модель записана в {args.output}; работающий бот загрузит ее по команде /reload_model")
+    except Exception as e:
+        logger.error(f"Ошибка при обучении модели: {e}")
+        sys.exit(1)
+    finally:
+        await get_session_manager().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+Тесты для поиска запрещенных слов автоматом Ахо-Корасик
+"""
+
+import random
+import re
+
+import pytest
+
+from application.matching.aho_corasick import AhoCorasickAutomaton, AhoCorasickMatcher
+from application.matching.base import is_word_char
+
+
+def regex_check(words, text):
+    """Эталонная реализация: цикл по паттернам \\bслово\\b"""
+    text_lower = text.lower()
+    return [word for word in words if re.search(r"\b" + re.escape(word) + r"\b", text_lower, re.IGNORECASE)]
+
+
+class TestAhoCorasickAutomaton:
+    """Тесты автомата Ахо-Корасик"""
+
+    def test_finds_all_overlapping_matches(self):
+        """Тест поиска всех, в том числе перекрывающихся, вхождений"""
+        automaton = AhoCorasickAutomaton(["he", "she", "his", "hers"])
+
+        matches = sorted(automaton.iter_matches("ushers"))
+
+        assert matches == [(1, 1), (2, 0), (2, 3)]
+
+    def test_no_matches(self):
+        """Тест текста без вхождений"""
+        automaton = AhoCorasickAutomaton(["spam"])
+        assert list(automaton.iter_matches("clean text")) == []
+
+    def test_add_matches_rebuilt_automaton(self):
+        """Тест вставки шаблонов в построенный автомат: вхождения те же, что у автомата, построенного заново"""
+        rng = random.Random(11)
+        alphabet = "abc"
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(10)]
+        automaton = AhoCorasickAutomaton(patterns)
+
+        for _ in range(40):
+            pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+            patterns.append(pattern)
+            assert automaton.add(pattern) == len(patterns) - 1
+
+            rebuilt = AhoCorasickAutomaton(patterns)
+            text = "".join(rng.choice(alphabet) for _ in range(30))
+            assert sorted(automaton.iter_matches(text)) == sorted(rebuilt.iter_matches(text))
+
+    def test_empty_patterns(self):
+        """Тест автомата без шаблонов"""
+        automaton = AhoCorasickAutomaton([])
+        assert automaton.node_count == 1
+        assert list(automaton.iter_matches("any text")) == []
+
+
+class TestAhoCorasickMatcher:
+    """Тесты поиска запрещенных слов с проверкой границ"""
+
+    def test_whole_words_only(self):
+        """Тест поиска только целых слов"""
+        matcher = AhoCorasickMatcher().build(["spam", "bad"])
+
+        assert matcher.match("this is spam") == ["spam"]
+        assert matcher.match("spammer and badge") == []
+
+    def test_result_in_dictionary_order(self):
+        """Тест порядка найденных слов как в словаре"""
+        matcher = AhoCorasickMatcher().build(["bad", "spam"])
+        assert matcher.match("spam is bad") == ["bad", "spam"]
+
+    def test_cyrillic_words(self):
+        """Тест поиска кириллических слов"""
+        matcher = AhoCorasickMatcher().build(["казино", "ставки"])
+        assert matcher.match("лучшее казино, ставки тут") == ["казино", "ставки"]
+        assert matcher.match("казинозавр") == []
+
+    def test_words_with_punctuation(self):
+        """Тест слов, начинающихся или заканчивающихся не словесным символом"""
+        words = ["c++", ".net", "t.me"]
+        matcher = AhoCorasickMatcher().build(words)
+
+        for text in ["i love c++ and .net", "c++x", "a.net", "t.me/bot", "go t.me"]:
+            assert matcher.match(text) == regex_check(words, text)
+
+    def test_uppercase_dictionary_word(self):
+        """Тест слова в верхнем регистре в словаре"""
+        matcher = AhoCorasickMatcher().build(["SPAM"])
+        assert matcher.match("buy spam") == ["SPAM"]
+
+    def test_duplicate_words(self):
+        """Тест повторяющихся слов в словаре"""
+        matcher = AhoCorasickMatcher().build(["spam", "bad", "spam"])
+        assert matcher.match("spam") == ["spam", "spam"]
+
+    def test_matches_regex_loop_on_random_texts(self):
+        """Тест совпадения результата с циклом по регулярным выражениям"""
+        rng = random.Random(42)
+        alphabet = "ab_ -.1ая"
+        words = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or "a" for _ in range(40)})
+        matcher = AhoCorasickMatcher().build(words)
+
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert matcher.match(text) == regex_check(words, text)
+
+
+def allowed_check(words, allowed, text):
+    """Эталонная реализация исключений: слово найдено, если хотя бы одно его вхождение не перекрыто разрешенным"""
+
+    def spans(pattern):
+        regex = re.compile(r"(?=(\b" + re.escape(pattern) + r"\b))", re.IGNORECASE)
+        return [(match.start(1), match.end(1)) for match in regex.finditer(text.lower())]
+
+    allowed_spans = [span for pattern in allowed for span in spans(pattern)]
+    return [
+        word
+        for word in words
+        if any(
+            all(end <= allowed_start or start >= allowed_end for allowed_start, allowed_end in allowed_spans)
+            for start, end in spans(word)
+        )
+    ]
+
+
+class TestAllowedFragments:
+    """Тесты разрешенных фрагментов, скомпилированных в автомат вместе со словами"""
+
+    def test_allowed_fragment_suppresses_overlapping_hits(self):
+        """Тест отбрасывания вхождений внутри разрешенного фрагмента"""
+        matcher = AhoCorasickMatcher(["сука собака"]).build(["сука", "злая"])
+
+        assert matcher.match("эта сука собака злая") == ["злая"]
+        assert matcher.match("сука собака, но сука") == ["сука"]
+        assert matcher.allowed == ["сука собака"]
+
+    def test_hit_after_allowed_fragment(self):
+        """Тест вхождения, которое начинается внутри фрагмента и заканчивается после него"""
+        matcher = AhoCorasickMatcher(["сука собака"]).build(["собака злая", "злая"])
+
+        assert matcher.match("сука собака злая") == ["злая"]
+        assert matcher.match("собака злая") == ["собака злая", "злая"]
+
+    def test_allowed_fragment_respects_word_boundaries(self):
+        """Тест фрагмента, который встречается только как часть слова"""
+        matcher = AhoCorasickMatcher(["сука собака"]).build(["сука"])
+        assert matcher.match("сука собакам") == ["сука"]
+
+    def test_allowed_word_equal_to_forbidden(self):
+        """Тест фрагмента, совпадающего с запрещенным словом"""
+        matcher = AhoCorasickMatcher(["spam"]).build(["spam", "bad"])
+        assert matcher.match("spam bad") == ["bad"]
+
+    def test_added_word_respects_allowed_fragments(self):
+        """Тест слова, добавленного после построения автомата с фрагментами"""
+        matcher = AhoCorasickMatcher(["сука собака"]).build(["злая"])
+        matcher.add_word("сука")
+
+        assert matcher.pending_changes == 0
+        assert matcher.match("сука собака злая") == ["злая"]
+        assert matcher.match("сука") == ["сука"]
+
+    def test_matches_reference_on_random_texts(self):
+        """Тест совпадения результата с эталонной проверкой перекрытий"""
+        rng = random.Random(7)
+        alphabet = "ab -"
+        words = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))).strip() or "a" for _ in range(20)})
+        allowed = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(2, 5))).strip() or "ab" for _ in range(6)})
+        matcher = AhoCorasickMatcher(allowed).build(words)
+
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert matcher.match(text) == allowed_check(words, allowed, text)
+
+
+@pytest.mark.parametrize("char, expected", [("a", True), ("я", True), ("5", True), ("_", True), (" ", False), (".", False)])
+def test_is_word_char(char, expected):
+    """Тест определения словесного символа"""
+    assert is_word_char(char) is expected
+    assert bool(re.match(r"\w", char)) is expected
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.exceptions import TelegramAPIError
+
+from interfaces.telegram.admins import ChatAdmins
+
+
+def _admin(user_id: int) -> Mock:
+    member = Mock()
+    member.user.id = user_id
+    return member
+
+
+class TestChatAdmins:
+    """Тесты кэша администраторов чатов"""
+
+    @pytest.mark.asyncio
+    async def test_is_admin_cached(self):
+        """Тест запроса списка администраторов не чаще раза в ttl секунд"""
+        bot = Mock()
+        bot.get_chat_administrators = AsyncMock(return_value=[_admin(1)])
+        admins = ChatAdmins(ttl=60)
+
+        assert await admins.is_admin(bot, 10, 1, now=0.0)
+        assert not await admins.is_admin(bot, 10, 2, now=30.0)
+        bot.get_chat_administrators.assert_awaited_once_with(chat_id=10)
+
+        bot.get_chat_administrators.return_value = [_admin(2)]
+        assert await admins.is_admin(bot, 10, 2, now=60.0)
+        assert bot.get_chat_administrators.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_is_admin_api_error(self):
+        """Тест ошибки Telegram: до следующего запроса администраторов нет"""
+        bot = Mock()
+        bot.get_chat_administrators = AsyncMock(side_effect=TelegramAPIError(method=Mock(), message="error"))
+        admins = ChatAdmins(ttl=60)
+
+        assert not await admins.is_admin(bot, 10, 1, now=0.0)
+        assert not await admins.is_admin(bot, 10, 1, now=1.0)
+        bot.get_chat_administrators.assert_awaited_once()
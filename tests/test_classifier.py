@@ -0,0 +1,81 @@
+"""
+Тесты для классификатора спама
+"""
+
+import numpy as np
+import pytest
+
+from application.matching.classifier import hash_features, SpamClassifier, text_features
+
+
+@pytest.fixture
+def classifier():
+    """Классификатор, у которого признаки слова казино имеют положительные веса"""
+    model = SpamClassifier(np.zeros(1 << 12, dtype=np.float32), bias=-2.0, threshold=0.5)
+    model.weights[hash_features(text_features("казино"), model.num_features)] = 4.0
+    return model
+
+
+def test_text_features():
+    """Тест признаков текста: слова, пары слов и триграммы"""
+    features = text_features("бонус казино")
+    assert "бонус" in features
+    assert "бонус казино" in features
+    assert "<ка" in features
+    assert "но>" in features
+    assert text_features("") == []
+
+
+def test_hash_features_is_stable():
+    """Тест того, что одинаковые признаки попадают в одну корзину в пределах числа корзин"""
+    buckets = hash_features(["казино", "казино", "бонус", "x" * 100], 1 << 10)
+    assert buckets[0] == buckets[1]
+    assert all(0 <= bucket < 1 << 10 for bucket in buckets)
+    assert len(hash_features([], 1 << 10)) == 0
+
+
+def test_scores_batch(classifier):
+    """Тест оценки пачки текстов одним вызовом"""
+    scores = classifier.scores(["Лучшее КАЗИНО", "привет всем", ""])
+    assert scores[0] > 0.5
+    assert scores[1] < 0.5
+    assert classifier.predict(["Лучшее КАЗИНО", "привет всем"]) == [True, False]
+    assert len(classifier.scores([])) == 0
+
+
+def test_write_and_load(classifier, tmp_path):
+    """Тест записи модели и загрузки с отображением весов в память"""
+    path = str(tmp_path / "spam.model")
+    SpamClassifier.write(path, classifier.weights, classifier.bias, classifier.threshold)
+
+    loaded = SpamClassifier.load(path)
+    assert loaded.num_features == classifier.num_features
+    assert loaded.bias == classifier.bias
+    assert loaded.threshold == classifier.threshold
+    assert not loaded.weights.flags.writeable
+    assert loaded.predict(["Лучшее КАЗИНО"]) == [True]
+
+
+def test_load_rejects_invalid_files(tmp_path):
+    """Тест отказа от поврежденных файлов модели"""
+    short = tmp_path / "short.model"
+    short.write_bytes(b"TABMODL")
+    with pytest.raises(ValueError):
+        SpamClassifier.load(str(short))
+
+    other = tmp_path / "other.model"
+    other.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        SpamClassifier.load(str(other))
+
+    truncated = tmp_path / "truncated.model"
+    SpamClassifier.write(str(truncated), np.zeros(1 << 4), 0.0)
+    truncated.write_bytes(truncated.read_bytes()[:-4])
+    with pytest.raises(ValueError):
+        SpamClassifier.load(str(truncated))
+
+
+def test_weights_must_be_power_of_two():
+    """Тест отказа от числа корзин, не являющегося степенью двойки"""
+    with pytest.raises(ValueError):
+        SpamClassifier(np.zeros(100), bias=0.0)
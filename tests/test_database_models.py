@@ -6,7 +6,7 @@ from unittest.mock import Mock
 
 import pytest
 
-from infrastructure.database.models import Base, ChatConfigModel, MessageModel, UserModel
+from infrastructure.database.models import Base, BotSettingModel, ChatConfigModel, MessageModel, UserModel
 
 
 class TestUserModel:
@@ -124,6 +124,18 @@ class TestChatConfigModel:
         assert "ChatConfigModel" in repr_str
 
 
+class TestBotSettingModel:
+    """Тесты модели глобальных настроек бота"""
+
+    def test_bot_setting_model_creation(self):
+        """Тест создания глобальной настройки"""
+        setting = BotSettingModel(key="global_forbidden_words", value='["spam"]', value_type="json")
+
+        assert setting.key == "global_forbidden_words"
+        assert setting.value_type == "json"
+        assert "global_forbidden_words" in repr(setting)
+
+
 class TestBaseModel:
     """Тесты базовой модели"""
 
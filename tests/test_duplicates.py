@@ -0,0 +1,83 @@
+"""
+Тесты для поиска рассылок по всем чатам
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from application.matching.duplicates import DuplicateDetector, minhash, similarity
+
+AD = "Заработок от 5000 рублей в день без вложений, пиши в личку"
+
+
+@pytest.fixture
+def detector():
+    return DuplicateDetector(threshold=3, window=60)
+
+
+def test_short_messages_ignored(detector):
+    """Тест того, что короткие сообщения не учитываются"""
+    assert detector.signature("всем привет, как дела") is None
+
+
+def test_near_duplicates_share_signature(detector):
+    """Тест похожести почти одинаковых сообщений и несвязанных сообщений"""
+    ad = detector.signature(AD)
+    assert similarity(ad, detector.signature("ЗАРАБОТОК от 5000 рублей в день без вложений!!! пиши в личку")) == 1.0
+    assert similarity(ad, detector.signature("Заработок от 7000 рублей в день без вложений, пиши в личку")) >= 0.5
+    assert similarity(ad, detector.signature("Сегодня вечером собираемся в парке обсудить планы на выходные")) < 0.5
+
+
+def test_minhash_without_numpy():
+    """Тест того, что подпись без numpy совпадает с подписью, посчитанной numpy"""
+    features = {"заработок", "от", "5000", "заработок от", "от 5000"}
+    signature = minhash(features)
+    with patch("application.matching.duplicates.np", None):
+        assert minhash(features) == signature
+
+
+def test_threshold_counts_distinct_chats(detector):
+    """Тест того, что рассылкой считается сообщение, замеченное в пороговом числе разных чатов"""
+    signature = detector.signature(AD)
+    assert detector.observe(signature, 1, now=0) is False
+    assert detector.observe(signature, 1, now=1) is False  # повтор в том же чате
+    assert detector.observe(signature, 2, now=2) is False
+    assert detector.observe(signature, 3, now=3) is False
+    assert detector.observe(detector.signature(AD + "!"), 4, now=4) is True
+    assert len(detector) == 1
+
+
+def test_flagged_copy_caught_immediately(detector):
+    """Тест того, что после нарушения следующие копии ловятся сразу"""
+    signature = detector.signature(AD)
+    assert detector.observe(signature, 1, now=0) is False
+    detector.flag(signature)
+    assert detector.observe(signature, 2, now=1) is True
+
+
+def test_window_eviction(detector):
+    """Тест вытеснения групп старше окна"""
+    signature = detector.signature(AD)
+    detector.observe(signature, 1, now=0)
+    detector.flag(signature)
+
+    assert detector.observe(signature, 2, now=61) is False
+    assert len(detector) == 1
+
+
+def test_max_entries_eviction():
+    """Тест вытеснения самых старых групп при превышении предела памяти"""
+    detector = DuplicateDetector(threshold=1, window=60, max_entries=2)
+    signatures = [
+        detector.signature(AD),
+        detector.signature("Сегодня вечером собираемся в парке обсудить планы на выходные"),
+        detector.signature("Продам велосипед в хорошем состоянии, недорого, самовывоз из центра"),
+    ]
+    for now, signature in enumerate(signatures):
+        detector.observe(signature, 1, now=now)
+
+    assert len(detector) == 2
+    # Первая группа вытеснена: ее копия снова считается новой
+    assert detector.observe(signatures[0], 2, now=3) is False
+    assert detector.observe(signatures[2], 2, now=4) is True
@@ -1,8 +1,11 @@
+import json
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
-from src.application.enhanced_config import EnhancedModerationConfig
+from src.application.enhanced_config import EnhancedModerationConfig, FUZZY_KEY, INFLECTIONS_KEY, REGEX_RULES_KEY
+from src.application.matching.regex_matchers import AlternationMatcher
+from src.application.matching.selection import MATCHER_BACKENDS
 from src.infrastructure.database.models import ChatConfigModel
 
 
@@ -31,6 +34,8 @@ class TestEnhancedModerationConfig:
         mock_config = Mock(spec=ChatConfigModel)
         mock_config.warnings_limit = 3
         mock_config.forbidden_words = ["spam", "bad"]
+        mock_config.regex_rules = []
+        mock_config.allowed_words = []
         return mock_config
 
     @pytest.mark.asyncio
@@ -152,15 +157,7 @@ class TestEnhancedModerationConfig:
     async def test_check_text_with_violations(self, config):
         """Тест проверки текста с нарушениями"""
         with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
-            with patch.object(config, "_get_compiled_patterns") as mock_patterns:
-                # Мокируем паттерны
-                pattern1 = Mock()
-                pattern1.search.return_value = Mock()  # найден
-                pattern2 = Mock()
-                pattern2.search.return_value = None  # не найден
-                mock_patterns.return_value = [pattern1, pattern2]
-
-                result = await config.check_text(123456, "This is spam message")
+            result = await config.check_text(123456, "This is SPAM message")
 
         assert result == ["spam"]
 
@@ -168,18 +165,23 @@ class TestEnhancedModerationConfig:
     async def test_check_text_no_violations(self, config):
         """Тест проверки текста без нарушений"""
         with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
-            with patch.object(config, "_get_compiled_patterns") as mock_patterns:
-                # Мокируем паттерны - ничего не найдено
-                pattern1 = Mock()
-                pattern1.search.return_value = None
-                pattern2 = Mock()
-                pattern2.search.return_value = None
-                mock_patterns.return_value = [pattern1, pattern2]
-
-                result = await config.check_text(123456, "This is clean message")
+            result = await config.check_text(123456, "This is clean message, spammer")
 
         assert result == []
 
+    @pytest.mark.asyncio
+    async def test_check_text_uses_matcher(self, config):
+        """Тест делегирования проверки бэкенду поиска"""
+        mock_matcher = Mock()
+        mock_matcher.match.return_value = ["bad"]
+        mock_matcher.match_count = 0
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
+            with patch.object(config, "_get_matcher", return_value=mock_matcher):
+                result = await config.check_text(123456, "This is BAD")
+
+        assert result == ["bad"]
+        mock_matcher.match.assert_called_once_with(config._normalizer.normalize_word("This is BAD"))
+
     @pytest.mark.asyncio
     async def test_check_text_empty(self, config):
         """Тест проверки пустого текста"""
@@ -226,6 +228,19 @@ class TestEnhancedModerationConfig:
         assert result == mock_chat_config
         assert config._cached_configs[123456] == mock_chat_config
 
+    @pytest.mark.asyncio
+    async def test_get_chat_config_missing_is_cached(self, config, mock_session_manager):
+        """Тест кэширования отсутствующей конфигурации чата"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+
+        with patch.object(config, "_get_chat_config_from_db", return_value=None) as mock_from_db:
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                assert await config._get_chat_config(123456) is None
+                assert await config._get_chat_config(123456) is None
+
+        mock_from_db.assert_called_once()
+        assert 123456 in config._cached_configs
+
     @pytest.mark.asyncio
     async def test_get_chat_config_from_db_error(self, config, mock_session_manager):
         """Тест обработки ошибки при получении конфигурации из БД"""
@@ -275,45 +290,632 @@ class TestEnhancedModerationConfig:
             chat_id=123456, warnings_limit=config.default_warnings_limit, forbidden_words=[]
         )
 
-    @pytest.mark.asyncio
-    async def test_get_compiled_patterns_caching(self, config):
-        """Тест кэширования скомпилированных паттернов"""
+    def test_get_matcher_caching(self, config):
+        """Тест кэширования скомпилированного бэкенда поиска"""
         words = ["spam", "bad"]
 
         # Первый вызов
-        patterns1 = await config._get_compiled_patterns(123456, words)
+        matcher1 = config._get_matcher(123456, words)
         # Второй вызов - должен вернуть из кэша
-        patterns2 = await config._get_compiled_patterns(123456, words)
+        matcher2 = config._get_matcher(123456, words)
 
-        assert patterns1 is patterns2
-        assert len(patterns1) == 2
+        assert matcher1 is matcher2
+        assert matcher1.words == words
 
     def test_invalidate_patterns_cache(self, config):
         """Тест инвалидации кэша паттернов"""
-        config._compiled_patterns_cache = {"123456_123": Mock(), "123456_456": Mock(), "789012_789": Mock()}
+        matcher = config._get_matcher(123456, ["spam"])
+        other_matcher = config._get_matcher(789012, ["spam"])
 
         config._invalidate_patterns_cache(123456)
 
-        assert "123456_123" not in config._compiled_patterns_cache
-        assert "123456_456" not in config._compiled_patterns_cache
-        assert "789012_789" in config._compiled_patterns_cache
+        assert config._get_matcher(123456, ["spam"]) is not matcher
+        assert config._get_matcher(789012, ["spam"]) is other_matcher
+
+    def test_patterns_cache_size_limit(self):
+        """Тест ограничения размера кэша паттернов и счетчиков кэша"""
+        config = EnhancedModerationConfig(patterns_cache_size=2)
+
+        with patch("application.matching.cache.metrics") as mock_metrics:
+            first_matcher = config._get_matcher(1, ["spam"])
+            config._get_matcher(2, ["spam"])
+            config._get_matcher(1, ["spam"])
+            config._get_matcher(3, ["spam"])
+
+            assert len(config._compiled_patterns_cache) == 2
+            assert mock_metrics.increment_pattern_cache_hits.call_count == 1
+            assert mock_metrics.increment_pattern_cache_misses.call_count == 3
+            assert mock_metrics.increment_pattern_cache_evictions.call_count == 1
+            # Вытеснен чат 2, к которому дольше всего не обращались
+            assert config._get_matcher(1, ["spam"]) is first_matcher
+            assert config._compiled_patterns_cache.get(2, config.get_matcher_backend(2, ["spam"])) is None
+
+    @pytest.mark.asyncio
+    async def test_chat_structures_share_bounded_cache(self):
+        """Тест хранения фильтров и индексов чатов в том же ограниченном кэше, что и бэкенды поиска"""
+        config = EnhancedModerationConfig(patterns_cache_size=10)
+        config._global_words = []
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "free crypto"]):
+            with patch.object(config, "get_regex_rules", return_value=[{"pattern": "x+y", "enabled": True}]):
+                for chat_id in range(1, 51):
+                    assert await config.check_text(chat_id, "spam") == ["spam"]
+
+        assert len(config._compiled_patterns_cache) == 10
+        assert {chat_id for chat_id, _, _ in config._compiled_patterns_cache.items()} <= {48, 49, 50}
+
+        # Сброс чата сразу освобождает все его записи
+        config._reset_compiled(50)
+        assert 50 not in {chat_id for chat_id, _, _ in config._compiled_patterns_cache.items()}
+        assert len(config._compiled_patterns_cache) < 10
 
     def test_clear_cache_specific_chat(self, config, mock_chat_config):
         """Тест очистки кэша для конкретного чата"""
         config._cached_configs = {123456: mock_chat_config, 789012: Mock()}
-        config._compiled_patterns_cache = {"123456_123": Mock()}
+        matcher = config._get_matcher(123456, ["spam"])
 
         config.clear_cache(123456)
 
         assert 123456 not in config._cached_configs
-        assert "123456_123" not in config._compiled_patterns_cache
+        assert config._get_matcher(123456, ["spam"]) is not matcher
 
     def test_clear_cache_all(self, config, mock_chat_config):
         """Тест очистки всего кэша"""
         config._cached_configs = {123456: mock_chat_config}
-        config._compiled_patterns_cache = {"123456_123": Mock()}
+        config._get_matcher(123456, ["spam"])
 
         config.clear_cache()
 
         assert config._cached_configs == {}
-        assert config._compiled_patterns_cache == {}
+        assert len(config._compiled_patterns_cache) == 0
+
+    def test_matcher_backend_by_dictionary_size(self, config):
+        """Тест выбора бэкенда поиска по размеру словаря"""
+        from src.application.matching.selection import ALTERNATION_BACKEND, AUTOMATON_BACKEND, REGEX_BACKEND
+
+        assert config.get_matcher_backend(123456, ["spam"]) == REGEX_BACKEND
+        assert config.get_matcher_backend(123456, [f"w{i}" for i in range(50)]) == ALTERNATION_BACKEND
+        assert config.get_matcher_backend(123456, [f"w{i}" for i in range(500)]) == AUTOMATON_BACKEND
+
+    def test_set_matcher_backend(self, config):
+        """Тест явного выбора бэкенда поиска для чата"""
+        from src.application.matching.selection import AUTOMATON_BACKEND, REGEX_BACKEND
+
+        config.set_matcher_backend(123456, AUTOMATON_BACKEND)
+        assert config.get_matcher_backend(123456, ["spam"]) == AUTOMATON_BACKEND
+        assert config.get_matcher_backend(789012, ["spam"]) == REGEX_BACKEND
+
+        config.set_matcher_backend(123456, None)
+        assert config.get_matcher_backend(123456, ["spam"]) == REGEX_BACKEND
+
+        with pytest.raises(ValueError):
+            config.set_matcher_backend(123456, "unknown")
+
+    @pytest.mark.asyncio
+    async def test_check_text_automaton_backend(self, config):
+        """Тест проверки текста автоматом Ахо-Корасик"""
+        from src.application.matching.selection import AUTOMATON_BACKEND
+
+        config.set_matcher_backend(123456, AUTOMATON_BACKEND)
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
+            result = await config.check_text(123456, "Bad SPAM message, spammer")
+
+        assert result == ["spam", "bad"]
+        assert config._compiled_patterns_cache.get(123456, AUTOMATON_BACKEND) is not None
+
+    @pytest.mark.asyncio
+    async def test_check_text_normalizes_obfuscated_words(self, config):
+        """Тест поиска запрещенных слов, замаскированных гомоглифами и повторами"""
+        with patch.object(config, "get_forbidden_words", return_value=["казино", "спам"]):
+            result = await config.check_text(123456, "Лучшее кáзинo и спааааам")
+
+        assert result == ["казино", "спам"]
+
+    @pytest.mark.asyncio
+    async def test_check_text_finds_inflected_forms(self, config):
+        """Тест поиска словоформ запрещенного слова"""
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "казино", "ставка"]):
+            result = await config.check_text(123456, "Заходи в казиношку, без ставок не уйдешь")
+
+        assert result == ["казино", "ставка"]
+
+    @pytest.mark.asyncio
+    async def test_add_forbidden_word_updates_inflection_index(self, config, mock_chat_config, mock_session_manager):
+        """Тест обновления индекса словоформ при добавлении и удалении слова"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        config._get_inflection_index(123456, mock_chat_config.forbidden_words)
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=mock_chat_config):
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                await config.add_forbidden_word(123456, "рулетка")
+
+        assert config._compiled_patterns_cache.peek(123456, INFLECTIONS_KEY).lookup(["рулеткой"]) == {"рулетка"}
+
+        with patch.object(config, "_get_chat_config_from_db", return_value=mock_chat_config):
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                await config.remove_forbidden_word(123456, "рулетка")
+
+        assert config._compiled_patterns_cache.peek(123456, INFLECTIONS_KEY).lookup(["рулеткой"]) == set()
+
+    @pytest.mark.asyncio
+    async def test_check_text_fuzzy_matching(self, config, mock_session_manager):
+        """Тест нечеткого поиска слов с опечатками и заменой букв цифрами"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=[])
+        config._cached_configs[123456] = chat_config
+        config._global_words = []
+
+        with patch.object(config, "get_forbidden_words", return_value=["казино", "криптовалюта"]):
+            with patch.object(config, "_get_or_create_chat_config", return_value=chat_config), patch.object(
+                config, "_get_chat_config_from_db", return_value=None
+            ):
+                with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                    assert not await config.is_fuzzy_matching_enabled(123456)
+                    assert await config.check_text(123456, "Лучшее казин0, криптавалюта") == []
+
+                    await config.set_fuzzy_matching(123456, True)
+                    # Флаг хранится в конфигурации чата и переживает перезапуск
+                    assert chat_config.fuzzy_matching is True
+                    mock_session.add.assert_called_with(chat_config)
+                    assert await config.is_fuzzy_matching_enabled(123456)
+                    assert await config.check_text(123456, "Лучшее казин0, криптавалюта") == ["казино", "криптовалюта"]
+                    assert await config.check_text(789012, "Лучшее казин0") == []
+
+                    await config.set_fuzzy_matching(123456, False)
+                    assert chat_config.fuzzy_matching is False
+                    assert config._compiled_patterns_cache.peek(123456, FUZZY_KEY) is None
+                    assert await config.check_text(123456, "Лучшее казин0") == []
+
+    @pytest.mark.asyncio
+    async def test_check_text_prefilter_skips_clean_message(self, config):
+        """Тест пропуска точного поиска для сообщения без токенов словаря"""
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "free crypto"]):
+            with patch("src.application.enhanced_config.metrics") as mock_metrics:
+                assert await config.check_text(123456, "Обычное сообщение") == []
+                mock_metrics.record_prefilter_result.assert_called_once_with(skipped=True)
+                assert not [key for _, key, _ in config._compiled_patterns_cache.items() if key in MATCHER_BACKENDS]
+
+                assert await config.check_text(123456, "crypto для всех") == []
+                mock_metrics.record_prefilter_result.assert_called_with(skipped=False, matched=False)
+
+                assert await config.check_text(123456, "free crypto") == ["free crypto"]
+                mock_metrics.record_prefilter_result.assert_called_with(skipped=False, matched=True)
+
+    @pytest.mark.asyncio
+    async def test_add_forbidden_word_updates_matcher_in_place(self, config, mock_chat_config, mock_session_manager):
+        """Тест обновления скомпилированного бэкенда при правке словаря без перестройки"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        config._cached_configs[123456] = mock_chat_config
+        assert await config.check_text(123456, "spam") == ["spam"]
+        matcher = config._get_matcher(123456, mock_chat_config.forbidden_words)
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=mock_chat_config):
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                await config.add_forbidden_word(123456, "scam")
+
+        assert await config.check_text(123456, "scam и spam") == ["spam", "scam"]
+        assert config._get_matcher(123456, mock_chat_config.forbidden_words) is matcher
+
+        with patch.object(config, "_get_chat_config_from_db", return_value=mock_chat_config):
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                await config.remove_forbidden_word(123456, "spam")
+
+        assert await config.check_text(123456, "scam и spam") == ["scam"]
+        assert config._get_matcher(123456, mock_chat_config.forbidden_words) is matcher
+
+    @pytest.mark.asyncio
+    async def test_matchers_restored_from_snapshot(self, tmp_path):
+        """Тест восстановления бэкендов поиска из снимка после перезапуска"""
+        snapshot_path = str(tmp_path / "matchers.snapshot")
+        config = EnhancedModerationConfig(snapshot_path=snapshot_path)
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
+            assert await config.check_text(123456, "spam") == ["spam"]
+        assert config.save_snapshot() == 1
+
+        restarted = EnhancedModerationConfig(snapshot_path=snapshot_path)
+        with patch.object(restarted, "get_forbidden_words", return_value=["spam", "bad"]):
+            with patch("src.application.enhanced_config.create_matcher") as mock_create_matcher:
+                assert await restarted.check_text(123456, "bad spam") == ["spam", "bad"]
+                mock_create_matcher.assert_not_called()
+
+    def test_save_snapshot_disabled(self, config):
+        """Тест того, что без пути к снимку ничего не записывается"""
+        config._get_matcher(123456, ["spam"])
+        assert config.save_snapshot() == 0
+
+    @pytest.mark.asyncio
+    async def test_check_text_global_dictionary(self, config):
+        """Тест общего словаря, скомпилированного один раз для всех чатов, поверх слов чата"""
+        from src.application.enhanced_config import GLOBAL_DICTIONARY_ID
+
+        config._global_words = ["casino", "spam"]
+        with patch.object(config, "get_forbidden_words", side_effect=lambda chat_id: ["scam"] if chat_id == 123456 else []):
+            with patch.object(config, "get_excluded_words", return_value=[]):
+                assert await config.check_text(123456, "spam casino scam") == ["scam", "casino", "spam"]
+                assert await config.check_text(789012, "spam casino scam") == ["casino", "spam"]
+
+        backend = config.get_matcher_backend(GLOBAL_DICTIONARY_ID, config._global_words)
+        assert len([key for _, key, _ in config._compiled_patterns_cache.items() if key in MATCHER_BACKENDS]) == 2
+        assert config._compiled_patterns_cache.peek(GLOBAL_DICTIONARY_ID, backend).words == ["casino", "spam"]
+
+    @pytest.mark.asyncio
+    async def test_check_text_global_dictionary_exclusions(self, config):
+        """Тест отключения слов общего словаря в отдельном чате"""
+        config._global_words = ["casino", "spam"]
+        with patch.object(config, "get_forbidden_words", return_value=[]):
+            with patch.object(config, "get_excluded_words", side_effect=lambda chat_id: ["spam"] if chat_id == 123456 else []):
+                assert await config.check_text(123456, "spam casino") == ["casino"]
+                assert await config.check_text(789012, "spam casino") == ["casino", "spam"]
+
+    @pytest.mark.asyncio
+    async def test_global_forbidden_words_management(self, config, mock_session_manager):
+        """Тест добавления, удаления и очистки общего словаря"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        config._global_words = ["casino"]
+        config._get_matcher(0, ["casino"])
+
+        with patch.object(config, "_get_setting_from_db", return_value=None):
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                await config.add_global_forbidden_word(" Spam ")
+                assert config._global_words == ["casino", "spam"]
+                setting = mock_session.add.call_args[0][0]
+                assert setting.key == "global_forbidden_words"
+                assert json.loads(setting.value) == ["casino", "spam"]
+                matcher = config._get_matcher(0, config._global_words)
+                assert matcher.match(config._normalizer.normalize("spam").text) == ["spam"]
+
+                assert await config.remove_global_forbidden_word("casino") is True
+                assert await config.remove_global_forbidden_word("casino") is False
+                assert config._global_words == ["spam"]
+
+                await config.clear_global_forbidden_words()
+                assert config._global_words == []
+
+    @pytest.mark.asyncio
+    async def test_get_global_forbidden_words_from_db(self, config, mock_session_manager):
+        """Тест загрузки общего словаря из настроек бота"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        setting = Mock(value='["casino", "spam"]')
+
+        with patch.object(config, "_get_setting_from_db", return_value=setting) as mock_get_setting:
+            with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                assert await config.get_global_forbidden_words() == ["casino", "spam"]
+                assert await config.get_global_forbidden_words() == ["casino", "spam"]
+
+        mock_get_setting.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_exclude_and_include_forbidden_word(self, config, mock_session_manager):
+        """Тест отключения и включения слова общего словаря в чате"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=[], excluded_words=[])
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=chat_config):
+            with patch.object(config, "_get_chat_config_from_db", return_value=chat_config):
+                with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                    await config.exclude_forbidden_word(123456, "Spam")
+                    assert await config.get_excluded_words(123456) == ["spam"]
+
+                    assert await config.include_forbidden_word(123456, "spam") is True
+                    assert await config.include_forbidden_word(123456, "spam") is False
+                    assert await config.get_excluded_words(123456) == []
+
+    @pytest.mark.asyncio
+    async def test_add_and_remove_allowed_word(self, config, mock_session_manager):
+        """Тест добавления и удаления разрешенного фрагмента со сбросом автомата чата"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=["spam"], allowed_words=[])
+        matcher = config._get_matcher(123456, ["spam"])
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=chat_config):
+            with patch.object(config, "_get_chat_config_from_db", return_value=chat_config):
+                with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                    await config.add_allowed_word(123456, " Spam Free ")
+                    await config.add_allowed_word(123456, "spam free")
+                    assert await config.get_allowed_words(123456) == ["spam free"]
+                    # Словарь с фрагментами компилируется в отдельный автомат, бэкенд без фрагментов остается в кэше
+                    assert config._get_matcher(123456, ["spam"], ["spam free"]) is not matcher
+                    assert config._get_matcher(123456, ["spam"]) is matcher
+
+                    assert await config.check_text(123456, "spam free") == []
+                    assert await config.check_text(123456, "spam") == ["spam"]
+
+                    assert await config.remove_allowed_word(123456, "spam free") is True
+                    assert await config.remove_allowed_word(123456, "spam free") is False
+                    assert await config.get_allowed_words(123456) == []
+                    assert await config.check_text(123456, "spam free") == ["spam"]
+
+    @pytest.mark.asyncio
+    async def test_check_text_allowed_words(self, config):
+        """Тест разрешенных фрагментов для слов чата, общего словаря, словоформ и нечеткого поиска"""
+        from src.application.enhanced_config import ALLOWED_GLOBAL_KEY, GLOBAL_DICTIONARY_ID
+
+        config._global_words = ["казино"]
+        config._cached_configs[123456] = ChatConfigModel(chat_id=123456, forbidden_words=[], fuzzy_matching=True)
+        allowed = {123456: ["сука собака", "казино рояль", "рука"]}
+        with patch.object(config, "get_forbidden_words", return_value=["сука"]):
+            with patch.object(config, "get_excluded_words", return_value=[]):
+                with patch.object(config, "get_allowed_words", side_effect=lambda chat_id: allowed.get(chat_id, [])):
+                    assert await config.check_text(123456, "Сука собака") == []
+                    assert await config.check_text(123456, "сука, а не собака") == ["сука"]
+                    assert await config.check_text(123456, "рука") == []
+                    assert await config.check_text(123456, "казино рояль") == []
+                    assert await config.check_text(123456, "казино") == ["казино"]
+                    assert await config.check_text(789012, "казино рояль") == ["казино"]
+
+                    # Общий словарь чата с фрагментами - отдельный автомат, который обновляется вместе с общим
+                    assert config._compiled_patterns_cache.peek(123456, ALLOWED_GLOBAL_KEY).words == ["казино"]
+                    config._global_words = ["казино", "рояль"]
+                    config._add_to_compiled(GLOBAL_DICTIONARY_ID, "рояль")
+                    assert await config.check_text(123456, "казино рояль") == []
+                    assert await config.check_text(123456, "рояль") == ["рояль"]
+                    assert await config.check_texts(123456, ["казино рояль", "рояль", "сука собака"]) == [[], ["рояль"], []]
+
+                    config._reset_compiled(GLOBAL_DICTIONARY_ID)
+                    assert config._compiled_patterns_cache.peek(123456, ALLOWED_GLOBAL_KEY) is None
+
+    @pytest.mark.asyncio
+    async def test_check_text_allowed_words_ignore_spacing(self, config):
+        """Тест того, что разрешенные фрагменты, как и фразы словаря, не зависят от пробелов между словами"""
+        config._global_words = []
+        config._cached_configs[123456] = ChatConfigModel(chat_id=123456, forbidden_words=[])
+        with patch.object(config, "get_forbidden_words", return_value=["bad"]):
+            with patch.object(config, "get_allowed_words", return_value=["not bad", "so \t good"]):
+                for text in ["not bad", "not  bad", "not\nbad", "Not \t\n bad!"]:
+                    assert await config.check_text(123456, text) == []
+                assert await config.check_texts(123456, ["not  bad", "not\nbad", "bad  so good"]) == [[], [], ["bad"]]
+                assert await config.check_text(123456, "not so bad") == ["bad"]
+
+    @pytest.mark.asyncio
+    async def test_allowed_global_matchers_are_not_saved_to_snapshot(self, tmp_path):
+        """Тест записи в снимок только автоматов словарей самих чатов"""
+        from src.application.enhanced_config import ALLOWED_GLOBAL_KEY
+
+        config = EnhancedModerationConfig(snapshot_path=str(tmp_path / "matchers.snapshot"))
+        config._get_matcher(123456, ["spam"], ["spam free"])
+        config._get_matcher(0, ["casino"], ["spam free"], 123456)
+        assert config._compiled_patterns_cache.peek(123456, ALLOWED_GLOBAL_KEY) is not None
+
+        assert config.save_snapshot() == 1
+        restored = EnhancedModerationConfig(snapshot_path=str(tmp_path / "matchers.snapshot"))
+        assert restored._get_matcher(123456, ["spam"], ["spam free"]).match("spam free") == []
+        assert restored._snapshot.loaded_count == 1
+
+    @pytest.mark.asyncio
+    async def test_check_texts_batch(self, config):
+        """Тест пакетной проверки: результаты совпадают с check_text, словари загружаются один раз"""
+        config._global_words = ["casino", "spam"]
+        texts = ["spam casino scam", "", "Обычное сообщение", "SCAM и спам", "spam"]
+
+        with patch.object(config, "get_forbidden_words", return_value=["scam"]) as mock_get_words:
+            with patch.object(config, "get_excluded_words", return_value=["spam"]):
+                expected = [await config.check_text(123456, text) for text in texts]
+                mock_get_words.reset_mock()
+
+                with patch("src.application.enhanced_config.metrics") as mock_metrics:
+                    assert await config.check_texts(123456, texts) == expected
+
+        assert expected == [["scam", "casino"], [], [], ["scam"], []]
+        mock_get_words.assert_awaited_once_with(123456)
+        mock_metrics.record_prefilter_results.assert_called_once_with(8, 4, 0)
+        mock_metrics.record_prefilter_result.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_check_texts_without_words(self, config):
+        """Тест пакетной проверки без словарей и без текстов"""
+        config._global_words = []
+        with patch.object(config, "get_forbidden_words", return_value=[]):
+            assert await config.check_texts(123456, ["spam", "casino"]) == [[], []]
+            assert await config.check_texts(123456, []) == []
+
+    @pytest.mark.asyncio
+    async def test_check_text_offload(self, config):
+        """Тест отправки дорогих проверок в пул процессов и возврата в основной процесс при сбое пула"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        check_offload = Mock()
+        check_offload.should_offload.side_effect = lambda text_length, word_count, fuzzy: text_length > 10
+        check_offload.check = AsyncMock(return_value=["spam"])
+        config._offload = check_offload
+        config._global_words = []
+
+        with patch.object(config, "get_forbidden_words", return_value=["spam"]):
+            assert await config.check_text(123456, "spam") == ["spam"]
+            check_offload.check.assert_not_called()
+
+            assert await config.check_text(123456, "long text with spam") == ["spam"]
+            versions = (config._dictionary_version(123456), config._dictionary_version(0))
+            check_offload.check.assert_awaited_once_with(
+                123456, versions, ["spam"], [], set(), False, "long text with spam", []
+            )
+
+            # Изменение словаря меняет его версию, и пул получит новые слова
+            config._add_to_compiled(123456, "scam")
+            assert config._dictionary_version(123456) != versions[0]
+            assert config._dictionary_version(0) == versions[1]
+
+            check_offload.check.side_effect = BrokenProcessPool("пул остановлен")
+            assert await config.check_text(123456, "long text with spam") == ["spam"]
+            check_offload.shutdown.assert_called_once()
+            assert config._offload is None
+
+    def test_compact_matchers(self, config):
+        """Тест отложенного сжатия бэкендов поиска после правок словаря"""
+        matcher = AlternationMatcher().build(["spam", "bad"])
+        config._compiled_patterns_cache.put(123456, "alternation", matcher)
+
+        config._add_to_compiled(123456, "scam")
+        assert matcher.needs_compaction
+        assert matcher.match(config._normalizer.normalize_word("scam")) == ["scam"]
+
+        assert config.compact_matchers() == 1
+        assert not matcher.needs_compaction
+        assert config.compact_matchers() == 0
+
+    def test_close_stops_offload(self):
+        """Тест остановки пула процессов проверки"""
+        config = EnhancedModerationConfig(offload_workers=1)
+        check_offload = config._offload
+        with patch.object(check_offload, "shutdown") as mock_shutdown:
+            config.close()
+        mock_shutdown.assert_called_once()
+        assert config._offload is None
+        check_offload._executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_check_text_phrases_ignore_separators(self, config):
+        """Тест поиска фраз с произвольными пробелами и переводами строк между словами"""
+        config._global_words = []
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "free crypto"]):
+            assert await config.check_text(123456, "Get FREE   crypto") == ["free crypto"]
+            assert await config.check_text(123456, "spam: free\ncrypto") == ["spam", "free crypto"]
+            assert await config.check_texts(123456, ["free\n\ncrypto", "free bitcoin crypto"]) == [["free crypto"], []]
+
+    @pytest.mark.asyncio
+    async def test_regex_rules_management(self, config, mock_session_manager):
+        """Тест добавления и удаления правил-шаблонов с проверкой безопасности и бюджета чата"""
+        from application.matching.regex_rules import UnsafeRegexError
+
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=[], regex_rules=[])
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=chat_config):
+            with patch.object(config, "_get_chat_config_from_db", return_value=chat_config):
+                with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                    await config.add_regex_rule(123456, r" t\.me/\w+bot ")
+                    assert await config.get_regex_rules(123456) == [{"pattern": r"t\.me/\w+bot", "enabled": True}]
+
+                    with pytest.raises(UnsafeRegexError):
+                        await config.add_regex_rule(123456, r"(a+)+$")
+                    with patch("src.application.enhanced_config.DEFAULT_COMPILE_BUDGET", 10):
+                        with pytest.raises(UnsafeRegexError, match="бюджет"):
+                            await config.add_regex_rule(123456, r"casino\d+")
+                    assert len(chat_config.regex_rules) == 1
+
+                    assert await config.remove_regex_rule(123456, r"t\.me/\w+bot") is True
+                    assert await config.remove_regex_rule(123456, r"t\.me/\w+bot") is False
+                    assert await config.get_regex_rules(123456) == []
+
+    @pytest.mark.asyncio
+    async def test_check_text_regex_rules_auto_disable(self, config, mock_session_manager):
+        """Тест срабатывания правил-шаблонов и отключения правила, превысившего лимит времени"""
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(
+            chat_id=123456,
+            warnings_limit=3,
+            forbidden_words=["spam"],
+            regex_rules=[{"pattern": r"t\.me/\w+bot", "enabled": True}, {"pattern": "casino", "enabled": False}],
+        )
+        config._cached_configs[123456] = chat_config
+        config._global_words = []
+
+        assert await config.check_text(123456, "spam t.me/freebot casino") == ["spam", r"t\.me/\w+bot"]
+        assert await config.check_texts(123456, ["t.me/xbot", "clean"]) == [[r"t\.me/\w+bot"], []]
+
+        with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+            with patch.object(config, "_get_chat_config_from_db", return_value=chat_config):
+                with patch("src.application.enhanced_config.metrics") as mock_metrics:
+                    config._compiled_patterns_cache.peek(123456, REGEX_RULES_KEY).time_limit = 0.0
+                    assert await config.check_text(123456, "t.me/freebot") == [r"t\.me/\w+bot"]
+
+        mock_metrics.increment_regex_rules_disabled.assert_called_once_with(123456)
+        assert chat_config.regex_rules[0] == {"pattern": r"t\.me/\w+bot", "enabled": False}
+        assert await config.check_text(123456, "t.me/freebot") == []
+
+    @pytest.mark.asyncio
+    async def test_check_text_records_rule_hits(self, config):
+        """Тест учета срабатываний правил и проверенных сообщений при поиске"""
+        config._global_words = []
+        with patch.object(config, "get_forbidden_words", return_value=["spam", "bad"]):
+            await config.check_text(123456, "spam and bad")
+            await config.check_texts(123456, ["spam", "clean", ""])
+
+        pending = config._hit_counters.pending
+        assert pending.hits == {(123456, "spam"): 2, (123456, "bad"): 1}
+        assert pending.checks == {123456: 3}
+        assert pending.match_times[123456] > 0
+
+    @pytest.mark.asyncio
+    async def test_flush_rule_stats(self, config, tmp_path):
+        """Тест записи счетчиков в БД и статистики правил с учетом еще не записанных счетчиков"""
+        from application.settings import DatabaseConfig
+        from infrastructure.database.session import DatabaseSessionManager
+
+        session_manager = DatabaseSessionManager(
+            DatabaseConfig(url=f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}", pool_size=1, max_overflow=0, echo=False)
+        )
+        await session_manager.init_db()
+        config._global_words = []
+
+        try:
+            with patch("src.application.enhanced_config.get_session_manager", return_value=session_manager):
+                with patch.object(config, "get_forbidden_words", return_value=["spam", "bad", "casino"]):
+                    with patch.object(config, "get_regex_rules", return_value=[{"pattern": r"t\.me/\w+", "enabled": True}]):
+                        assert await config.flush_rule_stats() == 0
+
+                        config._hit_counters.record(123456, ["spam", "bad"], 0.002)
+                        config._hit_counters.record(123456, ["spam"], 0.004)
+                        config._hit_counters.record(654321, ["spam"], 0.001)
+                        assert await config.flush_rule_stats() == 3
+                        assert not config._hit_counters.pending
+
+                        config._hit_counters.record(123456, ["spam"], 0.003)
+                        assert await config.flush_rule_stats() == 1
+
+                        config._hit_counters.record(123456, ["casino"], 0.003)
+                        stats = await config.get_rule_stats(123456)
+        finally:
+            await session_manager.close()
+
+        assert stats["top_rules"] == [("spam", 3), ("bad", 1), ("casino", 1)]
+        assert stats["dead_rules"] == [r"t\.me/\w+"]
+        assert stats["check_count"] == 4
+        assert abs(stats["average_match_time"] - 0.003) < 1e-9
+
+    @pytest.mark.asyncio
+    async def test_flush_rule_stats_restores_counters_on_error(self, config):
+        """Тест возврата счетчиков при ошибке записи в БД"""
+        config._hit_counters.record(123456, ["spam"], 0.001)
+        with patch("src.application.enhanced_config.get_session_manager", side_effect=Exception("DB error")):
+            assert await config.flush_rule_stats() == 0
+
+        assert config._hit_counters.pending.hits == {(123456, "spam"): 1}
+
+    @pytest.mark.asyncio
+    async def test_link_rules_management(self, config, mock_session_manager):
+        """Тест добавления и удаления правил для ссылок с проверкой формата"""
+        from application.matching.links import InvalidLinkRuleError
+
+        mock_session_manager_obj, mock_session = mock_session_manager
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=[], link_rules=[])
+
+        with patch.object(config, "_get_or_create_chat_config", return_value=chat_config):
+            with patch.object(config, "_get_chat_config_from_db", return_value=chat_config):
+                with patch("src.application.enhanced_config.get_session_manager", return_value=mock_session_manager_obj):
+                    await config.add_link_rule(123456, " *.Casino.XYZ ")
+                    await config.add_link_rule(123456, "*.casino.xyz")
+                    assert await config.get_link_rules(123456) == ["*.casino.xyz"]
+
+                    with pytest.raises(InvalidLinkRuleError):
+                        await config.add_link_rule(123456, "casino")
+
+                    assert await config.remove_link_rule(123456, "*.casino.xyz") is True
+                    assert await config.remove_link_rule(123456, "*.casino.xyz") is False
+                    assert await config.get_link_rules(123456) == []
+
+    @pytest.mark.asyncio
+    async def test_check_links(self, config):
+        """Тест проверки доменов и упоминаний по дереву правил чата и учета срабатываний"""
+        chat_config = ChatConfigModel(chat_id=123456, warnings_limit=3, forbidden_words=[], link_rules=["*.casino.xyz"])
+        config._cached_configs[123456] = chat_config
+
+        assert await config.check_links(123456, []) == []
+        assert await config.check_links(123456, ["win.casino.xyz", "@friend"]) == ["*.casino.xyz"]
+        assert await config.check_links(123456, ["casino.xyz.evil.com"]) == []
+
+        # Дерево перестраивается, когда правила чата изменились
+        chat_config.link_rules = ["*.casino.xyz", "@spambot"]
+        assert await config.check_links(123456, ["@spambot"]) == ["@spambot"]
+
+        pending = config._hit_counters.pending
+        assert pending.hits == {(123456, "*.casino.xyz"): 1, (123456, "@spambot"): 1}
+        assert pending.checks[123456] == 0
@@ -0,0 +1,74 @@
+"""
+Тесты для признаков текста
+"""
+
+import pytest
+
+from application.matching.features import build_feature_rules, DEFAULT_FEATURE_RULES, extract_features, MIN_REPEATED_RUN
+
+
+def test_caps_and_emoji():
+    """Тест доли заглавных букв и плотности эмодзи"""
+    features = extract_features("СРОЧНО заработок 💰💰")
+    assert features.letters == 15
+    assert features.uppercase == 6
+    assert features.caps_ratio == 6 / 15
+    assert features.emoji == 2
+    assert features.emoji_density == 2 / 19
+
+
+def test_digits_and_urls():
+    """Тест подсчета цифр и ссылок, в том числе в конце текста"""
+    features = extract_features("Звони 8800 https://casino.xyz/bonus и www.win.ru пиши t.me/spam")
+    assert features.digits == 4
+    assert features.urls == 3
+    assert extract_features("casino.xyz и http").urls == 0
+
+
+def test_repeated_runs():
+    """Тест повторов одного символа"""
+    features = extract_features("Дааааа!!!! ок" + "." * (MIN_REPEATED_RUN - 1))
+    assert features.repeated_runs == 2
+    assert features.longest_run == 5
+    assert extract_features("!!!!!!").longest_run == 6
+
+
+def test_mixed_script_words():
+    """Тест слов, в которых кириллица смешана с латиницей"""
+    features = extract_features("Зарабoтoк без влoжений, hello мир, ok123")
+    assert features.words == 6
+    assert features.mixed_script_words == 2
+    assert extract_features("пpивeт").mixed_script_words == 1
+
+
+def test_empty_text():
+    """Тест признаков пустого текста"""
+    features = extract_features("")
+    assert features.length == 0
+    assert features.caps_ratio == 0.0
+    assert features.emoji_density == 0.0
+    assert features.longest_run == 0
+
+
+@pytest.mark.parametrize(
+    "name, text, violation",
+    [
+        ("caps", "СРОЧНЫЙ ЗАРАБОТОК БЕЗ ВЛОЖЕНИЙ", "капс"),
+        ("emoji", "💰💰💰💰💰💰 пиши", "эмодзи"),
+        ("links", "http://a http://b www.c t.me/d", "много ссылок"),
+        ("mixed_script", "Зарабoтoк без влoжений", "смешение алфавитов"),
+    ],
+)
+def test_feature_rules(name, text, violation):
+    """Тест эвристик по умолчанию на нарушениях и на обычном сообщении"""
+    (rule,) = build_feature_rules([name])
+    assert rule(extract_features(text)) == violation
+    assert rule(extract_features("Привет, завтра в 10 встречаемся у входа, ссылка https://example.com")) is None
+
+
+def test_build_feature_rules():
+    """Тест сборки эвристик по названиям"""
+    assert len(build_feature_rules(DEFAULT_FEATURE_RULES)) == len(DEFAULT_FEATURE_RULES)
+    assert build_feature_rules([]) == []
+    with pytest.raises(ValueError, match="shouting"):
+        build_feature_rules(["caps", "shouting"])
@@ -0,0 +1,69 @@
+"""
+Тесты для защиты от флуда
+"""
+
+import pytest
+
+from application.flood import FloodDetector
+
+
+@pytest.fixture
+def detector():
+    return FloodDetector(limit=5, interval=3.0, idle_ttl=60.0)
+
+
+def test_limit_not_exceeded(detector):
+    """Тест того, что limit сообщений за интервал флудом не считаются"""
+    assert [detector.record(1, 10, now=now) for now in (0, 0.5, 1, 1.5, 2)] == [0] * 5
+    # Шестое сообщение уже через 3 секунды после первого
+    assert detector.record(1, 10, now=3.0) == 0
+
+
+def test_breach_and_reset(detector):
+    """Тест превышения частоты и того, что после нарушения окно начинается заново"""
+    for now in (0, 0.1, 0.2, 0.3, 0.4):
+        detector.record(1, 10, now=now)
+    assert detector.record(1, 10, now=0.5) == 1
+    assert [detector.record(1, 10, now=0.6 + i / 10) for i in range(5)] == [0] * 5
+    assert detector.record(1, 10, now=1.2) == 2
+
+
+def test_windows_are_per_chat_and_user(detector):
+    """Тест того, что окна разных пользователей и чатов независимы"""
+    for now in (0, 0.1, 0.2, 0.3, 0.4):
+        detector.record(1, 10, now=now)
+    assert detector.record(1, 11, now=0.5) == 0
+    assert detector.record(2, 10, now=0.5) == 0
+    assert detector.record(1, 10, now=0.5) == 1
+
+
+def test_idle_eviction_resets_breaches(detector):
+    """Тест вытеснения неактивных пользователей вместе со счетчиком нарушений"""
+    for now in (0, 0.1, 0.2, 0.3, 0.4, 0.5):
+        detector.record(1, 10, now=now)
+    detector.record(1, 11, now=30)
+    assert len(detector) == 2
+
+    detector.record(1, 12, now=61)
+    assert len(detector) == 2  # окно пользователя 10 удалено
+    for now in (62, 62.1, 62.2, 62.3, 62.4):
+        detector.record(1, 10, now=now)
+    assert detector.record(1, 10, now=62.5) == 1
+
+
+def test_max_tracked():
+    """Тест вытеснения давно писавших пользователей сверх предела"""
+    detector = FloodDetector(limit=2, interval=1.0, max_tracked=2)
+    detector.record(1, 10, now=0)
+    detector.record(1, 11, now=1)
+    detector.record(1, 10, now=2)
+    detector.record(1, 12, now=3)
+    assert len(detector) == 2
+    # Пользователь 11 писал раньше всех и вытеснен, его окно начинается заново
+    detector.record(1, 11, now=3.1)
+    assert detector.record(1, 11, now=3.2) == 0
+
+
+def test_invalid_limit():
+    with pytest.raises(ValueError):
+        FloodDetector(limit=0)
@@ -0,0 +1,78 @@
+"""
+Тесты для нечеткого поиска запрещенных слов по индексу удалений
+"""
+
+import pytest
+
+from application.matching.fuzzy import deletion_neighbourhood, edit_distance, FuzzyIndex
+from application.matching.normalization import TextNormalizer
+from application.matching.tokens import tokenize
+
+
+@pytest.fixture
+def normalizer():
+    return TextNormalizer()
+
+
+def test_deletion_neighbourhood():
+    """Тест окрестности удалений слова"""
+    assert deletion_neighbourhood("кот", 1) == {"кот", "от", "кт", "ко"}
+    assert "к" in deletion_neighbourhood("кот", 2)
+
+
+@pytest.mark.parametrize(
+    "first, second, distance",
+    [
+        ("казино", "казино", 0),
+        ("казин0", "казино", 1),
+        ("казно", "казино", 1),
+        ("казинио", "казино", 1),
+        ("казнио", "казино", 1),  # перестановка соседних букв
+        ("кзинно", "казино", 2),
+        ("спам", "казино", 3),
+    ],
+)
+def test_edit_distance(first, second, distance):
+    """Тест расстояния редактирования с ограничением"""
+    assert edit_distance(first, second, 2) == min(distance, 3)
+
+
+class TestFuzzyIndex:
+    """Тесты индекса нечеткого поиска"""
+
+    @pytest.fixture
+    def index(self, normalizer):
+        return FuzzyIndex(normalizer).build(["казино", "криптовалюта", "бот", "free crypto"])
+
+    def test_lookup_obfuscated_tokens(self, index, normalizer):
+        """Тест поиска слов с опечатками и цифрами вместо букв"""
+        tokens = tokenize(normalizer.normalize("Лучшее kaзин0 и криптавалюты").text)
+        assert index.lookup(tokens) == {"казино", "криптовалюта"}
+
+    def test_distance_depends_on_word_length(self, index):
+        """Тест того, что для коротких слов допускается меньше ошибок"""
+        assert index.lookup(["кзин"]) == set()
+        assert index.lookup(["крптвалюта"]) == {"криптовалюта"}
+        assert index.lookup(["бол"]) == set()
+
+    def test_phrases_not_indexed(self, index):
+        """Тест того, что фразы не попадают в индекс"""
+        assert index.lookup(["free", "crypto"]) == set()
+
+    def test_add_and_remove(self, index):
+        """Тест добавления и удаления слова"""
+        entries = index.entry_count
+        index.add("рулетка")
+        assert index.lookup(["рулетко"]) == {"рулетка"}
+
+        index.remove("рулетка")
+        assert index.lookup(["рулетко"]) == set()
+        assert index.entry_count == entries
+
+    def test_memory_cap(self, normalizer):
+        """Тест ограничения размера индекса"""
+        index = FuzzyIndex(normalizer, max_entries=15).build(["криптовалюта", "казино", "рулетка"])
+
+        assert index.entry_count <= 15
+        assert index.lookup(["крипт0валюта"]) == {"криптовалюта"}
+        assert index.skipped_words == 2
@@ -0,0 +1,58 @@
+"""
+Тесты для счетчиков срабатываний правил
+"""
+
+from application.matching.hit_counters import RuleHitCounters
+
+
+def test_record_counts_hits_checks_and_time():
+    """Тест учета срабатываний, проверенных сообщений и времени поиска по чатам"""
+    counters = RuleHitCounters()
+    counters.record(1, ["spam", "casino"], 0.002)
+    counters.record(1, ["spam"], 0.001)
+    counters.record(2, [], 0.004, checks=3)
+
+    pending = counters.pending
+    assert pending.hits == {(1, "spam"): 2, (1, "casino"): 1}
+    assert set(pending.last_hits) == {(1, "spam"), (1, "casino")}
+    assert pending.checks == {1: 2, 2: 3}
+    assert abs(pending.match_times[1] - 0.003) < 1e-9
+
+
+def test_empty_counters_are_falsy():
+    """Тест того, что без проверок записывать нечего"""
+    counters = RuleHitCounters()
+    assert not counters.pending
+    counters.record(1, [], 0.0)
+    assert counters.pending
+
+
+def test_drain_starts_new_period():
+    """Тест того, что забранные счетчики не учитываются повторно"""
+    counters = RuleHitCounters()
+    counters.record(1, ["spam"], 0.001)
+
+    delta = counters.drain()
+    assert delta.hits == {(1, "spam"): 1}
+    assert not counters.pending
+
+    counters.record(1, ["spam"], 0.001)
+    assert counters.pending.hits == {(1, "spam"): 1}
+    assert delta.hits == {(1, "spam"): 1}
+
+
+def test_restore_merges_with_new_counters():
+    """Тест возврата не записанных счетчиков: они складываются с накопленными после забора"""
+    counters = RuleHitCounters()
+    counters.record(1, ["spam"], 0.001)
+    delta = counters.drain()
+    counters.record(1, ["spam", "bad"], 0.002)
+    newer_last_hit = counters.pending.last_hits[(1, "spam")]
+
+    counters.restore(delta)
+
+    pending = counters.pending
+    assert pending.hits == {(1, "spam"): 2, (1, "bad"): 1}
+    assert pending.checks == {1: 2}
+    # Время последнего срабатывания остается более поздним
+    assert pending.last_hits[(1, "spam")] == newer_last_hit
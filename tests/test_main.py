@@ -66,7 +66,9 @@ class TestBotApplication:
             await app.startup()
 
             assert app.bot is not None
-            mock_bot_class.assert_called_once_with("test_token")
+            mock_bot_class.assert_called_once_with(
+                "test_token", performance=app.config.performance, moderation=app.config.moderation
+            )
             mock_session_mgr.init_db.assert_called_once()
 
     @pytest.mark.asyncio
@@ -382,7 +384,9 @@ class TestConfigurationIntegration:
             await app.startup()
 
             # Проверяем что бот создается с правильным токеном
-            mock_bot_class.assert_called_once_with("custom_token_123")
+            mock_bot_class.assert_called_once_with(
+                "custom_token_123", performance=mock_config.performance, moderation=mock_config.moderation
+            )
 
             # Проверяем что конфигурация сохранена
             assert app.config.environment == "production"
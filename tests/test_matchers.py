@@ -0,0 +1,213 @@
+"""
+Тесты для бэкендов поиска запрещенных слов и их выбора
+"""
+
+import random
+import re
+
+import pytest
+
+from application.matching.base import MAX_PENDING_WORDS
+from application.matching.regex_matchers import AlternationMatcher
+from application.matching.selection import (
+    ALTERNATION_BACKEND,
+    AUTOMATON_BACKEND,
+    MATCHER_BACKENDS,
+    REGEX_BACKEND,
+    MatcherSelector,
+    create_matcher,
+)
+
+
+def regex_check(words, text):
+    """Эталонная реализация: цикл по паттернам \\bслово\\b"""
+    text_lower = text.lower()
+    return [word for word in words if re.search(r"\b" + re.escape(word) + r"\b", text_lower, re.IGNORECASE)]
+
+
+@pytest.mark.parametrize("backend", list(MATCHER_BACKENDS))
+class TestMatcherBackends:
+    """Общие тесты для всех бэкендов поиска"""
+
+    def test_basic_match(self, backend):
+        """Тест поиска целых слов"""
+        matcher = create_matcher(backend, ["spam", "bad"])
+
+        assert matcher.match("bad spam") == ["spam", "bad"]
+        assert matcher.match("spammer") == []
+
+    def test_overlapping_and_prefix_words(self, backend):
+        """Тест перекрывающихся слов и слов-префиксов"""
+        words = ["free crypto", "crypto coin", "free", "crypto"]
+        matcher = create_matcher(backend, words)
+
+        assert matcher.match("get free crypto coin now") == words
+
+    def test_empty_dictionary(self, backend):
+        """Тест пустого словаря"""
+        matcher = create_matcher(backend, [])
+        assert matcher.match("any text") == []
+
+    def test_stats(self, backend):
+        """Тест статистики бэкенда"""
+        matcher = create_matcher(backend, ["spam"])
+        matcher.match("spam")
+        matcher.match("clean")
+
+        stats = matcher.stats()
+        assert stats.backend == backend
+        assert stats.word_count == 1
+        assert stats.match_count == 2
+        assert stats.build_time >= 0
+        assert stats.average_match_time >= 0
+
+    def test_matches_regex_loop_on_random_texts(self, backend):
+        """Тест совпадения результата с циклом по регулярным выражениям"""
+        rng = random.Random(7)
+        alphabet = "ab_ -.1ая"
+        words = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or "a" for _ in range(40)})
+        matcher = create_matcher(backend, words)
+
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert matcher.match(text) == regex_check(words, text)
+
+    def test_incremental_add_and_remove(self, backend):
+        """Тест добавления и удаления слов без перестройки бэкенда"""
+        matcher = create_matcher(backend, ["spam", "bad"])
+
+        matcher.add_word("scam")
+        matcher.remove_word("spam")
+
+        assert matcher.words == ["bad", "scam"]
+        assert matcher.match("spam scam bad") == ["bad", "scam"]
+        assert matcher.stats().word_count == 2
+        assert matcher.compaction_count == 0
+
+    def test_compaction_after_many_changes(self, backend):
+        """Тест отложенного сжатия бэкенда после накопления изменений"""
+        matcher = create_matcher(backend, ["spam"] + [f"word{index}" for index in range(10)])
+        for index in range(1, 10):
+            matcher.remove_word(f"word{index}")
+
+        assert matcher.compaction_count == 0
+        assert matcher.needs_compaction
+        assert matcher.match("spam word9 word0") == ["spam", "word0"]
+
+        matcher.compact()
+        assert not matcher.needs_compaction
+        assert matcher.compaction_count == 1
+        assert matcher.pending_changes == 0
+        assert matcher.words == ["spam", "word0"]
+        assert matcher.match("spam word9 word0") == ["spam", "word0"]
+
+    def test_incremental_changes_match_regex_loop(self, backend):
+        """Тест совпадения результата с циклом по регулярным выражениям после серии правок словаря"""
+        rng = random.Random(8)
+        alphabet = "ab_ -.1ая"
+        words = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or "a" for _ in range(30)})
+        matcher = create_matcher(backend, words)
+
+        for _ in range(100):
+            word = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or "b"
+            if word in words:
+                words.remove(word)
+                matcher.remove_word(word)
+            else:
+                words.append(word)
+                matcher.add_word(word)
+
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            assert matcher.match(text) == regex_check(words, text)
+            assert matcher.words == words
+
+
+def test_alternation_prefixes_respect_inner_boundary():
+    """Тест того, что префикс внутри слова без границы не считается найденным"""
+    matcher = AlternationMatcher().build(["spam", "spammer", "c", "c++"])
+
+    assert matcher.match("spammer") == ["spammer"]
+    assert matcher.match("c++ code") == ["c"]
+    assert matcher.match("c++x") == ["c", "c++"]
+
+
+def test_pending_words_capped():
+    """Тест сжатия сразу после того, как отдельно проверяемых добавленных слов стало слишком много"""
+    matcher = AlternationMatcher().build(["spam"])
+    for index in range(MAX_PENDING_WORDS):
+        matcher.add_word(f"word{index}")
+
+    assert matcher.pending_changes == MAX_PENDING_WORDS
+    assert matcher.compaction_count == 0
+
+    matcher.add_word("scam")
+    assert matcher.pending_changes == 0
+    assert matcher.compaction_count == 1
+    assert matcher.match("scam word0 spam") == ["spam", "word0", "scam"]
+
+
+def test_create_matcher_unknown_backend():
+    """Тест создания неизвестного бэкенда"""
+    with pytest.raises(ValueError):
+        create_matcher("unknown", ["spam"])
+
+
+class TestMatcherSelector:
+    """Тесты выбора бэкенда для чата"""
+
+    def test_select_by_size(self):
+        """Тест выбора бэкенда по размеру словаря"""
+        selector = MatcherSelector(alternation_min_words=10, automaton_min_words=100)
+
+        assert selector.select(1, 5) == REGEX_BACKEND
+        assert selector.select(1, 10) == ALTERNATION_BACKEND
+        assert selector.select(1, 100) == AUTOMATON_BACKEND
+
+    def test_promotion_by_latency(self):
+        """Тест перевода чата на более быстрый бэкенд при превышении бюджета задержки"""
+        selector = MatcherSelector(latency_budget=0.0, min_samples=2)
+        matcher = create_matcher(REGEX_BACKEND, ["spam"])
+
+        matcher.match("spam")
+        assert selector.observe(1, matcher) is None
+
+        matcher.match("spam")
+        assert selector.observe(1, matcher) == ALTERNATION_BACKEND
+        assert selector.select(1, 1) == ALTERNATION_BACKEND
+        assert selector.select(2, 1) == REGEX_BACKEND
+
+    def test_no_promotion_within_budget(self):
+        """Тест отсутствия перевода при задержке в пределах бюджета"""
+        selector = MatcherSelector(latency_budget=10.0, min_samples=1)
+        matcher = create_matcher(REGEX_BACKEND, ["spam"])
+        matcher.match("spam")
+
+        assert selector.observe(1, matcher) is None
+
+    def test_no_promotion_beyond_automaton(self):
+        """Тест отсутствия перевода с самого быстрого бэкенда"""
+        selector = MatcherSelector(latency_budget=0.0, min_samples=1)
+        matcher = create_matcher(AUTOMATON_BACKEND, ["spam"])
+        matcher.match("spam")
+
+        assert selector.observe(1, matcher) is None
+
+    def test_pinned_backend_is_not_promoted(self):
+        """Тест того, что закрепленный бэкенд не меняется"""
+        selector = MatcherSelector(latency_budget=0.0, min_samples=1)
+        selector.pin(1, REGEX_BACKEND)
+        matcher = create_matcher(REGEX_BACKEND, ["spam"])
+        matcher.match("spam")
+
+        assert selector.observe(1, matcher) is None
+        assert selector.select(1, 1000) == REGEX_BACKEND
+
+    def test_forget(self):
+        """Тест сброса выбора по задержке"""
+        selector = MatcherSelector(latency_budget=0.0, min_samples=1)
+        matcher = create_matcher(REGEX_BACKEND, ["spam"])
+        matcher.match("spam")
+        selector.observe(1, matcher)
+
+        selector.forget(1)
+        assert selector.select(1, 1) == REGEX_BACKEND
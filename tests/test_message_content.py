@@ -0,0 +1,58 @@
+"""
+Тесты для извлечения проверяемого содержимого сообщений
+"""
+
+from unittest.mock import Mock
+
+from aiogram.types import MessageEntity
+
+from interfaces.telegram.content import extract_content, MessageContent, ScannedMessages
+
+
+def make_message(text=None, entities=None, caption=None, caption_entities=None, forward_origin=None):
+    return Mock(
+        text=text, entities=entities, caption=caption, caption_entities=caption_entities, forward_origin=forward_origin
+    )
+
+
+def test_extract_text_with_entities():
+    """Тест извлечения текста, ссылок и упоминаний из разметки"""
+    message = make_message(
+        text="join @SpamBot at t.me/promo",
+        entities=[MessageEntity(type="mention", offset=5, length=8), MessageEntity(type="url", offset=17, length=10)],
+    )
+    assert extract_content(message) == MessageContent("join @SpamBot at t.me/promo", ("@spambot", "t.me", "@promo"))
+
+
+def test_extract_caption():
+    """Тест того, что подпись к медиа проверяется как текст"""
+    message = make_message(caption="free casino", caption_entities=None)
+    assert extract_content(message) == MessageContent("free casino", ())
+
+
+def test_extract_forward_source_only():
+    """Тест пересланного медиа без подписи: проверяется только источник"""
+    message = make_message(forward_origin=Mock(spec=["sender_user"], sender_user=Mock(username="Spammer")))
+    assert extract_content(message) == MessageContent("", ("@spammer",))
+
+
+def test_extract_nothing_to_check():
+    """Тест сообщения без текста, подписи и источника пересылки"""
+    assert extract_content(make_message()) is None
+    assert extract_content(make_message(forward_origin=Mock(spec=["sender_user_name"]))) is None
+
+
+def test_scanned_messages_eviction():
+    """Тест вытеснения самых старых сообщений чата при превышении лимита"""
+    scanned = ScannedMessages(max_messages=2)
+    content = MessageContent("text", ())
+
+    assert scanned.is_unchanged(1, 10, content) is False
+    assert scanned.is_unchanged(1, 11, content) is False
+    assert scanned.is_unchanged(1, 10, content) is True
+    assert scanned.is_unchanged(1, 12, content) is False
+
+    # Сообщение 11 вытеснено как самое давнее
+    assert scanned.is_unchanged(1, 11, content) is False
+    assert scanned.is_unchanged(1, 12, content) is True
+    assert scanned.is_unchanged(1, 12, MessageContent("edited", ())) is False
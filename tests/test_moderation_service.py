@@ -16,11 +16,11 @@ def config():
     config = AsyncMock()
     config.get_warnings_limit.return_value = 3
     config.set_warnings_limit = AsyncMock()
-    config.add_forbidden_word = AsyncMock()
-    config.remove_forbidden_word = AsyncMock()
-    config.get_forbidden_words.return_value = ["bad", "word"]
+    config.add_global_forbidden_word = AsyncMock()
+    config.remove_global_forbidden_word = AsyncMock()
+    config.get_global_forbidden_words.return_value = ["bad", "word"]
     config.check_text.return_value = []
-    config.clear_forbidden_words = AsyncMock()
+    config.clear_global_forbidden_words = AsyncMock()
     return config
 
 
@@ -292,31 +292,31 @@ async def test_add_forbidden_word(service):
 
     await service.add_forbidden_word(word)
 
-    service.config.add_forbidden_word.assert_awaited_once_with(word)
+    service.config.add_global_forbidden_word.assert_awaited_once_with(word)
 
 
 @pytest.mark.asyncio
 async def test_remove_forbidden_word(service):
     """Тест удаления запрещенного слова"""
     word = "badword"
-    service.config.remove_forbidden_word.return_value = True
+    service.config.remove_global_forbidden_word.return_value = True
 
     result = await service.remove_forbidden_word(word)
 
     assert result is True
-    service.config.remove_forbidden_word.assert_awaited_once_with(word)
+    service.config.remove_global_forbidden_word.assert_awaited_once_with(word)
 
 
 @pytest.mark.asyncio
 async def test_get_forbidden_words(service):
     """Тест получения списка запрещенных слов"""
     expected_words = ["bad", "word", "evil"]
-    service.config.get_forbidden_words.return_value = expected_words
+    service.config.get_global_forbidden_words.return_value = expected_words
 
     words = await service.get_forbidden_words()
 
     assert words == expected_words
-    service.config.get_forbidden_words.assert_awaited_once()
+    service.config.get_global_forbidden_words.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -324,4 +324,273 @@ async def test_clear_forbidden_words(service):
     """Тест очистки всех запрещенных слов"""
     await service.clear_forbidden_words()
 
-    service.config.clear_forbidden_words.assert_awaited_once()
+    service.config.clear_global_forbidden_words.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_exclude_and_include_forbidden_word(service):
+    """Тест отключения и включения слова общего словаря в чате"""
+    service.config.include_forbidden_word.return_value = True
+
+    await service.exclude_forbidden_word(456, "spam")
+    assert await service.include_forbidden_word(456, "spam") is True
+
+    service.config.exclude_forbidden_word.assert_awaited_once_with(456, "spam")
+    service.config.include_forbidden_word.assert_awaited_once_with(456, "spam")
+
+
+@pytest.mark.asyncio
+async def test_regex_rules_management(service):
+    """Тест управления правилами-шаблонами чата"""
+    service.config.remove_regex_rule.return_value = True
+    service.config.get_regex_rules.return_value = [{"pattern": "spam\\d+", "enabled": True}]
+
+    await service.add_regex_rule(456, "spam\\d+")
+    assert await service.remove_regex_rule(456, "spam\\d+") is True
+    assert await service.get_regex_rules(456) == [{"pattern": "spam\\d+", "enabled": True}]
+
+    service.config.add_regex_rule.assert_awaited_once_with(456, "spam\\d+")
+    service.config.remove_regex_rule.assert_awaited_once_with(456, "spam\\d+")
+
+
+@pytest.mark.asyncio
+async def test_check_message_link_rules(service, config, message_repository):
+    """Тест проверки доменов и упоминаний сообщения правилами чата для ссылок"""
+    config.check_text.return_value = ["spam"]
+    config.check_links.return_value = ["*.casino.xyz"]
+    message = Message(
+        message_id=1,
+        user_id=123,
+        chat_id=456,
+        text="spam win.casino.xyz",
+        timestamp=datetime.utcnow(),
+        links=["win.casino.xyz"],
+    )
+
+    assert await service.check_message(message) == ["spam", "*.casino.xyz"]
+    config.check_links.assert_awaited_once_with(456, ["win.casino.xyz"])
+    assert message.violation_words == ["spam", "*.casino.xyz"]
+    message_repository.save.assert_awaited_once_with(message)
+
+
+@pytest.mark.asyncio
+async def test_check_message_duplicate_spam(user_repository, message_repository, config):
+    """Тест поиска рассылки: после нарушения и после порога чатов копии ловятся без проверки по словарям"""
+    from application.matching.duplicates import DuplicateDetector
+    from application.services.moderation_service import DUPLICATE_SPAM
+
+    service = TelegramModerationService(
+        user_repository=user_repository,
+        message_repository=message_repository,
+        config=config,
+        duplicate_detector=DuplicateDetector(threshold=2, window=60),
+    )
+    ad = "Заработок от 5000 рублей в день без вложений, пиши в личку"
+
+    def copy_in(chat_id, text=ad):
+        return Message(message_id=1, user_id=123, chat_id=chat_id, text=text, timestamp=datetime.utcnow())
+
+    # Копии встречаются в двух чатах, третья копия уже считается рассылкой
+    assert await service.check_message(copy_in(1)) == []
+    assert await service.check_message(copy_in(2)) == []
+    assert await service.check_message(copy_in(3)) == [DUPLICATE_SPAM]
+    assert config.check_text.await_count == 2
+
+    # Сообщение, признанное нарушением по словарю, ловится в следующем чате сразу
+    other = "Лучшее онлайн казино с бонусом для новых игроков, переходи по ссылке"
+    config.check_text.return_value = ["казино"]
+    assert await service.check_message(copy_in(1, other)) == ["казино"]
+    config.check_text.return_value = []
+    assert await service.check_messages([copy_in(2, other), copy_in(2, "Всем привет, как дела")]) == [[DUPLICATE_SPAM], []]
+    assert config.check_text.await_count == 3
+    assert message_repository.save.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_check_flood(user_repository, message_repository, config, user):
+    """Тест защиты от флуда: первое нарушение - предупреждение, повторное - заглушение"""
+    from application.flood import FloodDetector
+
+    service = TelegramModerationService(
+        user_repository=user_repository,
+        message_repository=message_repository,
+        config=config,
+        flood_detector=FloodDetector(limit=2, interval=60),
+    )
+
+    assert [await service.check_flood(456, 123) for _ in range(2)] == [0, 0]
+    assert await service.check_flood(456, 123) == 1
+    assert user.warnings_count == 1
+    assert user.can_send_messages
+
+    assert [await service.check_flood(456, 123) for _ in range(3)] == [0, 0, 2]
+    assert user.warnings_count == 2
+    assert not user.can_send_messages
+
+    # Без ограничителя частоты проверка ничего не делает
+    assert await TelegramModerationService(user_repository, message_repository, config).check_flood(456, 123) == 0
+
+
+@pytest.mark.asyncio
+async def test_feature_rules(user_repository, message_repository, config, message):
+    """Тест эвристик по признакам текста: признаки считаются один раз на сообщение"""
+    seen = []
+
+    def shouting(features):
+        seen.append(features)
+        return "капс" if features.caps_ratio > 0.5 else None
+
+    service = TelegramModerationService(
+        user_repository=user_repository,
+        message_repository=message_repository,
+        config=config,
+        feature_rules=[shouting, lambda features: None],
+    )
+
+    message.text = "ЗАРАБОТОК БЕЗ ВЛОЖЕНИЙ"
+    assert "капс" in await service.check_message(message)
+    assert len(seen) == 1
+
+    message.text = "обычный текст"
+    results = await service.check_messages([message])
+    assert "капс" not in results[0]
+
+
+@pytest.mark.asyncio
+async def test_classifier(user_repository, message_repository, config, message, tmp_path):
+    """Тест классификатора спама: оценка сообщений без нарушений по словарям и замена модели из файла"""
+    import numpy as np
+
+    from application.matching.classifier import hash_features, SpamClassifier, text_features
+    from application.services.moderation_service import CLASSIFIED_SPAM
+
+    weights = np.zeros(1 << 12, dtype=np.float32)
+    weights[hash_features(text_features("казино"), len(weights))] = 4.0
+    path = str(tmp_path / "spam.model")
+    SpamClassifier.write(path, weights, bias=-2.0, threshold=0.5)
+
+    service = TelegramModerationService(user_repository, message_repository, config)
+    message.text = "лучшее казино"
+    assert await service.check_message(message) == []
+
+    assert await service.load_classifier(path)
+    assert await service.check_message(message) == [CLASSIFIED_SPAM]
+
+    clean = Message(message_id=2, user_id=123, chat_id=456, text="привет", timestamp=datetime.now())
+    config.check_texts.return_value = [[], []]
+    assert await service.check_messages([message, clean]) == [[CLASSIFIED_SPAM], []]
+
+    # Поврежденный файл не заменяет работающую модель
+    classifier = service.classifier
+    assert not await service.load_classifier(str(tmp_path / "missing.model"))
+    assert service.classifier is classifier
+
+    # Перезагрузка без пути берет файл последней загрузки
+    SpamClassifier.write(path, weights, bias=-2.0, threshold=0.99)
+    service.classifier_path = path
+    assert await service.load_classifier()
+    assert service.classifier.threshold == pytest.approx(0.99)
+    assert not await TelegramModerationService(user_repository, message_repository, config).load_classifier()
+
+
+@pytest.mark.asyncio
+async def test_clean_messages_sampled(user_repository, message_repository, config, message):
+    """Тест сохранения выборки чистых сообщений для обучения модели"""
+    service = TelegramModerationService(user_repository, message_repository, config, clean_sample_rate=1.0)
+    message.text = "обычное сообщение"
+
+    assert await service.check_message(message) == []
+    # Выборка пишется отдельно от таблицы сообщений
+    message_repository.save_training_sample.assert_awaited_once_with(message)
+    message_repository.save.assert_not_awaited()
+    assert not message.contains_violations
+
+    config.check_texts.return_value = [[]]
+    await service.check_messages([message])
+    assert message_repository.save_training_sample.await_count == 2
+
+    # По умолчанию чистые сообщения не сохраняются
+    message_repository.save_training_sample.reset_mock()
+    await TelegramModerationService(user_repository, message_repository, config).check_message(message)
+    message_repository.save_training_sample.assert_not_awaited()
+
+
+def test_register_join(user_repository, message_repository, config):
+    """Тест включения режима рейда при массовых вступлениях"""
+    from application.raid import RaidDetector
+
+    service = TelegramModerationService(
+        user_repository=user_repository,
+        message_repository=message_repository,
+        config=config,
+        raid_detector=RaidDetector(join_limit=3, window=60),
+    )
+
+    assert [service.register_join(456, user_id) for user_id in range(4)] == [False, False, True, True]
+
+    # Без детектора рейдов вступления не учитываются
+    assert not TelegramModerationService(user_repository, message_repository, config).register_join(456, 1)
+
+
+@pytest.mark.asyncio
+async def test_allowed_words_management(service):
+    """Тест управления разрешенными фрагментами чата"""
+    service.config.remove_allowed_word.return_value = True
+    service.config.get_allowed_words.return_value = ["сука собака"]
+
+    await service.add_allowed_word(456, "сука собака")
+    assert await service.remove_allowed_word(456, "сука собака") is True
+    assert await service.get_allowed_words(456) == ["сука собака"]
+
+    service.config.add_allowed_word.assert_awaited_once_with(456, "сука собака")
+    service.config.remove_allowed_word.assert_awaited_once_with(456, "сука собака")
+
+
+@pytest.mark.asyncio
+async def test_link_rules_management(service):
+    """Тест управления правилами чата для ссылок"""
+    service.config.remove_link_rule.return_value = True
+    service.config.get_link_rules.return_value = ["*.casino.xyz"]
+
+    await service.add_link_rule(456, "*.casino.xyz")
+    assert await service.remove_link_rule(456, "*.casino.xyz") is True
+    assert await service.get_link_rules(456) == ["*.casino.xyz"]
+
+    service.config.add_link_rule.assert_awaited_once_with(456, "*.casino.xyz")
+    service.config.remove_link_rule.assert_awaited_once_with(456, "*.casino.xyz")
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_matching_setting(service):
+    """Тест включения нечеткого поиска в чате"""
+    service.config.is_fuzzy_matching_enabled.return_value = True
+
+    await service.set_fuzzy_matching(456, True)
+    assert await service.is_fuzzy_matching_enabled(456) is True
+
+    service.config.set_fuzzy_matching.assert_awaited_once_with(456, True)
+
+
+@pytest.mark.asyncio
+async def test_check_messages_batch(service, config, user_repository, message_repository):
+    """Тест пакетной проверки сообщений: один вызов check_texts на чат, нарушения в исходном порядке"""
+    messages = [
+        Message(message_id=1, user_id=123, chat_id=456, text="bad", timestamp=datetime.utcnow()),
+        Message(message_id=2, user_id=124, chat_id=789, text="clean", timestamp=datetime.utcnow()),
+        Message(message_id=3, user_id=123, chat_id=456, text="clean", timestamp=datetime.utcnow()),
+        Message(message_id=4, user_id=125, chat_id=456, text="word", timestamp=datetime.utcnow()),
+    ]
+    config.check_texts = AsyncMock(side_effect=lambda chat_id, texts: [[text] if text != "clean" else [] for text in texts])
+
+    with patch("application.services.moderation_service.metrics") as mock_metrics:
+        results = await service.check_messages(messages)
+
+    assert results == [["bad"], [], [], ["word"]]
+    assert [call.args for call in config.check_texts.await_args_list] == [(456, ["bad", "clean", "word"]), (789, ["clean"])]
+    mock_metrics.increment_messages_processed.assert_any_call(456, count=3)
+    mock_metrics.increment_messages_processed.assert_any_call(789, count=1)
+    assert mock_metrics.increment_violations_detected.call_count == 2
+    assert [call.args[0] for call in message_repository.save.await_args_list] == [messages[0], messages[3]]
+    assert messages[0].contains_violations and not messages[1].contains_violations
+    assert user_repository.get_by_id.await_count == 2
+    config.check_text.assert_not_called()
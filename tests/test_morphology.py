@@ -0,0 +1,98 @@
+"""
+Тесты для индекса словоформ запрещенных слов
+"""
+import pytest
+
+from application.matching.morphology import InflectionIndex, generate_forms, russian_stem
+from application.matching.normalization import TextNormalizer
+from application.matching.tokens import tokenize
+
+
+@pytest.mark.parametrize(
+    "word, stem",
+    [
+        ("казино", "казин"),
+        ("ставки", "ставк"),
+        ("ставками", "ставк"),
+        ("играть", "игра"),
+        ("говорить", "говор"),
+        ("красивый", "красив"),
+        ("красивейший", "красив"),
+        ("подписывайтесь", "подписыва"),
+        ("Ёлками", "елк"),
+    ],
+)
+def test_russian_stem(word, stem):
+    """Тест нахождения основы слова"""
+    assert russian_stem(word) == stem
+
+
+class TestGenerateForms:
+    """Тесты генерации словоформ"""
+
+    def test_noun_case_forms_and_diminutives(self):
+        """Тест падежных форм и уменьшительных вариантов существительного"""
+        forms = generate_forms("казино")
+        assert {"казино", "казина", "казином", "казинах", "казиношка", "казиношку"} <= forms
+
+    def test_fleeting_vowel(self):
+        """Тест беглой гласной в родительном падеже множественного числа"""
+        assert "ставок" in generate_forms("ставка")
+        assert "денег" in generate_forms("деньги")
+
+    def test_verb_forms(self):
+        """Тест форм глагола"""
+        forms = generate_forms("заработать")
+        assert {"заработаю", "заработаешь", "заработал", "заработали", "заработаться"} <= forms
+
+    def test_adjective_forms(self):
+        """Тест форм прилагательного"""
+        forms = generate_forms("бесплатный")
+        assert {"бесплатная", "бесплатного", "бесплатными"} <= forms
+
+    @pytest.mark.parametrize("word", ["spam", "free crypto", "ад", "t.me"])
+    def test_no_forms_for_non_lexical_or_short_words(self, word):
+        """Тест отсутствия генерации для латиницы, фраз и коротких основ"""
+        assert generate_forms(word) == {word}
+
+
+class TestInflectionIndex:
+    """Тесты индекса словоформ"""
+
+    @pytest.fixture
+    def normalizer(self):
+        return TextNormalizer()
+
+    @pytest.fixture
+    def index(self, normalizer):
+        return InflectionIndex(normalizer).build(["казино", "ставка"])
+
+    def test_lookup_inflected_tokens(self, index, normalizer):
+        """Тест поиска словоформ среди токенов сообщения"""
+        tokens = tokenize(normalizer.normalize("Заходи в казиношку, без ставок не уйдешь").text)
+        assert index.lookup(tokens) == {"казино", "ставка"}
+
+    def test_lookup_clean_tokens(self, index):
+        """Тест сообщения без словоформ"""
+        assert index.lookup(["обычное", "сообщение"]) == set()
+
+    def test_add_and_remove(self, index):
+        """Тест добавления и удаления слова"""
+        index.add("рулетка")
+        assert index.lookup(["рулетку"]) == {"рулетка"}
+
+        index.remove("рулетка")
+        assert index.lookup(["рулетку"]) == set()
+
+    def test_remove_keeps_shared_forms(self, normalizer):
+        """Тест того, что удаление слова не удаляет общие формы других слов"""
+        index = InflectionIndex(normalizer).build(["ставка", "ставки"])
+        index.remove("ставки")
+
+        assert index.lookup(["ставкой"]) == {"ставка"}
+
+    def test_non_lexical_words_not_indexed(self, normalizer):
+        """Тест того, что латиница и фразы не попадают в индекс"""
+        index = InflectionIndex(normalizer).build(["spam", "free crypto"])
+        assert index.form_count == 0
+        index.remove("spam")
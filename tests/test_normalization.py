@@ -0,0 +1,99 @@
+"""
+Тесты для нормализации текста перед поиском запрещенных слов
+"""
+import time
+
+import pytest
+
+from application.matching.normalization import DEFAULT_BUDGET_SECONDS, TextNormalizer
+from application.matching.selection import MATCHER_BACKENDS, create_matcher
+
+
+@pytest.fixture
+def normalizer():
+    return TextNormalizer()
+
+
+class TestTextNormalizer:
+    """Тесты нормализации текста"""
+
+    @pytest.mark.parametrize(
+        "variant, word",
+        [
+            ("сaзино", "сазино"),  # латинская "a"
+            ("спааааам", "спам"),  # растянутые буквы
+            ("ка́зино", "казино"),  # ударение
+            ("ка​зи‍но", "казино"),  # пробелы и соединители нулевой ширины
+            ("ＳＰＡＭ", "spam"),  # полноширинные буквы
+            ("𝐬𝐩𝐚𝐦", "spam"),  # математические буквы
+            ("Ёлка", "елка"),
+        ],
+    )
+    def test_variants_normalize_like_dictionary_word(self, normalizer, variant, word):
+        """Тест приведения обходов к той же форме, что и слово словаря"""
+        assert normalizer.normalize(variant).text == normalizer.normalize_word(word)
+
+    def test_decomposed_short_i_is_composed(self, normalizer):
+        """Тест того, что "й", записанная через комбинируемый знак, не теряется"""
+        assert normalizer.normalize_word("йод") == "йод"
+
+    def test_digits_are_not_collapsed(self, normalizer):
+        """Тест того, что повторы цифр сохраняются"""
+        assert normalizer.normalize_word("1000") == "1000"
+
+    def test_collapse_can_be_disabled(self):
+        """Тест отключения схлопывания повторов"""
+        normalizer = TextNormalizer(collapse_repeats=False)
+        assert normalizer.normalize_word("ссылка") == "ссылка"
+
+    def test_budget_exceeded_counter(self):
+        """Тест подсчета превышений бюджета"""
+        normalizer = TextNormalizer(budget_seconds=0.0)
+        normalizer.normalize("текст")
+        assert normalizer.budget_exceeded == 1
+
+
+class TestNormalizedTextOffsets:
+    """Тесты отображения на позиции исходного текста"""
+
+    def test_offsets_for_removed_and_collapsed_chars(self, normalizer):
+        """Тест позиций после удаления и схлопывания символов"""
+        normalized = normalizer.normalize("Ооо, ка́​зииино!")
+
+        start = normalized.text.index("казино")
+        assert normalized.original_span(start, start + len("казино")) == "ка́​зииино"
+
+    def test_offsets_length_matches_text(self, normalizer):
+        """Тест того, что позиция есть у каждого символа нормализованного текста"""
+        for text in ["ＳＰＡＭ ﬁle", "йод", "спааааам 1000", "𝐬𝐩𝐚𝐦 ааа"]:
+            normalized = normalizer.normalize(text)
+            assert len(normalized._get_offsets()) == len(normalized.text)
+
+    def test_to_original_end_of_text(self, normalizer):
+        """Тест перевода позиции конца текста"""
+        normalized = normalizer.normalize("spam")
+        assert normalized.to_original(0, len(normalized.text)) == (0, 4)
+
+
+@pytest.mark.parametrize("backend", list(MATCHER_BACKENDS))
+def test_matchers_find_obfuscated_words(normalizer, backend):
+    """Тест поиска обходов всеми бэкендами по нормализованному словарю"""
+    words = ["казино", "spam"]
+    matcher = create_matcher(backend, words, [normalizer.normalize_word(word) for word in words])
+
+    assert matcher.match(normalizer.normalize("Лучшее сaзино и ка́зино, ＳＰＡＭ").text) == ["казино", "spam"]
+    assert matcher.match(normalizer.normalize("казинозавр").text) == []
+
+
+@pytest.mark.slow
+def test_normalization_benchmark(normalizer):
+    """Бенчмарк: нормализация типичного сообщения укладывается в бюджет"""
+    text = ("Привет! Лучшее сaзино тут: https://t.me/casino 😀 Фриииибеты ＦＲＥＥ " * 8)[:512]
+    runs = 1000
+
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        normalizer.normalize(text)
+    average = (time.perf_counter() - start_time) / runs
+
+    assert average < DEFAULT_BUDGET_SECONDS
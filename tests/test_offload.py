@@ -0,0 +1,104 @@
+"""
+Тесты для пула процессов дорогих проверок текста
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from application.enhanced_config import EnhancedModerationConfig
+from application.matching import offload
+from application.matching.offload import CheckOffload, DEFAULT_COST_THRESHOLD, estimate_cost
+from application.matching.snapshot import MatcherSnapshot
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_state():
+    offload._init_worker(None)
+    yield
+    offload._worker_config = None
+    offload._worker_dictionaries.clear()
+
+
+def test_estimate_cost():
+    """Тест оценки стоимости проверки по длине текста, словарю и нечеткому поиску"""
+    assert estimate_cost(100, 10, False) == 100
+    assert estimate_cost(100, 2500, False) == 300
+    assert estimate_cost(100, 10, True) == 400
+
+
+def check_in_worker(chat_words, global_words, excluded_words, fuzzy, text, allowed_words=(), versions=(1, 1)):
+    dictionaries = ((123456, versions[0], (chat_words, allowed_words)), (0, versions[1], (global_words, ())))
+    return offload._check_in_worker(123456, dictionaries, excluded_words, fuzzy, text)
+
+
+def test_worker_check():
+    """Тест проверки в процессе-обработчике с перестройкой структур при смене версии словаря"""
+    assert check_in_worker(("spam",), ("casino",), frozenset(), False, "spam casino") == ["spam", "casino"]
+    assert check_in_worker(("spam",), ("casino",), frozenset({"casino"}), False, "spam casino") == ["spam"]
+
+    # Словарь чата изменился в основном процессе: структуры процесса-обработчика перестраиваются
+    assert check_in_worker(("scam",), ("casino",), frozenset(), False, "spam scam", versions=(2, 1)) == ["scam"]
+    assert check_in_worker(("казино",), (), frozenset(), True, "Лучшее казин0", versions=(3, 2)) == ["казино"]
+
+    # Разрешенные фрагменты чата изменились: автоматы чата и общего словаря для него перестраиваются
+    text = "spam free casino royale"
+    assert check_in_worker(("spam",), ("casino",), frozenset(), False, text, ("spam free",), (4, 3)) == ["casino"]
+    assert check_in_worker(("spam",), ("casino",), frozenset(), False, text, ("casino royale",), (5, 3)) == ["spam"]
+    assert check_in_worker(("spam",), ("casino",), frozenset(), False, text, (), (6, 3)) == ["spam", "casino"]
+
+
+def test_worker_check_by_version():
+    """Тест проверки по версии словаря без передачи слов"""
+    assert check_in_worker(("spam",), ("casino",), frozenset(), False, "spam casino") == ["spam", "casino"]
+
+    # Версия не изменилась: процесс использует свою копию словарей
+    dictionaries = ((123456, 1, None), (0, 1, None))
+    assert offload._check_in_worker(123456, dictionaries, frozenset(), False, "spam casino") == ["spam", "casino"]
+
+    # Новой версии у процесса нет: проверку нужно повторить со словами
+    dictionaries = ((123456, 2, None), (0, 1, None))
+    assert offload._check_in_worker(123456, dictionaries, frozenset(), False, "spam casino") is None
+
+
+def test_worker_preloads_snapshot(tmp_path):
+    """Тест восстановления снимка бэкендов поиска при запуске процесса-обработчика"""
+    snapshot_path = str(tmp_path / "matchers.snapshot")
+    MatcherSnapshot.write(snapshot_path, [(123456, EnhancedModerationConfig()._get_matcher(123456, ["spam"]))])
+
+    offload._init_worker(snapshot_path)
+    snapshot = offload._worker_config._snapshot
+    assert snapshot.preload() == 1
+    assert check_in_worker(("spam",), (), frozenset(), False, "spam") == ["spam"]
+    assert snapshot.loaded_count == 1
+
+
+@pytest.mark.asyncio
+async def test_check_offload_pool():
+    """Тест проверки в пуле процессов с учетом метрик"""
+    check_offload = CheckOffload(workers=1)
+    assert check_offload.threshold == DEFAULT_COST_THRESHOLD
+    assert check_offload.should_offload(4096, 10, False)
+    assert not check_offload.should_offload(1000, 10, False)
+    assert check_offload.should_offload(1100, 10, True)
+
+    try:
+        with patch("application.matching.offload.metrics") as mock_metrics:
+            result = await check_offload.check(123456, (1, 1), ["spam"], [], [], False, "spam " * 1000)
+            # Слова этой версии уже переданы: в пул уходит только версия
+            assert check_offload._payload(123456, 1, ["spam"], [], resend=False) == (123456, 1, None)
+            assert await check_offload.check(123456, (1, 1), ["spam"], [], [], False, "spam " * 1000) == ["spam"]
+    finally:
+        check_offload.shutdown()
+
+    assert result == ["spam"]
+    assert check_offload.queue_depth == 0
+    assert mock_metrics.record_offloaded_check.call_count == 2
+    mock_metrics.set_offload_queue_depth.assert_any_call(1)
+    mock_metrics.set_offload_queue_depth.assert_called_with(0)
+
+
+def test_check_offload_invalid_workers():
+    """Тест ошибки при неположительном количестве процессов"""
+    with pytest.raises(ValueError):
+        CheckOffload(workers=0)
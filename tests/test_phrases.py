@@ -0,0 +1,73 @@
+"""
+Тесты для индекса фраз по токенам
+"""
+
+import pytest
+
+from application.matching.normalization import TextNormalizer
+from application.matching.phrases import PhraseIndex
+from application.matching.tokens import tokenize
+
+normalizer = TextNormalizer()
+
+
+@pytest.fixture
+def index():
+    return PhraseIndex(normalizer).build(["free crypto", "free crypto bonus", "spam", "быстрый заработок"])
+
+
+def lookup(index, text):
+    return index.lookup(tokenize(normalizer.normalize(text).text))
+
+
+def test_only_phrases_indexed(index):
+    """Тест того, что отдельные слова в индекс фраз не попадают"""
+    assert index.phrase_count == 3
+    assert lookup(index, "spam") == set()
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["free crypto", "FREE  crypto", "free\ncrypto", "free - crypto!", "get frеe\t\tcrypto now"],
+)
+def test_phrase_ignores_separators(index, text):
+    """Тест совпадения фразы независимо от пробелов, переводов строк и пунктуации"""
+    assert lookup(index, text) == {"free crypto"}
+
+
+def test_phrase_requires_adjacent_tokens(index):
+    """Тест того, что токены фразы должны идти подряд и целиком"""
+    assert lookup(index, "free bitcoin crypto") == set()
+    assert lookup(index, "freecrypto") == set()
+    assert lookup(index, "crypto free") == set()
+
+
+def test_nested_phrases(index):
+    """Тест одновременного совпадения фразы и ее продолжения"""
+    assert lookup(index, "free crypto, bonus") == {"free crypto", "free crypto bonus"}
+    assert lookup(index, "Быстрый\nзаработок") == {"быстрый заработок"}
+
+
+def test_remove_phrase(index):
+    """Тест удаления фразы без влияния на фразы с общим префиксом"""
+    index.remove("free crypto")
+    assert lookup(index, "free crypto bonus") == {"free crypto bonus"}
+    assert lookup(index, "free crypto") == set()
+
+    index.remove("free crypto bonus")
+    index.remove("unknown phrase")
+    assert lookup(index, "free crypto bonus") == set()
+    assert "free" not in index._root
+    assert index.phrase_count == 1
+
+
+def test_mask_tokens_of_found_phrases():
+    """Тест замены токенов найденных фраз, в том числе однословных и перекрывающихся"""
+    allowed = PhraseIndex(normalizer, min_tokens=1).build(["сука собака", "собака злая", "рука"])
+    tokens = tokenize("эта сука собака злая рука и сука")
+
+    assert allowed.phrase_count == 3
+    assert allowed.mask(tokens) == ["эта", "", "", "", "", "и", "сука"]
+    assert tokens[1] == "сука"
+    clean = ["просто", "текст"]
+    assert allowed.mask(clean) is clean
@@ -0,0 +1,71 @@
+"""
+Тесты для предварительного фильтра сообщений по токенам словаря
+"""
+
+import random
+
+import pytest
+
+from application.matching.normalization import TextNormalizer
+from application.matching.prefilter import TokenPrefilter
+from application.matching.selection import AUTOMATON_BACKEND, create_matcher
+from application.matching.tokens import tokenize
+from infrastructure.monitoring import Metrics
+
+
+@pytest.fixture
+def normalizer():
+    return TextNormalizer()
+
+
+class TestTokenPrefilter:
+    """Тесты предварительного фильтра"""
+
+    def test_clean_message_is_skipped(self):
+        """Тест отсева сообщения без токенов словаря"""
+        prefilter = TokenPrefilter(["spam", "free crypto", "t.me"])
+
+        assert not prefilter.may_match(tokenize("обычное сообщение без ссылок"))
+        assert prefilter.may_match(tokenize("лучший spam"))
+        assert prefilter.may_match(tokenize("канал t.me/channel"))
+
+    def test_phrase_keyed_by_longest_token(self):
+        """Тест того, что фраза представлена самым длинным токеном"""
+        prefilter = TokenPrefilter(["free crypto"])
+
+        assert prefilter.key_count == 1
+        assert not prefilter.may_match(["free"])
+        assert prefilter.may_match(["crypto"])
+
+    def test_word_without_word_chars_disables_skipping(self):
+        """Тест того, что слово без словесных символов отключает отсев"""
+        assert TokenPrefilter(["!!!"]).may_match(["обычное"])
+
+    def test_never_skips_real_match(self, normalizer):
+        """Тест того, что фильтр не отсеивает сообщения с совпадениями"""
+        rng = random.Random(6)
+        alphabet = "ab.+ -_1"
+        for _ in range(300):
+            words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or "a" for _ in range(3)]
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            patterns = [normalizer.normalize_word(word) for word in words]
+            matcher = create_matcher(AUTOMATON_BACKEND, words, patterns)
+
+            if matcher.match(text):
+                assert TokenPrefilter(patterns).may_match(tokenize(text)), (words, text)
+
+
+def test_prefilter_metrics():
+    """Тест доли отсеянных сообщений и доли ложных срабатываний"""
+    metrics = Metrics()
+    assert metrics.get_prefilter_skip_ratio() == 0.0
+    assert metrics.get_prefilter_false_positive_rate() == 0.0
+
+    for _ in range(6):
+        metrics.record_prefilter_result(skipped=True)
+    metrics.record_prefilter_result(skipped=False, matched=True)
+    metrics.record_prefilter_result(skipped=False, matched=False)
+
+    assert metrics.get_prefilter_skip_ratio() == 0.75
+    assert metrics.get_prefilter_false_positive_rate() == 0.5
+    assert metrics.get_metrics_summary()["prefilter_skip_ratio"] == 0.75
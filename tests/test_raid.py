@@ -0,0 +1,71 @@
+"""
+Тесты для защиты от рейдов
+"""
+
+import pytest
+
+from application.raid import BUCKETS, RaidDetector
+
+
+@pytest.fixture
+def detector():
+    return RaidDetector(join_limit=5, window=60, duration=600)
+
+
+def test_raid_detected(detector):
+    """Тест включения режима рейда при всплеске вступлений"""
+    assert [detector.record_join(1, user_id, now=user_id) for user_id in range(4)] == [False] * 4
+    assert not detector.is_raid(1, now=4)
+    # Пятое вступление за минуту включает режим, и вступивший сразу ограничивается
+    assert detector.record_join(1, 4, now=4)
+    assert detector.is_raid(1, now=5)
+    assert detector.record_join(1, 100, now=300)
+
+
+def test_slow_joins_are_not_raid(detector):
+    """Тест того, что вступления вне окна не накапливаются"""
+    assert not any(detector.record_join(1, user_id, now=user_id * 20) for user_id in range(20))
+
+
+def test_old_buckets_are_reset(detector):
+    """Тест обнуления корзин, переиспользованных после полного оборота окна"""
+    for user_id in range(4):
+        detector.record_join(1, user_id, now=0)
+    # Через окно та же корзина считает новый интервал с нуля
+    assert not detector.record_join(1, 10, now=60)
+    assert not detector.record_join(1, 11, now=60 + 60 / BUCKETS)
+
+
+def test_raid_expires_and_extends(detector):
+    """Тест окончания режима рейда и его продления новым всплеском"""
+    for user_id in range(5):
+        detector.record_join(1, user_id, now=0)
+    assert detector.is_raid(1, now=599)
+    assert not detector.is_raid(1, now=600)
+    assert not detector.record_join(1, 100, now=700)
+
+    for user_id in range(200, 205):
+        detector.record_join(1, user_id, now=1000)
+    assert detector.is_raid(1, now=1599)
+
+
+def test_repeated_join_notifications_counted_once(detector):
+    """Тест того, что вступление, пришедшее и как chat_member, и как new_chat_members, учитывается один раз"""
+    for _ in range(10):
+        detector.record_join(1, 42, now=0)
+    assert not detector.is_raid(1, now=0)
+
+
+def test_chats_are_independent(detector):
+    """Тест того, что счетчики разных чатов независимы"""
+    for user_id in range(5):
+        detector.record_join(1, user_id, now=0)
+    assert detector.is_raid(1, now=1)
+    assert not detector.is_raid(2, now=1)
+    assert not detector.record_join(2, 0, now=1)
+
+
+def test_invalid_join_limit():
+    """Тест отказа от неположительного порога"""
+    with pytest.raises(ValueError):
+        RaidDetector(join_limit=0)
@@ -0,0 +1,88 @@
+"""
+Тесты для правил-шаблонов с защитой от катастрофического перебора
+"""
+
+import pytest
+
+from application.matching.regex_rules import check_rule_pattern, MAX_PATTERN_LENGTH, RegexRuleSet, UnsafeRegexError
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"t\.me/\w+bot",
+        r"(?:https?://)?bit\.ly/\S+",
+        r"casino|казино",
+        r"[0-9]{3,}-[0-9]{2}",
+        r"free\s*crypto",
+        r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}",
+    ],
+)
+def test_safe_patterns_accepted(pattern):
+    """Тест приема шаблонов из безопасного подмножества"""
+    assert check_rule_pattern(pattern) > 0
+
+
+@pytest.mark.parametrize(
+    "pattern, message",
+    [
+        (r"(a+)+$", "Квантификатор"),
+        (r"(?:ab)*c", "Квантификатор"),
+        (r"(a|aa)+", "Квантификатор"),
+        (r"(\w)\1", "обратные ссылки"),
+        (r"spam(?=bot)", "просмотр"),
+        (r"(?<!no)spam", "просмотр"),
+        (r"a+b+c+d+e+", "квантификаторов"),
+        # Неограниченные квантификаторы подряд перебирают разбиения текста: секунды на сотне символов
+        (r"\w*\w*\w*!", "квантификаторов"),
+        (r".*.*.*x", "квантификаторов"),
+        (r"\d+\d+\d+\d+z", "квантификаторов"),
+        (r"\w{0,9}\w{0,9}\w*!", "широкие"),
+        (r"\w{0,20}\w{0,20}\w{0,20}\w{0,20}!", "широкие"),
+        (r"spam[", "Некорректный"),
+        ("", "пустым"),
+        ("a" * (MAX_PATTERN_LENGTH + 1), "длиннее"),
+    ],
+)
+def test_unsafe_patterns_rejected(pattern, message):
+    """Тест отказа для шаблонов вне безопасного подмножества"""
+    with pytest.raises(UnsafeRegexError, match=message):
+        check_rule_pattern(pattern)
+
+
+def test_rule_set_match():
+    """Тест поиска правилами без учета регистра и пропуска некорректных правил"""
+    rule_set = RegexRuleSet([r"t\.me/\w+bot", r"(a+)+$", r"casino"])
+    assert rule_set.patterns == [r"t\.me/\w+bot", "casino"]
+    assert rule_set.skipped_patterns == [r"(a+)+$"]
+    assert rule_set.match("Пиши в T.me/SuperBot") == ([r"t\.me/\w+bot"], [])
+    assert rule_set.match("обычное сообщение") == ([], [])
+
+
+def test_rule_set_skips_backtracking_rules():
+    """Тест того, что правила с катастрофическим перебором не компилируются и не запускаются"""
+    patterns = [r"\w*\w*\w*!", r".*.*.*x", r"\d+\d+\d+\d+z"]
+    rule_set = RegexRuleSet(patterns + ["casino"])
+    assert rule_set.patterns == ["casino"]
+    assert rule_set.skipped_patterns == patterns
+    assert rule_set.match("a" * 400 + "1" * 200) == ([], [])
+
+
+def test_rule_set_compile_budget():
+    """Тест того, что правила сверх бюджета чата не компилируются"""
+    first_cost = check_rule_pattern(r"spam\d+")
+    rule_set = RegexRuleSet([r"spam\d+", r"casino\d+"], budget=first_cost)
+    assert rule_set.patterns == [r"spam\d+"]
+    assert rule_set.skipped_patterns == [r"casino\d+"]
+    assert rule_set.used_budget == first_cost
+
+
+def test_rule_set_disables_slow_rules():
+    """Тест автоматического отключения правил, превысивших лимит времени"""
+    rule_set = RegexRuleSet([r"spam\d+", r"casino"], time_limit=0.0)
+
+    # Лимит исчерпан первым же правилом: оно отключается, остальные правила для сообщения пропускаются
+    assert rule_set.match("spam1 casino") == ([r"spam\d+"], [r"spam\d+"])
+    assert rule_set.patterns == ["casino"]
+    assert rule_set.match("spam1 casino") == (["casino"], ["casino"])
+    assert rule_set.patterns == []
@@ -1,8 +1,10 @@
 from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
+import asyncio
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -10,6 +12,7 @@ from domain.entities.message import Message
 from domain.entities.user import User
 from infrastructure.database.models import Base, MessageModel, UserModel
 from infrastructure.database.session import DatabaseSessionManager
+from infrastructure.monitoring import metrics
 from infrastructure.repositories import SQLAlchemyMessageRepository, SQLAlchemyUserRepository
 
 
@@ -176,3 +179,163 @@ async def test_message_repository_get_recent_messages(message_repository, messag
     assert len(messages) == 2
     assert messages[0].message_id == message2.message_id  # Most recent first
     assert messages[1].message_id == message.message_id
+
+
+@pytest.mark.asyncio
+async def test_message_repository_iter_messages(message_repository, message):
+    # Сообщения читаются пачками в порядке записи
+    await message_repository.save(message)
+    for message_id in range(2, 6):
+        await message_repository.save(
+            Message(message_id=message_id, user_id=123, chat_id=456, text=f"message {message_id}", timestamp=datetime.utcnow())
+        )
+
+    chunks = [chunk async for chunk in message_repository.iter_messages(chunk_size=2)]
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [m.message_id for chunk in chunks for m in chunk] == [1, 2, 3, 4, 5]
+    assert chunks[0][0].contains_violations
+    assert not chunks[0][1].contains_violations
+
+
+async def count_messages(db_session) -> int:
+    result = await db_session.execute(select(func.count()).select_from(MessageModel))
+    return result.scalar_one()
+
+
+def make_messages(count: int):
+    return [
+        Message(message_id=message_id, user_id=123, chat_id=456, text=f"message {message_id}", timestamp=datetime.utcnow())
+        for message_id in range(1, count + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_message_repository_buffers_until_flush(mock_session_manager, db_session):
+    repository = SQLAlchemyMessageRepository(batch_size=3)
+    flushes = metrics.message_flushes
+    for message in make_messages(2):
+        await repository.save(message)
+
+    # Сообщения ждут записи в буфере
+    assert len(repository) == 2
+    assert await count_messages(db_session) == 0
+
+    assert await repository.flush() == 2
+    assert await repository.flush() == 0
+    assert len(repository) == 0
+    assert await count_messages(db_session) == 2
+    assert metrics.message_flushes == flushes + 1
+    assert metrics.message_batch_sizes[-1] == 2
+    assert metrics.get_metrics_summary()["message_buffer_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_message_repository_reads_see_buffered_messages(mock_session_manager, message):
+    repository = SQLAlchemyMessageRepository(batch_size=100)
+    await repository.save(message)
+
+    violations = await repository.get_user_violations(message.user_id, message.chat_id)
+
+    assert [m.message_id for m in violations] == [message.message_id]
+    assert len(repository) == 0
+
+
+@pytest.mark.asyncio
+async def test_message_repository_run_flushes_by_size_and_interval(mock_session_manager, db_session):
+    repository = SQLAlchemyMessageRepository(batch_size=2, flush_interval=0.2)
+    task = asyncio.create_task(repository.run())
+    try:
+        messages = make_messages(3)
+        # Набранная пачка записывается сразу, не дожидаясь интервала
+        await repository.save(messages[0])
+        await repository.save(messages[1])
+        await asyncio.sleep(0.05)
+        assert await count_messages(db_session) == 2
+
+        # Неполная пачка записывается по истечении интервала
+        await repository.save(messages[2])
+        await asyncio.sleep(0.05)
+        assert await count_messages(db_session) == 2
+        await asyncio.sleep(0.3)
+        assert await count_messages(db_session) == 3
+    finally:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_message_repository_backpressure(mock_session_manager, db_session):
+    # Фоновая запись не запущена: заполненный буфер записывает сам save
+    repository = SQLAlchemyMessageRepository(batch_size=2, max_buffered=4)
+    for message in make_messages(3):
+        await repository.save(message)
+    assert await count_messages(db_session) == 0
+
+    await repository.save(Message(message_id=4, user_id=123, chat_id=456, text="last", timestamp=datetime.utcnow()))
+
+    assert len(repository) == 0
+    assert await count_messages(db_session) == 4
+
+
+@pytest.mark.asyncio
+async def test_message_repository_flush_error_keeps_messages(mock_session_manager, db_session):
+    repository = SQLAlchemyMessageRepository(batch_size=10, max_buffered=10)
+    for message in make_messages(3):
+        await repository.save(message)
+    errors = metrics.database_errors
+
+    with patch.object(db_session, "execute", side_effect=SQLAlchemyError("database is locked")):
+        with pytest.raises(SQLAlchemyError):
+            await repository.flush()
+        # Ошибка при остановке записывается в лог, а не прерывает остановку
+        await repository.close()
+
+    # Незаписанная пачка возвращается в буфер и записывается следующей попыткой
+    assert metrics.database_errors == errors + 2
+    assert len(repository) == 3
+    await repository.close()
+    assert len(repository) == 0
+    assert await count_messages(db_session) == 3
+
+
+@pytest.mark.asyncio
+async def test_message_repository_unexpected_error_keeps_messages(mock_session_manager, db_session):
+    repository = SQLAlchemyMessageRepository(batch_size=2, flush_interval=0.05, max_buffered=10)
+    task = asyncio.create_task(repository.run())
+    try:
+        # Любая ошибка записи возвращает пачку в буфер, а фоновая запись продолжает работать
+        with patch.object(db_session, "execute", side_effect=ValueError("bad row")):
+            for message in make_messages(2):
+                await repository.save(message)
+            await asyncio.sleep(0.02)
+            assert len(repository) == 2
+            assert not task.done()
+
+        await asyncio.sleep(0.15)
+        assert not task.done()
+        assert len(repository) == 0
+        assert await count_messages(db_session) == 2
+    finally:
+        task.cancel()
+
+
+def test_message_repository_invalid_batch_size():
+    with pytest.raises(ValueError):
+        SQLAlchemyMessageRepository(batch_size=0)
+
+
+@pytest.mark.asyncio
+async def test_message_repository_training_samples(message_repository, message):
+    # Выборка чистых сообщений хранится отдельно и не попадает в таблицу сообщений
+    clean_message = Message(
+        message_id=2, user_id=message.user_id, chat_id=message.chat_id, text="clean message", timestamp=datetime.utcnow()
+    )
+    await message_repository.save(message)
+    await message_repository.save_training_sample(clean_message)
+
+    messages = [m async for chunk in message_repository.iter_messages() for m in chunk]
+    samples = [m async for chunk in message_repository.iter_training_samples() for m in chunk]
+
+    assert [m.message_id for m in messages] == [message.message_id]
+    assert [(m.message_id, m.text) for m in samples] == [(2, "clean message")]
+    assert not samples[0].contains_violations
@@ -0,0 +1,99 @@
+"""
+Тесты для очереди ограничения вступивших во время рейда
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import asyncio
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from interfaces.telegram.restrictions import MAX_RETRY_AFTER_ATTEMPTS, RAID_RESTRICTION_TIME, RestrictionQueue
+
+
+@pytest.fixture
+def bot():
+    bot = Mock()
+    bot.restrict_chat_member = AsyncMock()
+    return bot
+
+
+def test_enqueue_skips_duplicates_and_overflow(bot):
+    """Тест того, что пользователь ставится в очередь один раз, а переполнение не блокирует"""
+    queue = RestrictionQueue(bot, max_queued=2)
+    assert queue.enqueue(1, 10)
+    assert queue.enqueue(1, 10)
+    assert queue.enqueue(1, 11)
+    assert len(queue) == 2
+    assert not queue.enqueue(1, 12)
+
+
+@pytest.mark.asyncio
+async def test_run_restricts_with_rate_limit(bot):
+    """Тест ограничения пользователей из очереди с паузой между запросами"""
+    queue = RestrictionQueue(bot, restrictions_per_second=10)
+    queue.enqueue(1, 10)
+    queue.enqueue(2, 20)
+
+    with patch("interfaces.telegram.restrictions.asyncio.sleep", new=AsyncMock()) as sleep:
+        task = asyncio.create_task(queue.run())
+        await asyncio.wait_for(queue._queue.join(), timeout=1)
+        task.cancel()
+
+    assert [call.kwargs["user_id"] for call in bot.restrict_chat_member.await_args_list] == [10, 20]
+    assert bot.restrict_chat_member.await_args.kwargs["until_date"] == RAID_RESTRICTION_TIME
+    assert not bot.restrict_chat_member.await_args.kwargs["permissions"].can_send_messages
+    sleep.assert_awaited_with(0.1)
+    # После ограничения пользователя можно снова поставить в очередь
+    assert queue.enqueue(1, 10)
+
+
+@pytest.mark.asyncio
+async def test_restrict_retries_after_flood_wait(bot):
+    """Тест повтора запроса после ответа Telegram с просьбой подождать"""
+    bot.restrict_chat_member.side_effect = [TelegramRetryAfter(method=Mock(), message="Flood", retry_after=3), None]
+    queue = RestrictionQueue(bot)
+
+    with patch("interfaces.telegram.restrictions.asyncio.sleep", new=AsyncMock()) as sleep:
+        await queue.restrict(1, 10)
+
+    sleep.assert_awaited_once_with(3)
+    assert bot.restrict_chat_member.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_restrict_error_is_logged(bot):
+    """Тест того, что ошибка Telegram не останавливает очередь"""
+    bot.restrict_chat_member.side_effect = TelegramBadRequest(method=Mock(), message="not enough rights")
+    await RestrictionQueue(bot).restrict(1, 10)
+    bot.restrict_chat_member.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_restrict_retries_are_bounded(bot):
+    """Тест ограниченного числа повторов, если Telegram каждый раз просит подождать"""
+    bot.restrict_chat_member.side_effect = TelegramRetryAfter(method=Mock(), message="Flood", retry_after=3)
+
+    with patch("interfaces.telegram.restrictions.asyncio.sleep", new=AsyncMock()) as sleep:
+        await RestrictionQueue(bot).restrict(1, 10)
+
+    assert bot.restrict_chat_member.await_count == MAX_RETRY_AFTER_ATTEMPTS
+    assert sleep.await_count == MAX_RETRY_AFTER_ATTEMPTS - 1
+
+
+@pytest.mark.asyncio
+async def test_run_survives_unexpected_errors(bot):
+    """Тест того, что непредвиденная ошибка одного ограничения не останавливает очередь"""
+    bot.restrict_chat_member.side_effect = [RuntimeError("network"), None]
+    queue = RestrictionQueue(bot)
+    queue.enqueue(1, 10)
+    queue.enqueue(2, 20)
+
+    with patch("interfaces.telegram.restrictions.asyncio.sleep", new=AsyncMock()):
+        task = asyncio.create_task(queue.run())
+        await asyncio.wait_for(queue._queue.join(), timeout=1)
+        assert not task.done()
+        task.cancel()
+
+    assert bot.restrict_chat_member.await_count == 2
+    assert queue.enqueue(1, 10)
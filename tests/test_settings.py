@@ -1,6 +1,7 @@
 """
 Тесты для модуля настроек приложения
 """
+
 import os
 from dataclasses import dataclass
 from unittest.mock import patch
@@ -69,8 +70,25 @@ class TestAppConfig:
             "LOG_FORMAT": "custom format",
             "DEFAULT_WARNINGS_LIMIT": "5",
             "ENABLE_AUTO_BAN": "false",
+            "DUPLICATE_THRESHOLD": "10",
+            "DUPLICATE_WINDOW": "300",
+            "FLOOD_LIMIT": "10",
+            "FLOOD_INTERVAL": "2.5",
+            "RAID_JOIN_LIMIT": "20",
+            "RAID_WINDOW": "30",
+            "RAID_DURATION": "900",
+            "SPAM_MODEL_PATH": "/var/lib/bot/spam.model",
+            "CLEAN_SAMPLE_RATE": "0.05",
+            "FEATURE_RULES": "caps, links",
             "CACHE_TTL": "7200",
             "PATTERNS_CACHE_SIZE": "500",
+            "MATCHER_SNAPSHOT_PATH": "/var/lib/bot/matchers.snapshot",
+            "CHECK_OFFLOAD_WORKERS": "2",
+            "CHECK_OFFLOAD_THRESHOLD": "8192",
+            "RULE_STATS_FLUSH_INTERVAL": "30",
+            "MESSAGE_BATCH_SIZE": "50",
+            "MESSAGE_FLUSH_INTERVAL": "0.5",
+            "MESSAGE_BUFFER_LIMIT": "500",
             "ENVIRONMENT": "development",
             "DEBUG": "true",
         }
@@ -100,10 +118,27 @@ class TestAppConfig:
             # Проверяем модерацию
             assert config.moderation.default_warnings_limit == 5
             assert config.moderation.enable_auto_ban is False
+            assert config.moderation.duplicate_threshold == 10
+            assert config.moderation.duplicate_window == 300
+            assert config.moderation.flood_limit == 10
+            assert config.moderation.flood_interval == 2.5
+            assert config.moderation.raid_join_limit == 20
+            assert config.moderation.raid_window == 30
+            assert config.moderation.raid_duration == 900
+            assert config.moderation.spam_model_path == "/var/lib/bot/spam.model"
+            assert config.moderation.clean_sample_rate == 0.05
+            assert config.moderation.feature_rules == ("caps", "links")
 
             # Проверяем производительность
             assert config.performance.cache_ttl == 7200
             assert config.performance.patterns_cache_size == 500
+            assert config.performance.matcher_snapshot_path == "/var/lib/bot/matchers.snapshot"
+            assert config.performance.check_offload_workers == 2
+            assert config.performance.check_offload_threshold == 8192
+            assert config.performance.rule_stats_flush_interval == 30
+            assert config.performance.message_batch_size == 50
+            assert config.performance.message_flush_interval == 0.5
+            assert config.performance.message_buffer_limit == 500
 
     def test_app_config_missing_bot_token(self):
         """Тест ошибки при отсутствии BOT_TOKEN"""
@@ -179,9 +214,26 @@ class TestAppConfig:
 
             assert config.moderation.default_warnings_limit == 3
             assert config.moderation.enable_auto_ban is True
+            assert config.moderation.duplicate_threshold == 0
+            assert config.moderation.duplicate_window == 600
+            assert config.moderation.flood_limit == 5
+            assert config.moderation.flood_interval == 3.0
+            assert config.moderation.raid_join_limit == 10
+            assert config.moderation.raid_window == 60
+            assert config.moderation.raid_duration == 600
+            assert config.moderation.spam_model_path is None
+            assert config.moderation.clean_sample_rate == 0.0
+            assert config.moderation.feature_rules == ()
 
             assert config.performance.cache_ttl == 3600
             assert config.performance.patterns_cache_size == 1000
+            assert config.performance.matcher_snapshot_path is None
+            assert config.performance.check_offload_workers == 0
+            assert config.performance.check_offload_threshold == 4096
+            assert config.performance.rule_stats_flush_interval == 60
+            assert config.performance.message_batch_size == 100
+            assert config.performance.message_flush_interval == 1.0
+            assert config.performance.message_buffer_limit == 10_000
 
             assert config.environment == "development"
             assert config.debug is False
@@ -0,0 +1,100 @@
+"""
+Тесты для снимка скомпилированных бэкендов поиска на диске
+"""
+
+import pytest
+
+from application.matching.aho_corasick import AhoCorasickMatcher
+from application.matching.selection import create_matcher, MATCHER_BACKENDS
+from application.matching.snapshot import MatcherSnapshot, SNAPSHOT_FORMAT_VERSION
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "matchers.snapshot")
+
+
+@pytest.mark.parametrize("backend", list(MATCHER_BACKENDS))
+def test_roundtrip(snapshot_path, backend):
+    """Тест записи и восстановления бэкенда поиска"""
+    words = ["spam", "free crypto"]
+    assert MatcherSnapshot.write(snapshot_path, [(123456, create_matcher(backend, words))]) == 1
+
+    snapshot = MatcherSnapshot(snapshot_path).open()
+    assert len(snapshot) == 1
+
+    matcher = snapshot.load(123456, backend, words)
+    assert matcher.backend == backend
+    assert matcher.match("spam and free crypto") == words
+    assert snapshot.loaded_count == 1
+    # Запись восстанавливается только один раз
+    assert snapshot.load(123456, backend, words) is None
+    snapshot.close()
+
+
+def test_changed_dictionary_is_rejected(snapshot_path):
+    """Тест отказа от записи, построенной по другому словарю"""
+    MatcherSnapshot.write(snapshot_path, [(123456, create_matcher("automaton", ["spam"]))])
+    snapshot = MatcherSnapshot(snapshot_path).open()
+
+    assert snapshot.load(123456, "automaton", ["spam", "bad"]) is None
+    assert snapshot.load(789012, "automaton", ["spam"]) is None
+    assert snapshot.rejected_count == 1
+
+
+def test_allowed_fragments_are_part_of_the_key(snapshot_path):
+    """Тест отказа от автомата, построенного с другими разрешенными фрагментами"""
+    matcher = AhoCorasickMatcher(["spam free"]).build(["spam"])
+    MatcherSnapshot.write(snapshot_path, [(123456, matcher), (789012, matcher)])
+    snapshot = MatcherSnapshot(snapshot_path).open()
+
+    assert snapshot.load(123456, "automaton", ["spam"]) is None
+    restored = snapshot.load(789012, "automaton", ["spam"], ["spam free"])
+    assert restored.match("spam free, spam") == ["spam"]
+    assert restored.match("spam free") == []
+
+
+def test_preload(snapshot_path):
+    """Тест восстановления всех записей заранее с проверкой актуальности при обращении"""
+    MatcherSnapshot.write(
+        snapshot_path, [(123456, create_matcher("automaton", ["spam"])), (789012, create_matcher("automaton", ["bad"]))]
+    )
+    snapshot = MatcherSnapshot(snapshot_path).open()
+    assert snapshot.preload() == 2
+
+    assert snapshot.load(123456, "automaton", ["spam"]).match("spam") == ["spam"]
+    assert snapshot.load(789012, "automaton", ["scam"]) is None
+    assert snapshot.loaded_count == 1
+    assert snapshot.rejected_count == 1
+
+
+def test_pending_changes_compacted_before_write(snapshot_path):
+    """Тест сжатия бэкенда с отложенными изменениями перед записью"""
+    matcher = create_matcher("automaton", ["spam", "bad"])
+    matcher.add_word("scam")
+    matcher.remove_word("spam")
+    MatcherSnapshot.write(snapshot_path, [(123456, matcher)])
+
+    restored = MatcherSnapshot(snapshot_path).open().load(123456, "automaton", ["bad", "scam"])
+    assert restored.pending_changes == 0
+    assert restored.match("spam scam bad") == ["bad", "scam"]
+
+
+def test_missing_file(snapshot_path):
+    """Тест отсутствующего файла снимка"""
+    snapshot = MatcherSnapshot(snapshot_path).open()
+    assert len(snapshot) == 0
+    assert snapshot.load(123456, "automaton", ["spam"]) is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"garbage", b"TABSNAP" + (SNAPSHOT_FORMAT_VERSION + 1).to_bytes(2, "little") + bytes(4)],
+)
+def test_invalid_file_is_ignored(snapshot_path, content):
+    """Тест игнорирования поврежденного файла и файла другой версии формата"""
+    with open(snapshot_path, "wb") as file:
+        file.write(content)
+
+    snapshot = MatcherSnapshot(snapshot_path).open()
+    assert len(snapshot) == 0
@@ -1,6 +1,7 @@
 from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 
+import asyncio
 import pytest
 
 from interfaces.telegram.bot import ModerationBot
@@ -69,6 +70,27 @@ class TestModerationBotInitialization:
             assert hasattr(bot, "moderation_service")
             assert hasattr(bot, "command_handlers")
 
+    def test_bot_feature_rules(self):
+        """Тест подключения эвристик по признакам текста из настроек модерации"""
+        from application.matching.features import caps_rule, links_rule
+        from application.settings import ModerationConfig
+
+        with patch("interfaces.telegram.bot.Bot"), patch("interfaces.telegram.bot.Dispatcher"), patch(
+            "interfaces.telegram.bot.SQLAlchemyUserRepository"
+        ), patch("interfaces.telegram.bot.SQLAlchemyMessageRepository"), patch(
+            "interfaces.telegram.bot.EnhancedModerationConfig"
+        ), patch(
+            "interfaces.telegram.bot.TelegramModerationService"
+        ) as mock_service_class, patch(
+            "interfaces.telegram.bot.ModeratorCommandHandlers"
+        ):
+            ModerationBot("test_token")
+            assert mock_service_class.call_args.kwargs["feature_rules"] == []
+
+            moderation = ModerationConfig(default_warnings_limit=3, enable_auto_ban=True, feature_rules=("caps", "links"))
+            ModerationBot("test_token", moderation=moderation)
+            assert mock_service_class.call_args.kwargs["feature_rules"] == [caps_rule, links_rule]
+
 
 class TestModerationBotHandlerRegistration:
     def test_handlers_registration(self, mock_dispatcher):
@@ -88,6 +110,8 @@ class TestModerationBotHandlerRegistration:
 
             # Проверяем что register был вызван для сообщений
             assert mock_dispatcher.message.register.call_count > 0
+            # Вступления в чат обрабатываются для защиты от рейдов
+            mock_dispatcher.chat_member.register.assert_called_once()
 
 
 class TestModerationBotStartStop:
@@ -97,7 +121,7 @@ class TestModerationBotStartStop:
         with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
             "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
         ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
-            "interfaces.telegram.bot.SQLAlchemyMessageRepository"
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
         ), patch(
             "interfaces.telegram.bot.EnhancedModerationConfig"
         ), patch(
@@ -116,24 +140,158 @@ class TestModerationBotStartStop:
             mock_dispatcher.start_polling.assert_awaited_once_with(mock_bot)
 
     @pytest.mark.asyncio
-    async def test_stop_bot_success(self, mock_bot, mock_dispatcher):
-        """Тест успешной остановки бота"""
+    async def test_start_loads_spam_model(self, mock_bot, mock_dispatcher):
+        """Тест загрузки модели классификатора спама при запуске"""
+        from application.settings import ModerationConfig
+
         with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
             "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
         ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
-            "interfaces.telegram.bot.SQLAlchemyMessageRepository"
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
         ), patch(
             "interfaces.telegram.bot.EnhancedModerationConfig"
         ), patch(
             "interfaces.telegram.bot.TelegramModerationService"
+        ) as mock_service_class, patch(
+            "interfaces.telegram.bot.ModeratorCommandHandlers"
+        ), patch(
+            "interfaces.telegram.bot.get_session_manager"
+        ) as mock_session_manager:
+            mock_session_manager.return_value.init_db = AsyncMock()
+            mock_service_class.return_value.load_classifier = AsyncMock(return_value=True)
+            moderation = ModerationConfig(default_warnings_limit=3, enable_auto_ban=True, spam_model_path="spam.model")
+
+            bot = ModerationBot("test_token", moderation=moderation)
+            await bot.start()
+
+            mock_service_class.return_value.load_classifier.assert_awaited_once_with("spam.model")
+
+    @pytest.mark.asyncio
+    async def test_stop_bot_success(self, mock_bot, mock_dispatcher):
+        """Тест успешной остановки бота"""
+        with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
+            "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
+        ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
+        ) as mock_message_repository_class, patch(
+            "interfaces.telegram.bot.EnhancedModerationConfig"
+        ) as mock_config_class, patch(
+            "interfaces.telegram.bot.TelegramModerationService"
         ), patch(
             "interfaces.telegram.bot.ModeratorCommandHandlers"
         ):
+            mock_config_class.return_value.flush_rule_stats = AsyncMock(return_value=0)
+
             bot = ModerationBot("test_token")
             await bot.stop()
 
             mock_dispatcher.stop_polling.assert_awaited_once()
             mock_bot.session.close.assert_awaited_once()
+            # Счетчики срабатываний правил и буфер сообщений записываются при остановке
+            mock_config_class.return_value.flush_rule_stats.assert_awaited_once()
+            mock_message_repository_class.return_value.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_rule_stats_flushed_periodically(self, mock_bot, mock_dispatcher):
+        """Тест периодической записи счетчиков срабатываний правил во время работы бота"""
+        with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
+            "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
+        ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
+        ), patch(
+            "interfaces.telegram.bot.EnhancedModerationConfig"
+        ) as mock_config_class, patch(
+            "interfaces.telegram.bot.TelegramModerationService"
+        ), patch(
+            "interfaces.telegram.bot.ModeratorCommandHandlers"
+        ), patch(
+            "interfaces.telegram.bot.get_session_manager"
+        ) as mock_session_manager:
+            mock_session_manager.return_value.init_db = AsyncMock()
+            flush_rule_stats = mock_config_class.return_value.flush_rule_stats = AsyncMock(return_value=0)
+
+            async def polling(bot):
+                # Ждем записей, а не фиксированное время: пауза сборщика мусора не должна ронять тест
+                while flush_rule_stats.await_count < 2:
+                    await asyncio.sleep(0.01)
+
+            mock_dispatcher.start_polling.side_effect = polling
+
+            bot = ModerationBot("test_token")
+            bot.rule_stats_flush_interval = 0.01
+            await asyncio.wait_for(bot.start(), timeout=5)
+
+            assert flush_rule_stats.await_count >= 2
+            # После остановки polling периодическая запись прекращается
+            flushed = flush_rule_stats.await_count
+            await asyncio.sleep(0.03)
+            assert flush_rule_stats.await_count == flushed
+
+    @pytest.mark.asyncio
+    async def test_message_buffer_flushed_while_polling(self, mock_bot, mock_dispatcher):
+        """Тест фоновой записи буфера сообщений, пока работает polling"""
+        from application.settings import PerformanceConfig
+
+        with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
+            "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
+        ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
+        ) as mock_message_repository_class, patch(
+            "interfaces.telegram.bot.EnhancedModerationConfig"
+        ), patch(
+            "interfaces.telegram.bot.TelegramModerationService"
+        ), patch(
+            "interfaces.telegram.bot.ModeratorCommandHandlers"
+        ), patch(
+            "interfaces.telegram.bot.get_session_manager"
+        ) as mock_session_manager:
+            mock_session_manager.return_value.init_db = AsyncMock()
+            run = mock_message_repository_class.return_value.run
+            run.side_effect = asyncio.Event().wait
+
+            async def polling(_):
+                await asyncio.sleep(0.01)
+
+            mock_dispatcher.start_polling.side_effect = polling
+            performance = PerformanceConfig(
+                cache_ttl=3600, patterns_cache_size=1000, message_batch_size=50, message_flush_interval=0.5
+            )
+
+            bot = ModerationBot("test_token", performance=performance)
+            await bot.start()
+
+            mock_message_repository_class.assert_called_once_with(batch_size=50, flush_interval=0.5, max_buffered=10_000)
+            run.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_raid_restrictions_processed_while_polling(self, mock_bot, mock_dispatcher):
+        """Тест ограничения вступивших во время рейда фоновой очередью, пока работает polling"""
+        with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
+            "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
+        ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
+        ), patch(
+            "interfaces.telegram.bot.EnhancedModerationConfig"
+        ), patch(
+            "interfaces.telegram.bot.TelegramModerationService"
+        ), patch(
+            "interfaces.telegram.bot.ModeratorCommandHandlers"
+        ), patch(
+            "interfaces.telegram.bot.get_session_manager"
+        ) as mock_session_manager:
+            mock_session_manager.return_value.init_db = AsyncMock()
+
+            bot = ModerationBot("test_token")
+
+            async def polling(_):
+                bot.restriction_queue.enqueue(456, 1)
+                bot.restriction_queue.enqueue(456, 2)
+                await asyncio.sleep(0.2)
+
+            mock_dispatcher.start_polling.side_effect = polling
+            await bot.start()
+
+            assert [call.kwargs["user_id"] for call in mock_bot.restrict_chat_member.await_args_list] == [1, 2]
 
 
 class TestModerationBotStatsCommand:
@@ -257,10 +415,10 @@ class TestModerationBotLifecycle:
         with patch("interfaces.telegram.bot.Bot", return_value=mock_bot), patch(
             "interfaces.telegram.bot.Dispatcher", return_value=mock_dispatcher
         ), patch("interfaces.telegram.bot.SQLAlchemyUserRepository"), patch(
-            "interfaces.telegram.bot.SQLAlchemyMessageRepository"
+            "interfaces.telegram.bot.SQLAlchemyMessageRepository", autospec=True
         ), patch(
             "interfaces.telegram.bot.EnhancedModerationConfig"
-        ), patch(
+        ) as mock_config_class, patch(
             "interfaces.telegram.bot.TelegramModerationService"
         ), patch(
             "interfaces.telegram.bot.ModeratorCommandHandlers"
@@ -268,6 +426,7 @@ class TestModerationBotLifecycle:
             "interfaces.telegram.bot.get_session_manager"
         ) as mock_session_manager:
             mock_session_manager.return_value.init_db = AsyncMock()
+            mock_config_class.return_value.flush_rule_stats = AsyncMock(return_value=0)
 
             # Создание бота
             bot = ModerationBot("test_token")
@@ -1,8 +1,10 @@
 from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 
+import asyncio
 import pytest
 
+from application.flood import FLOOD_MUTE_TIME
 from domain.entities.message import Message
 from domain.entities.user import User
 
@@ -16,9 +18,11 @@ def mock_decorators():
         return func
 
     # Патчим декораторы в модуле handlers
-    with patch("interfaces.telegram.handlers.admin_only", mock_decorator), patch(
-        "interfaces.telegram.handlers.chat_admin_only", mock_decorator
-    ), patch("interfaces.telegram.handlers.owner_only", mock_decorator):
+    with (
+        patch("interfaces.telegram.handlers.admin_only", mock_decorator),
+        patch("interfaces.telegram.handlers.chat_admin_only", mock_decorator),
+        patch("interfaces.telegram.handlers.owner_only", mock_decorator),
+    ):
         yield
 
 
@@ -37,7 +41,25 @@ def mock_moderation_service():
     service.remove_forbidden_word = AsyncMock(return_value=True)
     service.get_forbidden_words = AsyncMock(return_value=["bad", "word"])
     service.clear_forbidden_words = AsyncMock()
+    service.exclude_forbidden_word = AsyncMock()
+    service.include_forbidden_word = AsyncMock(return_value=True)
+    service.add_allowed_word = AsyncMock()
+    service.remove_allowed_word = AsyncMock(return_value=True)
+    service.get_allowed_words = AsyncMock(return_value=[])
+    service.set_fuzzy_matching = AsyncMock()
+    service.is_fuzzy_matching_enabled = AsyncMock(return_value=False)
+    service.add_regex_rule = AsyncMock()
+    service.remove_regex_rule = AsyncMock(return_value=True)
+    service.get_regex_rules = AsyncMock(return_value=[])
+    service.add_link_rule = AsyncMock()
+    service.remove_link_rule = AsyncMock(return_value=True)
+    service.get_link_rules = AsyncMock(return_value=[])
     service.get_warnings_limit = AsyncMock(return_value=3)
+    service.check_flood = AsyncMock(return_value=0)
+    service.register_join = Mock(return_value=False)
+    service.get_rule_stats = AsyncMock(
+        return_value={"top_rules": [], "dead_rules": [], "check_count": 0, "average_match_time": 0.0}
+    )
     return service
 
 
@@ -67,6 +89,18 @@ def handlers(mock_moderation_service, mock_user_repository):
         "add_forbidden_word_command",
         "remove_forbidden_word_command",
         "list_forbidden_words_command",
+        "exclude_forbidden_word_command",
+        "include_forbidden_word_command",
+        "add_allowed_word_command",
+        "remove_allowed_word_command",
+        "list_allowed_words_command",
+        "fuzzy_matching_command",
+        "add_regex_rule_command",
+        "remove_regex_rule_command",
+        "list_regex_rules_command",
+        "add_link_rule_command",
+        "remove_link_rule_command",
+        "list_link_rules_command",
         "set_warnings_limit_command",
         "ban_command",
         "unban_command",
@@ -74,6 +108,7 @@ def handlers(mock_moderation_service, mock_user_repository):
         "unmute_command",
         "kick_command",
         "bot_status_command",
+        "reload_model_command",
     ]
 
     # Убираем декораторы, заменяя методы их исходными функциями
@@ -95,6 +130,13 @@ def mock_telegram_message():
     message = Mock()
     message.message_id = 789
     message.text = "test message"
+    message.entities = None
+    message.caption = None
+    message.caption_entities = None
+    message.forward_origin = None
+    message.edit_date = None
+    message.new_chat_members = None
+    message.media_group_id = None
     message.reply = AsyncMock()
     message.delete = AsyncMock()
     message.from_user = Mock()
@@ -109,6 +151,7 @@ def mock_telegram_message():
     message.bot.ban_chat_member = AsyncMock()
     message.bot.unban_chat_member = AsyncMock()
     message.bot.restrict_chat_member = AsyncMock()
+    message.bot.get_chat_administrators = AsyncMock(return_value=[])
     message.reply_to_message = None
     return message
 
@@ -138,6 +181,177 @@ class TestMessageHandler:
         assert "bad" in args
         assert "word" in args
 
+    @pytest.mark.asyncio
+    async def test_handle_message_links_from_entities(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест передачи доменов и упоминаний из разметки Telegram, с учетом смещений в UTF-16"""
+        from aiogram.types import MessageEntity
+
+        mock_telegram_message.text = "🔥 Go https://Win.Casino.xyz/x, @SpamBot or here"
+        mock_telegram_message.entities = [
+            MessageEntity(type="url", offset=6, length=24),
+            MessageEntity(type="mention", offset=32, length=8),
+            MessageEntity(type="text_link", offset=44, length=4, url="https://t.me/promo_chat"),
+            MessageEntity(type="bold", offset=0, length=2),
+        ]
+
+        await handlers.handle_message(mock_telegram_message)
+
+        domain_message = mock_moderation_service.check_message.call_args[0][0]
+        assert domain_message.links == ["win.casino.xyz", "@spambot", "t.me", "@promo_chat"]
+
+    @pytest.mark.asyncio
+    async def test_handle_message_caption(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест проверки подписи к медиа вместе с ее разметкой"""
+        from aiogram.types import MessageEntity
+
+        mock_telegram_message.text = None
+        mock_telegram_message.caption = "bad casino.xyz"
+        mock_telegram_message.caption_entities = [MessageEntity(type="url", offset=4, length=10)]
+        mock_moderation_service.check_message.return_value = ["bad"]
+
+        await handlers.handle_message(mock_telegram_message)
+
+        domain_message = mock_moderation_service.check_message.call_args[0][0]
+        assert domain_message.text == "bad casino.xyz"
+        assert domain_message.links == ["casino.xyz"]
+        mock_telegram_message.reply.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_handle_message_forward_source(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест проверки канала, из которого переслано сообщение, как упоминания"""
+        mock_telegram_message.forward_origin = Mock(chat=Mock(username="Casino_Channel"))
+
+        await handlers.handle_message(mock_telegram_message)
+
+        assert mock_moderation_service.check_message.call_args[0][0].links == ["@casino_channel"]
+
+    @pytest.mark.asyncio
+    async def test_handle_message_unchanged_edit_skipped(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест пропуска правки, не изменившей текст, и повторной проверки измененной правки"""
+        with patch("interfaces.telegram.handlers.metrics") as mock_metrics:
+            await handlers.handle_message(mock_telegram_message)
+            # Правка без изменения текста: например, заменили кнопки
+            await handlers.handle_message(mock_telegram_message)
+            assert mock_moderation_service.check_message.await_count == 1
+            mock_metrics.increment_unchanged_edits_skipped.assert_called_once_with(456)
+
+            mock_telegram_message.text = "test message with spam"
+            await handlers.handle_message(mock_telegram_message)
+            assert mock_moderation_service.check_message.await_count == 2
+
+            # То же содержимое в другом чате проверяется отдельно
+            mock_telegram_message.chat.id = 457
+            await handlers.handle_message(mock_telegram_message)
+            assert mock_moderation_service.check_message.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_handle_message_flood(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест предупреждения и заглушения за флуд; правки частоту не увеличивают"""
+        mock_moderation_service.check_flood.return_value = 1
+        await handlers.handle_message(mock_telegram_message)
+        mock_moderation_service.check_flood.assert_awaited_once_with(456, 123)
+        assert "флуд" in mock_telegram_message.reply.call_args[0][0]
+        mock_moderation_service.check_message.assert_awaited_once()
+
+        mock_moderation_service.check_flood.return_value = 2
+        mock_telegram_message.message_id = 790
+        await handlers.handle_message(mock_telegram_message)
+        mock_telegram_message.bot.restrict_chat_member.assert_awaited_once()
+        assert mock_telegram_message.bot.restrict_chat_member.call_args.kwargs["until_date"] == FLOOD_MUTE_TIME
+        assert "заглушен" in mock_telegram_message.reply.call_args[0][0]
+        assert mock_moderation_service.check_message.await_count == 1
+
+        mock_telegram_message.edit_date = 1700000000
+        await handlers.handle_message(mock_telegram_message)
+        assert mock_moderation_service.check_flood.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_handle_message_flood_media_group(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест учета альбома во флуде как одного сообщения"""
+        handlers.media_group_delay = 0
+        mock_moderation_service.check_messages.return_value = [[], [], []]
+        mock_telegram_message.media_group_id = "album"
+        for message_id in (1, 2, 3):
+            mock_telegram_message.message_id = message_id
+            await handlers.handle_message(mock_telegram_message)
+        await asyncio.gather(*handlers._media_group_tasks)
+
+        mock_moderation_service.check_flood.assert_awaited_once_with(456, 123)
+        mock_moderation_service.check_messages.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_handle_message_media_group_checked_as_batch(
+        self, handlers, mock_telegram_message, mock_moderation_service
+    ):
+        """Тест проверки подписей альбома одной пачкой и ответа на сообщения с нарушениями"""
+        handlers.media_group_delay = 0
+        mock_moderation_service.check_messages.return_value = [[], ["spam"]]
+        first, second = Mock(), Mock()
+        for message_id, reply, text in ((1, first, "первая подпись"), (2, second, "spam")):
+            mock_telegram_message.message_id = message_id
+            mock_telegram_message.media_group_id = "album"
+            mock_telegram_message.text = text
+            mock_telegram_message.reply = reply.reply = AsyncMock()
+            await handlers.handle_message(mock_telegram_message)
+        await asyncio.gather(*handlers._media_group_tasks)
+
+        mock_moderation_service.check_message.assert_not_awaited()
+        (batch,), _ = mock_moderation_service.check_messages.await_args
+        assert [message.text for message in batch] == ["первая подпись", "spam"]
+        first.reply.assert_not_awaited()
+        assert "spam" in second.reply.await_args[0][0]
+        assert not handlers._media_groups
+
+        # Ошибка проверки альбома не выходит из фоновой задачи
+        mock_moderation_service.check_messages.side_effect = RuntimeError("db")
+        mock_telegram_message.message_id = 3
+        mock_telegram_message.media_group_id = "album2"
+        await handlers.handle_message(mock_telegram_message)
+        await asyncio.gather(*handlers._media_group_tasks)
+        assert not handlers._media_groups
+
+    @pytest.mark.asyncio
+    async def test_handle_message_flood_skips_admins(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест пропуска администраторов чата при защите от флуда"""
+        admin = Mock()
+        admin.user.id = 123
+        mock_telegram_message.bot.get_chat_administrators.return_value = [admin]
+
+        await handlers.handle_message(mock_telegram_message)
+        await handlers.handle_message(mock_telegram_message)
+
+        mock_moderation_service.check_flood.assert_not_awaited()
+        mock_telegram_message.bot.get_chat_administrators.assert_awaited_once_with(chat_id=456)
+
+    @pytest.mark.asyncio
+    async def test_handle_new_chat_members(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест учета вступлений из служебного сообщения и ограничения вступивших во время рейда"""
+        handlers.restriction_queue = Mock()
+        handlers.restriction_queue.enqueue.return_value = True
+        member, bot_member = Mock(id=1, is_bot=False), Mock(id=2, is_bot=True)
+        mock_telegram_message.new_chat_members = [member, bot_member]
+        mock_moderation_service.register_join.return_value = True
+
+        await handlers.handle_message(mock_telegram_message)
+
+        mock_moderation_service.register_join.assert_called_once_with(456, 1)
+        handlers.restriction_queue.enqueue.assert_called_once_with(456, 1)
+        mock_moderation_service.check_flood.assert_not_awaited()
+        mock_moderation_service.check_message.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_handle_chat_member(self, handlers, mock_moderation_service):
+        """Тест учета вступления из обновления chat_member; вне рейда никто не ограничивается"""
+        handlers.restriction_queue = Mock()
+        update = Mock()
+        update.chat.id = 456
+        update.new_chat_member.user = Mock(id=7, is_bot=False)
+
+        await handlers.handle_chat_member(update)
+
+        mock_moderation_service.register_join.assert_called_once_with(456, 7)
+        handlers.restriction_queue.enqueue.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_handle_message_no_text(self, handlers, mock_telegram_message):
         """Тест обработки сообщения без текста"""
@@ -294,6 +508,173 @@ class TestForbiddenWordsCommands:
         args = mock_telegram_message.reply.call_args[0][0]
         assert "не найдено" in args
 
+    @pytest.mark.asyncio
+    async def test_exclude_forbidden_word(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест отключения слова общего словаря в чате"""
+        mock_telegram_message.text = "/exclude_forbidden casino"
+
+        await handlers.exclude_forbidden_word_command(mock_telegram_message)
+
+        mock_moderation_service.exclude_forbidden_word.assert_awaited_once_with(456, "casino")
+        args = mock_telegram_message.reply.call_args[0][0]
+        assert "casino" in args
+
+    @pytest.mark.asyncio
+    async def test_exclude_forbidden_word_no_args(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест отключения слова без аргументов"""
+        mock_telegram_message.text = "/exclude_forbidden"
+
+        await handlers.exclude_forbidden_word_command(mock_telegram_message)
+
+        mock_moderation_service.exclude_forbidden_word.assert_not_awaited()
+        assert "укажите слово" in mock_telegram_message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_include_forbidden_word(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест включения слова общего словаря в чате"""
+        mock_telegram_message.text = "/include_forbidden casino"
+
+        await handlers.include_forbidden_word_command(mock_telegram_message)
+        mock_moderation_service.include_forbidden_word.assert_awaited_once_with(456, "casino")
+        assert "снова" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.include_forbidden_word.return_value = False
+        await handlers.include_forbidden_word_command(mock_telegram_message)
+        assert "не было отключено" in mock_telegram_message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_add_regex_rule(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест добавления правила-шаблона и отказа для небезопасного шаблона"""
+        from application.matching.regex_rules import UnsafeRegexError
+
+        mock_telegram_message.text = r"/add_regex t\.me/\w+bot"
+        await handlers.add_regex_rule_command(mock_telegram_message)
+        mock_moderation_service.add_regex_rule.assert_awaited_once_with(456, r"t\.me/\w+bot")
+        assert "добавлено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.add_regex_rule.side_effect = UnsafeRegexError("В правилах не поддерживаются обратные ссылки")
+        mock_telegram_message.text = r"/add_regex (a)\1"
+        await handlers.add_regex_rule_command(mock_telegram_message)
+        assert "не добавлено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/add_regex"
+        await handlers.add_regex_rule_command(mock_telegram_message)
+        assert "Использование" in mock_telegram_message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_remove_and_list_regex_rules(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест удаления и показа правил-шаблонов чата"""
+        mock_telegram_message.text = "/remove_regex spam\\d+"
+        await handlers.remove_regex_rule_command(mock_telegram_message)
+        mock_moderation_service.remove_regex_rule.assert_awaited_once_with(456, "spam\\d+")
+        assert "удалено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.remove_regex_rule.return_value = False
+        await handlers.remove_regex_rule_command(mock_telegram_message)
+        assert "не найдено" in mock_telegram_message.reply.call_args[0][0]
+
+        await handlers.list_regex_rules_command(mock_telegram_message)
+        assert "нет" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.get_regex_rules.return_value = [
+            {"pattern": "spam\\d+", "enabled": True},
+            {"pattern": "x+y", "enabled": False},
+        ]
+        await handlers.list_regex_rules_command(mock_telegram_message)
+        reply = mock_telegram_message.reply.call_args[0][0]
+        assert "spam\\d+" in reply
+        assert "x+y (отключено" in reply
+
+    @pytest.mark.asyncio
+    async def test_allowed_words_commands(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест добавления, удаления и показа разрешенных фрагментов"""
+        mock_telegram_message.text = "/add_allowed сука собака"
+        await handlers.add_allowed_word_command(mock_telegram_message)
+        mock_moderation_service.add_allowed_word.assert_awaited_once_with(456, "сука собака")
+        assert "разрешен" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/add_allowed"
+        await handlers.add_allowed_word_command(mock_telegram_message)
+        assert "Использование" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/remove_allowed"
+        await handlers.remove_allowed_word_command(mock_telegram_message)
+        assert "Использование" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/remove_allowed сука собака"
+        await handlers.remove_allowed_word_command(mock_telegram_message)
+        mock_moderation_service.remove_allowed_word.assert_awaited_once_with(456, "сука собака")
+        assert "больше не разрешен" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.remove_allowed_word.return_value = False
+        await handlers.remove_allowed_word_command(mock_telegram_message)
+        assert "не найден" in mock_telegram_message.reply.call_args[0][0]
+
+        await handlers.list_allowed_words_command(mock_telegram_message)
+        assert "нет" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.get_allowed_words.return_value = ["сука собака"]
+        await handlers.list_allowed_words_command(mock_telegram_message)
+        assert "• сука собака" in mock_telegram_message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_fuzzy_matching_command(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест включения, выключения и показа нечеткого поиска"""
+        mock_telegram_message.text = "/fuzzy"
+        await handlers.fuzzy_matching_command(mock_telegram_message)
+        assert "выключен" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/fuzzy On"
+        await handlers.fuzzy_matching_command(mock_telegram_message)
+        mock_moderation_service.set_fuzzy_matching.assert_awaited_once_with(456, True)
+        assert "включен" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/fuzzy off"
+        await handlers.fuzzy_matching_command(mock_telegram_message)
+        mock_moderation_service.set_fuzzy_matching.assert_awaited_with(456, False)
+
+        mock_telegram_message.text = "/fuzzy maybe"
+        await handlers.fuzzy_matching_command(mock_telegram_message)
+        assert "Использование" in mock_telegram_message.reply.call_args[0][0]
+        assert mock_moderation_service.set_fuzzy_matching.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_link_rules_commands(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест добавления, удаления и показа правил для ссылок"""
+        from application.matching.links import InvalidLinkRuleError
+
+        mock_telegram_message.text = "/add_link *.Casino.xyz"
+        await handlers.add_link_rule_command(mock_telegram_message)
+        mock_moderation_service.add_link_rule.assert_awaited_once_with(456, "*.Casino.xyz")
+        assert "'*.casino.xyz' добавлено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.add_link_rule.side_effect = InvalidLinkRuleError("Домен должен иметь вид casino.xyz")
+        mock_telegram_message.text = "/add_link casino"
+        await handlers.add_link_rule_command(mock_telegram_message)
+        assert "не добавлено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/add_link"
+        await handlers.add_link_rule_command(mock_telegram_message)
+        assert "Использование" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_telegram_message.text = "/remove_link @SpamBot"
+        await handlers.remove_link_rule_command(mock_telegram_message)
+        mock_moderation_service.remove_link_rule.assert_awaited_once_with(456, "@spambot")
+        assert "удалено" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.remove_link_rule.return_value = False
+        await handlers.remove_link_rule_command(mock_telegram_message)
+        assert "не найдено" in mock_telegram_message.reply.call_args[0][0]
+
+        await handlers.list_link_rules_command(mock_telegram_message)
+        assert "нет" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.get_link_rules.return_value = ["*.casino.xyz", "@spambot"]
+        await handlers.list_link_rules_command(mock_telegram_message)
+        reply = mock_telegram_message.reply.call_args[0][0]
+        assert "• *.casino.xyz" in reply
+        assert "• @spambot" in reply
+
     @pytest.mark.asyncio
     async def test_list_forbidden_words_with_words(self, handlers, mock_telegram_message, mock_moderation_service):
         """Тест показа списка запрещенных слов"""
@@ -388,6 +769,7 @@ class TestHelpCommand:
             args = mock_telegram_message.reply.call_args[0][0]
             assert "владельца" in args
             assert "/clear_forbidden" in args
+            assert "/reload_model" in args
 
     @pytest.mark.asyncio
     async def test_help_command_regular_user(self, handlers, mock_telegram_message):
@@ -406,6 +788,33 @@ class TestHelpCommand:
             assert "Общие команды" in args
 
 
+class TestReloadModelCommand:
+    @pytest.mark.asyncio
+    async def test_reload_model(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест перезагрузки модели классификатора из файла"""
+        mock_moderation_service.classifier_path = "spam.model"
+        mock_moderation_service.load_classifier = AsyncMock(return_value=True)
+
+        await handlers.reload_model_command(mock_telegram_message)
+
+        mock_moderation_service.load_classifier.assert_awaited_once_with()
+        assert "загружена" in mock_telegram_message.reply.call_args[0][0]
+
+        mock_moderation_service.load_classifier.return_value = False
+        await handlers.reload_model_command(mock_telegram_message)
+        assert "Не удалось" in mock_telegram_message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_reload_model_without_path(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Тест команды, когда файл модели не задан"""
+        mock_moderation_service.classifier_path = None
+
+        await handlers.reload_model_command(mock_telegram_message)
+
+        mock_moderation_service.load_classifier.assert_not_awaited()
+        assert "SPAM_MODEL_PATH" in mock_telegram_message.reply.call_args[0][0]
+
+
 class TestBotStatusCommand:
     @pytest.mark.asyncio
     async def test_bot_status_command(self, handlers, mock_telegram_message, mock_moderation_service):
@@ -429,6 +838,31 @@ class TestBotStatusCommand:
                 assert "3" in args  # warnings limit
                 assert "2" in args  # forbidden words count
 
+    @pytest.mark.asyncio
+    async def test_bot_status_command_rule_stats(self, handlers, mock_telegram_message, mock_moderation_service):
+        """Статус бота показывает частые срабатывания, правила без срабатываний и время поиска"""
+        mock_moderation_service.get_rule_stats.return_value = {
+            "top_rules": [("спам", 12), ("казино", 3)],
+            "dead_rules": [f"слово_{i}" for i in range(12)],
+            "check_count": 100,
+            "average_match_time": 0.00125,
+        }
+
+        with patch("application.settings.get_config") as mock_get_config_settings:
+            with patch("interfaces.telegram.decorators.get_user_role", return_value="admin"):
+                mock_get_config_settings.return_value = Mock(environment="test")
+
+                await handlers.bot_status_command(mock_telegram_message)
+
+        mock_moderation_service.get_rule_stats.assert_awaited_once_with(456)
+        args = mock_telegram_message.reply.call_args[0][0]
+        assert "• спам: 12" in args
+        assert "• казино: 3" in args
+        assert "1.25 мс" in args
+        assert "слово\\_9" in args
+        assert "слово\\_10" not in args
+        assert "и еще 2" in args
+
 
 class TestKickCommand:
     @pytest.mark.asyncio
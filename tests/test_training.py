@@ -0,0 +1,142 @@
+"""
+Тесты для обучения классификатора спама
+"""
+
+from datetime import datetime
+from random import Random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from application.matching.classifier import SpamClassifier
+from application.matching.training import SpamTrainer
+from domain.entities.message import Message
+from application.services.moderation_service import CLASSIFIED_SPAM, DUPLICATE_SPAM
+from train_model import is_training_spam, iter_labeled, main, parse_args, train
+
+SPAM = ["казино бонус за регистрацию", "заработок без вложений пиши в лс", "лучшее казино бонус каждый день"]
+CLEAN = ["привет как дела", "кто идет на встречу завтра", "спасибо за помощь с задачей"]
+
+
+class FakeMessageRepository:
+    """Репозиторий, отдающий нарушения и выборку чистых сообщений пачками, как серверный курсор"""
+
+    def __init__(self, messages):
+        self.messages = [m for m in messages if m.contains_violations]
+        self.samples = [m for m in messages if not m.contains_violations]
+        self.chunk_sizes = []
+
+    async def iter_messages(self, chunk_size=1000):
+        self.chunk_sizes.append(chunk_size)
+        for start in range(0, len(self.messages), chunk_size):
+            yield self.messages[start : start + chunk_size]
+
+    async def iter_training_samples(self, chunk_size=1000):
+        for start in range(0, len(self.samples), chunk_size):
+            yield self.samples[start : start + chunk_size]
+
+
+def make_message(number, text, violation_words=()):
+    return Message(
+        message_id=number,
+        user_id=1,
+        chat_id=1,
+        text=text,
+        timestamp=datetime.utcnow(),
+        contains_violations=bool(violation_words),
+        violation_words=list(violation_words),
+    )
+
+
+def make_messages():
+    texts = [(text, ["казино"]) for text in SPAM] + [(text, []) for text in CLEAN]
+    return [make_message(number, text, violation_words) for number, (text, violation_words) in enumerate(texts * 10)]
+
+
+def test_trainer_learns_separable_texts():
+    """Тест того, что несколько проходов по пачкам разделяют спам и обычные сообщения"""
+    trainer = SpamTrainer(num_features=1 << 12)
+    for _ in range(30):
+        trainer.partial_fit(SPAM + CLEAN, [True] * 3 + [False] * 3, threshold=0.5)
+
+    classifier = trainer.classifier(threshold=0.5)
+    assert classifier.predict(["казино бонус", "как дела"]) == [True, False]
+    assert trainer.stats.messages == 180
+    assert trainer.stats.spam == 90
+    assert trainer.stats.recall > 0.5
+    assert trainer.stats.precision > 0.5
+
+
+def test_trainer_rejects_invalid_num_features():
+    """Тест отказа от числа корзин, не являющегося степенью двойки"""
+    with pytest.raises(ValueError):
+        SpamTrainer(num_features=1000)
+
+
+@pytest.mark.asyncio
+async def test_train_streams_repository(tmp_path):
+    """Тест обучения потоком по репозиторию на каждой эпохе и записи модели, которую загружает бот"""
+    repository = FakeMessageRepository(make_messages())
+    args = parse_args([str(tmp_path / "spam.model"), "--epochs", "20", "--chunk-size", "7", "--num-features", "4096"])
+
+    trainer = await train(args, repository)
+    trainer.save(args.output, threshold=0.5)
+
+    assert repository.chunk_sizes == [7] * 20
+    assert SpamClassifier.load(args.output).predict(["казино бонус", "как дела"]) == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_train_requires_both_classes():
+    """Тест ошибки, если в таблице нет чистых сообщений"""
+    repository = FakeMessageRepository([m for m in make_messages() if m.contains_violations])
+    with pytest.raises(ValueError):
+        await train(parse_args(["spam.model", "--epochs", "1"]), repository)
+
+
+@pytest.mark.asyncio
+async def test_train_skips_heuristic_violations():
+    """Тест того, что примерами спама служат только нарушения по словарям, шаблонам и ссылкам"""
+    assert is_training_spam(["казино"])
+    assert is_training_spam([CLASSIFIED_SPAM, "казино"])
+    assert not is_training_spam([CLASSIFIED_SPAM])
+    assert not is_training_spam([DUPLICATE_SPAM, "капс"])
+
+    messages = make_messages() + [make_message(100, "обычное сообщение", [CLASSIFIED_SPAM])]
+    batches = [
+        batch async for batch in iter_labeled(FakeMessageRepository(messages), chunk_size=4, clean_sample=1.0, sampler=Random(0))
+    ]
+
+    labeled = [pair for batch in batches for pair in batch]
+    assert ("обычное сообщение", True) not in labeled
+    assert sum(is_spam for _, is_spam in labeled) == 30
+    assert len(labeled) == 60
+
+
+@pytest.mark.asyncio
+async def test_main(tmp_path):
+    """Тест запуска из командной строки: модель записывается, соединения с БД закрываются"""
+    output = tmp_path / "spam.model"
+    with (
+        patch("train_model.SQLAlchemyMessageRepository", return_value=FakeMessageRepository(make_messages())),
+        patch("train_model.get_session_manager") as mock_session_manager,
+        patch("train_model.load_dotenv"),
+    ):
+        mock_session_manager.return_value.close = AsyncMock()
+        await main([str(output), "--epochs", "2", "--num-features", "1024"])
+
+    assert SpamClassifier.load(str(output)).num_features == 1024
+    mock_session_manager.return_value.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_main_error_exits():
+    """Тест завершения с ошибкой, если обучить модель не удалось"""
+    with (
+        patch("train_model.SQLAlchemyMessageRepository", return_value=FakeMessageRepository([])),
+        patch("train_model.get_session_manager") as mock_session_manager,
+        patch("train_model.load_dotenv"),
+    ):
+        mock_session_manager.return_value.close = AsyncMock()
+        with pytest.raises(SystemExit):
+            await main(["spam.model", "--epochs", "1"])